@@ -12,6 +12,7 @@ commands are provided by the claude-colab plugin from this repo's marketplace.
 import json
 import re
 import subprocess
+import sys
 from pathlib import Path
 
 
@@ -77,6 +78,24 @@ def update_marketplace_version(version):
         print(f"  ✓ Updated marketplace.json version to {version}")
 
 
+def check_context_budget():
+    """Check the estimated context footprint of skills, agents and commands."""
+    sys.path.insert(0, "src/plugin/scripts")
+    from context_footprint import format_table, measure_plugin
+
+    results = measure_plugin(Path("src/plugin"))
+    over = [r for r in results if r["over_budget"]]
+    if over:
+        print(format_table(results))
+        names = ", ".join(f"{r['kind']} {r['name']}" for r in over)
+        print(f"\n✗ Over context budget: {names}")
+        print("  Move detail into lazily-loaded files (context_footprint.py split)")
+        return False
+    total = sum(r["total_tokens"] for r in results)
+    print(f"  ✓ Context footprint within budget (~{total} tokens across {len(results)} components)")
+    return True
+
+
 def build_notebook():
     """Build the final notebook from template."""
     version = get_version()
@@ -89,11 +108,19 @@ def build_notebook():
     update_plugin_version(version)
     update_marketplace_version(version)
 
+    if not check_context_budget():
+        sys.exit(1)
+
     # Read template
     template_path = Path("src/bootstrap_template.ipynb")
     with open(template_path, "r") as f:
         notebook = json.load(f)
 
+    # Scripts the notebook needs before the plugin is installed, as Python literals
+    dep_cache_source = Path("src/plugin/scripts/dep_cache.py").read_text()
+    runtime_probe_source = Path("src/plugin/scripts/runtime_probe.py").read_text()
+    package_inventory_source = Path("src/plugin/scripts/package_inventory.py").read_text()
+
     # Replace placeholders in notebook cells
     for cell in notebook["cells"]:
         if cell["cell_type"] == "code":
@@ -103,6 +130,9 @@ def build_notebook():
             # Replace placeholders
             source = source.replace("{{BOOTSTRAP_VERSION}}", version)
             source = source.replace("{{GITHUB_REPO}}", github_repo)
+            source = source.replace("{{DEP_CACHE_SCRIPT}}", repr(dep_cache_source))
+            source = source.replace("{{RUNTIME_PROBE_SCRIPT}}", repr(runtime_probe_source))
+            source = source.replace("{{PACKAGE_INVENTORY_SCRIPT}}", repr(package_inventory_source))
 
             # Convert back to list format
             lines = source.split("\n")
@@ -0,0 +1,165 @@
+"""
+Shared Colab environment helpers for the claude-colab plugin scripts.
+
+Only the standard library is imported here so every hook and command
+script can use these helpers without slowing down its startup.
+"""
+
+import contextlib
+import fcntl
+import json
+import os
+from pathlib import Path
+
+CONTENT_ROOT = Path("/content")
+DRIVE_ROOTS = (Path("/content/drive/My Drive"), Path("/content/drive/MyDrive"))
+WORKSPACE_ROOTS = (
+    Path("/content/claude-workspaces"),
+    Path("/content/drive/My Drive/claude-workspaces"),
+)
+
+# Local, per-runtime state (samplers, logs, caches). Never on Drive.
+STATE_DIR = Path(os.environ.get("CLAUDE_COLAB_STATE_DIR", "~/.cache/claude-colab")).expanduser()
+
+SIZE_UNITS = {"": 1, "K": 2**10, "M": 2**20, "G": 2**30, "T": 2**40}
+
+
+def in_colab():
+    """Return True when running inside a Colab runtime."""
+    return CONTENT_ROOT.exists() and bool(os.environ.get("COLAB_RELEASE_TAG"))
+
+
+def drive_root():
+    """Return the mounted Google Drive root, or None if Drive is not mounted."""
+    for root in DRIVE_ROOTS:
+        if root.exists():
+            return root
+    return None
+
+
+def find_workspaces():
+    """List every workspace directory created by the bootstrap notebook."""
+    workspaces = []
+    for root in WORKSPACE_ROOTS:
+        try:
+            entries = sorted(root.iterdir())
+        except OSError:
+            continue
+        # Dot-directories hold tool state, not projects
+        workspaces.extend(
+            entry for entry in entries if entry.is_dir() and not entry.name.startswith(".")
+        )
+    return workspaces
+
+
+def current_workspace(start=None):
+    """
+    Find the workspace containing `start` (default: cwd).
+
+    A workspace is identified by the ENVIRONMENT.json written by the notebook.
+    Falls back to the first known workspace, then to `start` itself.
+    """
+    start = Path(start or os.getcwd()).resolve()
+    for candidate in (start, *start.parents):
+        if (candidate / "ENVIRONMENT.json").is_file():
+            return candidate
+    workspaces = find_workspaces()
+    return workspaces[0] if workspaces else start
+
+
+def read_json(path, default=None):
+    """Read a JSON file, returning `default` if it is missing or invalid."""
+    try:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return default
+
+
+def parse_size(text, default_unit=""):
+    """Parse "20G", "500MB" or a plain number (in `default_unit`) into bytes."""
+    text = str(text).strip().upper()
+    if text.endswith("B"):
+        text = text[:-1]
+    unit = text[-1] if text and text[-1] in SIZE_UNITS else ""
+    try:
+        return int(float(text[: len(text) - len(unit)]) * SIZE_UNITS[unit or default_unit])
+    except ValueError:
+        raise ValueError(f"invalid size {text!r} (e.g. 500M, 2G)")
+
+
+def state_path(*parts):
+    """Return a path inside STATE_DIR, creating parent directories."""
+    path = STATE_DIR.joinpath(*parts)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    return path
+
+
+def boot_id():
+    """Identifier of the current boot (distinguishes pids from an earlier runtime)."""
+    try:
+        with open("/proc/sys/kernel/random/boot_id") as f:
+            return f.read().strip()
+    except OSError:
+        return None
+
+
+def pid_running(pid):
+    """Whether `pid` exists and has not exited (zombies count as exited)."""
+    try:
+        with open(f"/proc/{pid}/stat") as f:
+            return f.read().rsplit(")", 1)[1].split()[0] != "Z"
+    except OSError:
+        return False
+    except IndexError:
+        return True
+
+
+def read_pid(pid_file):
+    """Return the pid stored in `pid_file` if that process is alive, else None."""
+    try:
+        pid = int(Path(pid_file).read_text().strip())
+    except (OSError, ValueError):
+        return None
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return None
+    except PermissionError:
+        pass
+    return pid
+
+
+@contextlib.contextmanager
+def hold_pid_file(pid_file):
+    """
+    Lock `pid_file` and write this process's pid to it for the duration.
+
+    Yields False, leaving the file alone, if another process holds it: of
+    two background processes started at once, only one gets to run. The
+    lock is released when the process exits, even if it is killed.
+    """
+    while True:
+        fd = os.open(pid_file, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            os.close(fd)
+            yield False
+            return
+        # The previous holder may have removed the file between our open and flock
+        try:
+            if os.stat(pid_file).st_ino == os.fstat(fd).st_ino:
+                break
+        except FileNotFoundError:
+            pass
+        os.close(fd)
+    try:
+        os.ftruncate(fd, 0)
+        os.write(fd, str(os.getpid()).encode())
+        yield True
+    finally:
+        # Removed while still locked, so a waiter on this file retries with a new one
+        with contextlib.suppress(OSError):
+            os.unlink(pid_file)
+        os.close(fd)
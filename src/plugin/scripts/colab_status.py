@@ -0,0 +1,287 @@
+#!/usr/bin/env python3
+"""
+Colab status report for the /claude-colab:colab-status command.
+
+Collects GPU, Drive, workspace, Claude Code, plugin and package state concurrently
+and prints a single compact JSON document. Every collector shares one time
+budget; collectors that have not finished in time are reported as timed out
+instead of delaying the command.
+
+Usage:
+    colab_status.py [--budget SECONDS] [--summary]
+"""
+
+import argparse
+import json
+import os
+import shutil
+import subprocess
+import sys
+import threading
+import time
+from pathlib import Path
+
+import package_inventory
+from colab_env import current_workspace, drive_root, find_workspaces, in_colab, read_json
+from workspace_index import FileIndex
+
+DEFAULT_BUDGET = 3.0
+
+# Keys copied from ENVIRONMENT.json into the report
+ENVIRONMENT_KEYS = (
+    "project_name",
+    "project_type",
+    "storage_mode",
+    "python_version",
+    "bootstrap_version",
+)
+
+
+def _run(cmd, timeout):
+    """Run a command and return its stripped stdout, or None on any failure."""
+    try:
+        result = subprocess.run(cmd, capture_output=True, text=True, timeout=timeout)
+    except (OSError, subprocess.TimeoutExpired):
+        return None
+    if result.returncode != 0:
+        return None
+    return result.stdout.strip()
+
+
+def _disk(path):
+    """Return free/total space in GB for the filesystem holding `path`."""
+    try:
+        usage = shutil.disk_usage(path)
+    except OSError:
+        return None
+    return {"free_gb": round(usage.free / 1e9, 1), "total_gb": round(usage.total / 1e9, 1)}
+
+
+def collect_gpu(budget):
+    """Query GPUs through nvidia-smi (avoids importing torch)."""
+    if not shutil.which("nvidia-smi"):
+        return {"available": False}
+    output = _run(
+        [
+            "nvidia-smi",
+            "--query-gpu=name,memory.total,memory.used,utilization.gpu",
+            "--format=csv,noheader,nounits",
+        ],
+        budget,
+    )
+    if not output:
+        return {"available": False}
+    devices = []
+    for line in output.splitlines():
+        fields = [field.strip() for field in line.split(",")]
+        if len(fields) != 4:
+            continue
+        name, total, used, util = fields
+        try:
+            devices.append(
+                {
+                    "name": name,
+                    "memory_total_gb": round(int(total) / 1024, 1),
+                    "memory_used_gb": round(int(used) / 1024, 1),
+                    "utilization_pct": int(util),
+                }
+            )
+        except ValueError:
+            devices.append({"name": name})
+    return {"available": bool(devices), "devices": devices}
+
+
+def collect_drive(budget):
+    """Report whether Google Drive is mounted and how much space is left."""
+    root = drive_root()
+    if root is None:
+        return {"mounted": False}
+    return {"mounted": True, "root": str(root), "disk": _disk(root)}
+
+
+def collect_workspace(budget):
+    """Report the current workspace and the key fields of its ENVIRONMENT.json."""
+    workspace = current_workspace()
+    env = read_json(workspace / "ENVIRONMENT.json", default={}) or {}
+    report = {
+        "path": str(workspace),
+        "environment": {key: env[key] for key in ENVIRONMENT_KEYS if key in env},
+        "workspaces": [ws.name for ws in find_workspaces()],
+        "local_disk": _disk("/content" if Path("/content").exists() else workspace),
+    }
+    # Measured by runtime_probe.py in the notebook's step 6
+    recommended = (env.get("runtime") or {}).get("recommended")
+    if recommended:
+        report["recommended"] = recommended
+    # File counts come from the persistent index; walking Drive here would blow the budget
+    index = FileIndex.load(workspace)
+    if index.reconciled_at is not None:
+        report["index"] = index.summary()
+    return report
+
+
+def collect_claude(budget):
+    """Locate the claude binary and report its version."""
+    path = shutil.which("claude")
+    if not path:
+        candidate = Path("~/.local/bin/claude").expanduser()
+        path = str(candidate) if candidate.exists() else None
+    if not path:
+        return {"installed": False}
+    return {"installed": True, "path": path, "version": _run([path, "--version"], budget)}
+
+
+def collect_plugins(budget):
+    """Read enabled plugins and marketplaces from ~/.claude/settings.json."""
+    settings = read_json(Path("~/.claude/settings.json").expanduser(), default={}) or {}
+    enabled = settings.get("enabledPlugins", {})
+    if isinstance(enabled, dict):
+        enabled = [name for name, on in enabled.items() if on]
+    report = {
+        "enabled": enabled,
+        "marketplaces": sorted(settings.get("extraKnownMarketplaces", {})),
+    }
+    plugin_root = os.environ.get("CLAUDE_PLUGIN_ROOT")
+    if plugin_root:
+        manifest = read_json(Path(plugin_root) / ".claude-plugin" / "plugin.json", default={})
+        report["claude_colab_version"] = (manifest or {}).get("version")
+    return report
+
+
+def collect_packages(budget):
+    """Package count and key versions from the cached inventory (no `pip list`)."""
+    return package_inventory.summary()
+
+
+COLLECTORS = {
+    "gpu": collect_gpu,
+    "drive": collect_drive,
+    "workspace": collect_workspace,
+    "claude": collect_claude,
+    "plugins": collect_plugins,
+    "packages": collect_packages,
+}
+
+
+def collect_status(budget=DEFAULT_BUDGET, collectors=None):
+    """
+    Run all collectors concurrently within `budget` seconds.
+
+    Collectors run on daemon threads so a hung filesystem call can never
+    keep the process alive past the budget.
+    """
+    collectors = collectors or COLLECTORS
+    results = {}
+    started = time.monotonic()
+
+    def run(name, collector):
+        try:
+            results[name] = collector(budget)
+        except Exception as e:
+            results[name] = {"error": str(e)}
+
+    threads = [
+        threading.Thread(target=run, args=(name, collector), daemon=True)
+        for name, collector in collectors.items()
+    ]
+    for thread in threads:
+        thread.start()
+    deadline = started + budget
+    for thread in threads:
+        thread.join(max(0.0, deadline - time.monotonic()))
+
+    status = {"in_colab": in_colab()}
+    timed_out = []
+    for name in collectors:
+        if name in results:
+            status[name] = results[name]
+        else:
+            status[name] = {"error": "timed out"}
+            timed_out.append(name)
+    status["elapsed_ms"] = int((time.monotonic() - started) * 1000)
+    if timed_out:
+        status["timed_out"] = timed_out
+    return status
+
+
+def format_summary(status):
+    """Render a status document as a few human-readable lines."""
+    lines = []
+
+    gpu = status.get("gpu", {})
+    if gpu.get("devices"):
+        for device in gpu["devices"]:
+            lines.append(
+                f"GPU: {device.get('name')} "
+                f"({device.get('memory_used_gb', '?')}/{device.get('memory_total_gb', '?')}GB used)"
+            )
+    else:
+        lines.append(f"GPU: {gpu.get('error', 'none')}")
+
+    drive = status.get("drive", {})
+    if drive.get("mounted"):
+        disk = drive.get("disk") or {}
+        lines.append(f"Drive: mounted at {drive['root']} ({disk.get('free_gb', '?')}GB free)")
+    else:
+        lines.append(f"Drive: {drive.get('error', 'not mounted')}")
+
+    workspace = status.get("workspace", {})
+    if "path" in workspace:
+        env = workspace.get("environment", {})
+        mode = env.get("storage_mode", "unknown")
+        lines.append(f"Workspace: {workspace['path']} ({mode})")
+        if "index" in workspace:
+            index = workspace["index"]
+            lines.append(f"  Files: {index['files']} ({index['total_mb']} MB, from index)")
+        if "recommended" in workspace:
+            settings = ", ".join(f"{k}={v}" for k, v in workspace["recommended"].items())
+            lines.append(f"  Recommended: {settings}")
+    else:
+        lines.append(f"Workspace: {workspace.get('error', 'unknown')}")
+
+    claude = status.get("claude", {})
+    if claude.get("installed"):
+        lines.append(f"Claude Code: {claude.get('version') or 'unknown version'}")
+    else:
+        lines.append(f"Claude Code: {claude.get('error', 'not installed')}")
+
+    plugins = status.get("plugins", {})
+    if "enabled" in plugins:
+        lines.append(f"Plugins: {', '.join(plugins['enabled']) or 'none'}")
+    else:
+        lines.append(f"Plugins: {plugins.get('error', 'unknown')}")
+
+    packages = status.get("packages", {})
+    if "count" in packages:
+        key = ", ".join(f"{name} {version}" for name, version in packages["key"].items())
+        lines.append(f"Packages: {packages['count']} installed" + (f" ({key})" if key else ""))
+    else:
+        lines.append(f"Packages: {packages.get('error', 'unknown')}")
+
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    """Main command entry point."""
+    parser = argparse.ArgumentParser(description="Report Colab environment status as JSON.")
+    parser.add_argument(
+        "--budget",
+        type=float,
+        default=DEFAULT_BUDGET,
+        help=f"Total time budget in seconds (default: {DEFAULT_BUDGET})",
+    )
+    parser.add_argument(
+        "--summary", action="store_true", help="Print a human-readable summary instead of JSON"
+    )
+    args = parser.parse_args(argv)
+
+    status = collect_status(args.budget)
+    if args.summary:
+        print(format_summary(status))
+    else:
+        print(json.dumps(status, separators=(",", ":")))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
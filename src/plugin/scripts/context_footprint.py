@@ -0,0 +1,273 @@
+#!/usr/bin/env python3
+"""
+Context-footprint analyzer for skills, agents and commands.
+
+Estimates how many context tokens each plugin component costs when it is
+loaded, including files it pulls in eagerly with `@path` imports. Files that
+are only linked (`[title](reference/x.md)`) or mentioned by path are lazy:
+they are reported but don't count toward the budget, because Claude reads
+them only when needed.
+
+`split` moves the largest `##` sections of an oversized SKILL.md into
+`reference/*.md` files and leaves a short core with an index of them.
+
+Usage:
+    context_footprint.py measure [PLUGIN_DIR] [--check] [--json]
+    context_footprint.py split SKILL_DIR [--max-tokens N] [--write] [--force]
+
+Token counts are estimates (about 4 characters per token).
+"""
+
+import argparse
+import json
+import os
+import re
+import sys
+from pathlib import Path
+
+CHARS_PER_TOKEN = 4
+
+# Default per-component budgets in estimated tokens (core + eager imports)
+BUDGETS = {"skill": 4000, "agent": 4000, "command": 1500}
+
+# Sections never moved out of a skill's core by `split`
+KEEP_SECTIONS = {"when to use", "quick reference", "documentation references", "reference files"}
+
+EAGER_REF = re.compile(r"(?<![\w`/])@([\w./-]+\.md)\b")
+LAZY_LINK = re.compile(r"\]\(([^)\s#]+\.md)\)")
+LAZY_PATH = re.compile(r"`([\w./-]+\.md)`")
+FENCE = re.compile(r"^\s*(```|~~~)")
+
+
+def estimate_tokens(text):
+    """Estimate the token count of `text`."""
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+
+def strip_code(text):
+    """Remove fenced code blocks (examples there are not real references)."""
+    lines = []
+    in_fence = False
+    for line in text.splitlines():
+        if FENCE.match(line):
+            in_fence = not in_fence
+            continue
+        if not in_fence:
+            lines.append(line)
+    return "\n".join(lines)
+
+
+def default_plugin_dir():
+    """The plugin root: $CLAUDE_PLUGIN_ROOT or this script's plugin."""
+    return Path(os.environ.get("CLAUDE_PLUGIN_ROOT") or Path(__file__).resolve().parent.parent)
+
+
+def resolve_reference(ref, base_dir, search_dirs):
+    """Resolve a referenced path against the file's dir and the search dirs."""
+    for directory in (base_dir, *search_dirs):
+        candidate = (directory / ref).resolve()
+        if candidate.is_file():
+            return candidate
+    return None
+
+
+def measure_file(path, kind, search_dirs):
+    """Measure one component file and the files it references."""
+    text = path.read_text(encoding="utf-8")
+    prose = strip_code(text)
+    result = {
+        "kind": kind,
+        "name": path.parent.name if path.name == "SKILL.md" else path.stem,
+        "path": str(path),
+        "core_tokens": estimate_tokens(text),
+        "eager": [],
+        "lazy": [],
+        "unresolved": [],
+    }
+    lazy_refs = set(LAZY_LINK.findall(prose)) | set(LAZY_PATH.findall(prose))
+    for ref_kind, refs in (("eager", set(EAGER_REF.findall(prose))), ("lazy", lazy_refs)):
+        for ref in sorted(refs):
+            resolved = resolve_reference(ref, path.parent, search_dirs)
+            if resolved is None:
+                if ref_kind == "eager":
+                    result["unresolved"].append(ref)
+                continue
+            tokens = estimate_tokens(resolved.read_text(encoding="utf-8"))
+            result[ref_kind].append({"ref": ref, "tokens": tokens})
+    result["eager_tokens"] = sum(ref["tokens"] for ref in result["eager"])
+    result["lazy_tokens"] = sum(ref["tokens"] for ref in result["lazy"])
+    result["total_tokens"] = result["core_tokens"] + result["eager_tokens"]
+    return result
+
+
+def measure_plugin(plugin_dir, budgets=None):
+    """Measure every skill, agent and command in a plugin directory."""
+    plugin_dir = Path(plugin_dir)
+    budgets = {**BUDGETS, **(budgets or {})}
+    search_dirs = [plugin_dir, plugin_dir.parent, Path.cwd()]
+    components = [
+        *(("skill", p) for p in sorted(plugin_dir.glob("skills/*/SKILL.md"))),
+        *(("agent", p) for p in sorted(plugin_dir.glob("agents/*.md"))),
+        *(("command", p) for p in sorted(plugin_dir.glob("commands/*.md"))),
+    ]
+    results = []
+    for kind, path in components:
+        result = measure_file(path, kind, search_dirs)
+        result["budget"] = budgets[kind]
+        result["over_budget"] = result["total_tokens"] > result["budget"]
+        results.append(result)
+    return results
+
+
+def format_table(results):
+    """Render measure results as a table."""
+    lines = [f"{'kind':<8} {'name':<20} {'core':>6} {'eager':>7} {'lazy':>7} {'budget':>7}  status"]
+    for r in results:
+        status = "OVER" if r["over_budget"] else "ok"
+        if r["unresolved"]:
+            status += f" (unresolved: {', '.join(r['unresolved'])})"
+        lines.append(
+            f"{r['kind']:<8} {r['name'][:20]:<20} {r['core_tokens']:>6} {r['eager_tokens']:>7} "
+            f"{r['lazy_tokens']:>7} {r['budget']:>7}  {status}"
+        )
+    total = sum(r["total_tokens"] for r in results)
+    lines.append(f"Total loaded if every component triggers: ~{total} tokens")
+    return "\n".join(lines)
+
+
+def split_sections(text):
+    """Split markdown into (intro, [(title, section_text)]) on `## ` headings outside code."""
+    intro = []
+    sections = []
+    in_fence = False
+    for line in text.splitlines(keepends=True):
+        if FENCE.match(line):
+            in_fence = not in_fence
+        if not in_fence and line.startswith("## "):
+            sections.append([line[3:].strip(), [line]])
+        elif sections:
+            sections[-1][1].append(line)
+        else:
+            intro.append(line)
+    return "".join(intro), [(title, "".join(body)) for title, body in sections]
+
+
+def slugify(title):
+    """Turn a section title into a file name stem."""
+    return re.sub(r"[^a-z0-9]+", "-", title.lower()).strip("-") or "section"
+
+
+def plan_split(text, max_tokens):
+    """
+    Decide which sections to move out so the core fits in `max_tokens`.
+
+    Returns (core_text, {filename: content}). Sections are moved largest
+    first; the intro and KEEP_SECTIONS always stay in the core.
+    """
+    intro, sections = split_sections(text)
+    movable = sorted(
+        (i for i, (title, _) in enumerate(sections) if title.lower() not in KEEP_SECTIONS),
+        key=lambda i: -estimate_tokens(sections[i][1]),
+    )
+    moved = set()
+
+    def build_core():
+        kept = "".join(body for i, (_, body) in enumerate(sections) if i not in moved)
+        if not moved:
+            return intro + kept
+        index = [
+            "## Reference Files\n",
+            "\n",
+            "Read these only when the task needs them:\n",
+        ]
+        for i in sorted(moved):
+            title, body = sections[i]
+            index.append(
+                f"- [{title}](reference/{slugify(title)}.md) (~{estimate_tokens(body)} tokens)\n"
+            )
+        return intro + kept.rstrip("\n") + "\n\n" + "".join(index)
+
+    for i in movable:
+        if estimate_tokens(build_core()) <= max_tokens:
+            break
+        moved.add(i)
+
+    files = {}
+    for i in sorted(moved):
+        title, body = sections[i]
+        files[f"{slugify(title)}.md"] = "# " + body[3:].rstrip("\n") + "\n"
+    return build_core(), files
+
+
+def split_skill(skill_dir, max_tokens, write=False, force=False):
+    """Plan (and optionally apply) a split of `skill_dir`/SKILL.md."""
+    skill_dir = Path(skill_dir)
+    skill_md = skill_dir / "SKILL.md"
+    text = skill_md.read_text(encoding="utf-8")
+    core, files = plan_split(text, max_tokens)
+    reference_dir = skill_dir / "reference"
+    if write and files:
+        existing = [name for name in files if (reference_dir / name).exists()]
+        if existing and not force:
+            raise FileExistsError(f"reference files exist: {', '.join(existing)} (use --force)")
+        reference_dir.mkdir(exist_ok=True)
+        for name, content in files.items():
+            (reference_dir / name).write_text(content, encoding="utf-8")
+        skill_md.write_text(core, encoding="utf-8")
+    return {
+        "before_tokens": estimate_tokens(text),
+        "core_tokens": estimate_tokens(core),
+        "moved": {name: estimate_tokens(content) for name, content in files.items()},
+        "written": write and bool(files),
+    }
+
+
+def main(argv=None):
+    """Command entry point."""
+    parser = argparse.ArgumentParser(description="Measure and reduce plugin context footprint.")
+    sub = parser.add_subparsers(dest="action", required=True)
+
+    p = sub.add_parser("measure", help="Estimate tokens per skill, agent and command")
+    p.add_argument("plugin_dir", nargs="?", help="Plugin root (default: this plugin)")
+    p.add_argument("--check", action="store_true", help="Exit 1 if any component is over budget")
+    p.add_argument("--json", action="store_true")
+    for kind, budget in BUDGETS.items():
+        p.add_argument(f"--{kind}-budget", type=int, default=budget)
+
+    p = sub.add_parser("split", help="Move large sections of a SKILL.md into reference files")
+    p.add_argument("skill_dir")
+    p.add_argument("--max-tokens", type=int, default=BUDGETS["skill"] // 2)
+    p.add_argument("--write", action="store_true", help="Apply the split (default: dry run)")
+    p.add_argument("--force", action="store_true", help="Overwrite existing reference files")
+
+    args = parser.parse_args(argv)
+
+    if args.action == "measure":
+        budgets = {kind: getattr(args, f"{kind}_budget") for kind in BUDGETS}
+        results = measure_plugin(args.plugin_dir or default_plugin_dir(), budgets)
+        if args.json:
+            print(json.dumps(results, indent=1))
+        else:
+            print(format_table(results))
+        if args.check and any(r["over_budget"] for r in results):
+            return 1
+        return 0
+
+    try:
+        result = split_skill(args.skill_dir, args.max_tokens, args.write, args.force)
+    except (OSError, FileExistsError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+    if not result["moved"]:
+        print(f"SKILL.md is ~{result['before_tokens']} tokens; nothing to split")
+        return 0
+    print(f"SKILL.md: ~{result['before_tokens']} → ~{result['core_tokens']} tokens in core")
+    for name, tokens in result["moved"].items():
+        print(f"  reference/{name} (~{tokens} tokens)")
+    if not result["written"]:
+        print("Dry run - re-run with --write to apply")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,324 @@
+#!/usr/bin/env python3
+"""
+Local-disk cache for dataset files on Google Drive.
+
+Reading training data straight from /content/drive is limited by the FUSE
+mount. This cache copies files to local disk on first use and returns the
+local path from then on, so later epochs, runs and processes read at
+local-disk speed.
+
+- A cached copy is used only while the source's size and mtime still match
+  what was copied; otherwise it is copied again.
+- The cache stays under a quota by evicting least-recently-used files.
+  Files larger than the quota are read from the source.
+- `prefetch` copies many files (or whole directories) in parallel.
+
+The index is a SQLite database in the cache directory, so DataLoader worker
+processes can share one cache safely. It needs only the standard library
+and colab_env.py; copy both next to training code to use it elsewhere.
+
+Python API:
+    from data_cache import cached_path, DataCache
+
+    path = cached_path("/content/drive/MyDrive/data/train-000.parquet")
+    DataCache(quota="30G").prefetch(["/content/drive/MyDrive/data"], jobs=16)
+
+Settings: CLAUDE_COLAB_DATA_CACHE (directory, default /content/.data-cache)
+and CLAUDE_COLAB_DATA_CACHE_QUOTA (default 20G).
+
+Usage:
+    data_cache.py prefetch PATH... [--glob PATTERN] [--jobs N]
+    data_cache.py get PATH
+    data_cache.py status [--json]     # also with no arguments
+    data_cache.py evict [--to SIZE]
+    data_cache.py clear
+"""
+
+import argparse
+import fnmatch
+import json
+import os
+import shutil
+import sqlite3
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from colab_env import parse_size
+
+DEFAULT_CACHE_DIR = "/content/.data-cache"
+DEFAULT_QUOTA = "20G"
+DB_NAME = "index.sqlite"
+DEFAULT_JOBS = 16
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    source TEXT PRIMARY KEY,
+    size INTEGER NOT NULL,
+    mtime REAL NOT NULL,
+    last_used REAL NOT NULL
+)
+"""
+
+
+class DataCache:
+    """An LRU cache of source files on local disk, bounded by `quota` bytes."""
+
+    def __init__(self, cache_dir=None, quota=None):
+        self.root = Path(
+            cache_dir or os.environ.get("CLAUDE_COLAB_DATA_CACHE") or DEFAULT_CACHE_DIR
+        )
+        quota = quota or os.environ.get("CLAUDE_COLAB_DATA_CACHE_QUOTA") or DEFAULT_QUOTA
+        self.quota = parse_size(quota) if isinstance(quota, str) else int(quota)
+        self.files = self.root / "files"
+        self.files.mkdir(parents=True, exist_ok=True)
+        self._local = threading.local()
+        # Bytes being copied right now, counted against the quota
+        self._reserved = 0
+        self._lock = threading.Lock()
+
+    @property
+    def db(self):
+        """Per-thread SQLite connection, reopened in a forked child (DataLoader workers)."""
+        # A connection must not be used across fork: its locks belong to the parent
+        if getattr(self._local, "pid", None) != os.getpid():
+            db = sqlite3.connect(self.root / DB_NAME, timeout=30, isolation_level=None)
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("PRAGMA synchronous=NORMAL")
+            db.execute(SCHEMA)
+            self._local.db, self._local.pid = db, os.getpid()
+        return self._local.db
+
+    def local_path(self, source):
+        """Where `source` is (or would be) cached."""
+        return self.files / os.path.abspath(source).lstrip("/")
+
+    def used(self):
+        """Bytes held by cached files."""
+        return self.db.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+
+    def lookup(self, source, st=None):
+        """Return the local path if a valid copy of `source` is cached, else None."""
+        source = os.path.abspath(source)
+        row = self.db.execute(
+            "SELECT size, mtime FROM entries WHERE source = ?", (source,)
+        ).fetchone()
+        if row is None:
+            return None
+        st = st or os.stat(source)
+        local = self.local_path(source)
+        try:
+            valid = (st.st_size, st.st_mtime) == row and os.path.getsize(local) == row[0]
+        except OSError:
+            valid = False
+        if not valid:
+            self._forget(source)
+            return None
+        self.db.execute("UPDATE entries SET last_used = ? WHERE source = ?", (time.time(), source))
+        return str(local)
+
+    def get(self, source):
+        """
+        Return a local path for `source`, copying it into the cache on a miss.
+
+        Falls back to `source` itself when it is larger than the quota.
+        """
+        source = os.path.abspath(source)
+        st = os.stat(source)
+        hit = self.lookup(source, st)
+        if hit:
+            return hit
+        if st.st_size > self.quota:
+            return source
+        return self._copy(source, st)
+
+    def _copy(self, source, st):
+        with self._lock:
+            self.evict(self.quota - st.st_size - self._reserved)
+            self._reserved += st.st_size
+        local = self.local_path(source)
+        try:
+            local.parent.mkdir(parents=True, exist_ok=True)
+            tmp = local.with_name(f".{local.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+            shutil.copyfile(source, tmp)
+            os.utime(tmp, (st.st_atime, st.st_mtime))
+            os.replace(tmp, local)
+            self.db.execute(
+                "INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?)",
+                (source, st.st_size, st.st_mtime, time.time()),
+            )
+        finally:
+            with self._lock:
+                self._reserved -= st.st_size
+        return str(local)
+
+    def _forget(self, source):
+        self.db.execute("DELETE FROM entries WHERE source = ?", (source,))
+        try:
+            os.unlink(self.local_path(source))
+        except FileNotFoundError:
+            pass
+
+    def evict(self, target):
+        """Evict least-recently-used files down to `target` bytes. Returns (files, bytes)."""
+        used = self.used()
+        count = freed = 0
+        if used <= target:
+            return count, freed
+        rows = self.db.execute("SELECT source, size FROM entries ORDER BY last_used").fetchall()
+        for source, size in rows:
+            if used - freed <= target:
+                break
+            # Readers that already opened the file keep reading it after unlink
+            self._forget(source)
+            count += 1
+            freed += size
+        return count, freed
+
+    def prefetch(self, paths, pattern=None, jobs=DEFAULT_JOBS, progress=None):
+        """
+        Copy files (directories are walked) into the cache in parallel.
+
+        Stops adding files once the batch would exceed the quota, so a
+        prefetch never evicts its own files. Returns counts and throughput.
+        """
+        sources = []
+        for path in paths:
+            if os.path.isdir(path):
+                for dirpath, dirnames, filenames in os.walk(path):
+                    dirnames.sort()
+                    for name in sorted(filenames):
+                        sources.append(os.path.join(dirpath, name))
+            else:
+                sources.append(path)
+        if pattern:
+            sources = [s for s in sources if fnmatch.fnmatch(os.path.basename(s), pattern)]
+
+        todo, hits, budget, skipped = [], 0, self.quota, []
+        for source in sources:
+            st = os.stat(source)
+            if self.lookup(source, st):
+                hits += 1
+                budget -= st.st_size
+            elif st.st_size <= budget:
+                todo.append((os.path.abspath(source), st))
+                budget -= st.st_size
+            else:
+                skipped.append(source)
+
+        started = time.monotonic()
+        done = {"files": 0, "bytes": 0}
+
+        def copy(item):
+            self._copy(*item)
+            with self._lock:
+                done["files"] += 1
+                done["bytes"] += item[1].st_size
+                if progress:
+                    progress(done["files"], len(todo), done["bytes"])
+
+        with ThreadPoolExecutor(max(1, jobs)) as pool:
+            for _ in pool.map(copy, todo):
+                pass
+        elapsed = time.monotonic() - started
+        return {
+            "copied": done["files"],
+            "copied_mb": round(done["bytes"] / 2**20, 1),
+            "hits": hits,
+            "skipped_over_quota": len(skipped),
+            "seconds": round(elapsed, 2),
+            "mb_per_s": round(done["bytes"] / 2**20 / max(elapsed, 1e-6), 1),
+        }
+
+    def status(self):
+        """Cache directory, quota, usage and entry count."""
+        count = self.db.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+        usage = shutil.disk_usage(self.root)
+        return {
+            "cache_dir": str(self.root),
+            "files": count,
+            "used_mb": round(self.used() / 2**20, 1),
+            "quota_mb": round(self.quota / 2**20, 1),
+            "disk_free_mb": round(usage.free / 2**20, 1),
+        }
+
+    def clear(self):
+        """Remove every cached file."""
+        self.db.execute("DELETE FROM entries")
+        shutil.rmtree(self.files, ignore_errors=True)
+        self.files.mkdir(parents=True, exist_ok=True)
+
+
+_default = None
+
+
+def cached_path(source):
+    """Local path for `source` using the default cache (see DataCache.get)."""
+    global _default
+    if _default is None:
+        _default = DataCache()
+    return _default.get(source)
+
+
+def main(argv=None):
+    """Command entry point."""
+    parser = argparse.ArgumentParser(description="Local-disk cache for Drive datasets.")
+    parser.add_argument("--cache-dir", help=f"Cache directory (default: {DEFAULT_CACHE_DIR})")
+    parser.add_argument("--quota", help=f"Maximum cache size (default: {DEFAULT_QUOTA})")
+    sub = parser.add_subparsers(dest="action", required=True)
+    p = sub.add_parser("prefetch", help="Copy files or directories into the cache")
+    p.add_argument("paths", nargs="+")
+    p.add_argument("--glob", help="Only files whose name matches, e.g. '*.parquet'")
+    p.add_argument("--jobs", type=int, default=DEFAULT_JOBS)
+    p = sub.add_parser("get", help="Print the local path for a file, caching it")
+    p.add_argument("path")
+    p = sub.add_parser("status", help="Show cache usage")
+    p.add_argument("--json", action="store_true")
+    p = sub.add_parser("evict", help="Evict least-recently-used files")
+    p.add_argument("--to", default="0", help="Target size (default: 0, empty the cache)")
+    sub.add_parser("clear", help="Delete all cached files")
+    # A bare /claude-colab:data-cache passes no arguments
+    args = parser.parse_args((sys.argv[1:] if argv is None else argv) or ["status"])
+
+    try:
+        cache = DataCache(args.cache_dir, args.quota)
+        if args.action == "prefetch":
+
+            def progress(done, total, nbytes):
+                if done % 50 == 0 or done == total:
+                    print(f"  {done}/{total} files, {nbytes / 2**20:.0f} MB", file=sys.stderr)
+
+            result = cache.prefetch(args.paths, args.glob, args.jobs, progress)
+            print(
+                f"✓ Copied {result['copied']} file(s) ({result['copied_mb']} MB, "
+                f"{result['mb_per_s']} MB/s); {result['hits']} already cached"
+            )
+            if result["skipped_over_quota"]:
+                print(f"⚠️ {result['skipped_over_quota']} file(s) did not fit the quota")
+        elif args.action == "get":
+            print(cache.get(args.path))
+        elif args.action == "status":
+            status = cache.status()
+            if args.json:
+                print(json.dumps(status))
+            else:
+                print(
+                    f"{status['files']} file(s), {status['used_mb']} / {status['quota_mb']} MB"
+                    f" in {status['cache_dir']} ({status['disk_free_mb']} MB free on disk)"
+                )
+        elif args.action == "evict":
+            count, freed = cache.evict(parse_size(args.to))
+            print(f"✓ Evicted {count} file(s) ({freed / 2**20:.1f} MB)")
+        elif args.action == "clear":
+            cache.clear()
+            print("✓ Cache cleared")
+    except (OSError, ValueError, sqlite3.Error) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
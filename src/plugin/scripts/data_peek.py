@@ -0,0 +1,604 @@
+#!/usr/bin/env python3
+"""
+Fast schema and sample peek for large CSV, TSV, JSONL and Parquet files.
+
+Running `head` or `pandas.read_csv` on a multi-GB file to learn its columns
+either floods the context or loads the whole file. This reads a bounded
+sample instead and prints one compact JSON document:
+
+- CSV/TSV/JSONL (optionally .gz): the first MB is parsed to infer the
+  delimiter, header, column types and per-column stats; the row count is
+  estimated from the average row length in probes of the start, middle and
+  end of the memory-mapped file (exact when the whole file fits the sample).
+- Parquet: the footer is decoded directly (Thrift compact protocol) for the
+  exact row count, schema, row groups, codecs and per-column min/max/null
+  statistics, without reading any data pages. Sample rows need pyarrow;
+  they are omitted without it.
+
+Time and memory are bounded by the sample size, not the file size.
+
+Usage:
+    data_peek.py FILE [--rows N] [--sample-bytes SIZE]
+"""
+
+import argparse
+import csv
+import datetime
+import gzip
+import io
+import json
+import mmap
+import os
+import re
+import struct
+import sys
+from collections import Counter
+
+SAMPLE_BYTES = 2**20
+SAMPLE_ROWS = 2000
+PROBE_BYTES = 256 * 2**10
+SAMPLE_VALUE_CHARS = 80
+TOP_VALUES = 3
+NULLS = {"", "na", "n/a", "nan", "null", "none", "nil", "-"}
+DATE = re.compile(r"^\d{4}-\d{2}-\d{2}$")
+DATETIME = re.compile(r"^\d{4}-\d{2}-\d{2}[ T]\d{2}:\d{2}(:\d{2}(\.\d+)?)?(Z|[+-]\d{2}:?\d{2})?$")
+INT = re.compile(r"^[+-]?\d+$")
+# Narrowest first: a column gets the first type every non-null value fits
+TYPE_ORDER = ("bool", "int", "float", "date", "datetime", "string")
+FITS = {
+    "bool": {"bool"},
+    "int": {"int"},
+    "float": {"int", "float"},
+    "date": {"date"},
+    "datetime": {"date", "datetime"},
+    "string": set(TYPE_ORDER),
+}
+
+
+class PeekError(Exception):
+    """Raised when a file cannot be read as the detected format."""
+
+
+def value_type(text):
+    """Type of one textual value (None for nulls)."""
+    stripped = text.strip()
+    lowered = stripped.lower()
+    if lowered in NULLS:
+        return None
+    if lowered in ("true", "false"):
+        return "bool"
+    if INT.match(stripped):
+        return "int"
+    try:
+        float(stripped)
+        return "float"
+    except ValueError:
+        pass
+    if DATE.match(stripped):
+        return "date"
+    if DATETIME.match(stripped):
+        return "datetime"
+    return "string"
+
+
+def _number(text):
+    try:
+        return int(text)
+    except ValueError:
+        return float(text)
+
+
+def column_stats(values):
+    """Type and stats for one column's sampled values (str or JSON values)."""
+    kinds = []
+    present = []
+    for value in values:
+        if value is None:
+            kind = None
+        elif isinstance(value, bool):
+            kind = "bool"
+        elif isinstance(value, int):
+            kind = "int"
+        elif isinstance(value, float):
+            kind = "float"
+        elif isinstance(value, (dict, list)):
+            kind = "object" if isinstance(value, dict) else "array"
+        else:
+            kind = value_type(str(value))
+        if kind is not None:
+            kinds.append(kind)
+            present.append(value)
+    stats = {"nulls": round(1 - len(present) / len(values), 3) if values else 0.0}
+    seen = set(kinds)
+    if not seen:
+        return {"type": "null", **stats}
+    if seen <= {"object"} or seen <= {"array"}:
+        return {"type": kinds[0], **stats}
+    kind = next(t for t in TYPE_ORDER if seen <= FITS[t]) if seen <= set(TYPE_ORDER) else "mixed"
+    stats = {"type": kind, **stats}
+    texts = [v if isinstance(v, str) else json.dumps(v) for v in present]
+    counts = Counter(texts)
+    stats["distinct"] = len(counts)
+    if kind in ("int", "float"):
+        numbers = [v if isinstance(v, (int, float)) else _number(v.strip()) for v in present]
+        stats.update(min=min(numbers), max=max(numbers), mean=round(sum(numbers) / len(numbers), 4))
+    elif kind in ("date", "datetime"):
+        stripped = sorted(t.strip() for t in texts)
+        stats.update(min=stripped[0], max=stripped[-1])
+    else:
+        stats["max_len"] = max(len(t) for t in texts)
+        # Only worth showing for categorical-looking columns
+        if len(counts) <= max(10, len(texts) // 20):
+            stats["top"] = [value for value, _ in counts.most_common(TOP_VALUES)]
+    return stats
+
+
+def _short(value):
+    if isinstance(value, str) and len(value) > SAMPLE_VALUE_CHARS:
+        return value[: SAMPLE_VALUE_CHARS - 1] + "…"
+    return value
+
+
+# --- Text formats -----------------------------------------------------------
+
+
+def read_head(path, sample_bytes):
+    """
+    First `sample_bytes` of the (decompressed) file, cut at the last newline.
+
+    Returns (text, complete, bytes of the file consumed).
+    """
+    with open(path, "rb") as raw:
+        if path.endswith(".gz"):
+            stream = gzip.GzipFile(fileobj=raw)
+            data = stream.read(sample_bytes + 1)
+            consumed = raw.tell()
+        else:
+            data = raw.read(sample_bytes + 1)
+            consumed = None
+    complete = len(data) <= sample_bytes
+    if not complete:
+        data = data[: data.rfind(b"\n", 0, sample_bytes) + 1]
+        if consumed is None:
+            consumed = len(data)
+    elif consumed is None:
+        consumed = len(data)
+    return data.decode("utf-8", errors="replace"), complete, consumed
+
+
+def estimate_rows(path, head_rows, head_bytes, complete):
+    """Estimated row count, from row lengths at the start, middle and end of the file."""
+    if complete:
+        return head_rows, True
+    size = os.path.getsize(path)
+    if path.endswith(".gz"):
+        # head_bytes is compressed input consumed: scale by the compression ratio
+        return round(head_rows * size / max(head_bytes, 1)), False
+    lines, sampled = head_rows, head_bytes
+    with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        for start in (size // 2, max(size - PROBE_BYTES, 0)):
+            if start < head_bytes:
+                continue
+            chunk = mm[start : start + PROBE_BYTES]
+            first, last = chunk.find(b"\n"), chunk.rfind(b"\n")
+            if first < 0 or first == last:
+                continue
+            lines += chunk.count(b"\n", first + 1, last + 1)
+            sampled += last - first
+    return round(lines * size / max(sampled, 1)), False
+
+
+def peek_csv(path, rows, sample_bytes):
+    """Peek a delimited text file."""
+    text, complete, consumed = read_head(path, sample_bytes)
+    lines = text.splitlines()
+    if not lines:
+        raise PeekError("file is empty")
+    sample = "\n".join(lines[:50])
+    sniffer = csv.Sniffer()
+    try:
+        dialect = sniffer.sniff(sample, delimiters=",\t;|")
+        delimiter = dialect.delimiter
+    except csv.Error:
+        delimiter = "\t" if ".tsv" in path or ".tab" in path else ","
+    try:
+        has_header = sniffer.has_header(sample)
+    except csv.Error:
+        has_header = True
+    records = list(csv.reader(io.StringIO(text), delimiter=delimiter))
+    records = [r for r in records if r]
+    header = records[0] if has_header else [f"column_{i}" for i in range(len(records[0]))]
+    body = records[1:] if has_header else records
+    total, exact = estimate_rows(path, len(records), consumed, complete)
+    if has_header:
+        total -= 1
+
+    sampled = body[:SAMPLE_ROWS]
+    columns = {}
+    for i, name in enumerate(header):
+        values = [r[i] if i < len(r) and value_type(r[i]) is not None else None for r in sampled]
+        columns[name] = column_stats(values)
+    return {
+        "format": "csv",
+        "delimiter": delimiter,
+        "header": has_header,
+        "rows": total,
+        "rows_exact": exact,
+        "sampled_rows": len(sampled),
+        "columns": columns,
+        "sample": [
+            {name: _short(r[i]) for i, name in enumerate(header) if i < len(r)} for r in body[:rows]
+        ],
+    }
+
+
+def peek_jsonl(path, rows, sample_bytes):
+    """Peek a JSON Lines file."""
+    text, complete, consumed = read_head(path, sample_bytes)
+    records, bad = [], 0
+    for line in text.splitlines():
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError:
+            bad += 1
+            continue
+        records.append(record if isinstance(record, dict) else {"value": record})
+    if not records:
+        raise PeekError("no JSON records in the sample")
+    total, exact = estimate_rows(path, len(records) + bad, consumed, complete)
+
+    sampled = records[:SAMPLE_ROWS]
+    names = list(dict.fromkeys(key for record in sampled for key in record))
+    result = {
+        "format": "jsonl",
+        "rows": total,
+        "rows_exact": exact,
+        "sampled_rows": len(sampled),
+        "columns": {name: column_stats([r.get(name) for r in sampled]) for name in names},
+        "sample": [{k: _short(v) for k, v in r.items()} for r in records[:rows]],
+    }
+    if bad:
+        result["invalid_lines"] = bad
+    return result
+
+
+# --- Parquet ----------------------------------------------------------------
+
+PHYSICAL_TYPES = (
+    "BOOLEAN",
+    "INT32",
+    "INT64",
+    "INT96",
+    "FLOAT",
+    "DOUBLE",
+    "BYTE_ARRAY",
+    "FIXED_LEN_BYTE_ARRAY",
+)
+CODECS = ("UNCOMPRESSED", "SNAPPY", "GZIP", "LZO", "BROTLI", "LZ4", "ZSTD", "LZ4_RAW")
+# ConvertedType (legacy) ids that matter for display
+CONVERTED_TYPES = {
+    0: "UTF8",
+    5: "DECIMAL",
+    6: "DATE",
+    9: "TIMESTAMP_MILLIS",
+    10: "TIMESTAMP_MICROS",
+}
+# LogicalType union field ids
+LOGICAL_TYPES = {
+    1: "STRING",
+    2: "MAP",
+    3: "LIST",
+    4: "ENUM",
+    5: "DECIMAL",
+    6: "DATE",
+    7: "TIME",
+    8: "TIMESTAMP",
+    10: "INTEGER",
+    12: "JSON",
+    13: "BSON",
+    14: "UUID",
+    15: "FLOAT16",
+}
+TIME_UNITS = {1: 1_000, 2: 1_000_000, 3: 1_000_000_000}
+
+
+class ThriftReader:
+    """Just enough of the Thrift compact protocol to decode Parquet's FileMetaData."""
+
+    def __init__(self, data):
+        self.data = data
+        self.pos = 0
+
+    def byte(self):
+        value = self.data[self.pos]
+        self.pos += 1
+        return value
+
+    def varint(self):
+        shift = result = 0
+        while True:
+            b = self.byte()
+            result |= (b & 0x7F) << shift
+            if not b & 0x80:
+                return result
+            shift += 7
+
+    def zigzag(self):
+        n = self.varint()
+        return (n >> 1) ^ -(n & 1)
+
+    def binary(self):
+        size = self.varint()
+        value = self.data[self.pos : self.pos + size]
+        self.pos += size
+        return bytes(value)
+
+    def value(self, kind):
+        if kind in (1, 2):
+            return kind == 1
+        if kind == 3:
+            return struct.unpack("b", bytes([self.byte()]))[0]
+        if kind in (4, 5, 6):
+            return self.zigzag()
+        if kind == 7:
+            value = struct.unpack_from("<d", self.data, self.pos)[0]
+            self.pos += 8
+            return value
+        if kind == 8:
+            return self.binary()
+        if kind in (9, 10):
+            header = self.byte()
+            size, elem = header >> 4, header & 0x0F
+            if size == 15:
+                size = self.varint()
+            if elem in (1, 2):
+                # Booleans inside lists are one byte each
+                return [self.byte() == 1 for _ in range(size)]
+            return [self.value(elem) for _ in range(size)]
+        if kind == 11:
+            size = self.varint()
+            if not size:
+                return {}
+            types = self.byte()
+            return {self.value(types >> 4): self.value(types & 0x0F) for _ in range(size)}
+        if kind == 12:
+            return self.struct()
+        raise PeekError(f"corrupt Parquet footer (Thrift type {kind})")
+
+    def struct(self):
+        """Decode a struct as {field id: value}."""
+        fields, field_id = {}, 0
+        while True:
+            header = self.byte()
+            if header == 0:
+                return fields
+            delta, kind = header >> 4, header & 0x0F
+            field_id = field_id + delta if delta else self.zigzag()
+            fields[field_id] = self.value(kind)
+
+
+def read_parquet_footer(path):
+    """Decode a Parquet file's FileMetaData (raw field ids) from its footer."""
+    with open(path, "rb") as f:
+        f.seek(0, os.SEEK_END)
+        size = f.tell()
+        if size < 12:
+            raise PeekError("not a Parquet file (too small)")
+        f.seek(size - 8)
+        tail = f.read(8)
+        if tail[4:] != b"PAR1":
+            raise PeekError("not a Parquet file (missing PAR1 magic)")
+        length = struct.unpack("<i", tail[:4])[0]
+        if not 0 < length <= size - 12:
+            raise PeekError("corrupt Parquet footer length")
+        f.seek(size - 8 - length)
+        footer = f.read(length)
+    return ThriftReader(footer).struct()
+
+
+def _logical_type(element):
+    logical = element.get(10)
+    if logical:
+        field_id, detail = next(iter(logical.items()))
+        name = LOGICAL_TYPES.get(field_id, "UNKNOWN")
+        if name == "TIMESTAMP":
+            unit = next(iter(detail.get(2, {1: {}})), 1)
+            return name, TIME_UNITS.get(unit)
+        if name == "INTEGER":
+            return f"{'' if detail.get(2) else 'U'}INT{detail.get(1, 32)}", None
+        return name, None
+    converted = CONVERTED_TYPES.get(element.get(6))
+    if converted == "UTF8":
+        return "STRING", None
+    if converted and converted.startswith("TIMESTAMP"):
+        return "TIMESTAMP", 1_000 if converted.endswith("MILLIS") else 1_000_000
+    return converted, None
+
+
+def _decode_stat(raw, physical, logical, unit):
+    """Decode a min/max statistic from its plain encoding."""
+    try:
+        if physical == "INT32":
+            value = struct.unpack("<i", raw)[0]
+            if logical == "DATE":
+                return (datetime.date(1970, 1, 1) + datetime.timedelta(days=value)).isoformat()
+            return value
+        if physical == "INT64":
+            value = struct.unpack("<q", raw)[0]
+            if logical == "TIMESTAMP" and unit:
+                moment = datetime.datetime(1970, 1, 1) + datetime.timedelta(
+                    microseconds=value * 1_000_000 // unit
+                )
+                return moment.isoformat()
+            return value
+        if physical == "FLOAT":
+            return struct.unpack("<f", raw)[0]
+        if physical == "DOUBLE":
+            return struct.unpack("<d", raw)[0]
+        if physical == "BOOLEAN":
+            return bool(raw[0])
+        if logical in ("STRING", "ENUM", "JSON"):
+            return _short(raw.decode("utf-8", errors="replace"))
+    except (struct.error, IndexError, OverflowError):
+        pass
+    return None
+
+
+def _leaf_schema(schema):
+    """Map dotted leaf column paths to their SchemaElement."""
+    leaves = {}
+
+    def walk(index, prefix):
+        element = schema[index]
+        name = element.get(4, b"").decode()
+        path = f"{prefix}.{name}" if prefix else name
+        index += 1
+        children = element.get(5, 0)
+        if not children:
+            leaves[path] = element
+        for _ in range(children):
+            index = walk(index, path)
+        return index
+
+    # schema[0] is the root; its name is not part of column paths
+    index = 1
+    for _ in range(schema[0].get(5, 0)):
+        index = walk(index, "")
+    return leaves
+
+
+def peek_parquet(path, rows):
+    """Peek a Parquet file from its footer (and the first rows, with pyarrow)."""
+    meta = read_parquet_footer(path)
+    leaves = _leaf_schema(meta.get(2, []))
+    row_groups = meta.get(4, [])
+    columns = {}
+    for name, element in leaves.items():
+        physical = PHYSICAL_TYPES[element.get(1, 6)]
+        logical, unit = _logical_type(element)
+        columns[name] = {
+            "type": (logical or physical).lower(),
+            "physical": physical,
+            "nullable": element.get(3, 1) != 0,
+            "nulls": 0,
+            "compressed_mb": 0.0,
+            "codec": None,
+            "_bounds": [],
+            "_unit": unit,
+        }
+    for group in row_groups:
+        for chunk in group.get(1, []):
+            cmeta = chunk.get(3, {})
+            name = ".".join(part.decode() for part in cmeta.get(3, []))
+            column = columns.get(name)
+            if column is None:
+                continue
+            column["codec"] = CODECS[cmeta.get(4, 0)] if cmeta.get(4, 0) < len(CODECS) else None
+            column["compressed_mb"] += cmeta.get(7, 0) / 2**20
+            stats = cmeta.get(12, {})
+            if column["nulls"] is not None:
+                column["nulls"] = None if 3 not in stats else column["nulls"] + stats[3]
+            low = stats.get(6, stats.get(2))
+            high = stats.get(5, stats.get(1))
+            if low is not None and high is not None:
+                logical = column["type"].upper()
+                column["_bounds"].append(
+                    (
+                        _decode_stat(low, column["physical"], logical, column["_unit"]),
+                        _decode_stat(high, column["physical"], logical, column["_unit"]),
+                    )
+                )
+    for column in columns.values():
+        bounds = [b for b in column.pop("_bounds") if None not in b]
+        column.pop("_unit")
+        column["compressed_mb"] = round(column["compressed_mb"], 2)
+        if bounds:
+            try:
+                column.update(min=min(b[0] for b in bounds), max=max(b[1] for b in bounds))
+            except TypeError:
+                pass
+        if column["nulls"] is None:
+            del column["nulls"]
+
+    result = {
+        "format": "parquet",
+        "rows": meta.get(3, 0),
+        "rows_exact": True,
+        "row_groups": len(row_groups),
+        "created_by": (meta.get(6) or b"").decode(errors="replace") or None,
+        "columns": columns,
+    }
+    if rows:
+        try:
+            import pyarrow.parquet as pq
+
+            # Reads only the first pages of the first row group
+            batch = next(pq.ParquetFile(path).iter_batches(batch_size=rows), None)
+            records = batch.to_pylist() if batch is not None else []
+            result["sample"] = [
+                {
+                    k: _short(v if isinstance(v, (str, int, float, bool)) else str(v))
+                    for k, v in r.items()
+                }
+                for r in records
+            ]
+        except ImportError:
+            result["sample_unavailable"] = "install pyarrow for sample rows"
+    return result
+
+
+def detect_format(path):
+    """ "parquet", "jsonl" or "csv" from the name, then the content."""
+    name = path.lower()
+    if name.endswith(".gz"):
+        name = name[: -len(".gz")]
+    if name.endswith((".parquet", ".pq")):
+        return "parquet"
+    if name.endswith((".jsonl", ".ndjson")):
+        return "jsonl"
+    if name.endswith((".csv", ".tsv", ".tab", ".txt")):
+        return "csv"
+    with open(path, "rb") as f:
+        head = f.read(4)
+    if head == b"PAR1":
+        return "parquet"
+    if head.lstrip()[:1] == b"{":
+        return "jsonl"
+    return "csv"
+
+
+def peek(path, rows=5, sample_bytes=SAMPLE_BYTES):
+    """Schema, row count, column stats and sample rows of a data file."""
+    fmt = detect_format(path)
+    if fmt == "parquet":
+        result = peek_parquet(path, rows)
+    elif fmt == "jsonl":
+        result = peek_jsonl(path, rows, sample_bytes)
+    else:
+        result = peek_csv(path, rows, sample_bytes)
+    return {"path": path, "size_mb": round(os.path.getsize(path) / 2**20, 2), **result}
+
+
+def main(argv=None):
+    """Command entry point."""
+    parser = argparse.ArgumentParser(description="Peek at a large CSV/JSONL/Parquet file.")
+    parser.add_argument("path")
+    parser.add_argument("--rows", type=int, default=5, help="Sample rows to include")
+    parser.add_argument(
+        "--sample-bytes", type=int, default=SAMPLE_BYTES, help="Bytes read for schema inference"
+    )
+    args = parser.parse_args(argv)
+
+    try:
+        result = peek(args.path, args.rows, args.sample_bytes)
+    except (OSError, ValueError, IndexError, PeekError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+    print(json.dumps(result, default=str, ensure_ascii=False))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
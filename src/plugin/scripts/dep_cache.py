@@ -0,0 +1,417 @@
+#!/usr/bin/env python3
+"""
+Drive-backed dependency cache: wheel cache and virtualenv snapshots.
+
+A fresh Colab runtime would otherwise spend minutes re-running
+`pip install` for the project. After a `build`, two archives are kept on
+Drive:
+
+- `wheels-py<X.Y>-<cuda>.tar` - the pip/uv download and wheel cache, shared
+  by every lockfile for that Python/CUDA pair, so rebuilds don't download
+  or compile again;
+- `<project>/venv-<key>.tar.zst` (or `.tar.gz` without zstd) - the project
+  virtualenv, where key = Python version + CUDA version + lockfile hash.
+
+`restore` unpacks the snapshot when the key matches (seconds). When it
+doesn't, it rebuilds, either in the foreground or detached with
+`--background`, and snapshots the result for the next runtime.
+
+Lockfiles, first match wins: uv.lock (installed with `uv sync --frozen`),
+requirements.lock, requirements.txt.
+
+This script only uses the standard library and no other plugin module: the
+bootstrap notebook embeds it to restore dependencies before Claude Code runs.
+
+Usage:
+    dep_cache.py [status] [--project DIR] [--json]
+    dep_cache.py restore [--project DIR] [--background]
+    dep_cache.py build [--project DIR] [--keep N]
+
+Common options: --venv DIR (default /content/venvs/<project>),
+--cache-dir DIR (default <Drive>/.claude-colab/dep-cache).
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import re
+import shutil
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+LOCKFILES = ("uv.lock", "requirements.lock", "requirements.txt")
+DRIVE_ROOTS = (Path("/content/drive/My Drive"), Path("/content/drive/MyDrive"))
+VENV_ROOT = Path("/content/venvs")
+STATE_DIR = Path(os.environ.get("CLAUDE_COLAB_STATE_DIR", "~/.cache/claude-colab")).expanduser()
+KEY_FILE = ".dep-cache-key"
+KEEP_SNAPSHOTS = 2
+
+
+class DepCacheError(Exception):
+    """Raised when dependencies cannot be cached or restored."""
+
+
+def find_lockfile(project):
+    """Return the project's lockfile, or None."""
+    for name in LOCKFILES:
+        path = Path(project) / name
+        if path.is_file():
+            return path
+    return None
+
+
+def cuda_version():
+    """CUDA version reported by the driver (e.g. "cu12.2"), or "cpu"."""
+    try:
+        out = subprocess.run(["nvidia-smi"], capture_output=True, text=True, timeout=10).stdout
+    except (OSError, subprocess.TimeoutExpired):
+        return "cpu"
+    match = re.search(r"CUDA Version:\s*([\d.]+)", out)
+    return f"cu{match.group(1)}" if match else "cpu"
+
+
+def cache_key(lockfile, cuda=None):
+    """Key for a venv snapshot: Python version, CUDA version and lockfile hash."""
+    digest = hashlib.sha256(Path(lockfile).read_bytes()).hexdigest()[:16]
+    return f"{python_tag()}-{cuda or cuda_version()}-{digest}"
+
+
+def python_tag():
+    """Python major.minor, e.g. "py3.11"."""
+    return f"py{sys.version_info.major}.{sys.version_info.minor}"
+
+
+def default_cache_dir():
+    """Dependency cache on Drive ($CLAUDE_COLAB_DEP_CACHE overrides)."""
+    if os.environ.get("CLAUDE_COLAB_DEP_CACHE"):
+        return Path(os.environ["CLAUDE_COLAB_DEP_CACHE"])
+    for root in DRIVE_ROOTS:
+        if root.exists():
+            # Outside claude-workspaces/, where every directory is a workspace
+            return root / ".claude-colab" / "dep-cache"
+    return None
+
+
+class DepCache:
+    """Snapshot and wheel-cache locations for one project."""
+
+    def __init__(self, project, cache_dir=None, venv=None, cuda=None):
+        self.project = Path(project).resolve()
+        self.name = self.project.name
+        self.cache_dir = Path(cache_dir) if cache_dir else default_cache_dir()
+        if self.cache_dir is None:
+            raise DepCacheError("Google Drive is not mounted (or set --cache-dir)")
+        if venv:
+            self.venv = Path(venv)
+        elif VENV_ROOT.parent.exists():
+            self.venv = VENV_ROOT / self.name
+        else:
+            self.venv = self.project / ".venv"
+        self.venv = self.venv.absolute()
+        self.lockfile = find_lockfile(self.project)
+        self.cuda = cuda or cuda_version()
+        self.key = cache_key(self.lockfile, self.cuda) if self.lockfile else None
+        self.local_wheels = STATE_DIR / "wheel-cache"
+        self.build_log = STATE_DIR / f"dep-build-{self.name}.log"
+        self.lock_path = STATE_DIR / f"dep-build-{self.name}.lock"
+
+    @property
+    def snapshot_dir(self):
+        return self.cache_dir / self.name
+
+    @property
+    def wheels_archive(self):
+        return self.cache_dir / f"wheels-{python_tag()}-{self.cuda}.tar"
+
+    def snapshot_path(self):
+        """Existing snapshot for the current key, if any."""
+        if not self.key:
+            return None
+        for ext in (".tar.zst", ".tar.gz"):
+            path = self.snapshot_dir / f"venv-{self.key}{ext}"
+            if path.exists():
+                return path
+        return None
+
+    def installed_key(self):
+        """Key of the venv currently on disk, if it was built or restored by us."""
+        try:
+            return (self.venv / KEY_FILE).read_text().strip()
+        except OSError:
+            return None
+
+    def build_running(self):
+        """PID of a running build for this project, or None."""
+        try:
+            pid = int(self.lock_path.read_text())
+            os.kill(pid, 0)
+            return pid
+        except (OSError, ValueError):
+            return None
+
+
+def _compressor():
+    """(archive extension, tar compression args)."""
+    if shutil.which("zstd"):
+        return ".tar.zst", ["-I", "zstd -T0 -3"]
+    return ".tar.gz", ["-z"]
+
+
+def _tar_create(source_dir, archive, compress_args):
+    """Archive `source_dir` (by its name, relative to its parent) atomically."""
+    archive.parent.mkdir(parents=True, exist_ok=True)
+    tmp = archive.with_name(archive.name + ".tmp")
+    cmd = ["tar", *compress_args, "-cf", str(tmp), "-C", str(source_dir.parent), source_dir.name]
+    result = subprocess.run(cmd, capture_output=True, text=True)
+    if result.returncode != 0:
+        tmp.unlink(missing_ok=True)
+        raise DepCacheError(f"tar failed: {result.stderr.strip()}")
+    os.replace(tmp, archive)
+
+
+def _tar_extract(archive, dest_parent):
+    """Extract an archive created by _tar_create into `dest_parent`."""
+    if archive.name.endswith(".zst"):
+        args = ["-I", "zstd -d"]
+    elif archive.name.endswith(".gz"):
+        args = ["-z"]
+    else:
+        args = []
+    dest_parent.mkdir(parents=True, exist_ok=True)
+    result = subprocess.run(
+        ["tar", *args, "-xf", str(archive), "-C", str(dest_parent)], capture_output=True, text=True
+    )
+    if result.returncode != 0:
+        raise DepCacheError(f"tar failed: {result.stderr.strip()}")
+
+
+def _replace_dir(path):
+    """Move an existing directory aside and delete it."""
+    if path.exists() or path.is_symlink():
+        old = path.with_name(f".{path.name}.old-{os.getpid()}")
+        os.replace(path, old)
+        shutil.rmtree(old, ignore_errors=True)
+
+
+def restore_snapshot(cache):
+    """Unpack the matching snapshot into the venv path. Returns seconds taken."""
+    snapshot = cache.snapshot_path()
+    started = time.monotonic()
+    manifest_path = snapshot.with_name(snapshot.name.split(".tar")[0] + ".json")
+    try:
+        manifest = json.loads(manifest_path.read_text())
+    except (OSError, ValueError):
+        manifest = {}
+    if manifest.get("venv") and Path(manifest["venv"]) != cache.venv:
+        # Virtualenvs hard-code their own path in scripts; they must go back to the same place
+        cache.venv = Path(manifest["venv"])
+    _replace_dir(cache.venv)
+    _tar_extract(snapshot, cache.venv.parent)
+    return time.monotonic() - started
+
+
+def create_venv(cache, env):
+    """Create the venv and install the lockfile into it."""
+    uv = shutil.which("uv")
+    lockfile = cache.lockfile
+    if lockfile.name == "uv.lock":
+        if not uv:
+            raise DepCacheError("uv.lock needs uv (pip install uv)")
+        env = {**env, "UV_PROJECT_ENVIRONMENT": str(cache.venv)}
+        cmds = [[uv, "sync", "--frozen", "--python", sys.executable]]
+    elif uv:
+        cmds = [
+            [uv, "venv", "--python", sys.executable, str(cache.venv)],
+            [
+                uv,
+                "pip",
+                "install",
+                "--python",
+                str(cache.venv / "bin" / "python"),
+                "-r",
+                str(lockfile),
+            ],
+        ]
+    else:
+        cmds = [
+            [sys.executable, "-m", "venv", str(cache.venv)],
+            [str(cache.venv / "bin" / "python"), "-m", "pip", "install", "-r", str(lockfile)],
+        ]
+    for cmd in cmds:
+        result = subprocess.run(cmd, cwd=cache.project, env=env)
+        if result.returncode != 0:
+            raise DepCacheError(f"{' '.join(cmd[:3])} ... exited with {result.returncode}")
+
+
+def build(cache, keep=KEEP_SNAPSHOTS):
+    """Rebuild the venv from the lockfile, then snapshot it and the wheel cache to Drive."""
+    if not cache.lockfile:
+        raise DepCacheError(f"No lockfile in {cache.project} ({', '.join(LOCKFILES)})")
+    STATE_DIR.mkdir(parents=True, exist_ok=True)
+    try:
+        fd = os.open(cache.lock_path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o644)
+    except FileExistsError:
+        pid = cache.build_running()
+        if pid:
+            raise DepCacheError(f"A build is already running (pid {pid})")
+        # Stale lock from a build that was killed
+        cache.lock_path.unlink(missing_ok=True)
+        fd = os.open(cache.lock_path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o644)
+    os.write(fd, str(os.getpid()).encode())
+    os.close(fd)
+
+    try:
+        started = time.monotonic()
+        if cache.wheels_archive.exists() and not cache.local_wheels.exists():
+            print(f"Restoring wheel cache from {cache.wheels_archive}")
+            _tar_extract(cache.wheels_archive, cache.local_wheels.parent)
+        env = {
+            **os.environ,
+            "PIP_CACHE_DIR": str(cache.local_wheels / "pip"),
+            "UV_CACHE_DIR": str(cache.local_wheels / "uv"),
+        }
+        _replace_dir(cache.venv)
+        print(f"Building {cache.venv} from {cache.lockfile.name}")
+        create_venv(cache, env)
+        (cache.venv / KEY_FILE).write_text(cache.key + "\n")
+        build_s = time.monotonic() - started
+
+        ext, compress_args = _compressor()
+        snapshot = cache.snapshot_dir / f"venv-{cache.key}{ext}"
+        print(f"Saving snapshot {snapshot}")
+        _tar_create(cache.venv, snapshot, compress_args)
+        manifest = {
+            "key": cache.key,
+            "venv": str(cache.venv),
+            "lockfile": cache.lockfile.name,
+            "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "build_seconds": round(build_s, 1),
+        }
+        snapshot.with_name(f"venv-{cache.key}.json").write_text(json.dumps(manifest, indent=2))
+        if cache.local_wheels.exists():
+            print(f"Saving wheel cache {cache.wheels_archive}")
+            _tar_create(cache.local_wheels, cache.wheels_archive, [])
+        prune(cache, keep)
+        return snapshot
+    finally:
+        cache.lock_path.unlink(missing_ok=True)
+
+
+def prune(cache, keep):
+    """Delete all but the `keep` newest snapshots of the project."""
+    snapshots = sorted(
+        (p for p in cache.snapshot_dir.glob("venv-*.tar.*") if not p.name.endswith(".tmp")),
+        key=lambda p: p.stat().st_mtime,
+        reverse=True,
+    )
+    for old in snapshots[keep:]:
+        old.unlink(missing_ok=True)
+        old.with_name(old.name.split(".tar")[0] + ".json").unlink(missing_ok=True)
+
+
+def start_background_build(cache, argv):
+    """Run `build` detached, logging to the build log. Returns the child PID."""
+    STATE_DIR.mkdir(parents=True, exist_ok=True)
+    with open(cache.build_log, "w") as log:
+        proc = subprocess.Popen(
+            [sys.executable, os.path.abspath(__file__), "build", *argv],
+            stdin=subprocess.DEVNULL,
+            stdout=log,
+            stderr=subprocess.STDOUT,
+            start_new_session=True,
+        )
+    return proc.pid
+
+
+def status(cache):
+    """Describe the cache state for the project."""
+    snapshot = cache.snapshot_path()
+    return {
+        "project": str(cache.project),
+        "lockfile": cache.lockfile.name if cache.lockfile else None,
+        "key": cache.key,
+        "venv": str(cache.venv),
+        "venv_current": cache.key is not None and cache.installed_key() == cache.key,
+        "snapshot": str(snapshot) if snapshot else None,
+        "snapshot_mb": round(snapshot.stat().st_size / 2**20, 1) if snapshot else None,
+        "wheel_cache_mb": (
+            round(cache.wheels_archive.stat().st_size / 2**20, 1)
+            if cache.wheels_archive.exists()
+            else None
+        ),
+        "build_running": cache.build_running(),
+        "build_log": str(cache.build_log),
+    }
+
+
+def main(argv=None):
+    """Command entry point."""
+    parser = argparse.ArgumentParser(description="Drive-backed venv and wheel cache.")
+    sub = parser.add_subparsers(dest="action", required=True)
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument("--project", default=".", help="Project directory with the lockfile")
+    common.add_argument("--venv", help="Virtualenv path (default: /content/venvs/<project>)")
+    common.add_argument("--cache-dir", help="Cache directory (default: on Drive)")
+
+    p = sub.add_parser("status", parents=[common], help="Show key, snapshot and venv state")
+    p.add_argument("--json", action="store_true")
+    p = sub.add_parser("restore", parents=[common], help="Restore the venv, rebuilding on a miss")
+    p.add_argument("--background", action="store_true", help="Rebuild detached on a miss")
+    p = sub.add_parser("build", parents=[common], help="Rebuild and snapshot the venv")
+    p.add_argument("--keep", type=int, default=KEEP_SNAPSHOTS, help="Snapshots to keep")
+
+    argv = sys.argv[1:] if argv is None else list(argv)
+    # A bare /claude-colab:deps passes only --project
+    if not argv or (argv[0].startswith("-") and argv[0] not in ("-h", "--help")):
+        argv = ["status", *argv]
+    args = parser.parse_args(argv)
+    passthrough = ["--project", args.project]
+    for option in ("venv", "cache_dir"):
+        if getattr(args, option):
+            passthrough += [f"--{option.replace('_', '-')}", getattr(args, option)]
+
+    try:
+        cache = DepCache(args.project, args.cache_dir, args.venv)
+        if args.action == "status":
+            info = status(cache)
+            if args.json:
+                print(json.dumps(info, separators=(",", ":")))
+            else:
+                for name, value in info.items():
+                    print(f"{name:<16} {value}")
+            return 0
+
+        if not cache.lockfile:
+            print(f"No lockfile in {cache.project} ({', '.join(LOCKFILES)}); nothing to do")
+            return 0
+
+        if args.action == "build":
+            snapshot = build(cache, args.keep)
+            print(f"✓ Built and saved {snapshot.name}")
+            return 0
+
+        if cache.installed_key() == cache.key:
+            print(f"✓ {cache.venv} is up to date ({cache.key})")
+        elif cache.snapshot_path():
+            seconds = restore_snapshot(cache)
+            print(f"✓ Restored {cache.venv} from snapshot in {seconds:.1f}s ({cache.key})")
+        elif cache.build_running():
+            print(f"⏳ Build already running; log: {cache.build_log}")
+        elif args.background:
+            pid = start_background_build(cache, passthrough)
+            print(f"⏳ No snapshot for {cache.key}; rebuilding in background (pid {pid})")
+            print(f"   Log: {cache.build_log}")
+        else:
+            build(cache)
+            print(f"✓ Built {cache.venv} and saved a snapshot ({cache.key})")
+        return 0
+    except (DepCacheError, OSError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,421 @@
+#!/usr/bin/env python3
+"""
+Speed up git in Drive-backed workspaces.
+
+`git status` on /content/drive stats every file through the FUSE mount and
+rereads a large index, so it can take many seconds. `setup` times
+`git status` before and after, and in between turns on (checking each one
+works first):
+
+- untracked cache: skips re-scanning unchanged directories (only when
+  `git update-index --test-untracked-cache` passes on this filesystem)
+- split index and index v4: smaller index writes and reads
+- commit-graph (with changed-path filters): fast log/merge-base
+- checkStat=minimal, trustctime=false: FUSE inode/ctime changes no longer
+  force a rehash of every file
+- builtin fsmonitor, where this git supports it (not on Linux up to at
+  least git 2.39; reported as unsupported)
+
+`local-git on` moves `.git` to local disk (CLAUDE_COLAB_LOCAL_GIT_ROOT,
+default /content/.git-local) and leaves a `.git` file pointing at it. The
+Drive copy is kept as `.git-drive` and updated by `sync`. After a runtime
+restart SessionStart runs `restore`, which copies it back. Run `sync`
+before the runtime ends (the checkpoint command does); commits made after
+the last sync are lost with the runtime. `local-git off` syncs and moves
+`.git` back.
+
+Usage:
+    git_accel.py setup [REPO...] [--local-git] [--skip-cache-test] [--json]
+    git_accel.py status [REPO...]     # also with no arguments
+    git_accel.py bench [REPO...]
+    git_accel.py local-git on|off REPO
+    git_accel.py sync [REPO...]
+    git_accel.py restore [REPO...]
+REPO defaults to the git repositories in the current workspace (for sync and
+restore, those that keep .git on local disk).
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+from colab_env import current_workspace
+
+DEFAULT_LOCAL_ROOT = "/content/.git-local"
+DRIVE_GIT = ".git-drive"
+SYNC_STAMP = "claude-colab-synced"
+BENCH_RUNS = 3
+FIND_DEPTH = 2
+SKIP_DIRS = {".git", DRIVE_GIT, "node_modules", ".venv", "venv", "__pycache__"}
+# (key, value, why) set with `git config --local`
+SETTINGS = (
+    ("core.splitIndex", "true", "index writes only touch a small delta file"),
+    ("index.version", "4", "path-compressed index is smaller to read"),
+    ("core.commitGraph", "true", "log and merge-base read the commit-graph"),
+    ("fetch.writeCommitGraph", "true", "keep the commit-graph current after fetches"),
+    ("core.checkStat", "minimal", "ignore unstable FUSE inode/device numbers"),
+    ("core.trustctime", "false", "ignore unstable FUSE ctimes"),
+)
+
+
+class GitAccelError(Exception):
+    """Raised when a repository cannot be set up."""
+
+
+def git(repo, *args, check=True, timeout=600):
+    """Run git in `repo`. Returns the CompletedProcess."""
+    result = subprocess.run(
+        ["git", "-C", str(repo), *args], capture_output=True, text=True, timeout=timeout
+    )
+    if check and result.returncode != 0:
+        raise GitAccelError(f"git {' '.join(args)}: {result.stderr.strip() or result.stdout}")
+    return result
+
+
+def find_repos(root, depth=FIND_DEPTH):
+    """Git repositories at `root` or up to `depth` directories below it."""
+    root = Path(root)
+    repos = [root] if (root / ".git").exists() else []
+    if depth:
+        try:
+            entries = sorted(os.scandir(root), key=lambda e: e.name)
+        except OSError:
+            return repos
+        for entry in entries:
+            if entry.name not in SKIP_DIRS and entry.is_dir(follow_symlinks=False):
+                repos.extend(find_repos(entry.path, depth - 1))
+    return repos
+
+
+def time_status(repo, runs=BENCH_RUNS):
+    """Seconds for `git status`: the first run and the best of `runs`."""
+    times = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        git(repo, "status", "--porcelain")
+        times.append(time.perf_counter() - started)
+    return {"first_s": round(times[0], 3), "best_s": round(min(times), 3)}
+
+
+def _step(steps, name, status, detail=""):
+    steps.append({"step": name, "status": status, "detail": detail})
+
+
+def enable_untracked_cache(repo, steps, test=True):
+    if test:
+        # Sleeps a few seconds to watch directory mtimes; fails on filesystems that lie
+        result = git(repo, "update-index", "--test-untracked-cache", check=False, timeout=60)
+        if result.returncode != 0:
+            git(repo, "config", "--local", "core.untrackedCache", "false")
+            _step(steps, "untracked cache", "skipped", "directory mtimes unreliable here")
+            return
+    git(repo, "config", "--local", "core.untrackedCache", "true")
+    git(repo, "update-index", "--untracked-cache")
+    _step(steps, "untracked cache", "on")
+
+
+def enable_fsmonitor(repo, steps):
+    probe = git(repo, "fsmonitor--daemon", "status", check=False)
+    output = (probe.stderr + probe.stdout).strip()
+    if "not supported" in output or "is not a git command" in output:
+        _step(steps, "fsmonitor", "unsupported", output.splitlines()[-1] if output else "")
+        return
+    git(repo, "config", "--local", "core.fsmonitor", "true")
+    git(repo, "fsmonitor--daemon", "start", check=False)
+    _step(steps, "fsmonitor", "on")
+
+
+def write_commit_graph(repo, steps):
+    if git(repo, "rev-parse", "--verify", "-q", "HEAD", check=False).returncode != 0:
+        _step(steps, "commit-graph", "skipped", "no commits yet")
+        return
+    result = git(repo, "commit-graph", "write", "--reachable", "--changed-paths", check=False)
+    if result.returncode != 0:
+        # Older git without changed-path filters
+        result = git(repo, "commit-graph", "write", "--reachable", check=False)
+    if result.returncode == 0:
+        _step(steps, "commit-graph", "on")
+    else:
+        _step(steps, "commit-graph", "failed", result.stderr.strip())
+
+
+def setup(repo, local_git=False, test_cache=True):
+    """Time `git status`, apply every speedup, time it again. Returns a report."""
+    repo = Path(repo)
+    before = time_status(repo)
+    steps = []
+    for key, value, why in SETTINGS:
+        git(repo, "config", "--local", key, value)
+        _step(steps, f"{key}={value}", "on", why)
+    git(repo, "update-index", "--split-index")
+    git(repo, "update-index", "--index-version", "4")
+    enable_untracked_cache(repo, steps, test_cache)
+    write_commit_graph(repo, steps)
+    enable_fsmonitor(repo, steps)
+    if local_git:
+        _step(steps, "local .git", "on", str(local_git_on(repo)))
+    after = time_status(repo)
+    return {
+        "repo": str(repo),
+        "before": before,
+        "after": after,
+        "speedup": round(before["best_s"] / max(after["best_s"], 1e-3), 1),
+        "steps": steps,
+    }
+
+
+def status(repo):
+    """Which speedups are configured, and where `.git` lives."""
+    repo = Path(repo)
+    config = {}
+    for key in ("core.untrackedCache", "core.fsmonitor", *(key for key, _, _ in SETTINGS)):
+        value = git(repo, "config", "--local", "--get", key, check=False).stdout.strip()
+        config[key] = value or None
+    local = local_git_dir(repo) if keeps_local_git(repo) else None
+    report = {"repo": str(repo), "config": config, "local_git": local}
+    stamp = repo / DRIVE_GIT / SYNC_STAMP
+    if stamp.exists():
+        report["synced_at"] = stamp.read_text().strip()
+    return report
+
+
+# --- .git on local disk -----------------------------------------------------
+
+
+def local_root():
+    return Path(os.environ.get("CLAUDE_COLAB_LOCAL_GIT_ROOT", DEFAULT_LOCAL_ROOT))
+
+
+def local_path_for(repo):
+    """Local-disk location for `repo`'s .git directory."""
+    repo = Path(repo).resolve()
+    digest = hashlib.sha1(str(repo).encode()).hexdigest()[:8]
+    return local_root() / f"{repo.name}-{digest}"
+
+
+def local_git_dir(repo):
+    """The local .git directory `repo` points to, or None if .git is a directory."""
+    dot_git = Path(repo) / ".git"
+    if not dot_git.is_file():
+        return None
+    text = dot_git.read_text().strip()
+    return text[len("gitdir:") :].strip() if text.startswith("gitdir:") else None
+
+
+def _unchanged(relative, source, target):
+    if source.st_size != target.st_size:
+        return False
+    # Objects and packs are immutable once written; refs keep their size when updated
+    if relative.parts[0] == "objects" and relative.parts[1:2] != ("info",):
+        return True
+    return source.st_mtime_ns == target.st_mtime_ns
+
+
+def mirror(src, dst):
+    """
+    Make `dst` a copy of `src`, copying only files whose size or mtime differ.
+
+    Objects are copied before refs and the index, and stale files are removed
+    last, so an interrupted mirror never leaves refs pointing at missing
+    objects. Returns (files copied, files removed).
+    """
+    src, dst = Path(src), Path(dst)
+    files = []
+    for dirpath, _, filenames in os.walk(src):
+        relative = Path(dirpath).relative_to(src)
+        files.extend(relative / name for name in filenames)
+    files.sort(key=lambda path: (path.parts[0] != "objects", str(path)))
+    copied = 0
+    for relative in files:
+        source, target = src / relative, dst / relative
+        st = source.stat()
+        try:
+            current = target.stat()
+            if _unchanged(relative, st, current):
+                continue
+        except FileNotFoundError:
+            target.parent.mkdir(parents=True, exist_ok=True)
+        tmp = target.with_name(f".{target.name}.tmp")
+        shutil.copy2(source, tmp)
+        os.replace(tmp, target)
+        copied += 1
+    keep = set(files)
+    removed = 0
+    for dirpath, _, filenames in os.walk(dst, topdown=False):
+        relative = Path(dirpath).relative_to(dst)
+        for name in filenames:
+            if relative / name not in keep and name != SYNC_STAMP:
+                (Path(dirpath) / name).unlink()
+                removed += 1
+    return copied, removed
+
+
+def local_git_on(repo):
+    """Move `repo`'s .git to local disk, keeping the Drive copy as .git-drive."""
+    repo = Path(repo)
+    dot_git = repo / ".git"
+    if not dot_git.is_dir():
+        raise GitAccelError(f"{dot_git} is not a directory (already local?)")
+    local = local_path_for(repo)
+    if local.exists():
+        shutil.rmtree(local)
+    mirror(dot_git, local)
+    dot_git.rename(repo / DRIVE_GIT)
+    dot_git.write_text(f"gitdir: {local}\n")
+    exclude = local / "info" / "exclude"
+    exclude.parent.mkdir(exist_ok=True)
+    with open(exclude, "a") as f:
+        f.write(f"/{DRIVE_GIT}/\n")
+    (repo / DRIVE_GIT / SYNC_STAMP).write_text(time.strftime("%Y-%m-%dT%H:%M:%S"))
+    return local
+
+
+def keeps_local_git(repo):
+    """Whether `repo` was moved by `local-git on` (worktrees and submodules also use a .git file)."""
+    return bool(local_git_dir(repo)) and (Path(repo) / DRIVE_GIT).is_dir()
+
+
+def sync(repo):
+    """Copy the local .git back to .git-drive. Returns (copied, removed)."""
+    repo = Path(repo)
+    if not keeps_local_git(repo):
+        raise GitAccelError(f"{repo} does not keep .git on local disk")
+    local = local_git_dir(repo)
+    if not Path(local).is_dir():
+        raise GitAccelError(f"{local} is missing; run restore first")
+    result = mirror(local, repo / DRIVE_GIT)
+    (repo / DRIVE_GIT / SYNC_STAMP).write_text(time.strftime("%Y-%m-%dT%H:%M:%S"))
+    return result
+
+
+def needs_restore(repo):
+    """Whether `repo` points to a local .git that no longer exists (e.g. after a restart)."""
+    local = local_git_dir(repo)
+    return keeps_local_git(repo) and not Path(local).exists()
+
+
+def restore(repo):
+    """Copy .git-drive to the local .git location. Returns files copied."""
+    repo = Path(repo)
+    if not keeps_local_git(repo):
+        raise GitAccelError(f"{repo} does not keep .git on local disk")
+    local = local_git_dir(repo)
+    # Copied aside and renamed, so git never sees a half-restored directory
+    staging = Path(f"{local}.restoring")
+    shutil.rmtree(staging, ignore_errors=True)
+    copied, _ = mirror(repo / DRIVE_GIT, staging)
+    (staging / SYNC_STAMP).unlink(missing_ok=True)
+    shutil.rmtree(local, ignore_errors=True)
+    os.replace(staging, local)
+    return copied
+
+
+def local_git_off(repo):
+    """Sync and move .git back to Drive."""
+    repo = Path(repo)
+    if not keeps_local_git(repo):
+        raise GitAccelError(f"{repo} does not keep .git on local disk")
+    local = local_git_dir(repo)
+    if Path(local).is_dir():
+        sync(repo)
+    (repo / ".git").unlink()
+    (repo / DRIVE_GIT / SYNC_STAMP).unlink(missing_ok=True)
+    (repo / DRIVE_GIT).rename(repo / ".git")
+    shutil.rmtree(local, ignore_errors=True)
+
+
+def ensure_restored(workspace):
+    """Start a detached restore for repos whose local .git is gone. Returns their count."""
+    pending = [repo for repo in find_repos(workspace) if needs_restore(repo)]
+    if pending:
+        subprocess.Popen(
+            [sys.executable, os.path.abspath(__file__), "restore", *map(str, pending)],
+            stdin=subprocess.DEVNULL,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+            start_new_session=True,
+            close_fds=True,
+        )
+    return len(pending)
+
+
+def format_setup(report):
+    """Render a setup report as text."""
+    before, after = report["before"], report["after"]
+    lines = [
+        f"{report['repo']}",
+        f"  git status: {before['best_s']}s → {after['best_s']}s ({report['speedup']}x faster;"
+        f" first run {before['first_s']}s → {after['first_s']}s)",
+    ]
+    marks = {"on": "✓", "skipped": "-", "unsupported": "-", "failed": "⚠️"}
+    for step in report["steps"]:
+        detail = f" ({step['detail']})" if step["detail"] else ""
+        lines.append(f"  {marks[step['status']]} {step['step']}: {step['status']}{detail}")
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    """Command entry point."""
+    parser = argparse.ArgumentParser(description="Speed up git in Drive-backed workspaces.")
+    sub = parser.add_subparsers(dest="action", required=True)
+    p = sub.add_parser("setup", help="Enable speedups, with before/after timing")
+    p.add_argument("repos", nargs="*")
+    p.add_argument("--local-git", action="store_true", help="Also keep .git on local disk")
+    p.add_argument("--skip-cache-test", action="store_true", help="Trust directory mtimes")
+    p.add_argument("--json", action="store_true")
+    for name in ("status", "bench", "sync", "restore"):
+        p = sub.add_parser(name)
+        p.add_argument("repos", nargs="*")
+    p = sub.add_parser("local-git", help="Keep .git on local disk (on) or on Drive (off)")
+    p.add_argument("state", choices=("on", "off"))
+    p.add_argument("repos", nargs=1)
+    # A bare /claude-colab:git-accel passes no arguments
+    args = parser.parse_args((sys.argv[1:] if argv is None else argv) or ["status"])
+
+    repos = [Path(r) for r in args.repos] or find_repos(current_workspace())
+    if args.action in ("sync", "restore") and not args.repos:
+        repos = [repo for repo in repos if keeps_local_git(repo)]
+        if not repos:
+            print("No repository keeps .git on local disk")
+            return 0
+    if not repos:
+        print("Error: no git repository in the current workspace", file=sys.stderr)
+        return 1
+    failed = 0
+    for repo in repos:
+        # One repo's error must not keep the others from syncing
+        try:
+            if args.action == "setup":
+                report = setup(repo, args.local_git, not args.skip_cache_test)
+                print(json.dumps(report) if args.json else format_setup(report))
+            elif args.action == "status":
+                print(json.dumps(status(repo)))
+            elif args.action == "bench":
+                timing = time_status(repo)
+                print(f"{repo}: git status {timing['best_s']}s (first run {timing['first_s']}s)")
+            elif args.action == "sync":
+                copied, removed = sync(repo)
+                print(f"✓ {repo}: synced .git to Drive ({copied} copied, {removed} removed)")
+            elif args.action == "restore":
+                print(f"✓ {repo}: restored local .git ({restore(repo)} files)")
+            elif args.state == "on":
+                print(f"✓ {repo}: .git now at {local_git_on(repo)} (Drive copy in {DRIVE_GIT})")
+            else:
+                local_git_off(repo)
+                print(f"✓ {repo}: .git moved back to Drive")
+        except (OSError, GitAccelError, subprocess.SubprocessError) as e:
+            print(f"Error: {repo}: {e}", file=sys.stderr)
+            failed += 1
+    if failed:
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
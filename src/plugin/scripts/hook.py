@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+"""
+Lazy entry point for the plugin's hooks.
+
+hooks.json runs every hook through this dispatcher, which imports only the
+module for the requested hook, so a PreToolUse check never pays for what
+SessionStart needs. Hook modules are imported rather than run as scripts,
+so Python caches their bytecode.
+
+Every run is timed and logged by hook_log.py (`/claude-colab:hook-stats`).
+
+Usage:
+    hook.py HOOK [ARGS...]
+    hook.py --import-only HOOK    # import the hook module and exit (startup budget test)
+
+Hooks: session_start, safety_check, markdown_formatter, statusline
+"""
+
+import sys
+
+# hook name -> (module providing main(), hook event, matcher in hooks.json)
+HOOKS = {
+    "session_start": ("session_start", "SessionStart", None),
+    "safety_check": ("safety_check", "PreToolUse", "Bash|Write|Edit|MultiEdit|NotebookEdit"),
+    "markdown_formatter": ("markdown_formatter", "PostToolUse", "Edit|Write"),
+    "statusline": ("statusline", "StatusLine", None),
+}
+
+
+def main(argv=None):
+    """Import and run one hook's main()."""
+    argv = sys.argv[1:] if argv is None else argv
+    import_only = bool(argv) and argv[0] == "--import-only"
+    if import_only:
+        argv = argv[1:]
+    if not argv or argv[0] not in HOOKS:
+        print(f"usage: hook.py [--import-only] {{{','.join(HOOKS)}}}", file=sys.stderr)
+        return 1
+
+    module_name, event, matcher = HOOKS[argv[0]]
+    if import_only:
+        __import__(module_name)
+        return 0
+
+    import hook_log
+
+    def run_hook():
+        # Imported inside the timed call so the log includes import cost
+        module = __import__(module_name)
+        sys.argv = [module.__file__, *argv[1:]]
+        return module.main()
+
+    return hook_log.run(argv[0], event, matcher, run_hook)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,239 @@
+#!/usr/bin/env python3
+"""
+Hook invocation log and latency report.
+
+hook.py appends two compact JSON lines to a local log for every hook run:
+one when the hook starts and one when it finishes. The finish record holds
+the event, matcher, duration, exit code and whether the hook blocked or
+warned. A start with no finish means the hook was killed, usually by its
+timeout in hooks.json. The log rotates to `hooks.jsonl.1` when it reaches
+MAX_BYTES, so at most twice that is kept.
+
+Set CLAUDE_COLAB_HOOK_LOG=0 to turn logging off.
+
+Usage:
+    hook_log.py [report] [--top N] [--json]
+    hook_log.py clear
+"""
+
+import json
+import os
+import sys
+import time
+
+LOG_NAME = "hooks.jsonl"
+MAX_BYTES = 1024 * 1024
+DETAIL_CHARS = 120
+# A start this old without a finish record is counted as a timeout
+KILLED_AFTER_S = 60
+
+# Fields added by the running hook via annotate()
+_annotations = {}
+
+
+def enabled():
+    """Return False when CLAUDE_COLAB_HOOK_LOG=0."""
+    return os.environ.get("CLAUDE_COLAB_HOOK_LOG", "1") != "0"
+
+
+def log_path():
+    """Path of the current log file (same directory as colab_env.STATE_DIR)."""
+    # Not imported from colab_env: pathlib alone would double a hook's startup time
+    state_dir = os.environ.get("CLAUDE_COLAB_STATE_DIR", "~/.cache/claude-colab")
+    return os.path.join(os.path.expanduser(state_dir), LOG_NAME)
+
+
+def annotate(**fields):
+    """Attach fields (e.g. decision="warn", detail=command) to the running hook's record."""
+    for key, value in fields.items():
+        _annotations[key] = value[:DETAIL_CHARS] if isinstance(value, str) else value
+
+
+def append(record, path=None):
+    """Append one record, rotating the log first if it would exceed MAX_BYTES."""
+    path = path or log_path()
+    line = (json.dumps(record, separators=(",", ":")) + "\n").encode()
+    try:
+        if os.path.getsize(path) + len(line) > MAX_BYTES:
+            os.replace(path, path + ".1")
+    except FileNotFoundError:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+    fd = os.open(path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+    try:
+        # One write per line keeps concurrent hooks from interleaving records
+        os.write(fd, line)
+    finally:
+        os.close(fd)
+
+
+def _append_quietly(record):
+    try:
+        append(record)
+    except OSError:
+        # Telemetry must never break a hook
+        pass
+
+
+def run(hook, event, matcher, func):
+    """Run `func()` for `hook`, logging its start and finish. Returns func's result."""
+    if not enabled():
+        return func()
+    started = time.time()
+    record_id = f"{os.getpid():x}-{int(started * 1000):x}"
+    _append_quietly({"id": record_id, "hook": hook, "start": round(started, 3)})
+    _annotations.clear()
+    t0 = time.perf_counter()
+    code = 1
+    try:
+        code = func()
+        return code
+    except SystemExit as e:
+        code = e.code if isinstance(e.code, int) else (0 if e.code is None else 1)
+        raise
+    except BaseException as e:
+        annotate(error=type(e).__name__)
+        raise
+    finally:
+        record = {
+            "id": record_id,
+            "hook": hook,
+            "ts": round(time.time(), 3),
+            "event": event,
+            "matcher": matcher,
+            "ms": round((time.perf_counter() - t0) * 1000, 2),
+            "exit": code or 0,
+        }
+        if record["exit"] == 2:
+            record["decision"] = "block"
+        record.update(_annotations)
+        _append_quietly(record)
+
+
+def load_records(path=None):
+    """Read records from the rotated and current log, oldest first."""
+    path = path or log_path()
+    records = []
+    for name in (path + ".1", path):
+        try:
+            with open(name, encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        records.append(json.loads(line))
+                    except ValueError:
+                        continue
+        except OSError:
+            continue
+    return records
+
+
+def percentile(values, pct):
+    """Nearest-rank percentile of a sorted list."""
+    if not values:
+        return None
+    rank = max(0, -(-len(values) * pct // 100) - 1)
+    return values[int(rank)]
+
+
+def summarize(records, top=10, now=None):
+    """Per-hook latency percentiles, block/warn/error/timeout counts and the slowest runs."""
+    now = time.time() if now is None else now
+    finished = {record["id"] for record in records if "ms" in record}
+    hooks = {}
+
+    def stats(name):
+        return hooks.setdefault(
+            name,
+            {"runs": 0, "durations": [], "blocked": 0, "warned": 0, "errors": 0, "timeouts": 0},
+        )
+
+    for record in records:
+        if "start" in record:
+            if record["id"] not in finished and now - record["start"] > KILLED_AFTER_S:
+                stats(record["hook"])["timeouts"] += 1
+            continue
+        entry = stats(record["hook"])
+        entry["runs"] += 1
+        entry["durations"].append(record["ms"])
+        entry["blocked"] += record.get("decision") == "block"
+        entry["warned"] += record.get("decision") == "warn"
+        entry["errors"] += record["exit"] not in (0, 2) or "error" in record
+
+    for entry in hooks.values():
+        durations = sorted(entry.pop("durations"))
+        entry.update(
+            {
+                "p50_ms": percentile(durations, 50),
+                "p95_ms": percentile(durations, 95),
+                "p99_ms": percentile(durations, 99),
+                "max_ms": durations[-1] if durations else None,
+                "total_ms": round(sum(durations), 1),
+            }
+        )
+
+    slowest = sorted((r for r in records if "ms" in r), key=lambda r: -r["ms"])[:top]
+    return {"hooks": hooks, "slowest": slowest}
+
+
+def format_report(summary):
+    """Render a summary as text."""
+    if not summary["hooks"]:
+        return "No hook runs logged yet"
+
+    def ms(value):
+        return f"{value:8.1f}" if value is not None else f"{'-':>8}"
+
+    lines = [
+        f"{'hook':<20} {'runs':>6} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'max ms':>8}"
+        f" {'blocked':>7} {'warned':>6} {'errors':>6} {'timeouts':>8}"
+    ]
+    for name, s in sorted(summary["hooks"].items(), key=lambda item: -item[1]["total_ms"]):
+        lines.append(
+            f"{name:<20} {s['runs']:>6} {ms(s['p50_ms'])} {ms(s['p95_ms'])} {ms(s['p99_ms'])}"
+            f" {ms(s['max_ms'])} {s['blocked']:>7} {s['warned']:>6} {s['errors']:>6}"
+            f" {s['timeouts']:>8}"
+        )
+    if summary["slowest"]:
+        lines.append("\nSlowest runs:")
+        for r in summary["slowest"]:
+            stamp = time.strftime("%m-%d %H:%M:%S", time.localtime(r["ts"]))
+            detail = r.get("detail") or r.get("error") or ""
+            lines.append(f"  {r['ms']:8.1f} ms  {stamp}  {r['hook']:<18} {detail}")
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    """Command entry point."""
+    # Imported here: every hook imports this module for annotate()
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Hook latency report.")
+    sub = parser.add_subparsers(dest="action", required=True)
+    p = sub.add_parser("report", help="Summarize hook latency from the log")
+    p.add_argument("--top", type=int, default=10, help="Number of slowest runs to list")
+    p.add_argument("--json", action="store_true")
+    sub.add_parser("clear", help="Delete the log")
+    # A bare /claude-colab:hook-stats passes no arguments
+    args = parser.parse_args((sys.argv[1:] if argv is None else argv) or ["report"])
+
+    path = log_path()
+    if args.action == "clear":
+        for name in (path, path + ".1"):
+            try:
+                os.unlink(name)
+            except FileNotFoundError:
+                pass
+        print("✓ Hook log cleared")
+        return 0
+
+    summary = summarize(load_records(path), top=args.top)
+    if args.json:
+        print(json.dumps(summary, separators=(",", ":")))
+    else:
+        print(format_report(summary))
+        if not enabled():
+            print("\n⚠️ Logging is off (CLAUDE_COLAB_HOOK_LOG=0)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
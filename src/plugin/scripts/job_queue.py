@@ -0,0 +1,437 @@
+#!/usr/bin/env python3
+"""
+Background job queue for long GPU runs.
+
+Jobs are shell commands kept in a queue file in the workspace
+(`.claude/jobs/queue.json`), so the queue survives Claude restarts and, with
+a Drive workspace, runtime restarts. A detached scheduler starts queued jobs
+in submission order and exits when the queue is empty. Each job runs in its
+own session, detached from the terminal, and logs stdout and stderr to
+`.claude/jobs/<id>.log`.
+
+A job submitted without --gpu-mem is exclusive: it runs alone. Jobs with
+--gpu-mem run side by side while their declared memory fits the GPU
+(CLAUDE_COLAB_GPU_MEM overrides the detected total, in MB) and the GPU has
+that much free. The queue is strictly FIFO, so a large job is never starved
+by smaller ones behind it.
+
+A job found dead without an exit status (e.g. after a runtime restart) is
+marked "interrupted". `resume` puts a failed, cancelled or interrupted job
+back at the end of the queue.
+
+Usage:
+    job_queue.py submit [--name NAME] [--gpu-mem 8G] [--cwd DIR] -- COMMAND...
+    job_queue.py list [--all] [--json]   # no arguments: list --all
+    job_queue.py tail ID [-n LINES] [-f]
+    job_queue.py cancel ID
+    job_queue.py resume ID
+    job_queue.py run          # the scheduler loop (started automatically)
+"""
+
+import argparse
+import fcntl
+import hashlib
+import json
+import os
+import shlex
+import shutil
+import signal
+import subprocess
+import sys
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+from colab_env import (
+    boot_id,
+    current_workspace,
+    hold_pid_file,
+    parse_size,
+    pid_running,
+    read_json,
+    read_pid,
+    state_path,
+)
+
+JOBS_DIR = ".claude/jobs"
+QUEUE_NAME = "queue.json"
+POLL_INTERVAL = 2.0
+CANCEL_GRACE_S = 10
+FINISHED = ("done", "failed", "cancelled", "interrupted")
+
+
+class JobError(Exception):
+    """Raised for an unknown job or an invalid state change."""
+
+
+def jobs_dir(workspace):
+    """Directory holding the queue file and job logs."""
+    path = Path(workspace) / JOBS_DIR
+    path.mkdir(parents=True, exist_ok=True)
+    return path
+
+
+def _digest(workspace):
+    return hashlib.blake2b(str(Path(workspace).resolve()).encode(), digest_size=6).hexdigest()
+
+
+def load_queue(workspace):
+    """Read the queue without locking (for display)."""
+    return read_json(Path(workspace) / JOBS_DIR / QUEUE_NAME) or {"next_id": 1, "jobs": []}
+
+
+@contextmanager
+def locked_queue(workspace):
+    """Yield the queue under an exclusive lock and write it back atomically."""
+    # The lock lives on local disk: Drive's FUSE mount does not support flock
+    with open(state_path(f"jobs-{_digest(workspace)}.lock"), "a") as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        queue = load_queue(workspace)
+        yield queue
+        path = jobs_dir(workspace) / QUEUE_NAME
+        tmp = path.with_suffix(".tmp")
+        tmp.write_text(json.dumps(queue, indent=1))
+        os.replace(tmp, path)
+
+
+def find_job(queue, job_id):
+    """Return the job with `job_id` from a queue."""
+    for job in queue["jobs"]:
+        if job["id"] == int(job_id):
+            return job
+    raise JobError(f"no job {job_id}")
+
+
+def gpu_memory():
+    """Return (total MB, free MB) of GPU 0, or (None, None) without a GPU."""
+    override = os.environ.get("CLAUDE_COLAB_GPU_MEM")
+    if override:
+        return int(override), int(override)
+    if not shutil.which("nvidia-smi"):
+        return None, None
+    try:
+        output = subprocess.run(
+            ["nvidia-smi", "--query-gpu=memory.total,memory.free", "--format=csv,noheader,nounits"],
+            capture_output=True,
+            text=True,
+            timeout=10,
+        ).stdout
+        total, free = (int(v) for v in output.splitlines()[0].split(","))
+        return total, free
+    except (OSError, ValueError, IndexError, subprocess.SubprocessError):
+        return None, None
+
+
+def can_start(job, running, total, free):
+    """Whether `job` may start next to the `running` jobs."""
+    if any(other.get("gpu_mem") is None for other in running):
+        return False
+    if job.get("gpu_mem") is None:
+        return not running
+    if total is None:
+        return True
+    reserved = sum(other["gpu_mem"] for other in running)
+    return reserved + job["gpu_mem"] <= total and job["gpu_mem"] <= free
+
+
+def submit(workspace, command, name=None, gpu_mem=None, cwd=None, start=True):
+    """Add a job to the queue and make sure the scheduler is running. Returns the job."""
+    with locked_queue(workspace) as queue:
+        job = {
+            "id": queue["next_id"],
+            "name": name or command.split()[0],
+            "command": command,
+            "cwd": str(Path(cwd or workspace).resolve()),
+            "gpu_mem": gpu_mem,
+            "state": "queued",
+            "queued": time.time(),
+            "attempts": 0,
+        }
+        queue["next_id"] += 1
+        queue["jobs"].append(job)
+    if start:
+        ensure_scheduler(workspace)
+    return job
+
+
+def _launch(workspace, job):
+    """Start a job detached from the terminal. Returns its Popen."""
+    directory = jobs_dir(workspace)
+    exit_file = directory / f"{job['id']}.exit"
+    exit_file.unlink(missing_ok=True)
+    # The subshell lets the exit status be recorded even if the command calls `exit`
+    script = f"(\n{job['command']}\n)\necho $? > {shlex.quote(str(exit_file))}\n"
+    with open(directory / f"{job['id']}.log", "ab") as log:
+        log.write(f"=== job {job['id']} attempt {job['attempts'] + 1}: {job['command']}\n".encode())
+        log.flush()
+        process = subprocess.Popen(
+            ["bash", "-c", script],
+            cwd=job["cwd"],
+            stdin=subprocess.DEVNULL,
+            stdout=log,
+            stderr=subprocess.STDOUT,
+            start_new_session=True,
+            env={**os.environ, "CLAUDE_COLAB_JOB_ID": str(job["id"])},
+        )
+    job.update(
+        state="running",
+        pid=process.pid,
+        boot=boot_id(),
+        started=time.time(),
+        attempts=job["attempts"] + 1,
+    )
+    return process
+
+
+def _alive(job, children):
+    process = children.get(job["id"])
+    if process is not None:
+        return process.poll() is None
+    return job.get("boot") == boot_id() and pid_running(job["pid"])
+
+
+def reconcile(workspace, queue, children=None):
+    """Record finished jobs. Returns the jobs still running."""
+    children = {} if children is None else children
+    running = []
+    for job in queue["jobs"]:
+        if job["state"] != "running":
+            continue
+        if _alive(job, children):
+            running.append(job)
+            continue
+        process = children.pop(job["id"], None)
+        exit_file = Path(workspace) / JOBS_DIR / f"{job['id']}.exit"
+        try:
+            code = int(exit_file.read_text().strip())
+        except (OSError, ValueError):
+            code = process.returncode if process is not None else None
+        job["exit"] = code
+        job["finished"] = time.time()
+        if job.get("cancel_requested"):
+            job["state"] = "cancelled"
+        elif code is None:
+            job["state"] = "interrupted"
+        else:
+            job["state"] = "done" if code == 0 else "failed"
+    return running
+
+
+def schedule(workspace, queue, children):
+    """Reconcile, then start queued jobs in order while they fit. Returns True if work remains."""
+    running = reconcile(workspace, queue, children)
+    queued = sorted((j for j in queue["jobs"] if j["state"] == "queued"), key=lambda j: j["queued"])
+    total, free = gpu_memory() if queued else (None, None)
+    for job in queued:
+        if not can_start(job, running, total, free):
+            # Strict FIFO: later jobs wait too
+            break
+        children[job["id"]] = _launch(workspace, job)
+        running.append(job)
+        if free is not None and job.get("gpu_mem"):
+            free -= job["gpu_mem"]
+    return bool(running) or any(job["state"] == "queued" for job in queued)
+
+
+def _pid_file(workspace):
+    return state_path(f"jobs-{_digest(workspace)}.pid")
+
+
+def scheduler_pid(workspace):
+    """PID of the scheduler for `workspace`, or None."""
+    return read_pid(_pid_file(workspace))
+
+
+def run(workspace, poll=POLL_INTERVAL):
+    """
+    Scheduler loop: start jobs as capacity frees up; exit when the queue is idle.
+
+    Returns at once if another scheduler for `workspace` is running.
+    """
+    with hold_pid_file(_pid_file(workspace)) as held:
+        if not held:
+            return 0
+        # Jobs run in their own sessions, so stopping the scheduler leaves them running
+        signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))
+        children = {}
+        while True:
+            with locked_queue(workspace) as queue:
+                busy = schedule(workspace, queue, children)
+            if not busy:
+                return 0
+            time.sleep(poll)
+
+
+def ensure_scheduler(workspace):
+    """Start a detached scheduler for `workspace` if none is running. Returns its pid."""
+    workspace = Path(workspace).resolve()
+    pid = scheduler_pid(workspace)
+    if pid:
+        return pid
+    process = subprocess.Popen(
+        [sys.executable, os.path.abspath(__file__), "--workspace", str(workspace), "run"],
+        stdin=subprocess.DEVNULL,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+        start_new_session=True,
+        close_fds=True,
+    )
+    return process.pid
+
+
+def refresh(workspace):
+    """Record jobs that ended while no scheduler ran; restart it if jobs are queued."""
+    if scheduler_pid(workspace):
+        return load_queue(workspace)
+    with locked_queue(workspace) as queue:
+        reconcile(workspace, queue)
+    if any(job["state"] == "queued" for job in queue["jobs"]):
+        ensure_scheduler(workspace)
+    return queue
+
+
+def cancel(workspace, job_id, grace=CANCEL_GRACE_S):
+    """Cancel a queued job or stop a running one (SIGTERM, then SIGKILL). Returns the job."""
+    with locked_queue(workspace) as queue:
+        job = find_job(queue, job_id)
+        if job["state"] in FINISHED:
+            raise JobError(f"job {job_id} already {job['state']}")
+        job["cancel_requested"] = time.time()
+        if job["state"] == "queued":
+            job["state"] = "cancelled"
+            return job
+        pid = job["pid"]
+    try:
+        os.killpg(pid, signal.SIGTERM)
+        # Wait for the whole group: the job may still be saving a checkpoint
+        deadline = time.monotonic() + grace
+        while time.monotonic() < deadline:
+            os.killpg(pid, 0)
+            time.sleep(0.2)
+        os.killpg(pid, signal.SIGKILL)
+    except ProcessLookupError:
+        pass
+    # Without a scheduler nobody else records the cancellation
+    refresh(workspace)
+    return find_job(load_queue(workspace), job_id)
+
+
+def resume(workspace, job_id):
+    """Queue a failed, cancelled or interrupted job again. Returns the job."""
+    with locked_queue(workspace) as queue:
+        job = find_job(queue, job_id)
+        if job["state"] not in FINISHED or job["state"] == "done":
+            raise JobError(
+                f"job {job_id} is {job['state']}; only failed, cancelled or "
+                "interrupted jobs can be resumed"
+            )
+        for key in ("pid", "boot", "started", "finished", "exit", "cancel_requested"):
+            job.pop(key, None)
+        job.update(state="queued", queued=time.time())
+    ensure_scheduler(workspace)
+    return job
+
+
+def tail(workspace, job_id, lines=20, follow=False, poll=1.0, out=None):
+    """Print the end of a job's log; with `follow`, keep printing until the job ends."""
+    out = out or sys.stdout
+    log = Path(workspace) / JOBS_DIR / f"{int(job_id)}.log"
+    find_job(load_queue(workspace), job_id)
+    try:
+        with open(log, "rb") as f:
+            out.write(b"".join(f.readlines()[-lines:]).decode(errors="replace"))
+            while follow:
+                chunk = f.read()
+                if chunk:
+                    out.write(chunk.decode(errors="replace"))
+                    out.flush()
+                else:
+                    state = find_job(load_queue(workspace), job_id)["state"]
+                    if state != "running":
+                        out.write(f"\n[job {job_id} {state}]\n")
+                        break
+                    time.sleep(poll)
+    except FileNotFoundError:
+        print(f"(job {job_id} has not started)", file=out)
+
+
+def _duration(job):
+    if "started" not in job:
+        return "-"
+    seconds = int(job.get("finished", time.time()) - job["started"])
+    return f"{seconds // 3600}:{seconds // 60 % 60:02d}:{seconds % 60:02d}"
+
+
+def format_jobs(jobs):
+    """Render jobs as a table."""
+    if not jobs:
+        return "No jobs"
+    lines = [f"{'id':>4}  {'state':<11} {'gpu':>6} {'time':>8} {'exit':>4}  name"]
+    for job in jobs:
+        gpu = "excl" if job.get("gpu_mem") is None else f"{job['gpu_mem'] / 1024:.1f}G"
+        code = job.get("exit")
+        lines.append(
+            f"{job['id']:>4}  {job['state']:<11} {gpu:>6} {_duration(job):>8} "
+            f"{'-' if code is None else code:>4}  {job['name']}"
+        )
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    """Command entry point."""
+    parser = argparse.ArgumentParser(description="Background GPU job queue.")
+    parser.add_argument("--workspace", help="Workspace (default: the current one)")
+    sub = parser.add_subparsers(dest="action", required=True)
+    p = sub.add_parser("submit", help="Queue a shell command")
+    p.add_argument("--name")
+    p.add_argument("--gpu-mem", help="GPU memory the job needs (e.g. 8G); omit to run alone")
+    p.add_argument("--cwd", help="Working directory (default: the workspace)")
+    p.add_argument("command", nargs=argparse.REMAINDER)
+    p = sub.add_parser("list", help="Show jobs")
+    p.add_argument("--all", action="store_true", help="Include finished jobs")
+    p.add_argument("--json", action="store_true")
+    p = sub.add_parser("tail", help="Show a job's log")
+    p.add_argument("id", type=int)
+    p.add_argument("-n", "--lines", type=int, default=20)
+    p.add_argument("-f", "--follow", action="store_true")
+    for name, help_text in (("cancel", "Cancel or stop a job"), ("resume", "Re-queue a job")):
+        sub.add_parser(name, help=help_text).add_argument("id", type=int)
+    sub.add_parser("run", help="Run the scheduler in the foreground")
+    # A bare /claude-colab:jobs passes no arguments
+    args = parser.parse_args((sys.argv[1:] if argv is None else argv) or ["list", "--all"])
+
+    workspace = Path(args.workspace or current_workspace()).resolve()
+    try:
+        if args.action == "run":
+            return run(workspace)
+        if args.action == "submit":
+            command = args.command[1:] if args.command[:1] == ["--"] else args.command
+            if not command:
+                parser.error("submit needs a command")
+            # A single argument is a shell command line; several are quoted as argv
+            line = command[0] if len(command) == 1 else shlex.join(command)
+            # A plain number is MB
+            gpu_mem = parse_size(args.gpu_mem, "M") // 2**20 if args.gpu_mem else None
+            job = submit(workspace, line, args.name, gpu_mem, args.cwd)
+            print(f"✓ Queued job {job['id']} ({job['name']})")
+            print(f"  Log: {jobs_dir(workspace) / str(job['id'])}.log")
+        elif args.action == "list":
+            queue = refresh(workspace)
+            jobs = [j for j in queue["jobs"] if args.all or j["state"] not in FINISHED]
+            print(json.dumps(jobs) if args.json else format_jobs(jobs))
+        elif args.action == "tail":
+            tail(workspace, args.id, args.lines, args.follow)
+        elif args.action == "cancel":
+            job = cancel(workspace, args.id)
+            print(f"✓ Job {job['id']} {job['state']}")
+        elif args.action == "resume":
+            job = resume(workspace, args.id)
+            print(f"✓ Job {job['id']} queued again (attempt {job['attempts'] + 1})")
+    except (JobError, ValueError, OSError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
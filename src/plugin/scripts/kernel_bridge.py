@@ -0,0 +1,295 @@
+#!/usr/bin/env python3
+"""
+Run Python in a persistent local Jupyter kernel.
+
+Each `python3 -c ...` through Bash starts a fresh interpreter and imports
+torch, pandas and friends again (often 5-10 s). `exec` sends code to a
+long-lived IPython kernel instead, so imports, loaded data and models stay
+in memory between calls. The kernel is started on demand through
+jupyter_client, detached from the calling process, and lives until `stop`
+or `restart`.
+
+`exec` prints the code's stdout/stderr, the repr of its last expression
+(truncated) and the traceback of an error, and exits 1 if the code raised.
+Rich outputs (images, HTML) are listed by MIME type, not printed. When the
+timeout expires the kernel is interrupted (KeyboardInterrupt) and keeps its
+state.
+
+Requires jupyter_client and ipykernel (both preinstalled on Colab).
+
+Usage:
+    kernel_bridge.py exec 'CODE' [--timeout SECONDS] [--json]
+    kernel_bridge.py exec --file script.py
+    echo 'CODE' | kernel_bridge.py exec
+    kernel_bridge.py [status] | restart | stop
+"""
+
+import argparse
+import fcntl
+import json
+import os
+import queue
+import re
+import signal
+import subprocess
+import sys
+import time
+
+from colab_env import pid_running, read_pid, state_path
+
+DEFAULT_TIMEOUT = 600
+START_TIMEOUT = 60
+STOP_GRACE_S = 5
+MAX_STREAM_CHARS = 20_000
+MAX_REPR_CHARS = 2_000
+ANSI = re.compile(r"\x1b\[[0-9;]*m")
+
+
+class KernelError(Exception):
+    """Raised when the kernel cannot be started or reached."""
+
+
+def connection_file():
+    return state_path("kernel", "kernel.json")
+
+
+def pid_file():
+    return state_path("kernel", "kernel.pid")
+
+
+def kernel_pid():
+    """Pid of the running kernel, or None."""
+    return read_pid(pid_file())
+
+
+def _require_jupyter():
+    try:
+        import ipykernel  # noqa: F401
+        import jupyter_client
+    except ImportError:
+        raise KernelError("jupyter_client and ipykernel are required (pip install ipykernel)")
+    return jupyter_client
+
+
+def start(cwd=None):
+    """Start a detached kernel if none is running. Returns its pid."""
+    # Concurrent callers must not both launch a kernel: hold the lock from the
+    # pid check until the new pid is written
+    with open(state_path("kernel", "kernel.lock"), "a") as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        pid = kernel_pid()
+        if pid:
+            return pid
+        jupyter_client = _require_jupyter()
+        from jupyter_client.launcher import launch_kernel
+
+        connection = str(connection_file())
+        jupyter_client.write_connection_file(connection, ip="127.0.0.1")
+        log = open(state_path("kernel", "kernel.log"), "ab")
+        process = launch_kernel(
+            [sys.executable, "-m", "ipykernel_launcher", "-f", connection],
+            stdin=subprocess.DEVNULL,
+            stdout=log,
+            stderr=log,
+            cwd=cwd or os.getcwd(),
+            env={**os.environ, "MPLBACKEND": "Agg"},
+            # Survives the CLI process that started it
+            independent=True,
+        )
+        log.close()
+        pid_file().write_text(str(process.pid))
+        return process.pid
+
+
+def stop(grace=STOP_GRACE_S):
+    """Stop the kernel. Returns True if one was running."""
+    pid = kernel_pid()
+    if not pid:
+        return False
+    try:
+        client = connect(timeout=grace)
+        client.shutdown()
+        client.stop_channels()
+    except KernelError:
+        pass
+    deadline = time.monotonic() + grace
+    while pid_running(pid) and time.monotonic() < deadline:
+        time.sleep(0.1)
+    try:
+        os.killpg(pid, signal.SIGKILL)
+    except ProcessLookupError:
+        pass
+    for path in (pid_file(), connection_file()):
+        path.unlink(missing_ok=True)
+    return True
+
+
+def connect(timeout=START_TIMEOUT):
+    """A client with channels started, connected to the running kernel."""
+    _require_jupyter()
+    from jupyter_client import BlockingKernelClient
+
+    client = BlockingKernelClient()
+    try:
+        client.load_connection_file(str(connection_file()))
+        client.start_channels()
+        client.wait_for_ready(timeout=timeout)
+    except (OSError, RuntimeError) as e:
+        client.stop_channels()
+        raise KernelError(f"kernel not reachable: {e}")
+    return client
+
+
+def _truncate(text, limit):
+    if len(text) <= limit:
+        return text
+    half = limit // 2
+    return f"{text[:half]}\n... [{len(text) - limit} characters truncated] ...\n{text[-half:]}"
+
+
+def apply_message(result, msg):
+    """Fold one IOPub message into `result`. Returns True once the kernel is idle."""
+    kind, content = msg["msg_type"], msg["content"]
+    if kind == "stream":
+        result[content["name"]] += content["text"]
+    elif kind == "execute_result":
+        result["result"] = content["data"].get("text/plain", "")
+    elif kind == "display_data":
+        mime = sorted(set(content["data"]) - {"text/plain"})
+        if mime:
+            result["displays"].append(", ".join(mime))
+        else:
+            result["stdout"] += content["data"].get("text/plain", "") + "\n"
+    elif kind == "error":
+        result["error"] = {
+            "ename": content["ename"],
+            "evalue": content["evalue"],
+            "traceback": ANSI.sub("", "\n".join(content["traceback"])),
+        }
+    elif kind == "status":
+        return content["execution_state"] == "idle"
+    return False
+
+
+def _kernel_died(result, pid):
+    """Record a dead kernel (OOM kill, os._exit) and forget it so the next call starts one."""
+    result["error"] = {
+        "ename": "KernelDied",
+        "evalue": f"kernel (pid {pid}) exited",
+        "traceback": "Kernel died (out of memory, or the code exited the process); "
+        "its state is lost. The next exec starts a new kernel.",
+    }
+    for path in (pid_file(), connection_file()):
+        path.unlink(missing_ok=True)
+
+
+def execute(code, timeout=DEFAULT_TIMEOUT):
+    """Run `code` in the kernel (starting it if needed). Returns the collected output."""
+    started_kernel = not kernel_pid()
+    pid = start()
+    result = {"stdout": "", "stderr": "", "result": None, "displays": [], "error": None}
+    began = time.monotonic()
+    if not pid_running(pid):
+        _kernel_died(result, pid)
+        return _finish(result, began, started_kernel)
+    client = connect()
+    try:
+        msg_id = client.execute(code, store_history=True, allow_stdin=False)
+        deadline = began + timeout
+        interrupted = False
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0 and not interrupted:
+                # Interrupt keeps imports and data; the kernel reports KeyboardInterrupt
+                if pid_running(pid):
+                    os.kill(pid, signal.SIGINT)
+                interrupted = True
+                deadline = time.monotonic() + STOP_GRACE_S
+                result["timed_out"] = True
+                continue
+            if remaining <= 0:
+                break
+            try:
+                msg = client.get_iopub_msg(timeout=min(remaining, 1.0))
+            except queue.Empty:
+                # A dead kernel sends nothing more: don't wait out the timeout
+                if not pid_running(pid):
+                    _kernel_died(result, pid)
+                    break
+                continue
+            if msg["parent_header"].get("msg_id") != msg_id:
+                continue
+            if apply_message(result, msg):
+                break
+    finally:
+        client.stop_channels()
+    return _finish(result, began, started_kernel)
+
+
+def _finish(result, began, started_kernel):
+    """Truncate long output and add timing."""
+    result["stdout"] = _truncate(result["stdout"], MAX_STREAM_CHARS)
+    result["stderr"] = _truncate(result["stderr"], MAX_STREAM_CHARS)
+    if result["result"] is not None:
+        result["result"] = _truncate(result["result"], MAX_REPR_CHARS)
+    result["seconds"] = round(time.monotonic() - began, 2)
+    result["kernel_started"] = started_kernel
+    return result
+
+
+def format_result(result):
+    """Render an execution result as it would appear in a notebook."""
+    parts = [result["stdout"].rstrip("\n")] if result["stdout"] else []
+    if result["stderr"]:
+        parts.append(result["stderr"].rstrip("\n"))
+    parts.extend(f"[{mime} output not shown]" for mime in result["displays"])
+    if result["result"] is not None:
+        parts.append(result["result"])
+    if result["error"]:
+        parts.append(result["error"]["traceback"])
+    if result.get("timed_out"):
+        parts.append("⚠️ Timed out: the kernel was interrupted (state kept)")
+    return "\n".join(parts)
+
+
+def main(argv=None):
+    """Command entry point."""
+    parser = argparse.ArgumentParser(description="Run Python in a persistent local kernel.")
+    sub = parser.add_subparsers(dest="action", required=True)
+    p = sub.add_parser("exec", help="Execute code (argument, --file or stdin)")
+    p.add_argument("code", nargs="?")
+    p.add_argument("--file", help="Execute the contents of this file")
+    p.add_argument("--timeout", type=float, default=DEFAULT_TIMEOUT, help="Seconds")
+    p.add_argument("--json", action="store_true")
+    sub.add_parser("status", help="Show whether a kernel is running")
+    sub.add_parser("restart", help="Stop the kernel and start a fresh one")
+    sub.add_parser("stop", help="Stop the kernel and free its memory")
+    # A bare /claude-colab:kernel passes no arguments
+    args = parser.parse_args((sys.argv[1:] if argv is None else argv) or ["status"])
+
+    try:
+        if args.action == "exec":
+            if args.file:
+                with open(args.file) as f:
+                    code = f.read()
+            else:
+                code = args.code if args.code is not None else sys.stdin.read()
+            result = execute(code, args.timeout)
+            print(json.dumps(result) if args.json else format_result(result))
+            return 1 if result["error"] or result.get("timed_out") else 0
+        if args.action == "status":
+            pid = kernel_pid()
+            print(f"✓ Kernel running (pid {pid})" if pid else "No kernel running")
+        elif args.action == "restart":
+            stop()
+            print(f"✓ Kernel restarted (pid {start()})")
+        elif args.action == "stop":
+            print("✓ Kernel stopped" if stop() else "No kernel running")
+    except (OSError, KernelError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
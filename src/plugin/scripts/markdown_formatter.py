@@ -5,9 +5,10 @@ Auto-formats markdown files after Edit/Write operations.
 """
 
 import os
-import subprocess
 import sys
 
+from hook_log import annotate
+
 
 def get_markdown_files():
     """Get list of markdown files from CLAUDE_FILE_PATHS environment variable."""
@@ -25,6 +26,8 @@ def get_markdown_files():
 
 def format_markdown_file(filepath):
     """Format a single markdown file using available formatter."""
+    import subprocess
+
     # Try to use prettier if available
     try:
         result = subprocess.run(
@@ -66,6 +69,7 @@ def main():
     if not files:
         return 0
 
+    annotate(detail=" ".join(files))
     formatted_count = 0
     for filepath in files:
         if format_markdown_file(filepath):
@@ -0,0 +1,781 @@
+#!/usr/bin/env python3
+"""
+Notebook runner that re-executes only the cells whose inputs changed.
+
+Each code cell gets a key: a hash of its source, the keys of the cells that
+last defined the names it reads, and the size/mtime of files named by string
+literals in it (e.g. "data/train.csv"). After a cell runs, its output and
+the namespace names it (re)bound are pickled into an on-disk cache under
+that key. On the next run a cell whose key is cached is not executed: its
+output is replayed, and its values are loaded only if a cell that does run
+needs them. Editing the last cell re-runs just that cell.
+
+Dependencies come from the cell's AST:
+- a cell writes the names it assigns, imports, defines or deletes, and the
+  names it mutates (`df["x"] = ...`, `df.fit(...)`, `update(df)`)
+- a cell reads every other name it uses, including inside function bodies;
+  a cell calling those functions also reads their globals as bound above it,
+  and writes the globals they mutate (`def add(x): df["y"] = x`)
+- a cell that can't be parsed (or uses `import *`) depends on everything above
+
+Side effects outside the namespace (written files, changed cwd, installed
+packages) are not replayed; `--rerun CELL` forces a cell and everything
+depending on it to run. Cells whose values can't be pickled (open files,
+generators; functions and classes without cloudpickle) are re-executed when
+a later cell needs them.
+
+The cache lives on local disk (CLAUDE_COLAB_CELL_CACHE, default
+/content/.cell-cache) and evicts least-recently-used entries to stay under
+CLAUDE_COLAB_CELL_CACHE_QUOTA (default 10G).
+
+Usage:
+    notebook_cache.py run NOTEBOOK [--rerun CELL]... [--no-cache] [--allow-errors]
+                                   [--all-outputs] [--timeout SECONDS] [--json]
+    notebook_cache.py plan NOTEBOOK [--rerun CELL]... [--json]
+    notebook_cache.py status [--json]
+    notebook_cache.py clear
+"""
+
+import argparse
+import ast
+import contextlib
+import hashlib
+import importlib
+import io
+import json
+import os
+import pickle
+import re
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import types
+from pathlib import Path
+
+from colab_env import parse_size
+from notebook_tool import Notebook, NotebookError
+
+DEFAULT_CACHE_DIR = "/content/.cell-cache"
+DEFAULT_QUOTA = "10G"
+DEFAULT_TIMEOUT = 3600
+CACHE_FORMAT = 1
+MAX_OUTPUT_CHARS = 10_000
+MAX_PATH_LITERAL = 1024
+# Calls that don't mutate their arguments
+PURE_CALLS = frozenset(
+    {
+        "abs", "all", "any", "bool", "dict", "display", "enumerate", "float", "format",
+        "getattr", "hasattr", "hash", "id", "int", "isinstance", "len", "list", "max",
+        "min", "print", "range", "repr", "reversed", "round", "set", "sorted", "str",
+        "sum", "tuple", "type", "zip",
+    }
+)  # fmt: skip
+ANSI = re.compile(r"\x1b\[[0-9;]*m")
+# IPython's own namespace entries
+IGNORED_NAMES = re.compile(r"^(_+|_i+|_i?\d+|_[oid]h|In|Out|exit|quit|get_ipython|open|__\w+__)$")
+
+
+# --- dependency analysis ------------------------------------------------------
+
+
+class CellAnalyzer(ast.NodeVisitor):
+    """Collects the names a cell reads, binds and mutates, and its string literals."""
+
+    def __init__(self):
+        self.reads, self.binds, self.mutates = set(), set(), set()
+        # Names used by the cell itself, outside function bodies (e.g. functions it calls)
+        self.top_reads = set()
+        self.imports, self.literals = set(), set()
+        # Functions and classes it defines
+        self.functions = set()
+        # Read or mutated when a function defined here is called, not when the cell runs
+        self.deferred, self.deferred_mutates = set(), set()
+        self.star_import = False
+        # > 0 inside function, lambda and class bodies, whose bindings are local
+        self.depth = 0
+        # Parameters of the enclosing functions
+        self.params = frozenset()
+
+    def _bind(self, name):
+        if self.depth == 0:
+            self.binds.add(name)
+
+    def _mutate(self, node):
+        # The root name of a.b[c].d
+        while isinstance(node, (ast.Attribute, ast.Subscript, ast.Starred)):
+            node = node.value
+        if isinstance(node, ast.Name) and node.id not in self.params:
+            (self.deferred_mutates if self.depth else self.mutates).add(node.id)
+
+    def _body(self, nodes, args=None):
+        outer = self.params
+        if args is not None:
+            params = (*args.posonlyargs, *args.args, args.vararg, *args.kwonlyargs, args.kwarg)
+            self.params = outer | {arg.arg for arg in params if arg is not None}
+        self.depth += 1
+        for node in nodes:
+            self.visit(node)
+        self.depth -= 1
+        self.params = outer
+
+    def visit_Name(self, node):
+        if isinstance(node.ctx, ast.Load):
+            self.reads.add(node.id)
+            (self.deferred if self.depth else self.top_reads).add(node.id)
+        else:
+            self._bind(node.id)
+
+    def visit_FunctionDef(self, node):
+        self._bind(node.name)
+        if self.depth == 0:
+            self.functions.add(node.name)
+        for child in (*node.decorator_list, *node.args.defaults, *node.args.kw_defaults):
+            if child is not None:
+                self.visit(child)
+        self._body(node.body, node.args)
+
+    def visit_AsyncFunctionDef(self, node):
+        self.visit_FunctionDef(node)
+
+    def visit_Lambda(self, node):
+        for child in (*node.args.defaults, *node.args.kw_defaults):
+            if child is not None:
+                self.visit(child)
+        self._body([node.body], node.args)
+
+    def visit_ClassDef(self, node):
+        self._bind(node.name)
+        if self.depth == 0:
+            self.functions.add(node.name)
+        for child in (*node.decorator_list, *node.bases, *(k.value for k in node.keywords)):
+            self.visit(child)
+        self._body(node.body)
+
+    def visit_Import(self, node):
+        for alias in node.names:
+            name = alias.asname or alias.name.split(".")[0]
+            self._bind(name)
+            self.imports.add(name)
+
+    def visit_ImportFrom(self, node):
+        for alias in node.names:
+            if alias.name == "*":
+                self.star_import = True
+            else:
+                self._bind(alias.asname or alias.name)
+
+    def visit_Global(self, node):
+        self.binds.update(node.names)
+
+    def visit_Attribute(self, node):
+        if not isinstance(node.ctx, ast.Load):
+            self._mutate(node.value)
+        self.generic_visit(node)
+
+    def visit_Subscript(self, node):
+        self.visit_Attribute(node)
+
+    def visit_AugAssign(self, node):
+        if isinstance(node.target, ast.Name):
+            self.reads.add(node.target.id)
+        self.generic_visit(node)
+
+    def visit_Call(self, node):
+        if isinstance(node.func, ast.Attribute):
+            self._mutate(node.func.value)
+        if not (isinstance(node.func, ast.Name) and node.func.id in PURE_CALLS):
+            for arg in (*node.args, *(k.value for k in node.keywords)):
+                self._mutate(arg)
+        self.generic_visit(node)
+
+    def visit_Constant(self, node):
+        value = node.value
+        if isinstance(value, str) and 0 < len(value) <= MAX_PATH_LITERAL and "\n" not in value:
+            self.literals.add(value)
+
+
+def python_source(source):
+    """The cell as plain Python (IPython magics and `!` commands translated)."""
+    try:
+        from IPython.core.inputtransformer2 import TransformerManager
+    except ImportError:
+        return source
+    try:
+        return TransformerManager().transform_cell(source)
+    except Exception:
+        return source
+
+
+def analyze(source):
+    """Analyze one cell's source. Returns the analyzer, or None if it can't be parsed."""
+    try:
+        tree = ast.parse(python_source(source))
+    except (SyntaxError, ValueError):
+        return None
+    analyzer = CellAnalyzer()
+    analyzer.visit(tree)
+    return None if analyzer.star_import else analyzer
+
+
+def _file_stamps(literals, base):
+    """(path, size, mtime_ns) for string literals naming existing files or directories."""
+    stamps = []
+    for literal in sorted(literals):
+        path = os.path.join(base, os.path.expanduser(literal))
+        try:
+            st = os.stat(path)
+        except (OSError, ValueError):
+            continue
+        stamps.append((literal, st.st_size, st.st_mtime_ns))
+    return stamps
+
+
+def cell_keys(sources, base):
+    """
+    Key, dependencies (positions of earlier cells) and written names of each cell.
+
+    A cell's written names are None if it can't be analyzed (it may write anything).
+
+    `base` is the notebook's directory: relative file literals are resolved
+    against it, and it is part of every key.
+    """
+    analyses = [analyze(source) for source in sources]
+    imported = set().union(*(a.imports for a in analyses if a))
+    salt = f"{CACHE_FORMAT}|{sys.version.split()[0]}|{os.path.abspath(base)}"
+    writer, last_opaque = {}, None
+    keys, deps, writes, unresolved, unresolved_writes = [], [], [], [], []
+    for pos, (source, analysis) in enumerate(zip(sources, analyses)):
+        if analysis is None:
+            # Reads and may rebind anything
+            cell_deps = set(range(pos))
+            pending, pending_writes = set(), set()
+        else:
+            direct = {writer.get(name, last_opaque) for name in analysis.reads}
+            direct.discard(None)
+            # Globals read inside functions of the cells it uses take their
+            # values from here (the call site), not from where they were defined
+            inherited = set().union(*(unresolved[d] for d in direct))
+            extra = {writer.get(name, last_opaque) for name in inherited}
+            extra.discard(None)
+            cell_deps = direct | extra
+            pending = analysis.deferred | inherited
+            # Likewise the globals mutated by the functions it uses itself are
+            # written here, not where those functions were defined
+            called = {
+                writer[name]
+                for name in analysis.top_reads
+                if name in writer and name in analyses[writer[name]].functions
+            }
+            inherited_writes = set().union(*(unresolved_writes[d] for d in called))
+            if analysis.functions & analysis.top_reads:
+                # It may call a function it defines
+                inherited_writes |= analysis.deferred_mutates
+            # Functions defined here write what the functions they use write
+            used = {writer.get(name, last_opaque) for name in analysis.deferred}
+            used.discard(None)
+            pending_writes = analysis.deferred_mutates.union(*(unresolved_writes[d] for d in used))
+        digest = hashlib.sha256(salt.encode())
+        digest.update(source.encode())
+        for dep in sorted(cell_deps):
+            digest.update(keys[dep].encode())
+        if analysis is not None:
+            digest.update(repr(_file_stamps(analysis.literals, base)).encode())
+        keys.append(digest.hexdigest())
+        deps.append(sorted(cell_deps))
+        unresolved.append(pending)
+        unresolved_writes.append(pending_writes)
+        if analysis is None:
+            writer, last_opaque = {}, pos
+            writes.append(None)
+        else:
+            mutated = analysis.mutates | inherited_writes
+            writes.append(analysis.binds | (mutated - imported))
+            for name in writes[-1]:
+                writer[name] = pos
+    return keys, deps, writes
+
+
+# --- on-disk cache ------------------------------------------------------------
+
+
+class CellCache:
+    """Cell results keyed by cell key: `<key>.json` (output, timing) and `<key>.pkl` (values)."""
+
+    def __init__(self, cache_dir=None, quota=None):
+        self.root = Path(
+            cache_dir or os.environ.get("CLAUDE_COLAB_CELL_CACHE") or DEFAULT_CACHE_DIR
+        )
+        quota = quota or os.environ.get("CLAUDE_COLAB_CELL_CACHE_QUOTA") or DEFAULT_QUOTA
+        self.quota = parse_size(quota) if isinstance(quota, str) else int(quota)
+        self.root.mkdir(parents=True, exist_ok=True)
+
+    def _paths(self, key):
+        return self.root / f"{key}.json", self.root / f"{key}.pkl"
+
+    def meta(self, key):
+        """The entry's metadata, or None if it isn't cached."""
+        meta_path, _ = self._paths(key)
+        try:
+            return json.loads(meta_path.read_text())
+        except (OSError, ValueError):
+            return None
+
+    def touch(self, key):
+        """Mark an entry as used (for LRU eviction)."""
+        try:
+            os.utime(self._paths(key)[0])
+        except OSError:
+            pass
+
+    def store(self, key, meta, blob=None):
+        """Write an entry atomically: values first, then the metadata that makes it visible."""
+        meta_path, values_path = self._paths(key)
+        if blob is not None:
+            tmp = values_path.with_suffix(f".{os.getpid()}.tmp")
+            tmp.write_bytes(blob)
+            os.replace(tmp, values_path)
+        else:
+            values_path.unlink(missing_ok=True)
+        tmp = meta_path.with_suffix(f".{os.getpid()}.tmp")
+        tmp.write_text(json.dumps(meta))
+        os.replace(tmp, meta_path)
+
+    def load_values(self, key):
+        """The pickled values of an entry."""
+        return pickle.loads(self._paths(key)[1].read_bytes())
+
+    def entries(self):
+        """(key, bytes, last used) of every entry, least recently used first."""
+        entries = []
+        for meta_path in self.root.glob("*.json"):
+            key = meta_path.stem
+            try:
+                size = meta_path.stat().st_size
+                used = meta_path.stat().st_mtime
+                values_path = self._paths(key)[1]
+                if values_path.exists():
+                    size += values_path.stat().st_size
+            except OSError:
+                continue
+            entries.append((key, size, used))
+        return sorted(entries, key=lambda entry: entry[2])
+
+    def evict(self, target=None, keep=()):
+        """Evict least-recently-used entries (except `keep`) down to `target` bytes."""
+        target = self.quota if target is None else target
+        entries = self.entries()
+        used = sum(size for _, size, _ in entries)
+        count = freed = 0
+        for key, size, _ in entries:
+            if used - freed <= target:
+                break
+            if key in keep:
+                continue
+            for path in self._paths(key):
+                path.unlink(missing_ok=True)
+            count += 1
+            freed += size
+        return count, freed
+
+    def status(self):
+        """Cache directory, quota, usage and entry count."""
+        entries = self.entries()
+        return {
+            "cache_dir": str(self.root),
+            "entries": len(entries),
+            "used_mb": round(sum(size for _, size, _ in entries) / 2**20, 1),
+            "quota_mb": round(self.quota / 2**20, 1),
+        }
+
+    def clear(self):
+        """Remove every entry."""
+        shutil.rmtree(self.root, ignore_errors=True)
+        self.root.mkdir(parents=True, exist_ok=True)
+
+
+# --- planning and execution ---------------------------------------------------
+
+
+def load_cells(notebook_path):
+    """(index, id, source) of every code cell."""
+    with Notebook(notebook_path) as nb:
+        return [(cell.index, cell.id, cell.source) for cell in nb.cells if cell.cell_type == "code"]
+
+
+def _resolve_refs(cells, refs):
+    """Positions (in `cells`) of cells referenced by id or notebook index (ids first)."""
+    positions = set()
+    for ref in refs:
+        matches = [pos for pos, (_, cell_id, _) in enumerate(cells) if cell_id == ref]
+        if not matches and ref.lstrip("-").isdigit():
+            matches = [pos for pos, (index, _, _) in enumerate(cells) if index == int(ref)]
+        if not matches:
+            raise NotebookError(f"no code cell {ref!r}")
+        positions.add(matches[0])
+    return positions
+
+
+def make_plan(notebook_path, cache, rerun=(), use_cache=True):
+    """
+    Decide what happens to each code cell: "run", "restore" (load its cached
+    values because a running cell needs them) or "replay" (show the cached
+    output only).
+    """
+    cells = load_cells(notebook_path)
+    keys, deps, writes = cell_keys(
+        [source for _, _, source in cells], os.path.dirname(notebook_path)
+    )
+    forced = _resolve_refs(cells, rerun) if use_cache else set(range(len(cells)))
+    for pos in range(len(cells)):
+        if any(dep in forced for dep in deps[pos]):
+            forced.add(pos)
+    metas = [None if pos in forced else cache.meta(key) for pos, key in enumerate(keys)]
+    run = {pos for pos, meta in enumerate(metas) if meta is None}
+    needed = set()
+    for pos in reversed(range(len(cells))):
+        if pos in needed and pos not in run and not metas[pos]["cacheable"]:
+            run.add(pos)
+        if pos in run or pos in needed:
+            needed.update(deps[pos])
+    plan = []
+    for pos, (index, cell_id, source) in enumerate(cells):
+        action = "run" if pos in run else "restore" if pos in needed else "replay"
+        plan.append(
+            {
+                "index": index,
+                "id": cell_id,
+                "key": keys[pos],
+                "deps": [cells[dep][0] for dep in deps[pos]],
+                "action": action,
+                "source": source,
+                "writes": None if writes[pos] is None else sorted(writes[pos]),
+                "meta": metas[pos],
+            }
+        )
+    return plan
+
+
+def _is_definition(value):
+    return isinstance(value, (types.FunctionType, type)) and value.__module__ == "__main__"
+
+
+def _estimated_size(value):
+    """A value's in-memory size (`nbytes` for arrays and tensors), without pickling it."""
+    try:
+        nbytes = getattr(value, "nbytes", 0)
+        return max(sys.getsizeof(value), nbytes if isinstance(nbytes, int) else 0)
+    except Exception:
+        return 0
+
+
+def pack_values(namespace, names, quota=None):
+    """
+    Pickle the values of `names`. Returns (blob, None) or (None, reason it can't be).
+
+    Values whose in-memory size already exceeds `quota` bytes are not pickled.
+    """
+    try:
+        import cloudpickle
+
+        dumps = cloudpickle.dumps
+    except ImportError:
+        dumps = pickle.dumps
+        cloudpickle = None
+    too_large = "values larger than the cache quota"
+    values, modules = {}, {}
+    estimated = 0
+    for name in sorted(names):
+        value = namespace[name]
+        if isinstance(value, types.ModuleType):
+            modules[name] = value.__name__
+            continue
+        estimated += _estimated_size(value)
+        if quota is not None and estimated > quota:
+            return None, too_large
+        if cloudpickle is None and _is_definition(value):
+            # Pickled by reference, so they can't be loaded before the cell has run
+            return None, f"defines {name} (install cloudpickle to cache it)"
+        try:
+            values[name] = dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        except Exception as e:
+            return None, f"{name}: {type(e).__name__}: {e}"[:200]
+    blob = pickle.dumps({"values": values, "modules": modules})
+    if quota is not None and len(blob) > quota:
+        return None, too_large
+    return blob, None
+
+
+def _rebind(value, namespace):
+    """
+    Point a notebook function (or a notebook class's methods) at `namespace`.
+
+    cloudpickle restores them with a private copy of the globals they read,
+    which would hide later rebindings of those globals.
+    """
+    if isinstance(value, (staticmethod, classmethod)):
+        return type(value)(_rebind(value.__func__, namespace))
+    if isinstance(value, types.FunctionType):
+        if value.__module__ != "__main__" or value.__globals__ is namespace:
+            return value
+        function = types.FunctionType(
+            value.__code__, namespace, value.__name__, value.__defaults__, value.__closure__
+        )
+        function.__kwdefaults__ = value.__kwdefaults__
+        function.__qualname__ = value.__qualname__
+        function.__doc__ = value.__doc__
+        function.__dict__.update(value.__dict__)
+        return function
+    if isinstance(value, type) and value.__module__ == "__main__":
+        for name, attribute in list(vars(value).items()):
+            if isinstance(attribute, (types.FunctionType, staticmethod, classmethod)):
+                setattr(value, name, _rebind(attribute, namespace))
+    return value
+
+
+def restore_values(cache, key, namespace, deleted):
+    """Load an entry's values into `namespace`."""
+    packed = cache.load_values(key)
+    for name, module in packed["modules"].items():
+        namespace[name] = importlib.import_module(module)
+    for name, blob in packed["values"].items():
+        namespace[name] = _rebind(pickle.loads(blob), namespace)
+    for name in deleted:
+        namespace.pop(name, None)
+
+
+def _truncate(text):
+    if len(text) <= MAX_OUTPUT_CHARS:
+        return text
+    half = MAX_OUTPUT_CHARS // 2
+    return f"{text[:half]}\n... [{len(text) - MAX_OUTPUT_CHARS} characters truncated] ...\n{text[-half:]}"
+
+
+def execute_cell(run, namespace, source, writes):
+    """
+    Run one cell. Returns (output, seconds, error, changed names, deleted names).
+
+    `writes` are the names cell_keys() found it writes, or None for any name.
+    """
+    before = {name: value for name, value in namespace.items() if not IGNORED_NAMES.match(name)}
+    buffer = io.StringIO()
+    error = None
+    started = time.perf_counter()
+    with contextlib.redirect_stdout(buffer), contextlib.redirect_stderr(buffer):
+        try:
+            run(source)
+        except BaseException as e:
+            error = f"{type(e).__name__}: {e}"
+    seconds = time.perf_counter() - started
+    after = {name for name in namespace if not IGNORED_NAMES.match(name)}
+    # Rebound names, plus names it may have mutated in place
+    changed = {name for name in after if before.get(name, before) is not namespace[name]}
+    if writes is not None:
+        changed |= set(writes) & after
+    else:
+        changed = after
+    deleted = sorted(set(before) - after)
+    return _truncate(ANSI.sub("", buffer.getvalue())), seconds, error, changed, deleted
+
+
+def worker(notebook_path, results_path, rerun, use_cache, allow_errors):
+    """Child process: follow the plan, appending one JSON line per code cell."""
+    from notebook_profiler import make_runner
+
+    cache = CellCache()
+    plan = make_plan(notebook_path, cache, rerun, use_cache)
+    run, namespace = make_runner()
+    used = set()
+    failed = False
+    with open(results_path, "a", buffering=1) as results:
+        for step in plan:
+            key, meta = step["key"], step["meta"]
+            result = {"index": step["index"], "id": step["id"], "deps": step["deps"]}
+            action = "skipped" if failed else step["action"]
+            if action == "restore":
+                try:
+                    restore_values(cache, key, namespace, meta["deleted"])
+                except Exception as e:
+                    # e.g. a class it needs is gone; run it instead
+                    result["restore_error"] = f"{type(e).__name__}: {e}"[:200]
+                    action = "run"
+            if action in ("restore", "replay"):
+                cache.touch(key)
+                used.add(key)
+                result.update(
+                    status="cached", output=meta["output"], saved_s=round(meta["seconds"], 3)
+                )
+            elif action == "run":
+                output, seconds, error, changed, deleted = execute_cell(
+                    run, namespace, step["source"], step["writes"]
+                )
+                result.update(status="ran", output=output, seconds=round(seconds, 3))
+                if error:
+                    result["error"] = error
+                    failed = not allow_errors
+                else:
+                    blob, reason = pack_values(namespace, changed, cache.quota)
+                    cache.store(
+                        key,
+                        {
+                            "cacheable": blob is not None,
+                            "reason": reason,
+                            "output": output,
+                            "seconds": seconds,
+                            "deleted": deleted,
+                            "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                        },
+                        blob,
+                    )
+                    used.add(key)
+                    if reason:
+                        result["not_cached"] = reason
+            else:
+                result["status"] = "skipped"
+            results.write(json.dumps(result) + "\n")
+    cache.evict(keep=used)
+
+
+def run_notebook(
+    notebook_path, rerun=(), use_cache=True, allow_errors=False, timeout=DEFAULT_TIMEOUT
+):
+    """
+    Run a notebook through the cache in a child process. Returns (cell results, status).
+
+    Cells run with the notebook's directory as cwd. If the run times out or
+    the process dies, the results of the cells that finished are returned.
+    """
+    notebook_path = os.path.abspath(notebook_path)
+    fd, results_path = tempfile.mkstemp(prefix="nbcache-", suffix=".jsonl")
+    os.close(fd)
+    cmd = [sys.executable, os.path.abspath(__file__), "_worker", notebook_path, results_path]
+    cmd += [f"--rerun={ref}" for ref in rerun]
+    if not use_cache:
+        cmd.append("--no-cache")
+    if allow_errors:
+        cmd.append("--allow-errors")
+    env = {**os.environ, "MPLBACKEND": "Agg"}
+    status = "completed"
+    try:
+        proc = subprocess.run(
+            cmd,
+            cwd=os.path.dirname(notebook_path),
+            env=env,
+            stdin=subprocess.DEVNULL,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.PIPE,
+            text=True,
+            timeout=timeout,
+        )
+        if proc.returncode != 0:
+            status = f"worker exited with {proc.returncode}: {proc.stderr.strip()[-500:]}"
+    except subprocess.TimeoutExpired:
+        status = f"timed out after {timeout}s"
+    with open(results_path) as f:
+        results = [json.loads(line) for line in f if line.strip()]
+    os.unlink(results_path)
+    return results, status
+
+
+def format_results(results, all_outputs=False):
+    """Render cell results: one line per cell, then the output of cells that ran."""
+    lines = []
+    for entry in results:
+        label = f"[{entry['index']}] {entry.get('id') or ''}".rstrip()
+        if entry["status"] == "cached":
+            lines.append(f"{label}: cached (saved {entry['saved_s']:.2f}s)")
+        elif entry["status"] == "ran":
+            lines.append(f"{label}: ran {entry['seconds']:.2f}s")
+        else:
+            lines.append(f"{label}: skipped after an error")
+        if entry.get("error"):
+            lines.append(f"  ✗ {entry['error'][:200]}")
+        if entry.get("not_cached"):
+            lines.append(f"  ⚠️ not cached: {entry['not_cached']}")
+        output = entry.get("output")
+        if output and (entry["status"] == "ran" or all_outputs):
+            lines.extend(f"  | {line}" for line in output.rstrip("\n").splitlines())
+    ran = [e for e in results if e["status"] == "ran"]
+    saved = sum(e.get("saved_s", 0) for e in results)
+    lines.append(
+        f"\n{len(ran)} of {len(results)} cell(s) ran in "
+        f"{sum(e['seconds'] for e in ran):.2f}s; cache saved {saved:.2f}s"
+    )
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    """Command entry point."""
+    parser = argparse.ArgumentParser(description="Run a notebook, re-executing changed cells.")
+    sub = parser.add_subparsers(dest="action", required=True)
+    p = sub.add_parser("run", help="Run the notebook through the cache")
+    p.add_argument("notebook")
+    p.add_argument("--rerun", action="append", default=[], metavar="CELL", help="Index or id")
+    p.add_argument("--no-cache", action="store_true", help="Run every cell (and re-cache)")
+    p.add_argument("--allow-errors", action="store_true", help="Keep going after a failing cell")
+    p.add_argument("--all-outputs", action="store_true", help="Show cached outputs too")
+    p.add_argument("--timeout", type=float, default=DEFAULT_TIMEOUT)
+    p.add_argument("--json", action="store_true")
+    p = sub.add_parser("plan", help="Show which cells would run, without running them")
+    p.add_argument("notebook")
+    p.add_argument("--rerun", action="append", default=[], metavar="CELL")
+    p.add_argument("--json", action="store_true")
+    p = sub.add_parser("status", help="Show cache usage")
+    p.add_argument("--json", action="store_true")
+    sub.add_parser("clear", help="Delete all cached cell results")
+    p = sub.add_parser("_worker")
+    p.add_argument("notebook")
+    p.add_argument("results")
+    p.add_argument("--rerun", action="append", default=[])
+    p.add_argument("--no-cache", action="store_true")
+    p.add_argument("--allow-errors", action="store_true")
+    args = parser.parse_args(argv)
+
+    try:
+        if args.action == "_worker":
+            worker(args.notebook, args.results, args.rerun, not args.no_cache, args.allow_errors)
+        elif args.action == "run":
+            results, status = run_notebook(
+                args.notebook, args.rerun, not args.no_cache, args.allow_errors, args.timeout
+            )
+            if args.json:
+                print(json.dumps({"status": status, "cells": results}, separators=(",", ":")))
+            else:
+                print(format_results(results, args.all_outputs))
+                if status != "completed":
+                    print(f"⚠️ Run {status}")
+            if status != "completed" or any(entry.get("error") for entry in results):
+                return 1
+        elif args.action == "plan":
+            plan = make_plan(os.path.abspath(args.notebook), CellCache(), args.rerun)
+            rows = [
+                {"index": s["index"], "id": s["id"], "action": s["action"], "deps": s["deps"]}
+                for s in plan
+            ]
+            if args.json:
+                print(json.dumps(rows))
+            else:
+                for row in rows:
+                    deps = ", ".join(map(str, row["deps"])) or "-"
+                    print(f"[{row['index']}] {row['id'] or ''}: {row['action']} (after {deps})")
+        elif args.action == "status":
+            status = CellCache().status()
+            if args.json:
+                print(json.dumps(status))
+            else:
+                print(
+                    f"{status['entries']} cached cell(s), {status['used_mb']} /"
+                    f" {status['quota_mb']} MB in {status['cache_dir']}"
+                )
+        elif args.action == "clear":
+            CellCache().clear()
+            print("✓ Cell cache cleared")
+    except (OSError, ValueError, NotebookError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,357 @@
+#!/usr/bin/env python3
+"""
+Per-cell execution profiler for notebooks.
+
+`run` executes a notebook headlessly in a child process and records, for
+every code cell, wall time, CPU time, peak RSS growth and GPU memory change.
+`report` reads the same numbers back from a notebook that was already
+profiled, or falls back to the timing metadata written by Jupyter
+(`metadata.execution`) or Colab (`metadata.executionInfo`).
+
+Results are printed as a sortable table (or JSON) and can be stored in each
+cell's `metadata.profile` so the numbers travel with the notebook.
+
+Usage:
+    notebook_profiler.py run NOTEBOOK [--timeout SECONDS] [--allow-errors]
+                                      [--write-metadata] [--sort KEY] [--top N] [--json]
+    notebook_profiler.py report NOTEBOOK [--sort KEY] [--top N] [--json]
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import types
+from datetime import datetime
+
+from notebook_tool import Notebook, NotebookError
+
+DEFAULT_TIMEOUT = 3600
+
+# report column -> profile key
+SORT_KEYS = {
+    "wall": "wall_s",
+    "cpu": "cpu_s",
+    "rss": "peak_rss_delta_mb",
+    "gpu": "gpu_peak_delta_mb",
+    "index": "index",
+}
+
+
+def _rss_mb(field):
+    """Read VmRSS or VmHWM (peak) for this process from /proc, in MB."""
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith(field + ":"):
+                    return int(line.split()[1]) / 1024
+    except (OSError, ValueError):
+        pass
+    return None
+
+
+def _reset_peak_rss():
+    """Reset VmHWM to the current RSS (Linux >= 4.0). Returns True on success."""
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+        return True
+    except OSError:
+        return False
+
+
+def _torch_cuda():
+    """Return torch.cuda if the notebook already imported torch and a GPU is in use."""
+    torch = sys.modules.get("torch")
+    if torch is None:
+        return None
+    try:
+        return torch.cuda if torch.cuda.is_available() and torch.cuda.is_initialized() else None
+    except Exception:
+        return None
+
+
+def make_runner():
+    """
+    Return (run, namespace): a function that executes one cell's source, and
+    the namespace the cells share.
+
+    Uses IPython (so magics and `!` commands work) when it is installed,
+    otherwise plain exec(). Either way the namespace is installed as
+    `__main__`, so objects defined in cells can be pickled.
+    """
+    try:
+        from IPython.core.interactiveshell import InteractiveShell
+
+        shell = InteractiveShell.instance()
+
+        def run_ipython(source):
+            result = shell.run_cell(source, store_history=False)
+            error = result.error_before_exec or result.error_in_exec
+            if error is not None:
+                raise error
+
+        return run_ipython, shell.user_ns
+    except ImportError:
+        module = types.ModuleType("__main__")
+        sys.modules["__main__"] = module
+        namespace = module.__dict__
+
+        def run_exec(source):
+            exec(compile(source, "<cell>", "exec"), namespace)
+
+        return run_exec, namespace
+
+
+def profile_cell(run, source):
+    """Execute one cell and return its profile."""
+    cuda = _torch_cuda()
+    gpu_before = 0
+    if cuda:
+        cuda.reset_peak_memory_stats()
+        gpu_before = cuda.memory_allocated()
+    peak_reset = _reset_peak_rss()
+    rss_before = _rss_mb("VmRSS") if peak_reset else _rss_mb("VmHWM")
+    cpu_before = time.process_time()
+    wall_before = time.perf_counter()
+
+    error = None
+    try:
+        run(source)
+    except BaseException as e:
+        error = f"{type(e).__name__}: {e}"
+
+    profile = {
+        "wall_s": round(time.perf_counter() - wall_before, 3),
+        "cpu_s": round(time.process_time() - cpu_before, 3),
+    }
+    rss_peak = _rss_mb("VmHWM")
+    if rss_before is not None and rss_peak is not None:
+        profile["peak_rss_delta_mb"] = round(max(0.0, rss_peak - rss_before), 1)
+    # A cell may be the one that imports torch / initializes CUDA
+    cuda = cuda or _torch_cuda()
+    if cuda:
+        profile["gpu_mem_delta_mb"] = round((cuda.memory_allocated() - gpu_before) / 2**20, 1)
+        profile["gpu_peak_delta_mb"] = round((cuda.max_memory_allocated() - gpu_before) / 2**20, 1)
+    if error:
+        profile["error"] = error
+    return profile
+
+
+def worker(notebook_path, results_path, allow_errors):
+    """Child process: execute code cells in order, appending one JSON line per cell."""
+    with Notebook(notebook_path) as nb:
+        cells = [
+            (cell.index, cell.id, cell.source) for cell in nb.cells if cell.cell_type == "code"
+        ]
+
+    run, _ = make_runner()
+    with open(results_path, "a", buffering=1) as results, open(os.devnull, "w") as devnull:
+        for index, cell_id, source in cells:
+            stdout, stderr = sys.stdout, sys.stderr
+            sys.stdout = sys.stderr = devnull
+            try:
+                profile = profile_cell(run, source)
+            finally:
+                sys.stdout, sys.stderr = stdout, stderr
+            results.write(json.dumps({"index": index, "id": cell_id, **profile}) + "\n")
+            if "error" in profile and not allow_errors:
+                break
+
+
+def run_notebook(notebook_path, timeout=DEFAULT_TIMEOUT, allow_errors=False):
+    """
+    Profile a notebook in a child process. Returns (per-cell profiles, status).
+
+    Cells run with the notebook's directory as cwd. If the run stops at a
+    failing cell, times out or the kernel dies, the cells that finished are
+    still returned and the status says why the run stopped.
+    """
+    notebook_path = os.path.abspath(notebook_path)
+    fd, results_path = tempfile.mkstemp(prefix="nbprofile-", suffix=".jsonl")
+    os.close(fd)
+    cmd = [sys.executable, os.path.abspath(__file__), "_worker", notebook_path, results_path]
+    if allow_errors:
+        cmd.append("--allow-errors")
+    env = {**os.environ, "MPLBACKEND": "Agg"}
+    status = "completed"
+    try:
+        proc = subprocess.run(
+            cmd,
+            cwd=os.path.dirname(notebook_path),
+            env=env,
+            stdin=subprocess.DEVNULL,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.PIPE,
+            text=True,
+            timeout=timeout,
+        )
+        if proc.returncode != 0:
+            status = f"worker exited with {proc.returncode}: {proc.stderr.strip()[-500:]}"
+    except subprocess.TimeoutExpired:
+        status = f"timed out after {timeout}s"
+    with open(results_path) as f:
+        profiles = [json.loads(line) for line in f if line.strip()]
+    os.unlink(results_path)
+    if status == "completed" and not allow_errors and profiles and "error" in profiles[-1]:
+        status = f"error in cell {profiles[-1]['index']}"
+    return profiles, status
+
+
+def _iso_seconds(start, end):
+    """Seconds between two ISO-8601 timestamps, or None."""
+    try:
+        parse = datetime.fromisoformat
+        return (
+            parse(end.replace("Z", "+00:00")) - parse(start.replace("Z", "+00:00"))
+        ).total_seconds()
+    except (AttributeError, ValueError):
+        return None
+
+
+def profiles_from_metadata(notebook_path):
+    """Read per-cell profiles from an already executed notebook's metadata."""
+    profiles = []
+    with Notebook(notebook_path) as nb:
+        for cell in nb.cells:
+            if cell.cell_type != "code":
+                continue
+            metadata = cell.metadata
+            entry = {"index": cell.index, "id": cell.id}
+            if "profile" in metadata:
+                entry.update(metadata["profile"])
+            elif "executionInfo" in metadata:
+                # Colab: elapsed is in milliseconds
+                info = metadata["executionInfo"]
+                if "elapsed" in info:
+                    entry["wall_s"] = round(info["elapsed"] / 1000, 3)
+                if info.get("status") == "error":
+                    entry["error"] = "error"
+            elif "execution" in metadata:
+                # Jupyter (record_timing): iopub.execute_input -> shell.execute_reply
+                execution = metadata["execution"]
+                wall = _iso_seconds(
+                    execution.get("iopub.execute_input"), execution.get("shell.execute_reply")
+                )
+                if wall is not None:
+                    entry["wall_s"] = round(wall, 3)
+            else:
+                continue
+            profiles.append(entry)
+    return profiles
+
+
+def write_metadata(notebook_path, profiles):
+    """Store each profile in its cell's `metadata.profile`."""
+    stamp = datetime.now().isoformat(timespec="seconds")
+    updates = {
+        entry["index"]: {
+            "profile": {
+                **{k: v for k, v in entry.items() if k not in ("index", "id")},
+                "profiled_at": stamp,
+            }
+        }
+        for entry in profiles
+    }
+    with Notebook(notebook_path) as nb:
+        nb.update_metadata(updates)
+
+
+def sort_profiles(profiles, key="wall", top=None):
+    """Sort profiles by a report column (largest first, except index)."""
+    field = SORT_KEYS[key]
+    ordered = sorted(
+        profiles,
+        key=lambda entry: entry.get(field) if entry.get(field) is not None else -1,
+        reverse=key != "index",
+    )
+    return ordered[:top] if top else ordered
+
+
+def format_table(profiles):
+    """Render profiles as a fixed-width table."""
+
+    def num(value, fmt):
+        return format(value, fmt) if isinstance(value, (int, float)) else "-"
+
+    total_wall = sum(entry.get("wall_s") or 0 for entry in profiles) or 1
+    lines = [
+        f"{'#':>4}  {'id':<16} {'wall s':>8} {'%':>5} {'cpu s':>8} {'rss MB':>8} {'gpu MB':>8}"
+    ]
+    for entry in profiles:
+        wall = entry.get("wall_s")
+        line = (
+            f"{entry['index']:>4}  {str(entry.get('id') or '-')[:16]:<16} "
+            f"{num(wall, '8.2f')} {num((wall or 0) / total_wall * 100, '5.1f')} "
+            f"{num(entry.get('cpu_s'), '8.2f')} {num(entry.get('peak_rss_delta_mb'), '8.1f')} "
+            f"{num(entry.get('gpu_peak_delta_mb'), '8.1f')}"
+        )
+        if entry.get("error"):
+            line += f"  ✗ {entry['error'][:60]}"
+        lines.append(line)
+    return "\n".join(lines)
+
+
+def _print(profiles, args, status=None):
+    ordered = sort_profiles(profiles, args.sort, args.top)
+    if args.json:
+        print(json.dumps({"status": status, "cells": ordered}, separators=(",", ":")))
+        return
+    if not profiles:
+        print("No profile data (run the notebook with: notebook_profiler.py run NOTEBOOK)")
+        return
+    print(format_table(ordered))
+    if status and status != "completed":
+        print(f"\n⚠️ Run stopped ({status}); later cells were not profiled")
+
+
+def main(argv=None):
+    """Command entry point."""
+    parser = argparse.ArgumentParser(description="Per-cell notebook execution profiler.")
+    sub = parser.add_subparsers(dest="action", required=True)
+
+    def add_report_args(p):
+        p.add_argument("notebook")
+        p.add_argument("--sort", choices=sorted(SORT_KEYS), default="wall")
+        p.add_argument("--top", type=int, help="Show only the N largest cells")
+        p.add_argument("--json", action="store_true")
+
+    p = sub.add_parser("run", help="Execute and profile a notebook")
+    add_report_args(p)
+    p.add_argument("--timeout", type=float, default=DEFAULT_TIMEOUT)
+    p.add_argument("--allow-errors", action="store_true", help="Keep going after a failing cell")
+    p.add_argument(
+        "--write-metadata", action="store_true", help="Store results in metadata.profile"
+    )
+
+    p = sub.add_parser("report", help="Report from an already executed notebook")
+    add_report_args(p)
+
+    p = sub.add_parser("_worker")
+    p.add_argument("notebook")
+    p.add_argument("results")
+    p.add_argument("--allow-errors", action="store_true")
+
+    args = parser.parse_args(argv)
+
+    try:
+        if args.action == "_worker":
+            worker(args.notebook, args.results, args.allow_errors)
+        elif args.action == "run":
+            profiles, status = run_notebook(args.notebook, args.timeout, args.allow_errors)
+            if args.write_metadata and profiles:
+                write_metadata(args.notebook, profiles)
+            _print(profiles, args, status)
+        else:
+            _print(profiles_from_metadata(args.notebook), args)
+    except (OSError, NotebookError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
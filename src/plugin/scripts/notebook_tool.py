@@ -0,0 +1,520 @@
+#!/usr/bin/env python3
+"""
+Cell-level notebook editing without loading the whole notebook.
+
+The .ipynb file is memory-mapped and scanned for the byte span of each cell;
+only the small parts of a cell that are actually needed (type, id, source)
+are decoded. Output payloads - often megabytes of base64 images - are
+skipped over without ever being built into Python objects. Edits splice new
+bytes into the original file and are written through an atomic temp file,
+so untouched cells keep their exact formatting.
+
+Usage:
+    notebook_tool.py list NOTEBOOK [--json]
+    notebook_tool.py show NOTEBOOK CELL [--json] [--outputs]
+    notebook_tool.py replace NOTEBOOK CELL [--source-file FILE]      (stdin by default)
+    notebook_tool.py insert NOTEBOOK INDEX [--type code|markdown|raw] [--id ID]
+                                           [--source-file FILE]
+    notebook_tool.py delete NOTEBOOK CELL
+    notebook_tool.py strip-outputs NOTEBOOK [CELL ...]
+
+CELL is a cell index (negative counts from the end) or a cell id
+(`metadata.id` or the nbformat 4.5 top-level `id`).
+"""
+
+import argparse
+import json
+import mmap
+import os
+import re
+import sys
+import tempfile
+import uuid
+
+STRUCTURAL = re.compile(rb'[\[\]{}"]')
+WHITESPACE = re.compile(rb"[ \t\r\n]*")
+SCALAR = re.compile(rb"[^,\]}\s]+")
+# nbformat 4.5 cell id
+CELL_ID = re.compile(r"^[a-zA-Z0-9_-]{1,64}$")
+
+
+class NotebookError(ValueError):
+    """Raised for malformed notebooks and unknown cells."""
+
+
+def _ws(buf, pos):
+    """Return the position after any whitespace at `pos`."""
+    return WHITESPACE.match(buf, pos).end()
+
+
+def _expect(buf, pos, char):
+    """Check that `char` is at `pos` and return the position after it."""
+    if buf[pos : pos + 1] != char:
+        raise NotebookError(f"Malformed notebook JSON: expected {char!r} at offset {pos}")
+    return pos + 1
+
+
+def skip_string(buf, pos):
+    """
+    Return the end offset of the JSON string starting at `pos`.
+
+    Uses find() (memchr) to jump between quotes, so multi-megabyte base64
+    output payloads are skipped at memory speed.
+    """
+    i = pos + 1
+    while True:
+        quote = buf.find(b'"', i)
+        if quote < 0:
+            raise NotebookError(f"Malformed notebook JSON: unterminated string at {pos}")
+        backslashes = 0
+        while buf[quote - 1 - backslashes] == 0x5C:
+            backslashes += 1
+        if backslashes % 2 == 0:
+            return quote + 1
+        i = quote + 1
+
+
+def skip_value(buf, pos):
+    """Return the end offset of the JSON value starting at `pos` without decoding it."""
+    char = buf[pos : pos + 1]
+    if char == b'"':
+        return skip_string(buf, pos)
+    if char in (b"{", b"["):
+        depth = 0
+        i = pos
+        while True:
+            match = STRUCTURAL.search(buf, i)
+            if not match:
+                raise NotebookError(f"Malformed notebook JSON: unterminated value at {pos}")
+            token = match.group()
+            if token == b'"':
+                i = skip_string(buf, match.start())
+                continue
+            depth += 1 if token in (b"{", b"[") else -1
+            i = match.end()
+            if depth == 0:
+                return i
+    match = SCALAR.match(buf, pos)
+    if not match:
+        raise NotebookError(f"Malformed notebook JSON: unexpected {char!r} at offset {pos}")
+    return match.end()
+
+
+def object_members(buf, pos):
+    """Return [(key, value_start, value_end)] for the JSON object at `pos`."""
+    pos = _ws(buf, _expect(buf, pos, b"{"))
+    members = []
+    if buf[pos : pos + 1] == b"}":
+        return members
+    while True:
+        key_end = skip_value(buf, pos)
+        key = json.loads(bytes(buf[pos:key_end]))
+        value_start = _ws(buf, _expect(buf, _ws(buf, key_end), b":"))
+        value_end = skip_value(buf, value_start)
+        members.append((key, value_start, value_end))
+        pos = _ws(buf, value_end)
+        if buf[pos : pos + 1] == b"}":
+            return members
+        pos = _ws(buf, _expect(buf, pos, b","))
+
+
+def array_elements(buf, pos):
+    """Return [(start, end)] for each element of the JSON array at `pos`."""
+    pos = _ws(buf, _expect(buf, pos, b"["))
+    elements = []
+    if buf[pos : pos + 1] == b"]":
+        return elements
+    while True:
+        end = skip_value(buf, pos)
+        elements.append((pos, end))
+        pos = _ws(buf, end)
+        if buf[pos : pos + 1] == b"]":
+            return elements
+        pos = _ws(buf, _expect(buf, pos, b","))
+
+
+def source_to_lines(text):
+    """Convert source text to the nbformat list-of-lines form."""
+    return text.splitlines(keepends=True)
+
+
+class Cell:
+    """Byte spans and lightweight fields of one cell in a scanned notebook."""
+
+    def __init__(self, buf, index, start, end):
+        self.index = index
+        self.start = start
+        self.end = end
+        self.spans = {key: (s, e) for key, s, e in object_members(buf, start)}
+        self._buf = buf
+
+    def _decode(self, key, default=None):
+        if key not in self.spans:
+            return default
+        start, end = self.spans[key]
+        return json.loads(bytes(self._buf[start:end]))
+
+    @property
+    def cell_type(self):
+        return self._decode("cell_type", "code")
+
+    @property
+    def metadata(self):
+        return self._decode("metadata", {})
+
+    @property
+    def id(self):
+        """The cell's id: top-level `id` (nbformat 4.5) or `metadata.id` (Colab)."""
+        return self._decode("id") or self.metadata.get("id")
+
+    @property
+    def source(self):
+        source = self._decode("source", "")
+        return "".join(source) if isinstance(source, list) else source
+
+    def size(self, key=None):
+        """Size in bytes of the whole cell, or of one of its members."""
+        if key is None:
+            return self.end - self.start
+        start, end = self.spans.get(key, (0, 0))
+        return end - start
+
+    def output_count(self):
+        if "outputs" not in self.spans:
+            return 0
+        return len(array_elements(self._buf, self.spans["outputs"][0]))
+
+    def to_dict(self, outputs=False):
+        """Decode the cell; outputs are summarized unless `outputs` is True."""
+        keys = [key for key in self.spans if outputs or key != "outputs"]
+        cell = {key: self._decode(key) for key in keys}
+        if not outputs and "outputs" in self.spans:
+            cell["outputs"] = f"<{self.output_count()} outputs, {self.size('outputs')} bytes>"
+        return cell
+
+    def summary(self):
+        source = self.source
+        first_line = source.split("\n", 1)[0]
+        return {
+            "index": self.index,
+            "id": self.id,
+            "type": self.cell_type,
+            "bytes": self.size(),
+            "source_lines": source.count("\n") + (1 if source and not source.endswith("\n") else 0),
+            "source_bytes": self.size("source"),
+            "outputs": self.output_count(),
+            "output_bytes": self.size("outputs"),
+            "preview": first_line[:60],
+        }
+
+
+class Notebook:
+    """
+    A memory-mapped notebook scanned into cell spans.
+
+    Use as a context manager; edits are applied with `splice()`, which writes
+    a new file atomically and invalidates this object.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._file = open(path, "rb")
+        try:
+            self.buf = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            self._file.close()
+            raise NotebookError(f"{path} is empty") from None
+        try:
+            self._scan()
+        except Exception:
+            self.close()
+            raise
+
+    def _scan(self):
+        top = {key: (s, e) for key, s, e in object_members(self.buf, _ws(self.buf, 0))}
+        if "cells" not in top:
+            raise NotebookError(f"{self.path} has no 'cells' array")
+        self.cells_span = top["cells"]
+        self.version = tuple(
+            self._decode_span(top[key]) if key in top else 0
+            for key in ("nbformat", "nbformat_minor")
+        )
+        self.cells = [
+            Cell(self.buf, i, start, end)
+            for i, (start, end) in enumerate(array_elements(self.buf, self.cells_span[0]))
+        ]
+        self.indent = self._detect_indent()
+
+    def _decode_span(self, span):
+        return json.loads(bytes(self.buf[span[0] : span[1]]))
+
+    def _detect_indent(self):
+        """Guess the file's indent unit from the first cell's column (cells are depth 2)."""
+        if not self.cells:
+            return 1
+        line_start = self.buf.rfind(b"\n", 0, self.cells[0].start) + 1
+        column = self.cells[0].start - line_start
+        return max(1, column // 2) if line_start else 0
+
+    def close(self):
+        self.buf.close()
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def find(self, ref):
+        """Return the cell for an id or index reference (ids win, as they can be all digits)."""
+        for cell in self.cells:
+            if cell.id == str(ref):
+                return cell
+        try:
+            index = int(ref)
+        except (TypeError, ValueError):
+            raise NotebookError(f"No cell with id {ref!r}") from None
+        try:
+            return self.cells[index]
+        except IndexError:
+            raise NotebookError(f"Cell index {index} out of range ({len(self.cells)} cells)")
+
+    def dump_cell(self, cell):
+        """Serialize a new cell dict in the file's indentation style."""
+        if not self.indent:
+            return json.dumps(cell, ensure_ascii=False, separators=(",", ":"))
+        text = json.dumps(cell, ensure_ascii=False, indent=self.indent)
+        return text.replace("\n", "\n" + " " * (2 * self.indent))
+
+    def _separator(self):
+        """The bytes between two cells (or a default) for inserts."""
+        if len(self.cells) > 1:
+            return bytes(self.buf[self.cells[0].end : self.cells[1].start])
+        if self.indent:
+            return b",\n" + b" " * (2 * self.indent)
+        return b","
+
+    def splice(self, edits):
+        """
+        Write the notebook with byte-range `edits` applied, atomically.
+
+        `edits` is a list of (start, end, replacement_bytes); ranges must not
+        overlap. The file is rewritten through a temp file in the same
+        directory and renamed over the original.
+        """
+        directory = os.path.dirname(os.path.abspath(self.path))
+        mode = os.stat(self.path).st_mode & 0o777
+        fd, tmp_path = tempfile.mkstemp(prefix=".nbtool-", suffix=".ipynb", dir=directory)
+        try:
+            with os.fdopen(fd, "wb") as out:
+                pos = 0
+                for start, end, replacement in sorted(edits, key=lambda edit: edit[0]):
+                    out.write(self.buf[pos:start])
+                    out.write(replacement)
+                    pos = end
+                out.write(self.buf[pos:])
+                out.flush()
+                os.fsync(out.fileno())
+            os.chmod(tmp_path, mode)
+            self.close()
+            os.replace(tmp_path, self.path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+            raise
+
+    def _encode(self, value):
+        return json.dumps(value, ensure_ascii=False).encode()
+
+    def replace_source(self, ref, text):
+        """Replace a cell's source; code cells also lose their stale outputs."""
+        cell = self.find(ref)
+        if "source" not in cell.spans:
+            raise NotebookError(f"Cell {ref!r} has no source")
+        edits = [(*cell.spans["source"], self._encode(source_to_lines(text)))]
+        if cell.cell_type == "code":
+            edits.extend(self._clear_outputs_edits(cell))
+        self.splice(edits)
+
+    def insert(self, index, text, cell_type="code", cell_id=None):
+        """
+        Insert a new cell before position `index` (len(cells) appends).
+
+        The id goes in `metadata.id`, and also in the top-level `id` that
+        nbformat 4.5+ requires. It must not match an existing cell's id.
+        """
+        ids = {cell.id for cell in self.cells}
+        if cell_id is None:
+            cell_id = uuid.uuid4().hex[:8]
+            while cell_id in ids:
+                cell_id = uuid.uuid4().hex[:8]
+        elif cell_id in ids:
+            raise NotebookError(f"A cell with id {cell_id!r} already exists")
+        cell = {"cell_type": cell_type}
+        if self.version >= (4, 5):
+            if not CELL_ID.match(cell_id):
+                raise NotebookError(f"Invalid cell id {cell_id!r} (1-64 of a-z, A-Z, 0-9, - and _)")
+            cell["id"] = cell_id
+        cell["metadata"] = {"id": cell_id}
+        cell["source"] = source_to_lines(text)
+        if cell_type == "code":
+            cell["execution_count"] = None
+            cell["outputs"] = []
+        new = self.dump_cell(cell).encode()
+        count = len(self.cells)
+        index = max(0, min(count, index if index >= 0 else count + index + 1))
+
+        if not count:
+            start, end = self.cells_span
+            if self.indent:
+                inner = b"\n" + b" " * (2 * self.indent) + new + b"\n" + b" " * self.indent
+            else:
+                inner = new
+            self.splice([(start, end, b"[" + inner + b"]")])
+        elif index < count:
+            position = self.cells[index].start
+            self.splice([(position, position, new + self._separator())])
+        else:
+            position = self.cells[-1].end
+            self.splice([(position, position, self._separator() + new)])
+        return cell_id
+
+    def delete(self, ref):
+        """Delete a cell together with its separating comma."""
+        cell = self.find(ref)
+        cells = self.cells
+        if len(cells) == 1:
+            start, end = self.cells_span
+            self.splice([(start, end, b"[]")])
+        elif cell.index < len(cells) - 1:
+            self.splice([(cell.start, cells[cell.index + 1].start, b"")])
+        else:
+            self.splice([(cells[cell.index - 1].end, cell.end, b"")])
+
+    def _clear_outputs_edits(self, cell):
+        edits = []
+        if "outputs" in cell.spans:
+            edits.append((*cell.spans["outputs"], b"[]"))
+        if "execution_count" in cell.spans:
+            edits.append((*cell.spans["execution_count"], b"null"))
+        return edits
+
+    def strip_outputs(self, refs=None):
+        """Clear outputs and execution counts of code cells (all by default)."""
+        cells = [self.find(ref) for ref in refs] if refs else self.cells
+        edits = []
+        for cell in cells:
+            if cell.cell_type == "code":
+                edits.extend(self._clear_outputs_edits(cell))
+        if edits:
+            self.splice(edits)
+        return len(edits)
+
+    def update_metadata(self, updates):
+        """
+        Merge keys into the metadata of several cells in one atomic write.
+
+        `updates` maps a cell reference to a dict of metadata keys to set.
+        Only each cell's metadata object is rewritten (compactly).
+        """
+        edits = []
+        for ref, values in updates.items():
+            cell = self.find(ref)
+            metadata = {**cell.metadata, **values}
+            encoded = json.dumps(metadata, ensure_ascii=False, separators=(",", ":")).encode()
+            if "metadata" in cell.spans:
+                edits.append((*cell.spans["metadata"], encoded))
+            else:
+                edits.append((cell.start + 1, cell.start + 1, b'"metadata":' + encoded + b","))
+        if edits:
+            self.splice(edits)
+
+
+def _read_source(path):
+    if path in (None, "-"):
+        return sys.stdin.read()
+    with open(path, encoding="utf-8") as f:
+        return f.read()
+
+
+def _print_table(summaries):
+    print(f"{'#':>4}  {'id':<16} {'type':<8} {'lines':>5} {'out':>4} {'bytes':>10}  preview")
+    for s in summaries:
+        print(
+            f"{s['index']:>4}  {str(s['id'] or '-')[:16]:<16} {s['type']:<8} "
+            f"{s['source_lines']:>5} {s['outputs']:>4} {s['bytes']:>10}  {s['preview']}"
+        )
+
+
+def main(argv=None):
+    """Command entry point."""
+    parser = argparse.ArgumentParser(description="Cell-level notebook editing.")
+    sub = parser.add_subparsers(dest="action", required=True)
+
+    p = sub.add_parser("list", help="List cells with sizes")
+    p.add_argument("notebook")
+    p.add_argument("--json", action="store_true")
+
+    p = sub.add_parser("show", help="Print one cell's source")
+    p.add_argument("notebook")
+    p.add_argument("cell")
+    p.add_argument("--json", action="store_true", help="Print the cell as JSON")
+    p.add_argument("--outputs", action="store_true", help="Include full outputs in --json")
+
+    p = sub.add_parser("replace", help="Replace one cell's source")
+    p.add_argument("notebook")
+    p.add_argument("cell")
+    p.add_argument("--source-file", help="File with the new source (default: stdin)")
+
+    p = sub.add_parser("insert", help="Insert a new cell before INDEX")
+    p.add_argument("notebook")
+    p.add_argument("index", type=int, help="Position of the new cell (-1 appends)")
+    p.add_argument("--type", default="code", choices=("code", "markdown", "raw"))
+    p.add_argument("--id", help="Cell id (default: random)")
+    p.add_argument("--source-file", help="File with the new source (default: stdin)")
+
+    p = sub.add_parser("delete", help="Delete one cell")
+    p.add_argument("notebook")
+    p.add_argument("cell")
+
+    p = sub.add_parser("strip-outputs", help="Clear outputs of code cells")
+    p.add_argument("notebook")
+    p.add_argument("cells", nargs="*", help="Cells to strip (default: all)")
+
+    args = parser.parse_args(argv)
+
+    try:
+        with Notebook(args.notebook) as nb:
+            if args.action == "list":
+                summaries = [cell.summary() for cell in nb.cells]
+                if args.json:
+                    print(json.dumps(summaries, ensure_ascii=False))
+                else:
+                    _print_table(summaries)
+            elif args.action == "show":
+                cell = nb.find(args.cell)
+                if args.json:
+                    print(json.dumps(cell.to_dict(args.outputs), ensure_ascii=False, indent=1))
+                else:
+                    print(cell.source)
+            elif args.action == "replace":
+                nb.replace_source(args.cell, _read_source(args.source_file))
+                print(f"Replaced source of cell {args.cell}")
+            elif args.action == "insert":
+                cell_id = nb.insert(args.index, _read_source(args.source_file), args.type, args.id)
+                print(f"Inserted {args.type} cell {cell_id}")
+            elif args.action == "delete":
+                nb.delete(args.cell)
+                print(f"Deleted cell {args.cell}")
+            elif args.action == "strip-outputs":
+                count = nb.strip_outputs(args.cells)
+                print(f"Cleared {count} output field(s)")
+    except (OSError, NotebookError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,226 @@
+#!/usr/bin/env python3
+"""
+Cached inventory of installed Python packages.
+
+`pip list` and `pip freeze` take seconds on Colab's large site-packages. This
+scans the importlib.metadata distributions of the running interpreter once
+and caches name, version and location per interpreter. The cache stays valid
+while the mtimes of the site-packages directories are unchanged; installing,
+upgrading or removing a package adds or removes a *.dist-info directory,
+which changes them and triggers a rescan. Cached lookups take milliseconds.
+
+The notebook records a summary under "packages" in ENVIRONMENT.json in step
+6. Standalone (stdlib only): the notebook embeds it before the plugin is
+installed.
+
+The cache lives in CLAUDE_COLAB_STATE_DIR (default ~/.cache/claude-colab).
+
+Usage:
+    package_inventory.py list [--json]
+    package_inventory.py version NAME... [--json]   # exit 1 if any is missing
+    package_inventory.py summary [--json] [--update ENVIRONMENT.json]
+    package_inventory.py --refresh ...              # ignore the cache
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import re
+import sys
+import time
+
+DEFAULT_STATE_DIR = "~/.cache/claude-colab"
+# Versions recorded in ENVIRONMENT.json; everything else is a `version` lookup away
+KEY_PACKAGES = (
+    "torch",
+    "torchvision",
+    "tensorflow",
+    "jax",
+    "transformers",
+    "accelerate",
+    "datasets",
+    "numpy",
+    "pandas",
+    "scikit-learn",
+    "matplotlib",
+)
+SITE_DIR_NAMES = ("site-packages", "dist-packages")
+
+
+def normalize(name):
+    """PEP 503 normalized project name."""
+    return re.sub(r"[-_.]+", "-", name).lower()
+
+
+def interpreter_key():
+    """Identifies the running interpreter and its environment."""
+    return f"{sys.prefix}|{sys.version.split()[0]}"
+
+
+def cache_path():
+    """Per-interpreter cache file."""
+    state_dir = os.path.expanduser(os.environ.get("CLAUDE_COLAB_STATE_DIR", DEFAULT_STATE_DIR))
+    digest = hashlib.sha1(interpreter_key().encode()).hexdigest()[:12]
+    return os.path.join(state_dir, f"package-inventory-{digest}.json")
+
+
+def search_dirs():
+    """Directories on sys.path, in import order."""
+    dirs = []
+    for entry in sys.path:
+        path = os.path.abspath(entry or ".")
+        if path not in dirs and os.path.isdir(path):
+            dirs.append(path)
+    return dirs
+
+
+def _is_site_dir(path):
+    return os.path.basename(path) in SITE_DIR_NAMES
+
+
+def _mtime(path):
+    try:
+        return os.stat(path).st_mtime_ns
+    except OSError:
+        return None
+
+
+def scan():
+    """Read every distribution's metadata. Returns a fresh inventory."""
+    # Imported here so cache hits don't pay for it
+    from importlib.metadata import distributions
+
+    started = time.perf_counter()
+    dirs = search_dirs()
+    packages, holding = {}, set()
+    for dist in distributions(path=dirs):
+        name = dist.metadata["Name"]
+        if not name:
+            continue
+        location = os.path.abspath(str(dist.locate_file("")))
+        holding.add(location)
+        # The first distribution on sys.path is the one `import` finds
+        packages.setdefault(
+            normalize(name), {"name": name, "version": dist.version, "location": location}
+        )
+    watched = [d for d in dirs if _is_site_dir(d) or d in holding]
+    return {
+        "python": interpreter_key(),
+        "dirs": {d: _mtime(d) for d in watched},
+        "packages": dict(sorted(packages.items())),
+        "scanned_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "scan_ms": int((time.perf_counter() - started) * 1000),
+    }
+
+
+def is_current(inventory):
+    """Whether a cached inventory still describes this interpreter's packages."""
+    if inventory.get("python") != interpreter_key():
+        return False
+    dirs = inventory.get("dirs", {})
+    if any(_mtime(d) != mtime for d, mtime in dirs.items()):
+        return False
+    # A site directory added to sys.path since the scan (e.g. by a .pth file)
+    return all(d in dirs for d in search_dirs() if _is_site_dir(d))
+
+
+def load(refresh=False):
+    """The inventory, from the cache when it is current, else rescanned and cached."""
+    path = cache_path()
+    if not refresh:
+        try:
+            with open(path) as f:
+                inventory = json.load(f)
+            if is_current(inventory):
+                return inventory
+        except (OSError, ValueError):
+            pass
+    inventory = scan()
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, "w") as f:
+            json.dump(inventory, f)
+        os.replace(tmp, path)
+    except OSError:
+        # A read-only state dir only costs the next caller a rescan
+        pass
+    return inventory
+
+
+def version(name, inventory=None):
+    """Installed version of `name`, or None."""
+    entry = (inventory or load())["packages"].get(normalize(name))
+    return entry["version"] if entry else None
+
+
+def summary(inventory=None):
+    """Compact record for ENVIRONMENT.json and the status report."""
+    inventory = inventory or load()
+    packages = inventory["packages"]
+    return {
+        "count": len(packages),
+        "key": {
+            packages[name]["name"]: packages[name]["version"]
+            for name in KEY_PACKAGES
+            if name in packages
+        },
+        "inventory": cache_path(),
+        "scanned_at": inventory["scanned_at"],
+    }
+
+
+def main(argv=None):
+    """Command entry point."""
+    parser = argparse.ArgumentParser(description="Cached inventory of installed packages.")
+    parser.add_argument("--refresh", action="store_true", help="Rescan instead of using the cache")
+    sub = parser.add_subparsers(dest="action", required=True)
+    p = sub.add_parser("list", help="All installed packages")
+    p.add_argument("--json", action="store_true")
+    p = sub.add_parser("version", help="Versions of the named packages")
+    p.add_argument("names", nargs="+")
+    p.add_argument("--json", action="store_true")
+    p = sub.add_parser("summary", help="Package count and key versions")
+    p.add_argument("--json", action="store_true")
+    p.add_argument("--update", metavar="ENVIRONMENT_JSON", help="Store under 'packages'")
+    args = parser.parse_args(argv)
+
+    try:
+        inventory = load(args.refresh)
+        if args.action == "list":
+            packages = inventory["packages"].values()
+            if args.json:
+                print(json.dumps({p["name"]: p["version"] for p in packages}))
+            else:
+                print("\n".join(f"{p['name']}=={p['version']}" for p in packages))
+        elif args.action == "version":
+            versions = {name: version(name, inventory) for name in args.names}
+            if args.json:
+                print(json.dumps(versions))
+            else:
+                for name, found in versions.items():
+                    print(f"{name}=={found}" if found else f"{name}: not installed")
+            if None in versions.values():
+                return 1
+        elif args.action == "summary":
+            record = summary(inventory)
+            if args.update:
+                with open(args.update) as f:
+                    environment = json.load(f)
+                environment["packages"] = record
+                with open(args.update, "w") as f:
+                    json.dump(environment, f, indent=2)
+            if args.json:
+                print(json.dumps(record))
+            else:
+                key = ", ".join(f"{name} {v}" for name, v in record["key"].items())
+                print(f"{record['count']} packages installed" + (f" ({key})" if key else ""))
+    except (OSError, ValueError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,278 @@
+#!/usr/bin/env python3
+"""
+Page-cache warm-up for heavy Python packages.
+
+On a fresh Colab runtime the first `import torch` or `import tensorflow` is
+slow because the packages' shared objects and modules are cold on disk.
+SessionStart starts this as a detached, low-priority (nice 19, idle I/O
+class) background process that reads those files once so they are in the
+OS page cache when the first agent command imports them.
+
+- Packages are read in the configured order, `.so` files first, until the
+  size budget is used up. The budget is also capped at half of the available
+  RAM, so warming never pushes the runtime toward memory pressure.
+- It runs once per boot; the result (MB and files warmed, seconds taken,
+  per package) is saved in the state directory and shown by `status`.
+
+Config: `.claude/warmup.json` in the workspace, e.g.
+    {"packages": ["torch", "nvidia", "transformers"], "max_mb": 4096}
+Without it DEFAULT_PACKAGES and DEFAULT_MAX_MB are used. SessionStart runs it
+in Colab by default; CLAUDE_COLAB_WARMUP=0 disables it, =1 runs it outside Colab.
+
+Usage:
+    page_warmup.py start [--workspace DIR]   # detached, once per boot
+    page_warmup.py run [--workspace DIR]     # in the foreground
+    page_warmup.py status [--json]
+"""
+
+import argparse
+import json
+import os
+import shutil
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+from colab_env import boot_id, hold_pid_file, read_json, read_pid, state_path
+
+# Most-used first: the budget may run out before the end of the list
+DEFAULT_PACKAGES = (
+    "torch",
+    "nvidia",
+    "transformers",
+    "numpy",
+    "pandas",
+    "scipy",
+    "sklearn",
+    "tensorflow",
+    "jax",
+    "jaxlib",
+)
+DEFAULT_MAX_MB = 4096
+CONFIG_NAME = ".claude/warmup.json"
+SUFFIXES = (".so", ".py", ".pyc")
+READ_BLOCK = 2**20
+
+
+def pid_path():
+    return state_path("warmup.pid")
+
+
+def result_path():
+    return state_path("warmup.json")
+
+
+def load_config(workspace=None):
+    """(packages, max_mb) from the workspace config or the defaults."""
+    config = read_json(Path(workspace) / CONFIG_NAME, default={}) if workspace else {}
+    config = config or {}
+    return (
+        list(config.get("packages") or DEFAULT_PACKAGES),
+        int(config.get("max_mb") or DEFAULT_MAX_MB),
+    )
+
+
+def package_paths(name):
+    """Directories (or the module file) of an installed package, found without importing it."""
+    import importlib.util
+
+    try:
+        spec = importlib.util.find_spec(name)
+    except (ImportError, ValueError):
+        return []
+    if spec is None:
+        return []
+    if spec.submodule_search_locations:
+        return [d for d in spec.submodule_search_locations if os.path.isdir(d)]
+    # A single-module distribution
+    return [spec.origin] if spec.origin and os.path.isfile(spec.origin) else []
+
+
+def _is_warmable(name):
+    # Versioned shared objects too (libcudnn.so.9)
+    return name.endswith(SUFFIXES) or ".so." in name
+
+
+def package_files(name):
+    """(path, size) of a package's shared objects, then its modules."""
+    libraries, modules = [], []
+    for top in package_paths(name):
+        walk = os.walk(top) if os.path.isdir(top) else [(os.path.dirname(top), [], [top])]
+        for dirpath, _, filenames in walk:
+            for filename in filenames:
+                if not _is_warmable(filename):
+                    continue
+                path = os.path.join(dirpath, filename)
+                try:
+                    size = os.stat(path).st_size
+                except OSError:
+                    continue
+                is_library = filename.endswith(".so") or ".so." in filename
+                (libraries if is_library else modules).append((path, size))
+    libraries.sort(key=lambda item: -item[1])
+    return libraries + modules
+
+
+def available_mb():
+    """MemAvailable from /proc/meminfo in MB, or None."""
+    try:
+        with open("/proc/meminfo") as f:
+            for line in f:
+                if line.startswith("MemAvailable:"):
+                    return int(line.split()[1]) // 1024
+    except (OSError, ValueError):
+        pass
+    return None
+
+
+def _lower_priority():
+    try:
+        os.nice(19)
+    except OSError:
+        pass
+    if shutil.which("ionice"):
+        subprocess.run(
+            ["ionice", "-c", "3", "-p", str(os.getpid())],
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+        )
+
+
+def read_file(path, buffer):
+    """Read a file through the page cache. Returns bytes read."""
+    total = 0
+    try:
+        with open(path, "rb", buffering=0) as f:
+            while True:
+                n = f.readinto(buffer)
+                if not n:
+                    return total
+                total += n
+    except OSError:
+        return total
+
+
+def warm(packages, max_mb):
+    """Read the packages' files until `max_mb` is used. Returns the result."""
+    started = time.monotonic()
+    memory = available_mb()
+    budget = max_mb * 2**20
+    if memory is not None:
+        budget = min(budget, memory // 2 * 2**20)
+    buffer = bytearray(READ_BLOCK)
+    result = {"boot": boot_id(), "budget_mb": budget // 2**20, "packages": {}, "missing": []}
+    used = files = 0
+    for name in packages:
+        entries = package_files(name)
+        if not entries:
+            result["missing"].append(name)
+            continue
+        warmed = 0
+        for path, size in entries:
+            if used + size > budget:
+                continue
+            n = read_file(path, buffer)
+            warmed += n
+            used += n
+            files += 1
+        result["packages"][name] = round(warmed / 2**20, 1)
+        if used >= budget:
+            break
+    result.update(
+        mb=round(used / 2**20, 1),
+        files=files,
+        seconds=round(time.monotonic() - started, 1),
+        finished_at=time.strftime("%Y-%m-%dT%H:%M:%S"),
+    )
+    return result
+
+
+def run(workspace=None):
+    """
+    Warm in the foreground at low priority and save the result.
+
+    Returns None at once if another warm-up is running.
+    """
+    with hold_pid_file(pid_path()) as held:
+        if not held:
+            return None
+        _lower_priority()
+        packages, max_mb = load_config(workspace)
+        result = warm(packages, max_mb)
+        tmp = result_path().with_suffix(".tmp")
+        tmp.write_text(json.dumps(result))
+        tmp.replace(result_path())
+        return result
+
+
+def ensure_started(workspace=None):
+    """
+    Start a detached warm-up unless one is running or already ran this boot.
+
+    Returns the pid, or None when there is nothing to do. Never waits for it.
+    """
+    if read_pid(pid_path()):
+        return None
+    last = read_json(result_path(), default={}) or {}
+    if last.get("boot") and last.get("boot") == boot_id():
+        return None
+    cmd = [sys.executable, os.path.abspath(__file__), "run"]
+    if workspace:
+        cmd += ["--workspace", str(workspace)]
+    process = subprocess.Popen(
+        cmd,
+        stdin=subprocess.DEVNULL,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+        start_new_session=True,
+        close_fds=True,
+    )
+    return process.pid
+
+
+def format_result(result):
+    """Render a warm-up result as text."""
+    lines = [
+        f"✓ Warmed {result['mb']} MB ({result['files']:,} files) in {result['seconds']}s"
+        f" (budget {result['budget_mb']} MB)"
+    ]
+    lines.extend(f"  {name}: {mb} MB" for name, mb in result["packages"].items())
+    if result["missing"]:
+        lines.append(f"  Not installed: {', '.join(result['missing'])}")
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    """Command entry point."""
+    parser = argparse.ArgumentParser(description="Warm heavy packages into the page cache.")
+    sub = parser.add_subparsers(dest="action", required=True)
+    for name in ("start", "run"):
+        p = sub.add_parser(name)
+        p.add_argument("--workspace", help=f"Workspace with an optional {CONFIG_NAME}")
+    p = sub.add_parser("status")
+    p.add_argument("--json", action="store_true")
+    args = parser.parse_args(argv)
+
+    if args.action == "run":
+        result = run(args.workspace)
+        print(format_result(result) if result else "Warm-up already running")
+    elif args.action == "start":
+        pid = ensure_started(args.workspace)
+        print(f"Warm-up started (pid {pid})" if pid else "Warm-up already running or done")
+    else:
+        pid = read_pid(pid_path())
+        result = read_json(result_path(), default=None)
+        if args.json:
+            print(json.dumps({"running": pid is not None, "last": result}))
+        elif pid:
+            print(f"Warm-up running (pid {pid})")
+        elif result:
+            print(format_result(result))
+        else:
+            print("No warm-up has run yet")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""
+Protected-path rules for file-writing tools (Write, Edit, MultiEdit, NotebookEdit).
+
+safety_check.py calls check_path() for those tools. Rules are path prefixes
+compiled once per process into a trie keyed by path component, so a check
+costs one walk down the target's components however many rules there are.
+The longest matching prefix decides: a narrow "allow" (the Drive workspaces)
+can sit under a broad "block" (all of Drive), and a "block" for one file can
+sit under an allowed directory.
+
+Both the rule prefixes and the target are resolved with realpath, so a rule
+for ~/.claude/settings.json also matches through the ~/.claude symlink the
+notebook creates, and a symlink inside the workspace cannot be used to
+write outside it.
+
+Extra prefixes can be added with CLAUDE_COLAB_PROTECT_PATHS (block) and
+CLAUDE_COLAB_ALLOW_PATHS (allow), separated by ":".
+
+Usage:
+    path_guard.py PATH...    # print the decision for each path
+"""
+
+import os
+import sys
+
+ALLOW, WARN, BLOCK = "allow", "warn", "block"
+
+# (path prefix, action, message). "~" is the user's home directory.
+PATH_RULES = [
+    # System directories
+    ("/etc", BLOCK, "Refusing to write system configuration in /etc"),
+    ("/usr", BLOCK, "Refusing to write into /usr"),
+    ("/bin", BLOCK, "Refusing to write into /bin"),
+    ("/sbin", BLOCK, "Refusing to write into /sbin"),
+    ("/lib", BLOCK, "Refusing to write into /lib"),
+    ("/lib64", BLOCK, "Refusing to write into /lib64"),
+    ("/boot", BLOCK, "Refusing to write into /boot"),
+    ("/proc", BLOCK, "Refusing to write into /proc"),
+    ("/sys", BLOCK, "Refusing to write into /sys"),
+    ("/dev", BLOCK, "Refusing to write to a device"),
+    # Google Drive: only the workspaces the notebook creates are writable
+    ("/content/drive", BLOCK, "Refusing to write to Google Drive outside claude-workspaces"),
+    ("/content/drive/My Drive/claude-workspaces", ALLOW, None),
+    ("/content/drive/MyDrive/claude-workspaces", ALLOW, None),
+    # Claude Code's own permissions and credentials
+    ("~/.claude/settings.json", BLOCK, "Refusing to edit Claude Code settings (permissions)"),
+    ("~/.claude/settings.local.json", BLOCK, "Refusing to edit Claude Code settings (permissions)"),
+    ("~/.claude/.credentials.json", BLOCK, "Refusing to edit Claude Code credentials"),
+    ("~/.ssh", BLOCK, "Refusing to write SSH keys or config"),
+    # Shell startup files
+    ("~/.bashrc", WARN, "Warning: Editing ~/.bashrc"),
+    ("~/.profile", WARN, "Warning: Editing ~/.profile"),
+    ("~/.claude.json", WARN, "Warning: Editing ~/.claude.json"),
+]
+
+_trie = None
+
+
+def _components(path):
+    return [part for part in path.split("/") if part]
+
+
+def compile_rules(rules):
+    """Build the prefix trie: nested dicts by path component, rule stored under None."""
+    trie = {}
+    for prefix, action, message in rules:
+        literal = os.path.abspath(os.path.expanduser(prefix))
+        for path in {literal, os.path.realpath(literal)}:
+            node = trie
+            for part in _components(path):
+                node = node.setdefault(part, {})
+            node[None] = (action, message)
+    return trie
+
+
+def _env_rules():
+    rules = []
+    for name, action, message in (
+        ("CLAUDE_COLAB_PROTECT_PATHS", BLOCK, "Refusing to write protected path {}"),
+        ("CLAUDE_COLAB_ALLOW_PATHS", ALLOW, None),
+    ):
+        for prefix in filter(None, os.environ.get(name, "").split(":")):
+            rules.append((prefix, action, message and message.format(prefix)))
+    return rules
+
+
+def rules_trie():
+    """The compiled trie for PATH_RULES plus environment rules (built once)."""
+    global _trie
+    if _trie is None:
+        _trie = compile_rules(PATH_RULES + _env_rules())
+    return _trie
+
+
+def lookup(trie, path):
+    """Return (action, message) of the longest rule prefix of `path`, or (ALLOW, None)."""
+    node = trie
+    result = node.get(None, (ALLOW, None))
+    for part in _components(path):
+        node = node.get(part)
+        if node is None:
+            break
+        result = node.get(None, result)
+    return result
+
+
+def check_path(path, cwd=None):
+    """
+    Check a path a tool is about to write.
+
+    Returns:
+        (action, message, resolved path) - action is "allow", "warn" or "block"
+    """
+    path = os.path.expanduser(path)
+    if not os.path.isabs(path):
+        path = os.path.join(cwd or os.getcwd(), path)
+    resolved = os.path.realpath(path)
+    action, message = lookup(rules_trie(), resolved)
+    return action, message, resolved
+
+
+def main(argv=None):
+    """Command entry point."""
+    paths = sys.argv[1:] if argv is None else argv
+    if not paths:
+        print(__doc__.strip().split("Usage:")[1].strip(), file=sys.stderr)
+        return 1
+    for path in paths:
+        action, message, resolved = check_path(path)
+        print(f"{action:<5}  {resolved}" + (f"  ({message})" if message else ""))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,424 @@
+#!/usr/bin/env python3
+"""
+Background resource sampler for Claude Code in Google Colab.
+
+Records CPU, RAM, swap, disk and GPU memory every few seconds into a
+fixed-size, memory-mapped ring buffer so the sampler's footprint never grows.
+The report reads the buffer, shows recent trends and warns when a resource
+is close to (or trending toward) its limit - Colab kills the runtime on RAM
+or disk exhaustion without warning.
+
+Usage:
+    resource_monitor.py start [--interval SECONDS] [--capacity N]
+    resource_monitor.py stop
+    resource_monitor.py report [--window SECONDS] [--json]   # also with no arguments
+    resource_monitor.py run          # foreground sampler (used by start)
+"""
+
+import argparse
+import json
+import mmap
+import os
+import shutil
+import signal
+import struct
+import subprocess
+import sys
+import time
+from collections import namedtuple
+
+from colab_env import hold_pid_file, read_pid, state_path
+
+DEFAULT_INTERVAL = 5.0
+DEFAULT_CAPACITY = 720  # 1 hour at the default interval
+DEFAULT_WINDOW = 300.0
+
+# Warn when usage is above this fraction of the limit...
+WARN_FRACTION = 0.90
+# ...or is projected to reach the limit within this many seconds
+WARN_HORIZON = 600.0
+
+MAGIC = b"CCRB"
+VERSION = 1
+# magic, version, capacity, records written so far
+HEADER = struct.Struct("<4sIIQ")
+
+FIELDS = (
+    "time",
+    "cpu_pct",
+    "ram_used_mb",
+    "ram_total_mb",
+    "swap_used_mb",
+    "swap_total_mb",
+    "disk_used_mb",
+    "disk_total_mb",
+    "gpu_used_mb",
+    "gpu_total_mb",
+)
+RECORD = struct.Struct("<d9f")
+Sample = namedtuple("Sample", FIELDS)
+
+# (label, used field, total field) for each resource that has a hard limit
+LIMITED_RESOURCES = (
+    ("RAM", "ram_used_mb", "ram_total_mb"),
+    ("Swap", "swap_used_mb", "swap_total_mb"),
+    ("Disk", "disk_used_mb", "disk_total_mb"),
+    ("GPU memory", "gpu_used_mb", "gpu_total_mb"),
+)
+
+
+def buffer_path():
+    """Path of the ring buffer file."""
+    return state_path("resources.ring")
+
+
+def pid_path():
+    """Path of the sampler's pid file."""
+    return state_path("resources.pid")
+
+
+class RingBuffer:
+    """
+    Fixed-capacity ring of RECORD-sized samples in a memory-mapped file.
+
+    A single writer appends samples; any number of readers may map the same
+    file. The header's write counter is updated after each record so readers
+    never see a partially written slot as valid.
+    """
+
+    def __init__(self, path, capacity=DEFAULT_CAPACITY, create=False):
+        self.path = path
+        size = HEADER.size + capacity * RECORD.size
+        if create:
+            self._create(size, capacity)
+        self._file = open(path, "r+b")
+        self._mmap = mmap.mmap(self._file.fileno(), 0)
+        magic, version, self.capacity, _ = HEADER.unpack_from(self._mmap, 0)
+        if magic != MAGIC or version != VERSION:
+            self.close()
+            raise ValueError(f"{path} is not a resource ring buffer")
+
+    def _create(self, size, capacity):
+        """Create (or resize) the backing file and write a fresh header."""
+        try:
+            with open(self.path, "rb") as f:
+                existing = HEADER.unpack(f.read(HEADER.size))
+            if existing[:3] == (MAGIC, VERSION, capacity):
+                return
+        except (OSError, struct.error):
+            pass
+        with open(self.path, "wb") as f:
+            f.truncate(size)
+            f.write(HEADER.pack(MAGIC, VERSION, capacity, 0))
+
+    @property
+    def written(self):
+        """Total number of samples ever appended."""
+        return HEADER.unpack_from(self._mmap, 0)[3]
+
+    def append(self, sample):
+        """Write one sample, overwriting the oldest when full."""
+        written = self.written
+        offset = HEADER.size + (written % self.capacity) * RECORD.size
+        RECORD.pack_into(self._mmap, offset, *sample)
+        HEADER.pack_into(self._mmap, 0, MAGIC, VERSION, self.capacity, written + 1)
+
+    def samples(self):
+        """Return stored samples, oldest first."""
+        written = self.written
+        count = min(written, self.capacity)
+        first = written - count
+        return [
+            Sample(
+                *RECORD.unpack_from(
+                    self._mmap, HEADER.size + ((first + i) % self.capacity) * RECORD.size
+                )
+            )
+            for i in range(count)
+        ]
+
+    def close(self):
+        """Unmap and close the backing file."""
+        self._mmap.close()
+        self._file.close()
+
+
+class Sampler:
+    """Reads resource usage from /proc, the filesystem and nvidia-smi."""
+
+    def __init__(self, disk_path=None):
+        self.disk_path = disk_path or ("/content" if os.path.isdir("/content") else "/")
+        self.nvidia_smi = shutil.which("nvidia-smi")
+        self._cpu = self._read_cpu()
+
+    @staticmethod
+    def _read_cpu():
+        """Return (busy, total) jiffies from /proc/stat."""
+        try:
+            with open("/proc/stat") as f:
+                values = [int(v) for v in f.readline().split()[1:]]
+        except (OSError, ValueError):
+            return 0, 0
+        idle = values[3] + (values[4] if len(values) > 4 else 0)
+        total = sum(values)
+        return total - idle, total
+
+    @staticmethod
+    def _read_meminfo():
+        """Return /proc/meminfo values in MB."""
+        info = {}
+        try:
+            with open("/proc/meminfo") as f:
+                for line in f:
+                    key, _, rest = line.partition(":")
+                    info[key] = int(rest.split()[0]) / 1024
+        except (OSError, ValueError, IndexError):
+            pass
+        return info
+
+    def _read_gpu(self):
+        """Return (used, total) GPU memory in MB summed over all devices."""
+        if not self.nvidia_smi:
+            return 0.0, 0.0
+        try:
+            output = subprocess.run(
+                [
+                    self.nvidia_smi,
+                    "--query-gpu=memory.used,memory.total",
+                    "--format=csv,noheader,nounits",
+                ],
+                capture_output=True,
+                text=True,
+                timeout=2,
+            ).stdout
+            used = total = 0.0
+            for line in output.splitlines():
+                line_used, line_total = line.split(",")
+                used += float(line_used)
+                total += float(line_total)
+            return used, total
+        except (OSError, ValueError, subprocess.TimeoutExpired):
+            return 0.0, 0.0
+
+    def sample(self):
+        """Take one sample."""
+        busy, total = self._read_cpu()
+        prev_busy, prev_total = self._cpu
+        self._cpu = (busy, total)
+        cpu_pct = 100.0 * (busy - prev_busy) / (total - prev_total) if total > prev_total else 0.0
+
+        mem = self._read_meminfo()
+        ram_total = mem.get("MemTotal", 0.0)
+        ram_used = ram_total - mem.get("MemAvailable", ram_total)
+        swap_total = mem.get("SwapTotal", 0.0)
+        swap_used = swap_total - mem.get("SwapFree", swap_total)
+
+        try:
+            disk = shutil.disk_usage(self.disk_path)
+            disk_used, disk_total = disk.used / 2**20, disk.total / 2**20
+        except OSError:
+            disk_used = disk_total = 0.0
+
+        gpu_used, gpu_total = self._read_gpu()
+        return Sample(
+            time.time(),
+            cpu_pct,
+            ram_used,
+            ram_total,
+            swap_used,
+            swap_total,
+            disk_used,
+            disk_total,
+            gpu_used,
+            gpu_total,
+        )
+
+
+def running_pid():
+    """Return the pid of the running sampler, or None."""
+    return read_pid(pid_path())
+
+
+def run(interval=DEFAULT_INTERVAL, capacity=DEFAULT_CAPACITY):
+    """Sample forever in the foreground. Returns at once if a sampler is already running."""
+    with hold_pid_file(pid_path()) as held:
+        if not held:
+            return
+        ring = RingBuffer(buffer_path(), capacity, create=True)
+        sampler = Sampler()
+        signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))
+        try:
+            while True:
+                ring.append(sampler.sample())
+                time.sleep(interval)
+        finally:
+            ring.close()
+
+
+def ensure_running(interval=DEFAULT_INTERVAL, capacity=DEFAULT_CAPACITY):
+    """
+    Start the sampler as a detached background process if it isn't running.
+
+    Returns the sampler's pid. Never blocks on the sampler itself.
+    """
+    pid = running_pid()
+    if pid:
+        return pid
+    process = subprocess.Popen(
+        [
+            sys.executable,
+            os.path.abspath(__file__),
+            "run",
+            "--interval",
+            str(interval),
+            "--capacity",
+            str(capacity),
+        ],
+        stdin=subprocess.DEVNULL,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+        start_new_session=True,
+        close_fds=True,
+    )
+    return process.pid
+
+
+def stop():
+    """Stop the background sampler. Returns True if one was running."""
+    pid = running_pid()
+    if not pid:
+        return False
+    os.kill(pid, signal.SIGTERM)
+    return True
+
+
+def _slope(points):
+    """Least-squares slope of (x, y) points, or 0.0 if undefined."""
+    n = len(points)
+    if n < 2:
+        return 0.0
+    mean_x = sum(x for x, _ in points) / n
+    mean_y = sum(y for _, y in points) / n
+    var_x = sum((x - mean_x) ** 2 for x, _ in points)
+    if var_x == 0:
+        return 0.0
+    return sum((x - mean_x) * (y - mean_y) for x, y in points) / var_x
+
+
+def analyze(samples, window=DEFAULT_WINDOW):
+    """
+    Summarize the last `window` seconds of samples.
+
+    Returns a dict with the latest values, per-resource trends (MB/min and
+    seconds until the limit at the current rate) and a list of warnings.
+    """
+    if not samples:
+        return {"samples": 0, "resources": {}, "warnings": []}
+
+    latest = samples[-1]
+    recent = [s for s in samples if s.time >= latest.time - window]
+    cpu = [s.cpu_pct for s in recent]
+
+    report = {
+        "samples": len(recent),
+        "span_s": round(latest.time - recent[0].time, 1),
+        "cpu_pct": {"now": round(latest.cpu_pct, 1), "avg": round(sum(cpu) / len(cpu), 1)},
+        "resources": {},
+        "warnings": [],
+    }
+
+    for label, used_field, total_field in LIMITED_RESOURCES:
+        total = getattr(latest, total_field)
+        if total <= 0:
+            continue
+        used = getattr(latest, used_field)
+        slope = _slope([(s.time, getattr(s, used_field)) for s in recent])  # MB/s
+        seconds_to_limit = (total - used) / slope if slope > 0 else None
+        fraction = used / total
+        report["resources"][label] = {
+            "used_mb": round(used),
+            "total_mb": round(total),
+            "pct": round(100 * fraction, 1),
+            "trend_mb_per_min": round(slope * 60, 1),
+            "seconds_to_limit": round(seconds_to_limit) if seconds_to_limit else None,
+        }
+        if fraction >= WARN_FRACTION:
+            report["warnings"].append(f"{label} at {100 * fraction:.0f}% of {total / 1024:.1f}GB")
+        elif seconds_to_limit is not None and seconds_to_limit < WARN_HORIZON:
+            report["warnings"].append(
+                f"{label} trending toward limit: full in ~{seconds_to_limit / 60:.0f} min "
+                f"at +{slope * 60:.0f}MB/min"
+            )
+    return report
+
+
+def format_report(report):
+    """Render an analyze() result as text."""
+    if not report["samples"]:
+        return "No resource samples yet (is the sampler running?)"
+    lines = [
+        f"Last {report['span_s']:.0f}s ({report['samples']} samples) - "
+        f"CPU {report['cpu_pct']['now']}% now, {report['cpu_pct']['avg']}% avg"
+    ]
+    for label, r in report["resources"].items():
+        line = (
+            f"{label}: {r['used_mb'] / 1024:.1f}/{r['total_mb'] / 1024:.1f}GB ({r['pct']}%), "
+            f"{r['trend_mb_per_min']:+.0f}MB/min"
+        )
+        if r["seconds_to_limit"] is not None:
+            line += f", full in ~{r['seconds_to_limit'] / 60:.0f} min"
+        lines.append(line)
+    for warning in report["warnings"]:
+        lines.append(f"\033[33m⚠️ {warning}\033[0m")
+    return "\n".join(lines)
+
+
+def load_samples():
+    """Read all samples from the ring buffer (empty if it doesn't exist)."""
+    if not buffer_path().exists():
+        return []
+    try:
+        ring = RingBuffer(buffer_path())
+    except (OSError, ValueError):
+        return []
+    try:
+        return ring.samples()
+    finally:
+        ring.close()
+
+
+def main(argv=None):
+    """Command entry point."""
+    parser = argparse.ArgumentParser(description="Colab resource sampler and OOM early warning.")
+    sub = parser.add_subparsers(dest="action", required=True)
+    for name in ("start", "run"):
+        p = sub.add_parser(name)
+        p.add_argument("--interval", type=float, default=DEFAULT_INTERVAL)
+        p.add_argument("--capacity", type=int, default=DEFAULT_CAPACITY)
+    sub.add_parser("stop")
+    p = sub.add_parser("report")
+    p.add_argument("--window", type=float, default=DEFAULT_WINDOW)
+    p.add_argument("--json", action="store_true", help="Print the report as JSON")
+    # A bare /claude-colab:resources passes no arguments
+    args = parser.parse_args((sys.argv[1:] if argv is None else argv) or ["report"])
+
+    if args.action == "run":
+        run(args.interval, args.capacity)
+    elif args.action == "start":
+        print(f"Resource sampler running (pid {ensure_running(args.interval, args.capacity)})")
+    elif args.action == "stop":
+        print("Resource sampler stopped" if stop() else "Resource sampler was not running")
+    else:
+        report = analyze(load_samples(), args.window)
+        report["sampler_running"] = running_pid() is not None
+        if args.json:
+            print(json.dumps(report, separators=(",", ":")))
+        else:
+            print(format_report(report))
+            if not report["sampler_running"]:
+                print("Sampler not running - start it with: resource_monitor.py start")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
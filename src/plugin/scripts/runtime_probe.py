@@ -0,0 +1,357 @@
+#!/usr/bin/env python3
+"""
+Quick runtime capability benchmark.
+
+Measures, within a time budget (default 8 s, CLAUDE_COLAB_PROBE_BUDGET):
+- CPU: usable cores and single-core speed (SHA-256 MB/s, Python loop Mops/s)
+- RAM: total, available and copy bandwidth
+- Local disk and Drive: sequential write and read throughput
+- GPU (if nvidia-smi is present): memory, free memory, compute capability and
+  device memory bandwidth (with torch)
+
+From these it recommends DataLoader settings, whether to stage data from
+Drive to local disk, mixed precision and a memory budget for batch-size
+tuning. The notebook runs it in step 6 and stores the result under
+"runtime" in ENVIRONMENT.json, where the `colab` agent reads it.
+
+Standalone (stdlib, torch optional): the notebook embeds it before the
+plugin is installed.
+
+Usage:
+    runtime_probe.py [--local-dir DIR] [--drive-dir DIR] [--budget SECONDS] [--json]
+    runtime_probe.py --update ENVIRONMENT.json   # re-measure and store the result
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import subprocess
+import sys
+import time
+
+DEFAULT_BUDGET_S = 8.0
+# Share of the budget each probe may use; unused shares (no Drive, no GPU) are skipped
+SHARES = {"cpu": 0.1, "memory": 0.1, "local_disk": 0.25, "drive": 0.3, "gpu": 0.25}
+BLOCK = 4 * 2**20
+LOCAL_DISK_MAX_MB = 512
+DRIVE_MAX_MB = 16
+# GPU memory kept free for the CUDA context, cuDNN workspaces and fragmentation
+GPU_RESERVE_GB = 1.0
+PROBE_FILE = ".runtime-probe.tmp"
+# Drive reads are timed on an existing file at least this big, found within this many entries
+READ_SAMPLE_MIN_BYTES = BLOCK
+READ_SAMPLE_MAX_ENTRIES = 500
+
+
+def _timed(seconds, step):
+    """Call step() until `seconds` pass. Returns (calls, elapsed)."""
+    calls = 0
+    started = time.perf_counter()
+    while True:
+        step()
+        calls += 1
+        elapsed = time.perf_counter() - started
+        if elapsed >= seconds:
+            return calls, elapsed
+
+
+def probe_cpu(seconds):
+    """Core counts and single-core speed."""
+    block = b"\0" * 2**20
+    calls, elapsed = _timed(seconds / 2, lambda: hashlib.sha256(block).digest())
+
+    def loop():
+        total = 0
+        for i in range(100_000):
+            total += i
+
+    loops, loop_elapsed = _timed(seconds / 2, loop)
+    try:
+        usable = len(os.sched_getaffinity(0))
+    except AttributeError:
+        usable = os.cpu_count() or 1
+    return {
+        "cores": os.cpu_count() or 1,
+        "usable_cores": usable,
+        "sha256_mb_s": round(calls / elapsed),
+        "python_mops": round(loops * 0.1 / loop_elapsed, 1),
+    }
+
+
+def probe_memory(seconds):
+    """RAM size from /proc/meminfo and copy bandwidth."""
+    info = {}
+    try:
+        with open("/proc/meminfo") as f:
+            for line in f:
+                key, value = line.split(":", 1)
+                info[key] = int(value.split()[0]) * 1024
+    except (OSError, ValueError):
+        pass
+    size = 64 * 2**20
+    src, dst = bytearray(size), bytearray(size)
+
+    def copy():
+        dst[:] = src
+
+    calls, elapsed = _timed(seconds, copy)
+    return {
+        "total_gb": round(info.get("MemTotal", 0) / 2**30, 1),
+        "available_gb": round(info.get("MemAvailable", 0) / 2**30, 1),
+        "copy_gb_s": round(calls * size / 2**30 / elapsed, 1),
+    }
+
+
+def find_read_sample(directory, deadline, min_bytes=READ_SAMPLE_MIN_BYTES):
+    """An existing file of at least `min_bytes` under `directory` (bounded search), or None."""
+    stack, seen = [directory], 0
+    while stack and seen < READ_SAMPLE_MAX_ENTRIES and time.perf_counter() < deadline:
+        try:
+            with os.scandir(stack.pop()) as it:
+                entries = list(it)
+        except OSError:
+            continue
+        for entry in entries:
+            seen += 1
+            if entry.name.startswith("."):
+                continue
+            try:
+                if entry.is_dir(follow_symlinks=False):
+                    stack.append(entry.path)
+                elif entry.is_file(follow_symlinks=False) and entry.stat().st_size >= min_bytes:
+                    return entry.path
+            except OSError:
+                continue
+    return None
+
+
+def probe_disk(directory, seconds, max_mb, read_existing=False):
+    """
+    Sequential write (with fsync) and read throughput in `directory`.
+
+    The write goes to a scratch file. Reads are timed on that file after
+    dropping it from the page cache, which is enough on local disk. Drive's
+    FUSE layer keeps its own cache of a file it just wrote, so with
+    `read_existing` the read uses an existing file instead; if there is
+    none, the result is marked `read_cached` (read_mb_s is then too high).
+    """
+    path = os.path.join(directory, PROBE_FILE)
+    block = os.urandom(BLOCK)
+    written = 0
+    try:
+        started = time.perf_counter()
+        with open(path, "wb") as f:
+            while written < max_mb * 2**20 and time.perf_counter() - started < seconds / 2:
+                f.write(block)
+                written += BLOCK
+            f.flush()
+            os.fsync(f.fileno())
+        write_s = time.perf_counter() - started
+        sample = None
+        if read_existing:
+            sample = find_read_sample(directory, time.perf_counter() + seconds / 4)
+        fd = os.open(sample or path, os.O_RDONLY)
+        try:
+            # Drop cached pages so the read hits the device
+            if hasattr(os, "posix_fadvise"):
+                os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_DONTNEED)
+            read = 0
+            started = time.perf_counter()
+            while time.perf_counter() - started < seconds / 2:
+                chunk = os.read(fd, BLOCK)
+                if not chunk:
+                    break
+                read += len(chunk)
+            read_s = time.perf_counter() - started
+        finally:
+            os.close(fd)
+    finally:
+        try:
+            os.unlink(path)
+        except OSError:
+            pass
+    result = {
+        "path": directory,
+        "write_mb_s": round(written / 2**20 / max(write_s, 1e-6)),
+        "read_mb_s": round(read / 2**20 / max(read_s, 1e-6)),
+        "free_gb": round(shutil.disk_usage(directory).free / 2**30, 1),
+    }
+    if read_existing:
+        result["read_cached"] = sample is None
+    return result
+
+
+def probe_gpu(seconds):
+    """
+    GPU memory and bandwidth, or None without a GPU.
+
+    nvidia-smi, the torch import and CUDA initialization count against
+    `seconds`; the bandwidth test gets what is left, and is skipped if
+    nothing is.
+    """
+    if not shutil.which("nvidia-smi"):
+        return None
+    deadline = time.perf_counter() + seconds
+    result = {}
+    try:
+        output = subprocess.run(
+            [
+                "nvidia-smi",
+                "--query-gpu=name,memory.total,memory.used",
+                "--format=csv,noheader,nounits",
+            ],
+            capture_output=True,
+            text=True,
+            timeout=max(seconds, 1),
+        ).stdout
+        name, total, used = (v.strip() for v in output.splitlines()[0].split(","))
+        result.update(
+            name=name,
+            memory_gb=round(int(total) / 1024, 1),
+            free_gb=round((int(total) - int(used)) / 1024, 1),
+        )
+    except (OSError, ValueError, IndexError, subprocess.SubprocessError):
+        return None
+    if time.perf_counter() >= deadline:
+        return result
+    try:
+        import torch
+
+        if torch.cuda.is_available():
+            major, minor = torch.cuda.get_device_capability(0)
+            result["compute_capability"] = f"{major}.{minor}"
+            if time.perf_counter() >= deadline:
+                return result
+            size = 256 * 2**20
+            src = torch.empty(size, dtype=torch.uint8, device="cuda")
+            dst = torch.empty_like(src)
+            dst.copy_(src)
+            torch.cuda.synchronize()
+
+            def copy():
+                dst.copy_(src)
+                torch.cuda.synchronize()
+
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                return result
+            calls, elapsed = _timed(min(seconds / 2, remaining), copy)
+            # Each copy reads and writes `size` bytes
+            result["bandwidth_gb_s"] = round(2 * calls * size / 2**30 / elapsed)
+            del src, dst
+            torch.cuda.empty_cache()
+    except Exception:
+        # torch missing or CUDA unusable: keep the nvidia-smi numbers
+        pass
+    return result
+
+
+def recommend(measured):
+    """Derive suggested settings from measurements."""
+    cpu, memory, gpu = measured["cpu"], measured["memory"], measured.get("gpu")
+    workers = 0 if cpu["usable_cores"] <= 1 else min(cpu["usable_cores"], 8)
+    # Each worker holds its own dataset copy and prefetched batches
+    if memory["available_gb"]:
+        workers = min(workers, int(memory["available_gb"] // 1.5))
+    recommended = {"dataloader_num_workers": workers, "pin_memory": bool(gpu)}
+
+    drive, local = measured.get("drive"), measured["local_disk"]
+    # A cached Drive read says nothing about cold reads, which are far slower than local disk
+    recommended["stage_data_locally"] = bool(drive) and (
+        drive.get("read_cached", False) or drive["read_mb_s"] < local["read_mb_s"] / 2
+    )
+    if gpu:
+        recommended["batch_memory_budget_gb"] = round(
+            max(0.0, gpu["free_gb"] - GPU_RESERVE_GB) * 0.85, 1
+        )
+        capability = gpu.get("compute_capability")
+        if capability:
+            recommended["mixed_precision"] = "bf16" if float(capability) >= 8 else "fp16"
+    return recommended
+
+
+def probe(local_dir="/content", drive_dir=None, budget=None):
+    """Run every applicable probe within `budget` seconds. Returns measured + recommended."""
+    budget = budget or float(os.environ.get("CLAUDE_COLAB_PROBE_BUDGET", DEFAULT_BUDGET_S))
+    started = time.perf_counter()
+    local_dir = local_dir if os.path.isdir(local_dir) else "/tmp"
+    measured = {
+        "cpu": probe_cpu(budget * SHARES["cpu"]),
+        "memory": probe_memory(budget * SHARES["memory"]),
+        "local_disk": probe_disk(local_dir, budget * SHARES["local_disk"], LOCAL_DISK_MAX_MB),
+    }
+    if drive_dir and os.path.isdir(drive_dir):
+        measured["drive"] = probe_disk(
+            drive_dir, budget * SHARES["drive"], DRIVE_MAX_MB, read_existing=True
+        )
+    gpu = probe_gpu(budget * SHARES["gpu"])
+    if gpu:
+        measured["gpu"] = gpu
+    return {
+        "measured": measured,
+        "recommended": recommend(measured),
+        "seconds": round(time.perf_counter() - started, 1),
+        "measured_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+    }
+
+
+def format_result(result):
+    """Render a probe result as text."""
+    m, r = result["measured"], result["recommended"]
+    lines = [
+        f"CPU    {m['cpu']['usable_cores']} cores, {m['cpu']['sha256_mb_s']} MB/s SHA-256 per core",
+        f"RAM    {m['memory']['available_gb']} / {m['memory']['total_gb']} GB available, "
+        f"{m['memory']['copy_gb_s']} GB/s copy",
+        f"Disk   write {m['local_disk']['write_mb_s']} MB/s, read {m['local_disk']['read_mb_s']}"
+        f" MB/s ({m['local_disk']['free_gb']} GB free)",
+    ]
+    if "drive" in m:
+        cached = " (cached, not a cold read)" if m["drive"].get("read_cached") else ""
+        lines.append(
+            f"Drive  write {m['drive']['write_mb_s']} MB/s, "
+            f"read {m['drive']['read_mb_s']} MB/s{cached}"
+        )
+    if "gpu" in m:
+        gpu = m["gpu"]
+        bandwidth = f", {gpu['bandwidth_gb_s']} GB/s" if "bandwidth_gb_s" in gpu else ""
+        lines.append(
+            f"GPU    {gpu['name']}, {gpu['free_gb']} / {gpu['memory_gb']} GB free{bandwidth}"
+        )
+    lines.append("Recommended: " + ", ".join(f"{k}={v}" for k, v in r.items()))
+    lines.append(f"({result['seconds']}s)")
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    """Command entry point."""
+    parser = argparse.ArgumentParser(description="Quick runtime capability benchmark.")
+    parser.add_argument("--local-dir", default="/content")
+    parser.add_argument("--drive-dir", help="Directory on Drive to measure (e.g. the workspace)")
+    parser.add_argument("--budget", type=float, help=f"Seconds (default {DEFAULT_BUDGET_S})")
+    parser.add_argument("--json", action="store_true")
+    parser.add_argument("--update", metavar="ENVIRONMENT_JSON", help="Store under 'runtime'")
+    args = parser.parse_args(argv)
+
+    drive_dir = args.drive_dir
+    if args.update and not drive_dir:
+        workspace = os.path.dirname(os.path.abspath(args.update))
+        drive_dir = workspace if workspace.startswith("/content/drive") else None
+    try:
+        result = probe(args.local_dir, drive_dir, args.budget)
+        if args.update:
+            with open(args.update) as f:
+                environment = json.load(f)
+            environment["runtime"] = result
+            with open(args.update, "w") as f:
+                json.dump(environment, f, indent=2)
+    except (OSError, ValueError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+    print(json.dumps(result) if args.json else format_result(result))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,276 @@
+#!/usr/bin/env python3
+"""
+Bulk audit of commands against the safety hook's rules.
+
+Runs every Bash rule in safety_check.py (and, for transcripts, the write-path
+rules in path_guard.py) over bash/zsh histories, plain command logs or Claude
+Code session transcripts (`~/.claude/projects/*/*.jsonl`), and reports how
+often each rule matched with example commands. Use it to try candidate rules
+(--rules) on real traffic before adding them to the hook.
+
+Files are split into newline-aligned byte ranges and scanned by a pool of
+worker processes, so millions of lines take seconds. Unlike the hook, every
+rule is evaluated for every command, not just the first block.
+
+Candidate rules file (JSON): a list of objects with "pattern", "message",
+optional "needle" (lowercase literal the match contains) and "action"
+("block" or "warn", default "block").
+
+Usage:
+    safety_audit.py FILE... [--rules candidates.json] [--jobs N] [--examples N] [--json]
+    safety_check.py audit FILE...      # same
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import re
+import sys
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+
+import safety_check
+
+RANGE_BYTES = 8 * 2**20
+EXAMPLE_CHARS = 160
+FILE_TOOLS = safety_check.FILE_TOOLS
+# zsh extended history prefix (": 1700000000:0;") and bash HISTTIMEFORMAT stamps ("#1700000000")
+ZSH_PREFIX = re.compile(r"^: \d+:\d+;")
+BASH_STAMP = re.compile(r"^#\d+$")
+
+# Set in each worker by _init_worker
+_rules = None
+
+
+def load_candidates(path):
+    """Read and compile candidate rules. Raises ValueError on a bad file or pattern."""
+    with open(path, encoding="utf-8") as f:
+        entries = json.load(f)
+    rules = []
+    for entry in entries:
+        try:
+            re.compile(entry["pattern"])
+        except (KeyError, TypeError, re.error) as e:
+            raise ValueError(f"bad candidate rule {entry!r}: {e}")
+        action = entry.get("action", "block")
+        if action not in ("block", "warn"):
+            raise ValueError(f"bad action {action!r} (block or warn)")
+        message = entry.get("message") or entry["pattern"]
+        rules.append((entry.get("needle", "").lower(), entry["pattern"], message, action))
+    return rules
+
+
+def hook_rules():
+    """The hook's Bash rules as (needle, pattern, message, action, source)."""
+    return [(n, p, m, "block", "hook") for n, p, m in safety_check.BLOCKED_PATTERNS] + [
+        (n, p, m, "warn", "hook") for n, p, m in safety_check.WARN_PATTERNS
+    ]
+
+
+def _init_worker(rules):
+    global _rules
+    _rules = [(needle, safety_check._regex(pattern), key) for needle, pattern, key in rules]
+
+
+def file_format(path):
+    """ "transcript" for JSONL session transcripts, else "lines"."""
+    if path.endswith(".jsonl"):
+        return "transcript"
+    with open(path, "rb") as f:
+        head = f.read(4096).lstrip()
+    return "transcript" if head.startswith(b"{") else "lines"
+
+
+def split_ranges(path, size=None):
+    """Byte ranges covering a file; workers align them to line starts."""
+    size = size or RANGE_BYTES
+    total = os.path.getsize(path)
+    return [(start, min(start + size, total)) for start in range(0, total, size)] or [(0, 0)]
+
+
+def read_range(path, start, end):
+    """Lines whose first byte lies in [start, end)."""
+    with open(path, "rb") as f:
+        if start:
+            f.seek(start - 1)
+            f.readline()
+        position = f.tell()
+        if position >= end:
+            return []
+        data = f.read(end - position)
+        if data and not data.endswith(b"\n"):
+            data += f.readline()
+    return data.decode("utf-8", errors="replace").splitlines()
+
+
+def history_commands(lines):
+    """Commands from history or log lines."""
+    for line in lines:
+        if not line.strip() or BASH_STAMP.match(line):
+            continue
+        yield "bash", ZSH_PREFIX.sub("", line, count=1)
+
+
+def transcript_commands(lines):
+    """(kind, command or path) for Bash and file-writing tool calls in a transcript."""
+    for line in lines:
+        # Most records are text; skip them before paying for JSON parsing
+        if '"tool_use"' not in line:
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError:
+            continue
+        content = (record.get("message") or {}).get("content")
+        if not isinstance(content, list):
+            continue
+        for block in content:
+            if not isinstance(block, dict) or block.get("type") != "tool_use":
+                continue
+            tool_input = block.get("input") or {}
+            if block.get("name") == "Bash" and tool_input.get("command"):
+                yield "bash", tool_input["command"]
+            elif block.get("name") in FILE_TOOLS and tool_input.get(FILE_TOOLS[block["name"]]):
+                yield "path", tool_input[FILE_TOOLS[block["name"]]]
+
+
+def _digest(command):
+    # Stable across worker processes, unlike hash()
+    return hashlib.blake2b(command.encode(errors="replace"), digest_size=8).digest()
+
+
+def _example(command):
+    command = " ".join(command.split())
+    return command if len(command) <= EXAMPLE_CHARS else command[: EXAMPLE_CHARS - 1] + "…"
+
+
+def audit_range(task):
+    """Worker: evaluate one byte range. Returns a partial summary."""
+    path, start, end, fmt, examples = task
+    parse = transcript_commands if fmt == "transcript" else history_commands
+    # Histories repeat the same commands over and over: evaluate each once
+    occurrences = Counter(parse(read_range(path, start, end)))
+    summary = {"commands": 0, "paths": 0, "budget": 0, "rules": {}}
+
+    def hit(key, command, count):
+        entry = summary["rules"].setdefault(key, {"matches": 0, "distinct": set(), "examples": []})
+        entry["matches"] += count
+        entry["distinct"].add(_digest(command))
+        if len(entry["examples"]) < examples:
+            entry["examples"].append(_example(command))
+
+    for (kind, command), count in occurrences.items():
+        if kind == "path":
+            from path_guard import ALLOW, check_path
+
+            summary["paths"] += count
+            action, message, _ = check_path(command)
+            if action != ALLOW:
+                hit(json.dumps(["path", action, message]), command, count)
+            continue
+        summary["commands"] += count
+        lowered = command.lower()
+        deadline = time.process_time() + safety_check.CPU_BUDGET_MS / 1000
+        try:
+            for needle, regex, key in _rules:
+                if needle in lowered and safety_check.find_match(regex, command, deadline):
+                    hit(key, command, count)
+        except safety_check.BudgetExceededError:
+            summary["budget"] += count
+    return summary
+
+
+def merge(total, part, examples):
+    """Add a partial summary into `total`."""
+    for field in ("commands", "paths", "budget"):
+        total[field] += part[field]
+    for key, entry in part["rules"].items():
+        into = total["rules"].setdefault(key, {"matches": 0, "distinct": set(), "examples": []})
+        into["matches"] += entry["matches"]
+        into["distinct"] |= entry["distinct"]
+        for example in entry["examples"]:
+            if len(into["examples"]) < examples and example not in into["examples"]:
+                into["examples"].append(example)
+
+
+def audit(paths, candidates=(), jobs=None, examples=3):
+    """Audit `paths` with the hook's rules plus `candidates`. Returns a summary."""
+    rules = hook_rules() + [(n, p, m, a, "candidate") for n, p, m, a in candidates]
+    keyed = [(n, p, json.dumps([source, a, m])) for n, p, m, a, source in rules]
+    tasks = []
+    for path in paths:
+        fmt = file_format(path)
+        tasks.extend((path, start, end, fmt, examples) for start, end in split_ranges(path))
+
+    started = time.monotonic()
+    total = {"commands": 0, "paths": 0, "budget": 0, "rules": {}}
+    jobs = max(1, min(jobs or os.cpu_count() or 1, len(tasks)))
+    if jobs == 1:
+        _init_worker(keyed)
+        for task in tasks:
+            merge(total, audit_range(task), examples)
+    else:
+        with ProcessPoolExecutor(jobs, initializer=_init_worker, initargs=(keyed,)) as pool:
+            for part in pool.map(audit_range, tasks):
+                merge(total, part, examples)
+
+    results = []
+    for key, entry in total["rules"].items():
+        source, action, message = json.loads(key)
+        entry["distinct"] = len(entry["distinct"])
+        results.append({"source": source, "action": action, "rule": message, **entry})
+    results.sort(key=lambda r: (r["source"] != "candidate", -r["matches"]))
+    return {
+        "files": len(paths),
+        "commands": total["commands"],
+        "paths": total["paths"],
+        "over_budget": total["budget"],
+        "seconds": round(time.monotonic() - started, 2),
+        "jobs": jobs,
+        "rules": results,
+    }
+
+
+def format_summary(summary):
+    """Render an audit summary as text."""
+    lines = [
+        f"Audited {summary['commands']:,} commands and {summary['paths']:,} write paths from "
+        f"{summary['files']} file(s) in {summary['seconds']}s ({summary['jobs']} workers)"
+    ]
+    if summary["over_budget"]:
+        lines.append(f"⚠️ {summary['over_budget']} command(s) exceeded the CPU budget")
+    if not summary["rules"]:
+        lines.append("No rule matched")
+    for r in summary["rules"]:
+        lines.append(
+            f"\n[{r['source']}/{r['action']}] {r['rule']}: {r['matches']:,} match(es)"
+            f" ({r['distinct']:,} distinct)"
+        )
+        lines.extend(f"    {example}" for example in r["examples"])
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    """Command entry point."""
+    parser = argparse.ArgumentParser(description="Audit command histories against safety rules.")
+    parser.add_argument("files", nargs="+", help="History, log or transcript (.jsonl) files")
+    parser.add_argument("--rules", help="Candidate rules (JSON) to evaluate alongside the hook's")
+    parser.add_argument("--jobs", type=int, help="Worker processes (default: CPU count)")
+    parser.add_argument("--examples", type=int, default=3, help="Examples per rule")
+    parser.add_argument("--json", action="store_true")
+    args = parser.parse_args(argv)
+
+    try:
+        candidates = load_candidates(args.rules) if args.rules else []
+        summary = audit(args.files, candidates, args.jobs, args.examples)
+    except (OSError, ValueError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+    print(json.dumps(summary) if args.json else format_summary(summary))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -7,38 +7,161 @@ Blocks or warns about dangerous commands that could:
 - Kill the Colab session
 - Accidentally delete Google Drive data
 
+For Write, Edit, MultiEdit and NotebookEdit it checks the target path
+against the protected-path rules in path_guard.py instead.
+
+`safety_check.py audit FILE...` runs the same rules over shell histories and
+session transcripts in bulk (see safety_audit.py).
+
 Exit codes:
 - 0: Allow the command
 - 2: Block with error message (non-zero = block)
 """
 
 import json
+import os
 import re
 import sys
+import time
+
+from hook_log import annotate
+
+# Tools that write a file, and the tool_input field holding its path
+FILE_TOOLS = {
+    "Write": "file_path",
+    "Edit": "file_path",
+    "MultiEdit": "file_path",
+    "NotebookEdit": "notebook_path",
+}
+
+# Rules are (needle, pattern, message). A pattern only runs if its needle, a
+# lowercase literal every match contains, occurs in the command.
+#
+# The stdlib engine backtracks, so patterns are kept linear-time by shape:
+# every repeat is bounded (whitespace runs up to 256, flag groups up to 8) and
+# must start with a character the piece before it cannot match. Work per start
+# position is then bounded, and no match is longer than OVERLAP_CHARS, which
+# is checked below at import so chunked scanning can never miss one.
+# tests/test_plugin_scripts.py benchmarks them on pathological input.
 
 # Patterns that should be BLOCKED (exit 2)
 BLOCKED_PATTERNS = [
     # Delete root or home
-    (r"rm\s+(-[rfvd]+\s+)*/([\s;|&]|$)", "Refusing to delete root directory /"),
-    (r"rm\s+(-[rfvd]+\s+)*~([\s;|&/]|$)", "Refusing to delete home directory ~"),
-    (r"rm\s+(-[rfvd]+\s+)*/\*", "Refusing to delete /*"),
+    (
+        "rm",
+        r"rm\s{1,256}(-[rfvd]{1,16}\s{1,256}){0,8}/([\s;|&]|$)",
+        "Refusing to delete root directory /",
+    ),
+    (
+        "rm",
+        r"rm\s{1,256}(-[rfvd]{1,16}\s{1,256}){0,8}~([\s;|&/]|$)",
+        "Refusing to delete home directory ~",
+    ),
+    ("rm", r"rm\s{1,256}(-[rfvd]{1,16}\s{1,256}){0,8}/\*", "Refusing to delete /*"),
     # Delete Google Drive
-    (r"rm\s+(-[rfvd]+\s+)*/content/drive", "Refusing to delete Google Drive mount"),
+    (
+        "rm",
+        r"rm\s{1,256}(-[rfvd]{1,16}\s{1,256}){0,8}/content/drive",
+        "Refusing to delete Google Drive mount",
+    ),
     # Fork bombs and system killers
-    (r":\(\)\s*\{\s*:\s*\|\s*:\s*&\s*\}\s*;", "Fork bomb detected"),
-    (r"kill\s+(-\d+\s+)*(1|init)\b", "Refusing to kill init process"),
+    (
+        ":",
+        r":\(\)\s{0,256}\{\s{0,256}:\s{0,256}\|\s{0,256}:\s{0,256}&\s{0,256}\}\s{0,256};",
+        "Fork bomb detected",
+    ),
+    ("kill", r"kill\s{1,256}(-\d{1,16}\s{1,256}){0,8}(1|init)\b", "Refusing to kill init process"),
     # Dangerous dd commands
-    (r"dd\s+.*of=/dev/(sd[a-z]|nvme|hd[a-z])", "Refusing to write directly to disk device"),
+    (
+        "of=/dev/",
+        r"dd\s[^\n]{0,512}?of=/dev/(sd[a-z]|nvme|hd[a-z])",
+        "Refusing to write directly to disk device",
+    ),
     # Chmod dangerous
-    (r"chmod\s+(-[Rrf]+\s+)*777\s+/($|\s)", "Refusing chmod 777 on root"),
+    (
+        "777",
+        r"chmod\s{1,256}(-[Rrf]{1,16}\s{1,256}){0,8}777\s{1,256}/($|\s)",
+        "Refusing chmod 777 on root",
+    ),
 ]
 
 # Patterns that trigger a WARNING (printed but allowed)
 WARN_PATTERNS = [
-    (r"rm\s+(-[rfvd]+\s+)*/content(?!/drive)", "Warning: Deleting from /content workspace"),
-    (r"pip\s+install\s+--user", "Warning: Installing packages with --user flag"),
+    (
+        "/content",
+        r"rm\s{1,256}(-[rfvd]{1,16}\s{1,256}){0,8}/content(?!/drive)",
+        "Warning: Deleting from /content workspace",
+    ),
+    (
+        "--user",
+        r"pip\s{1,256}install\s{1,256}--user",
+        "Warning: Installing packages with --user flag",
+    ),
 ]
 
+# Commands are scanned in chunks of CHUNK_CHARS start positions; each chunk
+# also sees the next OVERLAP_CHARS so a match across the boundary is found.
+CHUNK_CHARS = 256 * 1024
+OVERLAP_CHARS = 4096
+# CPU time allowed for one check, and what to do when it runs out: "block"
+# (fail closed, the default) or "allow" (fail open with a warning)
+CPU_BUDGET_MS = float(os.environ.get("CLAUDE_COLAB_SAFETY_BUDGET_MS", "1000"))
+ON_BUDGET = os.environ.get("CLAUDE_COLAB_SAFETY_ON_BUDGET", "block")
+
+_compiled = {}
+
+
+class BudgetExceededError(Exception):
+    """Raised when a check uses more than CPU_BUDGET_MS of CPU time."""
+
+
+def _regex(pattern):
+    regex = _compiled.get(pattern)
+    if regex is None:
+        regex = _compiled[pattern] = re.compile(pattern, re.IGNORECASE)
+    return regex
+
+
+def _max_width(pattern):
+    """Return the length of the longest string `pattern` can match."""
+    try:
+        from re import _parser as sre_parse  # Python 3.11+
+    except ImportError:
+        import sre_parse
+    return sre_parse.parse(pattern).getwidth()[1]
+
+
+# A longer match could straddle a chunk boundary unseen, failing open
+for _needle, _pattern, _message in BLOCKED_PATTERNS + WARN_PATTERNS:
+    if _max_width(_pattern) >= OVERLAP_CHARS:
+        raise AssertionError(f"{_pattern!r} can match more than OVERLAP_CHARS characters")
+
+
+def find_match(regex, command, deadline):
+    """
+    Search `command` chunk by chunk; return the first match or None.
+
+    Raises BudgetExceededError once process CPU time passes `deadline`.
+    """
+    for chunk_start in range(0, max(len(command), 1), CHUNK_CHARS):
+        chunk_end = chunk_start + CHUNK_CHARS
+        window_end = min(len(command), chunk_end + OVERLAP_CHARS)
+        pos = chunk_start
+        while True:
+            if time.process_time() > deadline:
+                raise BudgetExceededError
+            match = regex.search(command, pos, window_end)
+            # Matches starting in the overlap belong to the next chunk
+            if match is None or match.start() >= chunk_end:
+                break
+            # `$` also matches at the window's end; confirm against the full command
+            if match.end() < window_end or window_end == len(command):
+                return match
+            if regex.match(command, match.start()):
+                return match
+            pos = match.start() + 1
+    return None
+
 
 def check_command(command: str) -> tuple[int, str | None]:
     """
@@ -47,28 +170,72 @@ def check_command(command: str) -> tuple[int, str | None]:
     Returns:
         (exit_code, message) - 0 for allow, 2 for block
     """
-    # Check blocked patterns
-    for pattern, message in BLOCKED_PATTERNS:
-        if re.search(pattern, command, re.IGNORECASE):
-            return 2, message
+    deadline = time.process_time() + CPU_BUDGET_MS / 1000
+    lowered = command.lower()
+    try:
+        # Check blocked patterns
+        for needle, pattern, message in BLOCKED_PATTERNS:
+            if needle in lowered and find_match(_regex(pattern), command, deadline):
+                return 2, message
+
+        # Check warning patterns (print warning but allow)
+        for needle, pattern, message in WARN_PATTERNS:
+            if needle in lowered and find_match(_regex(pattern), command, deadline):
+                print(f"\033[33m{message}\033[0m", file=sys.stderr)
+                annotate(decision="warn")
+    except BudgetExceededError:
+        annotate(budget_exceeded=True)
+        size = f"{len(command) / 2**20:.1f} MB"
+        if ON_BUDGET == "allow":
+            print(
+                f"\033[33mWarning: {size} command not fully checked within the safety "
+                f"budget ({CPU_BUDGET_MS:.0f} ms)\033[0m",
+                file=sys.stderr,
+            )
+            annotate(decision="warn")
+            return 0, None
+        return 2, (
+            f"Command too large to check within the safety budget ({size}); split it up "
+            "or set CLAUDE_COLAB_SAFETY_ON_BUDGET=allow"
+        )
+
+    return 0, None
+
+
+def check_file_tool(path: str, cwd: str | None = None) -> tuple[int, str | None]:
+    """
+    Check the target of a file-writing tool against protected paths.
 
-    # Check warning patterns (print warning but allow)
-    for pattern, message in WARN_PATTERNS:
-        if re.search(pattern, command, re.IGNORECASE):
-            print(f"\033[33m{message}\033[0m", file=sys.stderr)
+    Returns:
+        (exit_code, message) - 0 for allow, 2 for block
+    """
+    # Imported here so Bash checks don't pay for it
+    from path_guard import BLOCK, WARN, check_path
 
+    action, message, resolved = check_path(path, cwd)
+    if action == BLOCK:
+        return 2, f"{message}: {resolved}"
+    if action == WARN:
+        print(f"\033[33m{message}\033[0m", file=sys.stderr)
+        annotate(decision="warn")
     return 0, None
 
 
 def main():
     """
-    Read tool use from stdin and check for dangerous commands.
+    Read tool use from stdin and check for dangerous commands or paths.
 
     Expected input format (JSON):
     {
         "tool_name": "Bash",
         "tool_input": {"command": "rm -rf /"}
     }
+    or
+    {
+        "tool_name": "Write",
+        "tool_input": {"file_path": "/etc/hosts", "content": "..."},
+        "cwd": "/content/claude-workspaces/project"
+    }
     """
     try:
         # Read input from stdin
@@ -80,16 +247,21 @@ def main():
         tool_name = data.get("tool_name", "")
         tool_input = data.get("tool_input", {})
 
-        # Only check Bash commands
-        if tool_name != "Bash":
+        if tool_name in FILE_TOOLS:
+            path = tool_input.get(FILE_TOOLS[tool_name], "")
+            if not path:
+                sys.exit(0)
+            annotate(detail=path)
+            exit_code, message = check_file_tool(path, data.get("cwd"))
+        elif tool_name == "Bash":
+            command = tool_input.get("command", "")
+            if not command:
+                sys.exit(0)
+            annotate(detail=command)
+            exit_code, message = check_command(command)
+        else:
             sys.exit(0)
 
-        command = tool_input.get("command", "")
-        if not command:
-            sys.exit(0)
-
-        exit_code, message = check_command(command)
-
         if exit_code != 0 and message:
             # Output as JSON for Claude Code to display
             result = {"status": "blocked", "message": message}
@@ -107,4 +279,9 @@ def main():
 
 
 if __name__ == "__main__":
+    if sys.argv[1:2] == ["audit"]:
+        # Bulk mode lives in its own module so the hook stays fast to import
+        from safety_audit import main as audit_main
+
+        sys.exit(audit_main(sys.argv[2:]))
     main()
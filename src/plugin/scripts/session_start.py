@@ -7,15 +7,20 @@ Features:
 - Checks for plugin updates from GitHub releases
 - Displays welcome message with environment info
 - Sets up environment variables if needed
+- Starts the background resource sampler (see resource_monitor.py)
+- Starts the workspace file-index watcher (see workspace_index.py)
+- Warms heavy packages into the page cache in the background (see page_warmup.py)
+- Restores repos' local-disk .git from Drive after a runtime restart (see git_accel.py)
 """
 
+import functools
 import json
 import os
 import sys
-import urllib.error
-import urllib.request
 from pathlib import Path
 
+from colab_env import drive_root, in_colab
+
 # GitHub repo for update checks
 GITHUB_REPO = "ali/claude-colab"
 GITHUB_API_URL = f"https://api.github.com/repos/{GITHUB_REPO}/releases/latest"
@@ -39,6 +44,11 @@ def get_current_version():
 
 def check_for_updates():
     """Check GitHub releases for newer version."""
+    # Imported here: urllib.request pulls in http, email and ssl, which
+    # would otherwise cost every hook process startup time
+    import urllib.error
+    import urllib.request
+
     try:
         req = urllib.request.Request(
             GITHUB_API_URL,
@@ -78,8 +88,7 @@ def get_environment_info():
     """Gather environment information for display."""
     info = {}
 
-    # Check if in Colab
-    info["in_colab"] = os.path.exists("/content") and os.environ.get("COLAB_RELEASE_TAG")
+    info["in_colab"] = in_colab()
 
     # Check GPU
     try:
@@ -91,14 +100,111 @@ def get_environment_info():
     except ImportError:
         info["gpu"] = None
 
-    # Check Drive
-    info["drive_mounted"] = os.path.exists("/content/drive/My Drive") or os.path.exists(
-        "/content/drive/MyDrive"
-    )
+    info["drive_mounted"] = drive_root() is not None
 
     return info
 
 
+def _best_effort(setting, colab_only=True):
+    """
+    Decorate a background-start helper so it never fails session start.
+
+    The helper is skipped when the environment variable `setting` is "0".
+    With `colab_only` it runs only in Colab unless `setting` is "1".
+    """
+
+    def decorate(fn):
+        @functools.wraps(fn)
+        def wrapper():
+            value = os.environ.get(setting, "")
+            if value == "0" or (colab_only and value != "1" and not in_colab()):
+                return
+            try:
+                fn()
+            except Exception:
+                # Background helpers are optional - never fail session start
+                pass
+
+        return wrapper
+
+    return decorate
+
+
+@_best_effort("CLAUDE_COLAB_SAMPLER")
+def start_resource_sampler():
+    """
+    Start the background resource sampler (detached; never blocks the hook).
+
+    Runs in Colab by default. Set CLAUDE_COLAB_SAMPLER=0 to disable it, or
+    CLAUDE_COLAB_SAMPLER=1 to run it outside Colab.
+    """
+    from resource_monitor import ensure_running
+
+    ensure_running()
+
+
+def find_workspace():
+    """The notebook-created workspace (with an ENVIRONMENT.json) containing cwd, or None."""
+    cwd = Path.cwd()
+    return next((d for d in (cwd, *cwd.parents) if (d / "ENVIRONMENT.json").is_file()), None)
+
+
+@_best_effort("CLAUDE_COLAB_INDEX")
+def start_index_watcher():
+    """
+    Start the workspace file-index watcher (detached; never blocks the hook).
+
+    Runs in Colab for workspaces created by the notebook (with an
+    ENVIRONMENT.json). CLAUDE_COLAB_INDEX=0 disables it, =1 runs it outside Colab.
+    """
+    workspace = find_workspace()
+    if workspace:
+        from workspace_index import ensure_watching
+
+        ensure_watching(workspace)
+
+
+@_best_effort("CLAUDE_COLAB_JOBS", colab_only=False)
+def resume_job_queue():
+    """
+    Restart the job scheduler if the workspace has queued jobs (e.g. after a
+    runtime restart with a Drive workspace). CLAUDE_COLAB_JOBS=0 disables it.
+    """
+    workspace = find_workspace()
+    if workspace and (workspace / ".claude" / "jobs" / "queue.json").is_file():
+        from job_queue import refresh
+
+        refresh(workspace)
+
+
+@_best_effort("CLAUDE_COLAB_WARMUP")
+def start_page_warmup():
+    """
+    Start the page-cache warm-up of heavy packages (detached, low priority,
+    once per boot; never blocks the hook).
+
+    Runs in Colab by default. CLAUDE_COLAB_WARMUP=0 disables it, =1 runs it
+    outside Colab.
+    """
+    from page_warmup import ensure_started
+
+    ensure_started(find_workspace())
+
+
+@_best_effort("CLAUDE_COLAB_GIT_RESTORE", colab_only=False)
+def restore_local_git():
+    """
+    Copy `.git` back to local disk for workspace repos set up with
+    `git_accel.py local-git on` whose local copy was lost with the runtime
+    (detached; never blocks the hook). CLAUDE_COLAB_GIT_RESTORE=0 disables it.
+    """
+    workspace = find_workspace()
+    if workspace:
+        from git_accel import ensure_restored
+
+        ensure_restored(workspace)
+
+
 def main():
     """Main session start hook."""
     current_version = get_current_version()
@@ -131,6 +237,12 @@ def main():
         if status_parts:
             output_lines.append(f"\033[36mColab: {' | '.join(status_parts)}\033[0m")
 
+    start_resource_sampler()
+    start_index_watcher()
+    resume_job_queue()
+    start_page_warmup()
+    restore_local_git()
+
     # Print output if any
     if output_lines:
         print("\n".join(output_lines))
@@ -8,33 +8,42 @@ import json
 import os
 import sys
 
-try:
-    # Read JSON input from stdin
-    data = json.load(sys.stdin)
 
-    model = data.get("model", {}).get("display_name", "unknown")
-    cwd = data.get("cwd", os.getcwd())
-    project_dir = data.get("workspace", {}).get("project_dir", cwd)
+def main():
+    """Print the status line for the JSON session info on stdin."""
+    try:
+        # Read JSON input from stdin
+        data = json.load(sys.stdin)
 
-    # Shorten paths
-    cwd_short = os.path.basename(cwd) if cwd != "/" else "/"
-    project_short = os.path.basename(project_dir) if project_dir != "/" else "/"
+        model = data.get("model", {}).get("display_name", "unknown")
+        cwd = data.get("cwd", os.getcwd())
+        project_dir = data.get("workspace", {}).get("project_dir", cwd)
 
-    # Format status line with ANSI colors
-    # Green for model, cyan for directory
-    status = f"\033[32m{model}\033[0m | \033[36m{cwd_short}\033[0m"
+        # Shorten paths
+        cwd_short = os.path.basename(cwd) if cwd != "/" else "/"
+        project_short = os.path.basename(project_dir) if project_dir != "/" else "/"
 
-    if cwd_short != project_short:
-        status += f" (\033[33m{project_short}\033[0m)"
+        # Format status line with ANSI colors
+        # Green for model, cyan for directory
+        status = f"\033[32m{model}\033[0m | \033[36m{cwd_short}\033[0m"
 
-    # Add Colab indicator if in Colab
-    if os.path.exists("/content") and os.environ.get("COLAB_RELEASE_TAG"):
-        status += " | \033[35mColab\033[0m"
+        if cwd_short != project_short:
+            status += f" (\033[33m{project_short}\033[0m)"
 
-    print(status)
+        # Add Colab indicator if in Colab
+        if os.path.exists("/content") and os.environ.get("COLAB_RELEASE_TAG"):
+            status += " | \033[35mColab\033[0m"
 
-except Exception:
-    # Fallback if JSON parsing fails
-    cwd = os.getcwd()
-    cwd_short = os.path.basename(cwd) if cwd != "/" else "/"
-    print(f"Claude Code | {cwd_short}")
+        print(status)
+
+    except Exception:
+        # Fallback if JSON parsing fails
+        cwd = os.getcwd()
+        cwd_short = os.path.basename(cwd) if cwd != "/" else "/"
+        print(f"Claude Code | {cwd_short}")
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,533 @@
+#!/usr/bin/env python3
+"""
+Import a zip or tarball into a local workspace, fast.
+
+`unzip` onto Drive FUSE runs one file at a time. This script reads the
+archive (on Drive or local disk) once and extracts to local disk under
+/content/claude-workspaces/<name>:
+
+- zip members are decompressed on parallel threads, each with its own handle;
+- tarballs are streamed (decompressed by pigz/zstd/xz when installed) and
+  small files are written by a thread pool while the stream continues;
+- hard links are recreated once the files they name are on disk;
+- files over --max-file-size are deferred (listed in `.import-deferred.json`
+  and extractable later with `deferred --extract`) or skipped;
+- progress and throughput are printed while it runs.
+
+A single top-level directory (as in GitHub zips) is stripped. The result is
+registered as a workspace project: it gets an ENVIRONMENT.json and a file
+index, so the status command, the agents and the index watcher see it.
+
+Usage:
+    workspace_import.py import ARCHIVE [--name NAME] [--jobs N]
+                               [--max-file-size 200M] [--large defer|skip|extract] [--force]
+    workspace_import.py deferred [WORKSPACE] [--extract] [--jobs N]
+"""
+
+import argparse
+import json
+import os
+import shutil
+import stat
+import subprocess
+import sys
+import tarfile
+import threading
+import time
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path, PurePosixPath
+
+from colab_env import WORKSPACE_ROOTS, current_workspace, parse_size, read_json
+from workspace_index import FileIndex
+
+DEFAULT_JOBS = min(16, (os.cpu_count() or 2) * 2)
+DEFAULT_MAX_FILE_SIZE = 200 * 2**20
+# Tar members up to this size are handed to the writer pool; larger ones are streamed inline
+POOLED_MAX_BYTES = 4 * 2**20
+# Bytes of small tar members buffered in memory at once
+POOL_MEMORY_BYTES = 128 * 2**20
+COPY_BUFFER = 1 << 20
+DEFERRED_NAME = ".import-deferred.json"
+
+# (suffix, external decompressor command) tried in order for tarballs
+DECOMPRESSORS = (
+    ((".tar.gz", ".tgz"), (["pigz", "-dc"], ["gzip", "-dc"])),
+    ((".tar.zst", ".tzst"), (["zstd", "-dc"],)),
+    ((".tar.xz", ".txz"), (["xz", "-dc", "-T0"],)),
+    ((".tar.bz2", ".tbz2"), (["pbzip2", "-dc"], ["bzip2", "-dc"])),
+)
+
+
+class ArchiveImportError(Exception):
+    """Raised when an archive cannot be imported."""
+
+
+def safe_member_path(name, strip):
+    """Relative destination path for a member, or None if it is unsafe or stripped away."""
+    parts = PurePosixPath(name.replace("\\", "/")).parts
+    if not parts or parts[0] == "/" or ".." in parts:
+        return None
+    parts = parts[strip:]
+    return PurePosixPath(*parts) if parts else None
+
+
+def valid_name(name):
+    """Whether `name` is a single path component usable as a workspace directory."""
+    return bool(name) and name not in (".", "..") and not any(c in name for c in "/\\\0")
+
+
+def common_root(names):
+    """The single top-level directory shared by every member, if any."""
+    roots = {PurePosixPath(n).parts[0] for n in names if PurePosixPath(n).parts}
+    if len(roots) != 1:
+        return None
+    root = roots.pop()
+    # A lone file at the top level is not a wrapper directory
+    return root if any(len(PurePosixPath(n).parts) > 1 for n in names) else None
+
+
+class Progress:
+    """Thread-safe progress and throughput reporting on stderr."""
+
+    def __init__(self, total=None, position=None, stream=sys.stderr):
+        self.total = total
+        self.position = position
+        self.stream = stream
+        self.tty = stream.isatty()
+        self.bytes = 0
+        self.files = 0
+        self.started = time.monotonic()
+        self.last_print = self.started
+        self.lock = threading.Lock()
+
+    def add(self, nbytes, files=0):
+        with self.lock:
+            self.bytes += nbytes
+            self.files += files
+            now = time.monotonic()
+            if now - self.last_print >= (0.5 if self.tty else 5.0):
+                self.last_print = now
+                self._print(self.line())
+
+    def rate(self):
+        """Extracted MB/s so far."""
+        return self.bytes / 2**20 / max(time.monotonic() - self.started, 1e-6)
+
+    def line(self):
+        if self.total:
+            fraction = self.bytes / self.total
+        elif self.position:
+            fraction = self.position()
+        else:
+            fraction = None
+        percent = f"[{fraction * 100:3.0f}%] " if fraction is not None else ""
+        return f"{percent}{self.bytes / 2**30:.2f} GB, {self.files} files, {self.rate():.0f} MB/s"
+
+    def _print(self, text):
+        end = "\r" if self.tty else "\n"
+        print(f"  {text}", end=end, file=self.stream, flush=True)
+
+    def finish(self):
+        if self.tty:
+            print(file=self.stream)
+
+
+def _apply_metadata(path, mode, mtime):
+    """Set permission bits (owner-writable) and mtime on an extracted file."""
+    try:
+        if mode:
+            os.chmod(path, stat.S_IMODE(mode) | stat.S_IWUSR)
+        os.utime(path, (mtime, mtime))
+    except OSError:
+        pass
+
+
+class _Extraction:
+    """Shared state for one extraction run."""
+
+    def __init__(self, dest, strip, max_file_size, large, jobs, progress, only=None):
+        self.dest = dest
+        self.strip = strip
+        self.max_file_size = max_file_size
+        self.large = large
+        self.jobs = jobs
+        self.progress = progress
+        self.only = only
+        self.deferred = []
+        self.skipped_unsafe = []
+        self.skipped_links = []
+
+    def target(self, name, size):
+        """Destination path for a file member, or None if it is not extracted now."""
+        rel = safe_member_path(name, self.strip)
+        if rel is None:
+            self.skipped_unsafe.append(name)
+            return None
+        if self.only is not None:
+            return self.dest / rel if name in self.only else None
+        if size > self.max_file_size and self.large != "extract":
+            if self.large == "defer":
+                self.deferred.append({"member": name, "path": str(rel), "size": size})
+            return None
+        return self.dest / rel
+
+
+def extract_zip(archive, ex):
+    """Extract a zip with parallel workers."""
+    with zipfile.ZipFile(archive) as zf:
+        members = zf.infolist()
+        jobs = []
+        for info in members:
+            if info.is_dir():
+                rel = safe_member_path(info.filename, ex.strip)
+                if rel is not None and ex.only is None:
+                    (ex.dest / rel).mkdir(parents=True, exist_ok=True)
+                continue
+            target = ex.target(info.filename, info.file_size)
+            if target is not None:
+                jobs.append((info, target))
+    for _, target in jobs:
+        target.parent.mkdir(parents=True, exist_ok=True)
+    ex.progress.total = sum(info.file_size for info, _ in jobs) or None
+
+    local = threading.local()
+
+    def extract_one(job):
+        info, target = job
+        if not hasattr(local, "zf"):
+            local.zf = zipfile.ZipFile(archive)
+        with local.zf.open(info) as src, open(target, "wb") as dst:
+            while True:
+                block = src.read(COPY_BUFFER)
+                if not block:
+                    break
+                dst.write(block)
+                ex.progress.add(len(block))
+        mode = info.external_attr >> 16
+        mtime = time.mktime(info.date_time + (0, 0, -1))
+        _apply_metadata(target, mode if stat.S_ISREG(mode) else 0, mtime)
+        ex.progress.add(0, files=1)
+
+    # Largest first so one huge member doesn't finish last on a single thread
+    jobs.sort(key=lambda job: -job[0].file_size)
+    with ThreadPoolExecutor(ex.jobs) as pool:
+        for _ in pool.map(extract_one, jobs):
+            pass
+
+
+def _open_tar_stream(archive):
+    """Return (readable binary stream, decompressor process or None, raw archive file)."""
+    raw = open(archive, "rb")
+    name = archive.name.lower()
+    for suffixes, commands in DECOMPRESSORS:
+        if name.endswith(suffixes):
+            for command in commands:
+                if shutil.which(command[0]):
+                    # The child shares raw's file offset, which Progress reads
+                    proc = subprocess.Popen(command, stdin=raw, stdout=subprocess.PIPE)
+                    return proc.stdout, proc, raw
+    return raw, None, raw
+
+
+def extract_tar(archive, ex):
+    """Extract a tarball in one streaming pass with a writer pool for small files."""
+    size = archive.stat().st_size
+    stream, proc, raw = _open_tar_stream(archive)
+    ex.progress.position = lambda: os.lseek(raw.fileno(), 0, os.SEEK_CUR) / max(size, 1)
+    memory = threading.BoundedSemaphore(max(1, POOL_MEMORY_BYTES // POOLED_MAX_BYTES))
+    errors = []
+    links = []
+
+    def write_small(target, data, mode, mtime):
+        try:
+            with open(target, "wb") as dst:
+                dst.write(data)
+            _apply_metadata(target, mode, mtime)
+            ex.progress.add(len(data), files=1)
+        except OSError as e:
+            errors.append(e)
+        finally:
+            memory.release()
+
+    try:
+        mode = "r|*" if proc is None else "r|"
+        with tarfile.open(fileobj=stream, mode=mode) as tf, ThreadPoolExecutor(ex.jobs) as pool:
+            for member in tf:
+                if member.isdir():
+                    rel = safe_member_path(member.name, ex.strip)
+                    if rel is not None and ex.only is None:
+                        (ex.dest / rel).mkdir(parents=True, exist_ok=True)
+                    continue
+                if member.issym():
+                    rel = safe_member_path(member.name, ex.strip)
+                    link = PurePosixPath(member.linkname)
+                    if rel is None or link.is_absolute() or ".." in link.parts or ex.only:
+                        continue
+                    target = ex.dest / rel
+                    target.parent.mkdir(parents=True, exist_ok=True)
+                    if not target.is_symlink():
+                        os.symlink(member.linkname, target)
+                    continue
+                if member.islnk():
+                    if ex.only is None:
+                        links.append(member)
+                    continue
+                if not member.isfile():
+                    continue
+                target = ex.target(member.name, member.size)
+                if target is None:
+                    continue
+                target.parent.mkdir(parents=True, exist_ok=True)
+                src = tf.extractfile(member)
+                if member.size <= POOLED_MAX_BYTES:
+                    memory.acquire()
+                    pool.submit(write_small, target, src.read(), member.mode, member.mtime)
+                else:
+                    with open(target, "wb") as dst:
+                        while True:
+                            block = src.read(COPY_BUFFER)
+                            if not block:
+                                break
+                            dst.write(block)
+                            ex.progress.add(len(block))
+                    _apply_metadata(target, member.mode, member.mtime)
+                    ex.progress.add(0, files=1)
+    except tarfile.TarError as e:
+        raise ArchiveImportError(f"{archive.name}: {e}")
+    finally:
+        if proc is not None:
+            stream.close()
+            proc.wait()
+        raw.close()
+    if errors:
+        raise errors[0]
+    # A hard link names an earlier member that the pool may still have been
+    # writing, so links are made once every file is on disk
+    for member in links:
+        rel = safe_member_path(member.name, ex.strip)
+        source = safe_member_path(member.linkname, ex.strip)
+        if rel is None or source is None:
+            ex.skipped_unsafe.append(member.name)
+            continue
+        if rel == source:
+            continue
+        target = ex.dest / rel
+        try:
+            target.parent.mkdir(parents=True, exist_ok=True)
+            target.unlink(missing_ok=True)
+            os.link(ex.dest / source, target, follow_symlinks=False)
+        except OSError:
+            # The linked file was deferred, skipped or is not in the archive
+            ex.skipped_links.append(member.name)
+            continue
+        ex.progress.add(0, files=1)
+
+
+def flatten_wrapper(dest, ex):
+    """
+    Move the contents of a single top-level directory up into `dest`.
+
+    Tarballs are streamed, so the wrapper directory is only known after
+    extraction; renames on local disk are cheap. Returns 1 if a wrapper was
+    stripped, else 0.
+    """
+    entries = list(dest.iterdir())
+    if len(entries) != 1 or not entries[0].is_dir() or entries[0].is_symlink():
+        return 0
+    # Renamed first in case it contains an entry with its own name
+    wrapper = entries[0].rename(dest / f".{entries[0].name}.import")
+    for child in wrapper.iterdir():
+        child.rename(dest / child.name)
+    wrapper.rmdir()
+    for member in ex.deferred:
+        member["path"] = str(PurePosixPath(*PurePosixPath(member["path"]).parts[1:]))
+    return 1
+
+
+def archive_stem(archive):
+    """Archive name without its archive suffixes ("repo-main.tar.gz" -> "repo-main")."""
+    name = archive.name
+    for suffix in (".gz", ".zst", ".xz", ".bz2", ".tar", ".tgz", ".tzst", ".txz", ".tbz2", ".zip"):
+        if name.lower().endswith(suffix):
+            name = name[: -len(suffix)]
+    return name
+
+
+def extract(archive, dest, strip, max_file_size, large, jobs, only=None):
+    """Extract `archive` into `dest`. Returns the _Extraction with its results."""
+    progress = Progress()
+    ex = _Extraction(dest, strip, max_file_size, large, jobs, progress, only)
+    if zipfile.is_zipfile(archive):
+        extract_zip(archive, ex)
+    else:
+        extract_tar(archive, ex)
+    progress.finish()
+    return ex
+
+
+def register_project(dest, name, archive, strip=0, deferred=()):
+    """Write ENVIRONMENT.json, the deferred list and the file index for a new workspace."""
+    template = read_json(current_workspace() / "ENVIRONMENT.json", default={}) or {}
+    environment = {
+        **{k: v for k, v in template.items() if k not in ("workspace_path", "project_name")},
+        "storage_mode": "ephemeral",
+        "workspace_path": str(dest),
+        "project_name": name,
+        "imported_from": str(archive),
+        "imported_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+    }
+    # An ENVIRONMENT.json shipped inside the archive wins
+    if read_json(dest / "ENVIRONMENT.json") is None:
+        (dest / "ENVIRONMENT.json").write_text(json.dumps(environment, indent=2))
+    if deferred:
+        record = {"archive": str(archive), "strip": strip, "members": list(deferred)}
+        (dest / DEFERRED_NAME).write_text(json.dumps(record, indent=2))
+    index = FileIndex(dest)
+    index.reconcile()
+    index.save()
+    return index
+
+
+def import_archive(
+    archive,
+    name=None,
+    dest_root=None,
+    jobs=DEFAULT_JOBS,
+    max_file_size=DEFAULT_MAX_FILE_SIZE,
+    large="defer",
+    force=False,
+):
+    """Extract an archive into a new local workspace and register it. Returns a summary."""
+    archive = Path(archive).resolve()
+    if not archive.is_file():
+        raise ArchiveImportError(f"{archive} not found")
+    is_zip = zipfile.is_zipfile(archive)
+    if is_zip:
+        with zipfile.ZipFile(archive) as zf:
+            wrapper = common_root(zf.namelist())
+        # "../x" and "/x" members share a "root" too; they are skipped as unsafe
+        if not valid_name(wrapper):
+            wrapper = None
+    else:
+        wrapper = None
+    if name is not None and not valid_name(name):
+        raise ArchiveImportError(f"invalid workspace name {name!r}")
+    name = name or wrapper or archive_stem(archive)
+    root = Path(dest_root or WORKSPACE_ROOTS[0]).resolve()
+    dest = root / name
+    # Never rmtree or create anything outside the workspace root
+    if not valid_name(name) or dest.resolve().parent != root:
+        raise ArchiveImportError(f"{dest} is not a directory directly under {root}")
+    if dest.exists() and any(dest.iterdir()):
+        if not force:
+            raise ArchiveImportError(f"{dest} already exists and is not empty (use --force)")
+        shutil.rmtree(dest)
+    dest.mkdir(parents=True, exist_ok=True)
+
+    started = time.monotonic()
+    strip = 1 if wrapper else 0
+    ex = extract(archive, dest, strip, max_file_size, large, jobs)
+    if not is_zip:
+        strip = flatten_wrapper(dest, ex)
+    elapsed = time.monotonic() - started
+    index = register_project(dest, name, archive, strip, ex.deferred)
+    return {
+        "workspace": str(dest),
+        "files": ex.progress.files,
+        "bytes": ex.progress.bytes,
+        "seconds": round(elapsed, 2),
+        "mb_per_s": round(ex.progress.bytes / 2**20 / max(elapsed, 1e-6), 1),
+        "deferred": ex.deferred,
+        "skipped_unsafe": ex.skipped_unsafe,
+        "skipped_links": ex.skipped_links,
+        "indexed_files": len(index.files),
+    }
+
+
+def extract_deferred(workspace, jobs=DEFAULT_JOBS):
+    """Extract members deferred by an earlier import. Returns the number extracted."""
+    workspace = Path(workspace)
+    record = read_json(workspace / DEFERRED_NAME)
+    if not record or not record.get("members"):
+        return 0
+    only = {member["member"] for member in record["members"]}
+    ex = extract(Path(record["archive"]), workspace, record["strip"], 0, "extract", jobs, only)
+    (workspace / DEFERRED_NAME).unlink()
+    index = FileIndex.load(workspace)
+    index.reconcile()
+    index.save()
+    return ex.progress.files
+
+
+def main(argv=None):
+    """Command entry point."""
+    parser = argparse.ArgumentParser(description="Import an archive into a local workspace.")
+    sub = parser.add_subparsers(dest="action", required=True)
+    p = sub.add_parser("import", help="Extract an archive into a new workspace")
+    p.add_argument("archive")
+    p.add_argument("--name", help="Workspace name (default: archive's top directory or stem)")
+    p.add_argument("--dest-root", help=f"Parent directory (default: {WORKSPACE_ROOTS[0]})")
+    p.add_argument("--jobs", type=int, default=DEFAULT_JOBS)
+    p.add_argument("--max-file-size", default="200M", help="Files above this are deferred")
+    p.add_argument("--large", choices=("defer", "skip", "extract"), default="defer")
+    p.add_argument("--force", action="store_true", help="Replace an existing workspace")
+    p.add_argument("--json", action="store_true")
+    p = sub.add_parser("deferred", help="List or extract deferred large files")
+    p.add_argument("workspace", nargs="?")
+    p.add_argument("--extract", action="store_true")
+    p.add_argument("--jobs", type=int, default=DEFAULT_JOBS)
+    args = parser.parse_args(argv)
+
+    try:
+        if args.action == "deferred":
+            workspace = Path(args.workspace or current_workspace())
+            if args.extract:
+                print(f"✓ Extracted {extract_deferred(workspace, args.jobs)} deferred file(s)")
+                return 0
+            record = read_json(workspace / DEFERRED_NAME) or {}
+            members = record.get("members", [])
+            for member in members:
+                print(f"{member['size'] / 2**20:10.1f} MB  {member['path']}")
+            print(f"{len(members)} deferred file(s) from {record.get('archive', '-')}")
+            return 0
+
+        result = import_archive(
+            args.archive,
+            args.name,
+            args.dest_root,
+            args.jobs,
+            parse_size(args.max_file_size),
+            args.large,
+            args.force,
+        )
+    except (ArchiveImportError, OSError, ValueError, zipfile.BadZipFile) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+
+    if args.json:
+        print(json.dumps(result, separators=(",", ":")))
+        return 0
+    print(
+        f"✓ Imported {result['files']} files ({result['bytes'] / 2**20:.1f} MB) into "
+        f"{result['workspace']} in {result['seconds']}s ({result['mb_per_s']} MB/s)"
+    )
+    if result["deferred"]:
+        size = sum(member["size"] for member in result["deferred"]) / 2**20
+        print(
+            f"⚠️ Deferred {len(result['deferred'])} large file(s) ({size:.1f} MB); "
+            "extract with: workspace_import.py deferred --extract"
+        )
+    if result["skipped_unsafe"]:
+        print(f"⚠️ Skipped {len(result['skipped_unsafe'])} member(s) with unsafe paths")
+    if result["skipped_links"]:
+        print(
+            f"⚠️ Skipped {len(result['skipped_links'])} hard link(s) to files that were not "
+            "extracted"
+        )
+    print(f'cd "{result["workspace"]}"')
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
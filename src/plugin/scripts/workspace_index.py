@@ -0,0 +1,546 @@
+#!/usr/bin/env python3
+"""
+Persistent file index for a workspace.
+
+Walking a workspace on Drive FUSE can take tens of seconds, so checkpoints,
+colab-status and searches read this index instead. It holds the path, size,
+mtime and (with --hash) a content hash of every file, and is stored in the
+workspace at `.claude/file-index.json.gz` so it survives the runtime.
+
+`watch` keeps the index current during a session. It first reconciles the
+index with the tree by size and mtime (rehashing only files that changed),
+then follows changes with inotify and writes the index a few seconds after
+the last change. SessionStart starts it detached in Colab
+(CLAUDE_COLAB_INDEX=0 disables it). Changes made while no watcher runs, e.g.
+from another runtime through Drive, are picked up by the next reconcile.
+
+Usage:
+    workspace_index.py scan [WORKSPACE] [--hash]
+    workspace_index.py start|stop [WORKSPACE] [--hash]
+    workspace_index.py watch [WORKSPACE] [--hash]
+    workspace_index.py query [WORKSPACE] [--changed-since WHEN] [--glob PATTERN]
+                             [--largest N] [--json]
+
+WHEN is an age (30m, 2h, 7d), an ISO date/time or a Unix timestamp.
+"""
+
+import argparse
+import bisect
+import ctypes
+import ctypes.util
+import fnmatch
+import gzip
+import hashlib
+import json
+import os
+import re
+import select
+import signal
+import struct
+import subprocess
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+
+from colab_env import current_workspace, read_pid, state_path
+
+INDEX_NAME = ".claude/file-index.json.gz"
+FORMAT_VERSION = 1
+EXCLUDE_DIRS = {".git", "__pycache__", ".ipynb_checkpoints", "node_modules", ".venv"}
+# Files larger than this are indexed without a hash even with --hash
+HASH_MAX_BYTES = 256 * 1024 * 1024
+# Seconds after the last change before the index is written
+FLUSH_DELAY = 2.0
+# Reconcile interval when inotify can't watch every directory
+FALLBACK_RECONCILE_INTERVAL = 120
+
+# inotify(7) constants
+IN_MODIFY = 0x2
+IN_ATTRIB = 0x4
+IN_CLOSE_WRITE = 0x8
+IN_MOVED_FROM = 0x40
+IN_MOVED_TO = 0x80
+IN_CREATE = 0x100
+IN_DELETE = 0x200
+IN_Q_OVERFLOW = 0x4000
+IN_IGNORED = 0x8000
+IN_ISDIR = 0x40000000
+IN_CLOEXEC = 0o2000000
+WATCH_MASK = (
+    IN_MODIFY | IN_ATTRIB | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE
+)
+EVENT = struct.Struct("iIII")
+
+AGE = re.compile(r"^(\d+(?:\.\d+)?)([smhd])$")
+AGE_SECONDS = {"s": 1, "m": 60, "h": 3600, "d": 86400}
+
+
+def file_hash(path):
+    """BLAKE2b-128 hex digest of a file's content."""
+    digest = hashlib.blake2b(digest_size=16)
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class FileIndex:
+    """
+    Path -> (size, mtime, hash) for every file under a workspace root.
+
+    Paths are relative to the root and use "/". Queries never touch the
+    filesystem; `reconcile`, `refresh` and `remove_tree` update the index.
+    """
+
+    def __init__(self, root, hashed=False):
+        self.root = Path(root).resolve()
+        self.hashed = hashed
+        self.files = {}
+        # Sorted keys of `files` for subtree lookups, built on first use
+        self._paths = None
+        self.reconciled_at = None
+
+    @property
+    def path(self):
+        return self.root / INDEX_NAME
+
+    @classmethod
+    def load(cls, root, hashed=None):
+        """Load the stored index for `root` (empty if missing or unreadable)."""
+        index = cls(root, bool(hashed))
+        try:
+            with gzip.open(index.path, "rt", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError, EOFError):
+            return index
+        if data.get("version") != FORMAT_VERSION:
+            return index
+        index.files = {path: tuple(entry) for path, entry in data["files"].items()}
+        index.reconciled_at = data.get("reconciled_at")
+        index.hashed = data.get("hashed", False) if hashed is None else hashed
+        return index
+
+    def save(self):
+        """Write the index atomically."""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        data = {
+            "version": FORMAT_VERSION,
+            "hashed": self.hashed,
+            "reconciled_at": self.reconciled_at,
+            "saved_at": time.time(),
+            "files": self.files,
+        }
+        tmp = self.path.with_name(self.path.name + f".{os.getpid()}.tmp")
+        with gzip.open(tmp, "wt", encoding="utf-8", compresslevel=1) as f:
+            json.dump(data, f, separators=(",", ":"))
+        os.replace(tmp, self.path)
+
+    @staticmethod
+    def _excluded(rel):
+        """True for the index file itself and its temporary files."""
+        return rel == INDEX_NAME or rel.startswith(INDEX_NAME + ".")
+
+    def _entry(self, full, st, old=None):
+        """Index entry for a stat result, reusing the old hash if size and mtime match."""
+        size, mtime = st.st_size, round(st.st_mtime, 3)
+        digest = None
+        if self.hashed and size <= HASH_MAX_BYTES:
+            if old and old[0] == size and old[1] == mtime and old[2]:
+                digest = old[2]
+            else:
+                try:
+                    digest = file_hash(full)
+                except OSError:
+                    pass
+        return (size, mtime, digest)
+
+    def _set(self, rel, entry):
+        if self._paths is not None and rel not in self.files:
+            bisect.insort(self._paths, rel)
+        self.files[rel] = entry
+
+    def _subtree(self, rel_dir):
+        """Indexed paths under `rel_dir` ("" for all), via bisect on the sorted keys."""
+        if self._paths is None:
+            self._paths = sorted(self.files)
+        if not rel_dir:
+            return 0, len(self._paths)
+        # "0" is the character after "/", so this range is exactly `rel_dir/...`
+        lo = bisect.bisect_left(self._paths, rel_dir + "/")
+        return lo, bisect.bisect_left(self._paths, rel_dir + "0", lo)
+
+    def walk(self, rel_dir=""):
+        """Yield (relative path, DirEntry) for every file under `rel_dir`, skipping EXCLUDE_DIRS."""
+        stack = [rel_dir]
+        while stack:
+            current = stack.pop()
+            try:
+                entries = os.scandir(self.root / current if current else self.root)
+            except OSError:
+                continue
+            with entries:
+                for entry in entries:
+                    rel = f"{current}/{entry.name}" if current else entry.name
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            if entry.name not in EXCLUDE_DIRS:
+                                stack.append(rel)
+                        elif entry.is_file(follow_symlinks=False) and not self._excluded(rel):
+                            yield rel, entry
+                    except OSError:
+                        continue
+
+    def reconcile(self, rel_dir=""):
+        """Bring the index in line with the tree under `rel_dir`. Returns change counts."""
+        counts = {"added": 0, "changed": 0, "removed": 0}
+        seen = set()
+        for rel, entry in self.walk(rel_dir):
+            seen.add(rel)
+            try:
+                st = entry.stat(follow_symlinks=False)
+            except OSError:
+                continue
+            old = self.files.get(rel)
+            if old and old[0] == st.st_size and old[1] == round(st.st_mtime, 3):
+                if old[2] or not self.hashed or st.st_size > HASH_MAX_BYTES:
+                    continue
+            self._set(rel, self._entry(entry.path, st, old))
+            counts["changed" if old else "added"] += 1
+        lo, hi = self._subtree(rel_dir)
+        kept = []
+        for rel in self._paths[lo:hi]:
+            if rel in seen:
+                kept.append(rel)
+            else:
+                del self.files[rel]
+                counts["removed"] += 1
+        self._paths[lo:hi] = kept
+        if not rel_dir:
+            self.reconciled_at = time.time()
+        return counts
+
+    def refresh(self, rel):
+        """Re-stat one path: update, add or drop it. Directories are reconciled."""
+        full = self.root / rel
+        try:
+            st = full.stat(follow_symlinks=False)
+        except OSError:
+            self.remove_tree(rel)
+            return
+        if full.is_dir():
+            self.reconcile(rel)
+        elif full.is_file() and not self._excluded(rel):
+            self._set(rel, self._entry(full, st, self.files.get(rel)))
+
+    def remove_tree(self, rel):
+        """Drop a path and everything under it."""
+        lo, hi = self._subtree(rel)
+        for path in self._paths[lo:hi]:
+            del self.files[path]
+        del self._paths[lo:hi]
+        if self.files.pop(rel, None) is not None:
+            del self._paths[bisect.bisect_left(self._paths, rel)]
+
+    # Queries
+
+    def entries(self):
+        """All files as dicts, in path order."""
+        return [
+            {"path": path, "size": size, "mtime": mtime, "hash": digest}
+            for path, (size, mtime, digest) in sorted(self.files.items())
+        ]
+
+    def query(self, changed_since=None, pattern=None, largest=None):
+        """
+        Files matching all given filters.
+
+        `pattern` is a glob matched against the relative path, or against the
+        file name when it has no "/" ("*.ipynb", "data/**.csv"). `largest`
+        keeps the N biggest matches, largest first.
+        """
+        results = self.entries()
+        if changed_since is not None:
+            results = [entry for entry in results if entry["mtime"] > changed_since]
+        if pattern:
+            if "/" in pattern:
+                results = [e for e in results if fnmatch.fnmatchcase(e["path"], pattern)]
+            else:
+                results = [
+                    e for e in results if fnmatch.fnmatchcase(e["path"].rsplit("/", 1)[-1], pattern)
+                ]
+        if largest:
+            results = sorted(results, key=lambda entry: -entry["size"])[:largest]
+        return results
+
+    def changed_since(self, timestamp):
+        """Files modified after a Unix timestamp."""
+        return self.query(changed_since=timestamp)
+
+    def largest(self, n=10):
+        """The `n` largest files."""
+        return self.query(largest=n)
+
+    def match(self, pattern):
+        """Files matching a glob (see query)."""
+        return self.query(pattern=pattern)
+
+    def summary(self):
+        """File count, total size and index age."""
+        return {
+            "files": len(self.files),
+            "total_mb": round(sum(size for size, _, _ in self.files.values()) / 2**20, 1),
+            "hashed": self.hashed,
+            "reconciled_at": self.reconciled_at,
+            "watcher_running": watcher_pid(self.root) is not None,
+        }
+
+
+def load_index(workspace=None, hashed=None):
+    """Load the workspace index, scanning once if none exists yet."""
+    index = FileIndex.load(workspace or current_workspace(), hashed)
+    if index.reconciled_at is None:
+        index.reconcile()
+        index.save()
+    return index
+
+
+class Inotify:
+    """Minimal recursive inotify watcher (Linux, via libc)."""
+
+    def __init__(self):
+        self.libc = ctypes.CDLL(ctypes.util.find_library("c") or None, use_errno=True)
+        self.fd = self.libc.inotify_init1(IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self.paths = {}
+        self.complete = True
+
+    def add(self, full_path, rel):
+        """Watch one directory. Returns False when the kernel watch limit is reached."""
+        wd = self.libc.inotify_add_watch(self.fd, os.fsencode(full_path), WATCH_MASK)
+        if wd < 0:
+            self.complete = False
+            return False
+        self.paths[wd] = rel
+        return True
+
+    def add_tree(self, root, rel=""):
+        """Watch a directory and all its subdirectories, skipping EXCLUDE_DIRS."""
+        stack = [rel]
+        while stack:
+            current = stack.pop()
+            if not self.add(root / current if current else root, current):
+                return
+            try:
+                with os.scandir(root / current if current else root) as entries:
+                    for entry in entries:
+                        if entry.name not in EXCLUDE_DIRS and entry.is_dir(follow_symlinks=False):
+                            stack.append(f"{current}/{entry.name}" if current else entry.name)
+            except OSError:
+                continue
+
+    def read(self, timeout):
+        """Wait up to `timeout` s and return [(relative path, mask)]; ("", IN_Q_OVERFLOW) on overflow."""
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        if not ready:
+            return []
+        data = os.read(self.fd, 256 * 1024)
+        events = []
+        offset = 0
+        while offset < len(data):
+            wd, mask, _, length = EVENT.unpack_from(data, offset)
+            offset += EVENT.size
+            name = data[offset : offset + length].rstrip(b"\0").decode("utf-8", "surrogateescape")
+            offset += length
+            if mask & IN_Q_OVERFLOW:
+                events.append(("", IN_Q_OVERFLOW))
+                continue
+            if mask & IN_IGNORED:
+                self.paths.pop(wd, None)
+                continue
+            base = self.paths.get(wd)
+            if base is None:
+                continue
+            events.append((f"{base}/{name}" if base and name else base or name, mask))
+        return events
+
+    def close(self):
+        os.close(self.fd)
+
+
+def _pid_file(root):
+    digest = hashlib.blake2b(str(root).encode(), digest_size=6).hexdigest()
+    return state_path(f"index-{digest}.pid")
+
+
+def watcher_pid(root):
+    """PID of the watcher for `root`, or None."""
+    return read_pid(_pid_file(Path(root).resolve()))
+
+
+def watch(root, hashed=False, stop_after=None):
+    """Reconcile, then keep the index current with inotify until terminated."""
+    root = Path(root).resolve()
+    pid_file = _pid_file(root)
+    pid_file.write_text(str(os.getpid()))
+    signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))
+    index = FileIndex.load(root, hashed or None)
+    notify = Inotify()
+    try:
+        # Watch before reconciling so changes made meanwhile are not missed
+        notify.add_tree(root)
+        index.reconcile()
+        index.save()
+        dirty = set()
+        last_event = last_reconcile = time.monotonic()
+        started = time.monotonic()
+        while stop_after is None or time.monotonic() - started < stop_after:
+            events = notify.read(FLUSH_DELAY / 2 if dirty else 1.0)
+            now = time.monotonic()
+            for rel, mask in events:
+                if mask & IN_Q_OVERFLOW:
+                    index.reconcile()
+                    dirty.add("")
+                    continue
+                if mask & IN_ISDIR and mask & (IN_CREATE | IN_MOVED_TO):
+                    notify.add_tree(root, rel)
+                if FileIndex._excluded(rel) or EXCLUDE_DIRS.intersection(rel.split("/")):
+                    continue
+                dirty.add(rel)
+                last_event = now
+            if not notify.complete and now - last_reconcile > FALLBACK_RECONCILE_INTERVAL:
+                index.reconcile()
+                last_reconcile = now
+                dirty.add("")
+            if dirty and now - last_event >= FLUSH_DELAY:
+                for rel in dirty:
+                    if rel:
+                        index.refresh(rel)
+                index.save()
+                dirty.clear()
+    finally:
+        notify.close()
+        try:
+            if pid_file.read_text().strip() == str(os.getpid()):
+                pid_file.unlink()
+        except OSError:
+            pass
+
+
+def ensure_watching(root, hashed=False):
+    """Start a detached watcher for `root` if none is running. Returns its pid."""
+    root = Path(root).resolve()
+    pid = watcher_pid(root)
+    if pid:
+        return pid
+    cmd = [sys.executable, os.path.abspath(__file__), "watch", str(root)]
+    if hashed:
+        cmd.append("--hash")
+    process = subprocess.Popen(
+        cmd,
+        stdin=subprocess.DEVNULL,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+        start_new_session=True,
+        close_fds=True,
+    )
+    return process.pid
+
+
+def stop_watching(root):
+    """Stop the watcher for `root`. Returns True if one was running."""
+    pid = watcher_pid(root)
+    if not pid:
+        return False
+    os.kill(pid, signal.SIGTERM)
+    return True
+
+
+def parse_when(value, now=None):
+    """Parse an age ("2h"), ISO date/time or Unix timestamp into a Unix timestamp."""
+    now = time.time() if now is None else now
+    match = AGE.match(value)
+    if match:
+        return now - float(match.group(1)) * AGE_SECONDS[match.group(2)]
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    try:
+        return datetime.fromisoformat(value).timestamp()
+    except ValueError:
+        raise ValueError(f"can't parse time {value!r} (use 30m, 2h, 7d, ISO date or timestamp)")
+
+
+def format_entries(entries):
+    """Render query results as a table."""
+    lines = []
+    for entry in entries:
+        stamp = time.strftime("%Y-%m-%d %H:%M", time.localtime(entry["mtime"]))
+        lines.append(f"{entry['size'] / 2**20:10.2f} MB  {stamp}  {entry['path']}")
+    lines.append(f"{len(entries)} file(s), {sum(e['size'] for e in entries) / 2**20:.1f} MB")
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    """Command entry point."""
+    parser = argparse.ArgumentParser(description="Persistent workspace file index.")
+    sub = parser.add_subparsers(dest="action", required=True)
+    for name, help_text in (
+        ("scan", "Reconcile the index with the tree now"),
+        ("start", "Start the background watcher"),
+        ("stop", "Stop the background watcher"),
+        ("watch", "Reconcile, then follow changes (foreground)"),
+    ):
+        p = sub.add_parser(name, help=help_text)
+        p.add_argument("workspace", nargs="?")
+        p.add_argument("--hash", action="store_true", help="Store content hashes")
+    p = sub.add_parser("query", help="Query the index without walking the tree")
+    p.add_argument("workspace", nargs="?")
+    p.add_argument("--changed-since", metavar="WHEN")
+    p.add_argument("--glob", metavar="PATTERN")
+    p.add_argument("--largest", type=int, metavar="N")
+    p.add_argument("--summary", action="store_true", help="Only print counts and totals")
+    p.add_argument("--json", action="store_true")
+    args = parser.parse_args(argv)
+
+    root = Path(args.workspace or current_workspace()).resolve()
+    try:
+        if args.action == "watch":
+            watch(root, args.hash)
+        elif args.action == "start":
+            print(f"Index watcher running for {root} (pid {ensure_watching(root, args.hash)})")
+        elif args.action == "stop":
+            print("Index watcher stopped" if stop_watching(root) else "No index watcher running")
+        elif args.action == "scan":
+            index = FileIndex.load(root, args.hash or None)
+            started = time.monotonic()
+            counts = index.reconcile()
+            index.save()
+            print(
+                f"✓ Indexed {len(index.files)} files in {time.monotonic() - started:.1f}s "
+                f"(+{counts['added']} ~{counts['changed']} -{counts['removed']})"
+            )
+        else:
+            index = load_index(root)
+            if args.summary:
+                result = index.summary()
+            else:
+                since = parse_when(args.changed_since) if args.changed_since else None
+                result = index.query(since, args.glob, args.largest)
+            if args.json:
+                print(json.dumps(result, separators=(",", ":")))
+            elif args.summary:
+                for name, value in result.items():
+                    print(f"{name:<16} {value}")
+            else:
+                print(format_entries(result))
+    except (OSError, ValueError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
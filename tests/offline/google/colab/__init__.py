@@ -0,0 +1,6 @@
+"""
+Offline stand-in for the `google.colab` module.
+
+Only the pieces the bootstrap notebook uses are provided: `drive.mount`
+and `userdata.get`.
+"""
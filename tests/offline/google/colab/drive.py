@@ -0,0 +1,12 @@
+"""Offline stand-in for `google.colab.drive`."""
+
+import os
+
+
+def mount(mountpoint, force_remount=False, timeout_ms=None, readonly=False):
+    """Create an empty local directory tree that looks like a mounted Drive."""
+    os.makedirs(os.path.join(mountpoint, "My Drive"), exist_ok=True)
+    link = os.path.join(mountpoint, "MyDrive")
+    if not os.path.lexists(link):
+        os.symlink("My Drive", link)
+    print(f"Mounted at {mountpoint}")
@@ -0,0 +1,21 @@
+"""
+Offline stand-in for `google.colab.userdata`.
+
+Secrets are read from the FAKE_COLAB_SECRETS environment variable
+(a JSON object of name -> value).
+"""
+
+import json
+import os
+
+
+class SecretNotFoundError(Exception):
+    """Raised when a secret does not exist (matches Colab's behavior)."""
+
+
+def get(key):
+    """Return the secret named `key`."""
+    secrets = json.loads(os.environ.get("FAKE_COLAB_SECRETS") or "{}")
+    if key not in secrets:
+        raise SecretNotFoundError(f"Secret {key} does not exist.")
+    return secrets[key]
@@ -0,0 +1,10 @@
+#!/bin/bash
+# Offline stand-in for https://claude.ai/install.sh
+set -e
+mkdir -p "$HOME/.local/bin"
+cat > "$HOME/.local/bin/claude" <<'STUB'
+#!/bin/sh
+echo "0.0.0 (Claude Code offline stub)"
+STUB
+chmod +x "$HOME/.local/bin/claude"
+echo "Claude Code successfully installed!"
@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+Execute the bootstrap notebook's code cells offline.
+
+Runs every code cell in order in one shared namespace (like a kernel would)
+with `/content` remapped to a scratch directory and Colab form parameters
+overridden. Installers, apt and google.colab are expected to be replaced by
+the stand-ins in this directory (see test_notebook_offline.py).
+
+Usage:
+    run_notebook.py NOTEBOOK CONTENT_ROOT RESULTS_JSON [--param NAME=VALUE ...]
+
+Writes a JSON list with one entry per code cell:
+    {"id": ..., "ok": bool, "stdout": ..., "error": ...}
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import re
+import traceback
+
+
+def apply_params(source, params):
+    """Replace `NAME = value  # @param ...` form fields with overrides."""
+    for name, value in params.items():
+        source = re.sub(
+            rf"^({re.escape(name)}\s*=\s*)[^#\n]*(#\s*@param.*)$",
+            lambda m, value=value: f"{m.group(1)}{value}  {m.group(2)}",
+            source,
+            flags=re.MULTILINE,
+        )
+    return source
+
+
+def run_notebook(notebook, content_root, params):
+    """Execute code cells and return per-cell results."""
+    namespace = {"__name__": "__main__"}
+    results = []
+    for index, cell in enumerate(notebook["cells"]):
+        if cell["cell_type"] != "code":
+            continue
+        cell_id = cell.get("metadata", {}).get("id", str(index))
+        source = "".join(cell["source"]).replace("/content", content_root)
+        source = apply_params(source, params)
+
+        stdout = io.StringIO()
+        result = {"id": cell_id, "ok": True, "error": None}
+        try:
+            with contextlib.redirect_stdout(stdout):
+                exec(compile(source, f"<cell {cell_id}>", "exec"), namespace)
+        except BaseException:
+            result["ok"] = False
+            result["error"] = traceback.format_exc()
+        result["stdout"] = stdout.getvalue()
+        results.append(result)
+        if not result["ok"]:
+            break
+    return results
+
+
+def main():
+    """Command entry point."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("notebook")
+    parser.add_argument("content_root")
+    parser.add_argument("results")
+    parser.add_argument("--param", action="append", default=[], metavar="NAME=VALUE")
+    args = parser.parse_args()
+
+    params = dict(param.split("=", 1) for param in args.param)
+    with open(args.notebook, encoding="utf-8") as f:
+        notebook = json.load(f)
+    results = run_notebook(notebook, args.content_root, params)
+    with open(args.results, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -9,6 +9,7 @@ commands are provided by the claude-colab plugin from this repo's marketplace.
 
 import json
 import re
+import sys
 from pathlib import Path
 
 import pytest
@@ -17,6 +18,9 @@ import pytest
 EXPECTED_PLACEHOLDERS = [
     "{{BOOTSTRAP_VERSION}}",
     "{{GITHUB_REPO}}",
+    "{{DEP_CACHE_SCRIPT}}",
+    "{{RUNTIME_PROBE_SCRIPT}}",
+    "{{PACKAGE_INVENTORY_SCRIPT}}",
 ]
 
 # Required content patterns for the new plugin-based architecture
@@ -227,6 +231,23 @@ class TestPluginStructure:
         commands = list(commands_dir.glob("*.md"))
         assert len(commands) > 0, "No commands found in plugin"
 
+    def test_context_budget(self):
+        """Test that no skill, agent or command exceeds its context-token budget."""
+        sys.path.insert(0, str(Path(__file__).parent.parent / "src" / "plugin" / "scripts"))
+        from context_footprint import measure_plugin
+
+        plugin_dir = Path(__file__).parent.parent / "src" / "plugin"
+        results = measure_plugin(plugin_dir)
+        assert len(results) > 0, "No plugin components measured"
+        for result in results:
+            assert not result["over_budget"], (
+                f"{result['kind']} {result['name']} is ~{result['total_tokens']} tokens "
+                f"(budget {result['budget']})"
+            )
+            assert not result["unresolved"], (
+                f"{result['kind']} {result['name']} imports missing files: {result['unresolved']}"
+            )
+
     def test_hooks_json_exists(self):
         """Test that hooks.json exists and is valid."""
         hooks_path = Path(__file__).parent.parent / "src" / "plugin" / "hooks" / "hooks.json"
@@ -0,0 +1,244 @@
+"""
+Execute the built notebook offline against local stand-ins.
+
+A fast alternative to the Docker execution tests: the notebook's code cells
+run in a subprocess with
+- a fake `google.colab` module (drive.mount, userdata.get),
+- stub `apt-get` and `curl` commands that "download" from a local mirror,
+- a stub `claude.ai/install.sh` that installs a fake `claude` binary,
+- `/content` and `$HOME` remapped to a temporary directory.
+
+The tests then assert on the files and settings the notebook produced. No
+network, Docker or Jupyter is needed and the full bootstrap runs in seconds.
+"""
+
+import json
+import os
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import pytest
+
+OFFLINE_DIR = Path(__file__).parent / "offline"
+
+
+@pytest.fixture
+def notebook_path():
+    """Path to the built notebook."""
+    path = Path(__file__).parent.parent / "dist" / "claude-colab.ipynb"
+    if not path.exists():
+        pytest.skip(f"Notebook not found at {path} (run build.py)")
+    return path
+
+
+@pytest.fixture
+def sandbox(tmp_path):
+    """Scratch HOME, /content and install prefix for one notebook run."""
+    dirs = {name: tmp_path / name for name in ("home", "content", "prefix", "logs")}
+    for path in dirs.values():
+        path.mkdir()
+    (dirs["home"] / ".bashrc").write_text("# offline test bashrc\n")
+    return dirs
+
+
+def run_offline(notebook_path, sandbox, params=None, secrets=None):
+    """Run the notebook offline and return (per-cell results, elapsed seconds)."""
+    env = {
+        key: value
+        for key, value in os.environ.items()
+        if key not in ("CLAUDE_CODE_OAUTH_TOKEN", "CLAUDE_CODE_TOKEN", "PYTHONPATH")
+    }
+    env.update(
+        {
+            "HOME": str(sandbox["home"]),
+            "PATH": os.pathsep.join(
+                [str(sandbox["prefix"] / "bin"), str(OFFLINE_DIR / "bin"), env.get("PATH", "")]
+            ),
+            "PYTHONPATH": str(OFFLINE_DIR),
+            "OFFLINE_MIRROR": str(OFFLINE_DIR / "mirror"),
+            "OFFLINE_PREFIX": str(sandbox["prefix"]),
+            "OFFLINE_LOG_DIR": str(sandbox["logs"]),
+            "FAKE_COLAB_SECRETS": json.dumps(secrets or {}),
+            # Keep the runtime benchmark in step 6 short
+            "CLAUDE_COLAB_PROBE_BUDGET": "1",
+        }
+    )
+    results_path = sandbox["logs"] / "results.json"
+    cmd = [
+        sys.executable,
+        str(OFFLINE_DIR / "run_notebook.py"),
+        str(notebook_path),
+        str(sandbox["content"]),
+        str(results_path),
+    ]
+    for name, value in (params or {}).items():
+        cmd.extend(["--param", f"{name}={value}"])
+
+    started = time.monotonic()
+    result = subprocess.run(cmd, capture_output=True, text=True, env=env, timeout=120)
+    elapsed = time.monotonic() - started
+    assert result.returncode == 0, f"Runner failed:\n{result.stderr}"
+
+    cells = json.loads(results_path.read_text())
+    failed = [cell for cell in cells if not cell["ok"]]
+    assert not failed, f"Cell {failed[0]['id']} failed:\n{failed[0]['error']}"
+    return cells, elapsed
+
+
+def cell_output(cells, cell_id):
+    """Return the captured stdout of a cell."""
+    return next(cell["stdout"] for cell in cells if cell["id"] == cell_id)
+
+
+class TestOfflineBootstrap:
+    """Run the full bootstrap in ephemeral mode without a token."""
+
+    @pytest.fixture
+    def run(self, notebook_path, sandbox):
+        cells, elapsed = run_offline(notebook_path, sandbox)
+        return cells, elapsed, sandbox
+
+    def test_all_cells_run_quickly(self, run, notebook_path):
+        """Test that every code cell ran, in seconds."""
+        cells, elapsed, _ = run
+        notebook = json.loads(notebook_path.read_text())
+        code_cells = [c for c in notebook["cells"] if c["cell_type"] == "code"]
+        assert len(cells) == len(code_cells)
+        assert elapsed < 30, f"Offline bootstrap took {elapsed:.1f}s"
+
+    def test_installers_used_local_mirror(self, run):
+        """Test that apt and the Claude installer were served offline."""
+        _, _, sandbox = run
+        apt_log = (sandbox["logs"] / "apt.log").read_text()
+        assert "install -qq -y socat bubblewrap" in apt_log
+        assert (sandbox["prefix"] / "bin" / "socat").exists()
+        assert (sandbox["prefix"] / "bin" / "bwrap").exists()
+        assert "https://claude.ai/install.sh" in (sandbox["logs"] / "curl.log").read_text()
+        assert (sandbox["home"] / ".local" / "bin" / "claude").exists()
+
+    def test_workspace_and_claude_symlink(self, run):
+        """Test that the workspace exists and ~/.claude points into it."""
+        _, _, sandbox = run
+        workspace = sandbox["content"] / "claude-workspaces" / "my-project"
+        assert (workspace / ".claude").is_dir()
+        home_claude = sandbox["home"] / ".claude"
+        assert home_claude.is_symlink()
+        assert Path(os.readlink(home_claude)) == workspace / ".claude"
+
+    def test_bashrc_configured(self, run):
+        """Test that PATH and terminal settings were appended to ~/.bashrc."""
+        _, _, sandbox = run
+        bashrc = (sandbox["home"] / ".bashrc").read_text()
+        assert 'export PATH="$HOME/.local/bin:$HOME/.claude/bin:$PATH"' in bashrc
+        assert "export TERM=xterm-256color" in bashrc
+        assert "CLAUDE_CODE_OAUTH_TOKEN" not in bashrc
+
+    def test_settings_json(self, run):
+        """Test marketplace, plugin and permission settings."""
+        _, _, sandbox = run
+        settings_path = (
+            sandbox["content"] / "claude-workspaces" / "my-project" / ".claude" / "settings.json"
+        )
+        settings = json.loads(settings_path.read_text())
+        marketplace = settings["extraKnownMarketplaces"]["claude-colab"]["source"]
+        assert marketplace["source"] == "github"
+        assert "/" in marketplace["repo"]
+        assert settings["enabledPlugins"] == {"claude-colab@claude-colab": True}
+        assert "Bash(python3:*)" in settings["permissions"]["allow"]
+        assert len(settings["permissions"]["allow"]) == len(set(settings["permissions"]["allow"]))
+
+    def test_environment_json(self, run):
+        """Test the captured environment snapshot."""
+        _, _, sandbox = run
+        env_path = sandbox["content"] / "claude-workspaces" / "my-project" / "ENVIRONMENT.json"
+        env = json.loads(env_path.read_text())
+        assert env["storage_mode"] == "ephemeral"
+        assert env["project_name"] == "my-project"
+        assert env["drive_mounted"] is False
+        assert env["tools"]["socat"] is True
+        assert env["tools"]["bwrap"] is True
+        runtime = env["runtime"]
+        assert runtime["measured"]["local_disk"]["write_mb_s"] > 0
+        assert "drive" not in runtime["measured"]
+        assert {"dataloader_num_workers", "stage_data_locally"} <= set(runtime["recommended"])
+        assert not list((sandbox["content"]).glob("**/.runtime-probe.tmp"))
+        packages = env["packages"]
+        assert packages["count"] > 0
+        assert Path(packages["inventory"]).is_relative_to(sandbox["home"])
+
+    def test_missing_token_handled(self, run):
+        """Test that the auth cell explains how to add a token."""
+        cells, _, sandbox = run
+        assert "No Claude Code OAuth token found" in cell_output(cells, "auth")
+        assert not (sandbox["home"] / ".claude.json").exists()
+
+
+class TestOfflineBootstrapPersistent:
+    """Run the bootstrap with Drive enabled and a token in Colab Secrets."""
+
+    def test_drive_and_token(self, notebook_path, sandbox):
+        """Test persistent workspace on the (fake) Drive and token export."""
+        cells, _ = run_offline(
+            notebook_path,
+            sandbox,
+            params={"USE_GOOGLE_DRIVE": "True", "PROJECT_NAME": '"offline-test"'},
+            secrets={"CLAUDE_CODE_OAUTH_TOKEN": "sk-test-token"},
+        )
+        workspace = sandbox["content"] / "drive" / "My Drive" / "claude-workspaces" / "offline-test"
+        env = json.loads((workspace / "ENVIRONMENT.json").read_text())
+        assert env["storage_mode"] == "persistent"
+        assert env["drive_mounted"] is True
+        assert (workspace / ".claude" / "settings.json").exists()
+
+        bashrc = (sandbox["home"] / ".bashrc").read_text()
+        assert 'export CLAUDE_CODE_OAUTH_TOKEN="sk-test-token"' in bashrc
+        claude_json = json.loads((sandbox["home"] / ".claude.json").read_text())
+        assert claude_json["hasCompletedOnboarding"] is True
+        assert "Found CLAUDE_CODE_OAUTH_TOKEN" in cell_output(cells, "auth")
+
+
+class TestOfflineDependencyCache:
+    """Run the optional dependency-restore step against a snapshot on the fake Drive."""
+
+    def test_restores_matching_snapshot(self, notebook_path, sandbox):
+        """Test that a snapshot keyed to the lockfile is restored and activated."""
+        sys.path.insert(0, str(Path(__file__).parent.parent / "src" / "plugin" / "scripts"))
+        import dep_cache
+
+        drive = sandbox["content"] / "drive" / "My Drive" / "claude-workspaces"
+        project = drive / "deps-test"
+        project.mkdir(parents=True)
+        (project / "requirements.txt").write_text("# no packages\n")
+        venv = sandbox["content"] / "venvs" / "deps-test"
+        (venv / "bin").mkdir(parents=True)
+        (venv / "bin" / "activate").write_text("# fake venv\n")
+
+        cache_dir = sandbox["content"] / "drive" / "My Drive" / ".claude-colab" / "dep-cache"
+        cache = dep_cache.DepCache(project, cache_dir, venv)
+        (venv / dep_cache.KEY_FILE).write_text(cache.key)
+        snapshot = cache.snapshot_dir / f"venv-{cache.key}.tar.gz"
+        dep_cache._tar_create(venv, snapshot, ["-z"])
+        dep_cache.shutil.rmtree(venv)
+
+        params = {
+            "USE_GOOGLE_DRIVE": "True",
+            "PROJECT_NAME": '"deps-test"',
+            "RESTORE_DEPENDENCIES": "True",
+        }
+        run_offline(notebook_path, sandbox, params=params)
+        assert (sandbox["content"] / ".claude-colab" / "dep_cache.py").exists()
+        assert (venv / "bin" / "activate").exists()
+        assert f'source "{venv}/bin/activate"' in (sandbox["home"] / ".bashrc").read_text()
+
+        # Re-running the notebook doesn't stack activation lines
+        run_offline(notebook_path, sandbox, params=params)
+        assert (sandbox["home"] / ".bashrc").read_text().count("# Project virtualenv") == 1
+        env = json.loads((project / "ENVIRONMENT.json").read_text())
+        assert env["dependencies"]["key"] == cache.key
+
+    def test_skipped_by_default(self, notebook_path, sandbox):
+        """Test that the step does nothing unless enabled."""
+        cells, _ = run_offline(notebook_path, sandbox)
+        assert "Skipping dependency cache" in cell_output(cells, "dependencies")
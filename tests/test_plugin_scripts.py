@@ -0,0 +1,2134 @@
+"""
+Tests for the plugin's bundled scripts.
+
+The scripts live in src/plugin/scripts/ and are run directly by hooks and
+commands, so they are imported here from that directory.
+"""
+
+import datetime
+import gzip
+import json
+import os
+import shutil
+import signal
+import subprocess
+import sys
+import threading
+import time
+import types
+from pathlib import Path
+
+import pytest
+
+SCRIPTS_DIR = Path(__file__).parent.parent / "src" / "plugin" / "scripts"
+sys.path.insert(0, str(SCRIPTS_DIR))
+
+import colab_env  # noqa: E402
+import colab_status  # noqa: E402
+import context_footprint  # noqa: E402
+import data_cache  # noqa: E402
+import data_peek  # noqa: E402
+import dep_cache  # noqa: E402
+import git_accel  # noqa: E402
+import hook  # noqa: E402
+import hook_log  # noqa: E402
+import job_queue  # noqa: E402
+import kernel_bridge  # noqa: E402
+import notebook_cache  # noqa: E402
+import notebook_profiler  # noqa: E402
+import notebook_tool  # noqa: E402
+import package_inventory  # noqa: E402
+import page_warmup  # noqa: E402
+import path_guard  # noqa: E402
+import resource_monitor  # noqa: E402
+import runtime_probe  # noqa: E402
+import safety_audit  # noqa: E402
+import safety_check  # noqa: E402
+import session_start  # noqa: E402
+import workspace_import  # noqa: E402
+import workspace_index  # noqa: E402
+
+
+@pytest.fixture
+def home(tmp_path, monkeypatch):
+    """Isolated HOME with an empty ~/.claude directory."""
+    (tmp_path / ".claude").mkdir()
+    monkeypatch.setenv("HOME", str(tmp_path))
+    monkeypatch.setenv("CLAUDE_COLAB_STATE_DIR", str(tmp_path / "state"))
+    return tmp_path
+
+
+class TestColabStatus:
+    """Test the colab_status command script."""
+
+    def test_reports_all_sections(self, home):
+        """Test that every collector contributes a section."""
+        status = colab_status.collect_status(budget=5.0)
+        for name in colab_status.COLLECTORS:
+            assert name in status, f"Missing status section: {name}"
+        assert "elapsed_ms" in status
+
+    def test_reads_enabled_plugins(self, home):
+        """Test that enabled plugins are read from settings.json."""
+        settings = {
+            "enabledPlugins": {"claude-colab@claude-colab": True, "other@x": False},
+            "extraKnownMarketplaces": {"claude-colab": {}},
+        }
+        (home / ".claude" / "settings.json").write_text(json.dumps(settings))
+        plugins = colab_status.collect_plugins(1.0)
+        assert plugins["enabled"] == ["claude-colab@claude-colab"]
+        assert plugins["marketplaces"] == ["claude-colab"]
+
+    def test_reports_runtime_recommendations(self, tmp_path, monkeypatch):
+        """Test that benchmarked settings from ENVIRONMENT.json are surfaced."""
+        runtime = {"recommended": {"dataloader_num_workers": 2, "stage_data_locally": True}}
+        (tmp_path / "ENVIRONMENT.json").write_text(json.dumps({"runtime": runtime}))
+        monkeypatch.chdir(tmp_path)
+        workspace = colab_status.collect_workspace(1.0)
+        assert workspace["recommended"] == runtime["recommended"]
+        summary = colab_status.format_summary({"workspace": workspace})
+        assert "Recommended: dataloader_num_workers=2" in summary
+
+    def test_budget_is_enforced(self):
+        """Test that a hung collector is reported as timed out within budget."""
+
+        def slow(budget):
+            time.sleep(5)
+            return {}
+
+        started = time.monotonic()
+        status = colab_status.collect_status(
+            budget=0.2, collectors={"slow": slow, "fast": lambda budget: {"ok": True}}
+        )
+        assert time.monotonic() - started < 1.0
+        assert status["slow"] == {"error": "timed out"}
+        assert status["fast"] == {"ok": True}
+        assert status["timed_out"] == ["slow"]
+
+    def test_cli_outputs_compact_json(self, home):
+        """Test that the CLI prints one compact JSON document."""
+        result = subprocess.run(
+            [sys.executable, str(SCRIPTS_DIR / "colab_status.py"), "--budget", "5"],
+            capture_output=True,
+            text=True,
+            env={"HOME": str(home), "PATH": "/usr/bin:/bin"},
+        )
+        assert result.returncode == 0, result.stderr
+        assert len(result.stdout.strip().splitlines()) == 1
+        assert "gpu" in json.loads(result.stdout)
+
+    def test_summary(self, home):
+        """Test that the summary renders one line per section."""
+        summary = colab_status.format_summary(colab_status.collect_status(budget=5.0))
+        assert len(summary.splitlines()) >= len(colab_status.COLLECTORS)
+
+
+def _sample(t, ram_used, ram_total=1000.0):
+    """Build a resource sample with only time and RAM set."""
+    return resource_monitor.Sample(t, 10.0, ram_used, ram_total, 0, 0, 0, 0, 0, 0)
+
+
+class TestResourceMonitor:
+    """Test the resource sampler's ring buffer and trend analysis."""
+
+    def test_ring_buffer_wraps(self, tmp_path):
+        """Test that the ring keeps only the newest `capacity` samples."""
+        path = tmp_path / "ring"
+        ring = resource_monitor.RingBuffer(path, capacity=4, create=True)
+        for i in range(10):
+            ring.append(_sample(float(i), float(i)))
+        assert [s.time for s in ring.samples()] == [6.0, 7.0, 8.0, 9.0]
+        ring.close()
+
+        expected_size = resource_monitor.HEADER.size + 4 * resource_monitor.RECORD.size
+        assert path.stat().st_size == expected_size
+
+        # Reopening (as a reader) sees the same data
+        reader = resource_monitor.RingBuffer(path)
+        assert reader.written == 10
+        assert reader.samples()[-1].ram_used_mb == 9.0
+        reader.close()
+
+    def test_rejects_foreign_file(self, tmp_path):
+        """Test that a non-ring file is refused."""
+        path = tmp_path / "other"
+        path.write_bytes(b"x" * 64)
+        with pytest.raises(ValueError):
+            resource_monitor.RingBuffer(path)
+
+    def test_sampler_reads_system(self):
+        """Test that a live sample has plausible RAM and disk values."""
+        sample = resource_monitor.Sampler(disk_path="/").sample()
+        assert sample.ram_total_mb > 0
+        assert 0 <= sample.ram_used_mb <= sample.ram_total_mb
+        assert sample.disk_total_mb > 0
+
+    def test_warns_on_upward_trend(self):
+        """Test that a steady climb toward the limit produces a warning."""
+        # +10MB/s, at 540MB of 1000MB after 4s -> full in ~46s
+        samples = [_sample(float(t), 500.0 + 10 * t) for t in range(5)]
+        report = resource_monitor.analyze(samples)
+        ram = report["resources"]["RAM"]
+        assert ram["trend_mb_per_min"] == pytest.approx(600.0)
+        assert ram["seconds_to_limit"] == pytest.approx(46, abs=1)
+        assert any("RAM trending toward limit" in w for w in report["warnings"])
+
+    def test_warns_on_high_usage(self):
+        """Test that usage above the warn fraction is flagged even when flat."""
+        report = resource_monitor.analyze([_sample(float(t), 950.0) for t in range(3)])
+        assert report["warnings"] == ["RAM at 95% of 1.0GB"]
+
+    def test_no_warnings_when_stable(self):
+        """Test that flat, moderate usage is quiet."""
+        report = resource_monitor.analyze([_sample(float(t), 300.0) for t in range(3)])
+        assert report["warnings"] == []
+        assert "RAM" in resource_monitor.format_report(report)
+
+    def test_no_arguments_reports(self, home, monkeypatch, capsys):
+        """Test that the bare slash command (no arguments) prints the report."""
+        monkeypatch.setattr(colab_env, "STATE_DIR", home / "state")
+        assert resource_monitor.main([]) == 0
+        assert "Sampler not running" in capsys.readouterr().out
+
+    def test_one_sampler_per_pid_file(self, home, monkeypatch):
+        """Test that of two samplers started at once, the second exits at once."""
+        monkeypatch.setattr(colab_env, "STATE_DIR", home / "state")
+        pid_file = resource_monitor.pid_path()
+        with colab_env.hold_pid_file(pid_file) as held:
+            assert held and pid_file.read_text() == str(os.getpid())
+            with colab_env.hold_pid_file(pid_file) as again:
+                assert not again
+            resource_monitor.run(interval=60)
+            assert pid_file.read_text() == str(os.getpid())
+        assert not pid_file.exists()
+
+        cmd = [sys.executable, resource_monitor.__file__, "run", "--interval", "60"]
+        samplers = [subprocess.Popen(cmd) for _ in range(2)]
+        try:
+            deadline = time.monotonic() + 10
+            while all(p.poll() is None for p in samplers) and time.monotonic() < deadline:
+                time.sleep(0.05)
+            running = [p for p in samplers if p.poll() is None]
+            assert len(running) == 1
+            while resource_monitor.running_pid() is None and time.monotonic() < deadline:
+                time.sleep(0.05)
+            assert resource_monitor.running_pid() == running[0].pid
+        finally:
+            for process in samplers:
+                process.terminate()
+                process.wait()
+
+
+def _write_notebook(path, cells, indent=1):
+    """Write a minimal nbformat 4 notebook."""
+    notebook = {"cells": cells, "metadata": {}, "nbformat": 4, "nbformat_minor": 5}
+    path.write_text(json.dumps(notebook, indent=indent))
+
+
+def _code_cell(cell_id, source, outputs=None):
+    return {
+        "cell_type": "code",
+        "execution_count": 1,
+        "metadata": {"id": cell_id},
+        "outputs": outputs if outputs is not None else [{"output_type": "stream", "text": ["ok"]}],
+        "source": source,
+    }
+
+
+@pytest.fixture(params=[1, None], ids=["indented", "compact"])
+def notebook_file(request, tmp_path):
+    """A small notebook with a tricky output payload, indented or compact."""
+    path = tmp_path / "nb.ipynb"
+    payload = {"output_type": "stream", "text": ['quote " brace } bracket ] \\" end']}
+    cells = [
+        {"cell_type": "markdown", "metadata": {"id": "intro"}, "source": ["# Title"]},
+        _code_cell("load", ["x = 1\n", "print(x)"], [payload]),
+        _code_cell("train", ["y = x + 1"]),
+    ]
+    _write_notebook(path, cells, indent=request.param)
+    return path
+
+
+class TestNotebookTool:
+    """Test streaming cell-level notebook edits."""
+
+    def test_lists_cells(self, notebook_file):
+        """Test that cells are scanned with ids, types and output counts."""
+        with notebook_tool.Notebook(notebook_file) as nb:
+            summaries = [cell.summary() for cell in nb.cells]
+        assert [s["id"] for s in summaries] == ["intro", "load", "train"]
+        assert [s["type"] for s in summaries] == ["markdown", "code", "code"]
+        assert summaries[1]["outputs"] == 1
+        assert summaries[1]["source_lines"] == 2
+        assert summaries[0]["preview"] == "# Title"
+
+    def test_find_by_index_and_id(self, notebook_file):
+        """Test cell lookup by index, negative index and id."""
+        with notebook_tool.Notebook(notebook_file) as nb:
+            assert nb.find("1").id == "load"
+            assert nb.find(-1).id == "train"
+            assert nb.find("train").source == "y = x + 1"
+            with pytest.raises(notebook_tool.NotebookError):
+                nb.find("missing")
+
+    def test_find_numeric_id_before_index(self, tmp_path):
+        """Test that an all-digit reference matching a cell id finds that cell."""
+        path = tmp_path / "numeric.ipynb"
+        _write_notebook(path, [_code_cell("a", ["a = 1"]), _code_cell("0", ["b = 2"])])
+        with notebook_tool.Notebook(path) as nb:
+            assert nb.find("0").source == "b = 2"
+            assert nb.find(0).source == "b = 2"
+            assert nb.find("1").id == "0"
+
+    def test_replace_clears_outputs(self, notebook_file):
+        """Test that replacing code clears its outputs and leaves other cells intact."""
+        before = json.loads(notebook_file.read_text())
+        with notebook_tool.Notebook(notebook_file) as nb:
+            nb.replace_source("load", "x = 2\nprint(x)\n")
+        after = json.loads(notebook_file.read_text())
+        assert after["cells"][1]["source"] == ["x = 2\n", "print(x)\n"]
+        assert after["cells"][1]["outputs"] == []
+        assert after["cells"][1]["execution_count"] is None
+        assert after["cells"][0] == before["cells"][0]
+        assert after["cells"][2] == before["cells"][2]
+
+    def test_insert_and_delete(self, notebook_file):
+        """Test inserting at the start, middle and end, then deleting."""
+        with notebook_tool.Notebook(notebook_file) as nb:
+            nb.insert(0, "# First", "markdown", "first")
+        with notebook_tool.Notebook(notebook_file) as nb:
+            nb.insert(2, "z = 0", "code", "middle")
+        with notebook_tool.Notebook(notebook_file) as nb:
+            nb.insert(-1, "print(z)", "code", "last")
+        ids = [c["metadata"]["id"] for c in json.loads(notebook_file.read_text())["cells"]]
+        assert ids == ["first", "intro", "middle", "load", "train", "last"]
+
+        for ref in ("first", "last", "middle"):
+            with notebook_tool.Notebook(notebook_file) as nb:
+                nb.delete(ref)
+        ids = [c["metadata"]["id"] for c in json.loads(notebook_file.read_text())["cells"]]
+        assert ids == ["intro", "load", "train"]
+
+    def test_delete_all_then_insert(self, notebook_file):
+        """Test that a notebook can be emptied and refilled."""
+        for _ in range(3):
+            with notebook_tool.Notebook(notebook_file) as nb:
+                nb.delete(0)
+        assert json.loads(notebook_file.read_text())["cells"] == []
+        with notebook_tool.Notebook(notebook_file) as nb:
+            nb.insert(0, "a = 1", "code", "only")
+        cells = json.loads(notebook_file.read_text())["cells"]
+        assert [c["metadata"]["id"] for c in cells] == ["only"]
+
+    def test_insert_ids(self, notebook_file, tmp_path):
+        """Test top-level ids for nbformat 4.5+ and that duplicate ids are rejected."""
+        with notebook_tool.Notebook(notebook_file) as nb:
+            generated = nb.insert(1, "a = 1")
+        cells = json.loads(notebook_file.read_text())["cells"]
+        assert cells[1]["id"] == cells[1]["metadata"]["id"] == generated
+
+        with notebook_tool.Notebook(notebook_file) as nb:
+            with pytest.raises(notebook_tool.NotebookError, match="already exists"):
+                nb.insert(0, "b = 2", "code", "load")
+            with pytest.raises(notebook_tool.NotebookError, match="Invalid cell id"):
+                nb.insert(0, "b = 2", "code", "has space")
+        assert len(json.loads(notebook_file.read_text())["cells"]) == 4
+
+        # nbformat 4.4 has no top-level cell ids
+        old = tmp_path / "old.ipynb"
+        old.write_text(
+            json.dumps({"cells": [], "metadata": {}, "nbformat": 4, "nbformat_minor": 4})
+        )
+        with notebook_tool.Notebook(old) as nb:
+            nb.insert(0, "c = 3", "code", "c")
+        (cell,) = json.loads(old.read_text())["cells"]
+        assert "id" not in cell and cell["metadata"]["id"] == "c"
+
+    def test_strip_outputs(self, notebook_file):
+        """Test clearing outputs of all code cells."""
+        with notebook_tool.Notebook(notebook_file) as nb:
+            assert nb.strip_outputs() == 4
+        cells = json.loads(notebook_file.read_text())["cells"]
+        assert all(c["outputs"] == [] for c in cells if c["cell_type"] == "code")
+        assert "outputs" not in cells[0]
+
+    def test_update_metadata(self, notebook_file):
+        """Test merging metadata into several cells in one write."""
+        with notebook_tool.Notebook(notebook_file) as nb:
+            nb.update_metadata({"load": {"tags": ["slow"]}, 2: {"profile": {"wall_s": 1.5}}})
+        cells = json.loads(notebook_file.read_text())["cells"]
+        assert cells[1]["metadata"] == {"id": "load", "tags": ["slow"]}
+        assert cells[2]["metadata"] == {"id": "train", "profile": {"wall_s": 1.5}}
+        assert cells[0]["metadata"] == {"id": "intro"}
+
+    def test_cli_show(self, notebook_file, capsys):
+        """Test that `show` prints a cell's source."""
+        assert notebook_tool.main(["show", str(notebook_file), "train"]) == 0
+        assert capsys.readouterr().out == "y = x + 1\n"
+
+    def test_malformed_notebook(self, tmp_path):
+        """Test that truncated JSON is reported, not crashed on."""
+        path = tmp_path / "bad.ipynb"
+        path.write_text('{"cells": [{"cell_type": "code", "source": "x')
+        assert notebook_tool.main(["list", str(path)]) == 1
+
+
+class TestNotebookProfiler:
+    """Test the per-cell notebook profiler."""
+
+    @pytest.fixture
+    def profiled_notebook(self, tmp_path):
+        """A notebook with a sleeping cell, an allocating cell and a failing cell."""
+        path = tmp_path / "profile.ipynb"
+        cells = [
+            {"cell_type": "markdown", "metadata": {"id": "title"}, "source": ["# Profile me"]},
+            _code_cell("setup", ["import time\n", "data = []"], []),
+            # Longer than IPython takes to render the failing cell's first traceback
+            _code_cell("sleep", ["time.sleep(0.5)"], []),
+            _code_cell("alloc", ["data.append(bytearray(64 * 1024 * 1024))"], []),
+            _code_cell("fail", ["1 / 0"], []),
+            _code_cell("after", ["done = True"], []),
+        ]
+        _write_notebook(path, cells)
+        return path
+
+    def test_run_profiles_each_cell(self, profiled_notebook):
+        """Test that each code cell gets timings until the first error."""
+        profiles, status = notebook_profiler.run_notebook(profiled_notebook, timeout=60)
+        assert status == "error in cell 4"
+        by_id = {entry["id"]: entry for entry in profiles}
+        assert list(by_id) == ["setup", "sleep", "alloc", "fail"]
+        assert by_id["sleep"]["wall_s"] >= 0.5
+        assert by_id["sleep"]["cpu_s"] < by_id["sleep"]["wall_s"]
+        assert by_id["alloc"]["peak_rss_delta_mb"] >= 60
+        assert by_id["fail"]["error"].startswith("ZeroDivisionError")
+
+    def test_allow_errors_and_sorting(self, profiled_notebook):
+        """Test running past errors and sorting by wall time."""
+        profiles, status = notebook_profiler.run_notebook(profiled_notebook, allow_errors=True)
+        assert profiles[-1]["id"] == "after" and status == "completed"
+        assert notebook_profiler.sort_profiles(profiles, "wall", top=1)[0]["id"] == "sleep"
+        assert "sleep" in notebook_profiler.format_table(profiles)
+
+    def test_metadata_round_trip(self, profiled_notebook):
+        """Test writing profiles to cell metadata and reading them back."""
+        profiles, _ = notebook_profiler.run_notebook(profiled_notebook)
+        notebook_profiler.write_metadata(profiled_notebook, profiles)
+        cells = json.loads(profiled_notebook.read_text())["cells"]
+        assert cells[2]["metadata"]["profile"]["wall_s"] >= 0.2
+        assert "profile" not in cells[0]["metadata"]
+
+        report = notebook_profiler.profiles_from_metadata(profiled_notebook)
+        assert [entry["id"] for entry in report] == ["setup", "sleep", "alloc", "fail"]
+
+    def test_reads_colab_and_jupyter_timing(self, tmp_path):
+        """Test fallbacks to Colab executionInfo and Jupyter execution metadata."""
+        path = tmp_path / "executed.ipynb"
+        colab = _code_cell("colab", ["x = 1"])
+        colab["metadata"]["executionInfo"] = {"elapsed": 2500, "status": "ok"}
+        jupyter = _code_cell("jupyter", ["y = 2"])
+        jupyter["metadata"]["execution"] = {
+            "iopub.execute_input": "2024-01-01T00:00:00.000000Z",
+            "shell.execute_reply": "2024-01-01T00:00:01.500000Z",
+        }
+        _write_notebook(path, [colab, jupyter, _code_cell("never_run", ["z = 3"])])
+
+        report = notebook_profiler.profiles_from_metadata(path)
+        assert [(entry["id"], entry["wall_s"]) for entry in report] == [
+            ("colab", 2.5),
+            ("jupyter", 1.5),
+        ]
+
+
+class TestContextFootprint:
+    """Test the context-footprint analyzer and skill splitter."""
+
+    @pytest.fixture
+    def plugin_dir(self, tmp_path):
+        """A plugin with one skill that eagerly imports a large doc."""
+        plugin = tmp_path / "plugin"
+        skill = plugin / "skills" / "big"
+        skill.mkdir(parents=True)
+        (tmp_path / "docs").mkdir()
+        (tmp_path / "docs" / "huge.md").write_text("x" * 40000)
+        (tmp_path / "docs" / "lazy.md").write_text("y" * 400)
+        (skill / "SKILL.md").write_text(
+            "# Big\n\nSee @docs/huge.md and `docs/lazy.md`.\n\n```\n@docs/not-a-ref.md\n```\n"
+        )
+        return plugin
+
+    def test_eager_and_lazy_references(self, plugin_dir):
+        """Test that @imports count toward the budget and paths don't."""
+        (result,) = context_footprint.measure_plugin(plugin_dir)
+        assert result["eager_tokens"] == 10000
+        assert result["lazy_tokens"] == 100
+        assert result["over_budget"]
+        assert result["unresolved"] == []
+
+    def test_check_exit_code(self, plugin_dir):
+        """Test that --check fails the run when over budget."""
+        assert context_footprint.main(["measure", str(plugin_dir), "--check"]) == 1
+        args = ["measure", str(plugin_dir), "--check", "--skill-budget", "20000"]
+        assert context_footprint.main(args) == 0
+
+    def test_split_moves_largest_sections(self, tmp_path):
+        """Test that split keeps a short core and writes reference files."""
+        skill = tmp_path / "skill"
+        skill.mkdir()
+        (skill / "SKILL.md").write_text(
+            "# Skill\n\nIntro.\n\n## When to Use\n- always\n\n"
+            "## Big Section\n" + "detail\n" * 400 + "```\n## not a heading\n```\n\n"
+            "## Small Section\nshort\n"
+        )
+        result = context_footprint.split_skill(skill, max_tokens=200, write=True)
+        assert list(result["moved"]) == ["big-section.md"]
+        assert result["core_tokens"] <= 200
+
+        core = (skill / "SKILL.md").read_text()
+        assert "## When to Use" in core
+        assert "## Small Section" in core
+        assert "[Big Section](reference/big-section.md)" in core
+        reference = (skill / "reference" / "big-section.md").read_text()
+        assert reference.startswith("# Big Section\n")
+        assert "## not a heading" in reference
+
+        with pytest.raises(FileExistsError):
+            (skill / "SKILL.md").write_text("# Skill\n\n## Big Section\n" + "x\n" * 2000)
+            context_footprint.split_skill(skill, max_tokens=200, write=True)
+
+
+# Per-hook import budget in milliseconds (cumulative `-X importtime` of the hook
+# module, best of a few runs). Hooks run on every session or tool call.
+HOOK_IMPORT_BUDGET_MS = {
+    "session_start": 60,
+    "safety_check": 40,
+    "markdown_formatter": 30,
+    "statusline": 40,
+}
+
+# Modules no hook may import at startup (load them inside the function that needs them)
+HEAVY_MODULES = {"urllib.request", "http.client", "ssl", "email", "subprocess"}
+
+
+def _import_profile(entry, hook):
+    """Run `entry --import-only hook` under -X importtime; return {module: cumulative us}."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", str(entry), "--import-only", hook],
+        capture_output=True,
+        text=True,
+        timeout=30,
+    )
+    assert result.returncode == 0, result.stderr
+    modules = {}
+    for line in result.stderr.splitlines():
+        if line.startswith("import time:") and "|" in line:
+            _, cumulative, name = line.split("|", 2)
+            if cumulative.strip().isdigit():
+                modules[name.strip()] = int(cumulative)
+    return modules
+
+
+class TestHookStartup:
+    """Test that each hook entry point imports only what it needs."""
+
+    def test_budget_covers_every_hook(self):
+        """Test that every hook in the dispatcher has an import budget."""
+        assert set(hook.HOOKS) == set(HOOK_IMPORT_BUDGET_MS)
+
+    @pytest.mark.parametrize("hook", sorted(HOOK_IMPORT_BUDGET_MS))
+    def test_import_budget(self, hook):
+        """Test each hook's import time against its budget."""
+        runs = [_import_profile(SCRIPTS_DIR / "hook.py", hook) for _ in range(3)]
+        heavy = HEAVY_MODULES & set(runs[0])
+        assert not heavy, f"{hook} imports {sorted(heavy)} at startup"
+        best_ms = min(run[hook] for run in runs) / 1000
+        budget = HOOK_IMPORT_BUDGET_MS[hook]
+        assert best_ms <= budget, f"{hook} imports in {best_ms:.1f} ms (budget {budget} ms)"
+
+
+class TestSessionStart:
+    """Test the SessionStart background helpers."""
+
+    def test_best_effort_gating(self, monkeypatch):
+        """Test the Colab check, the on/off variable and swallowed errors."""
+        calls = []
+
+        @session_start._best_effort("CLAUDE_COLAB_TEST_HELPER")
+        def helper():
+            calls.append(1)
+            raise RuntimeError("never reaches the hook")
+
+        monkeypatch.setattr(session_start, "in_colab", lambda: False)
+        monkeypatch.delenv("CLAUDE_COLAB_TEST_HELPER", raising=False)
+        helper()
+        monkeypatch.setenv("CLAUDE_COLAB_TEST_HELPER", "1")
+        helper()
+        monkeypatch.setattr(session_start, "in_colab", lambda: True)
+        monkeypatch.setenv("CLAUDE_COLAB_TEST_HELPER", "0")
+        helper()
+        monkeypatch.setenv("CLAUDE_COLAB_TEST_HELPER", "")
+        helper()
+        assert calls == [1, 1]
+
+
+class TestHookLog:
+    """Test hook telemetry logging and the latency report."""
+
+    def test_dispatcher_matches_hooks_json(self):
+        """Test that hook.py's event/matcher table agrees with hooks.json."""
+        hooks_json = json.loads((SCRIPTS_DIR.parent / "hooks" / "hooks.json").read_text())
+        for event, groups in hooks_json["hooks"].items():
+            for group in groups:
+                for entry in group["hooks"]:
+                    name = entry["command"].split("hook.py ", 1)[1]
+                    assert hook.HOOKS[name][1:] == (event, group.get("matcher"))
+
+    def test_logs_start_and_finish(self, home, monkeypatch, capsys):
+        """Test that a blocked and a warned command are logged with their decision."""
+        for command in ("rm -rf /", "pip install --user requests"):
+            stdin = json.dumps({"tool_name": "Bash", "tool_input": {"command": command}})
+            result = subprocess.run(
+                [sys.executable, str(SCRIPTS_DIR / "hook.py"), "safety_check"],
+                input=stdin,
+                capture_output=True,
+                text=True,
+            )
+            assert result.returncode == (2 if command == "rm -rf /" else 0)
+
+        records = hook_log.load_records()
+        assert len(records) == 4
+        blocked, warned = records[1], records[3]
+        assert blocked["id"] == records[0]["id"] and "start" in records[0]
+        assert (
+            blocked["event"] == "PreToolUse" and blocked["matcher"] == hook.HOOKS["safety_check"][2]
+        )
+        assert (blocked["exit"], blocked["decision"], blocked["detail"]) == (2, "block", "rm -rf /")
+        assert (warned["exit"], warned["decision"]) == (0, "warn")
+        # The bare slash command passes no arguments: report
+        assert hook_log.main([]) == 0
+        assert "safety_check" in capsys.readouterr().out
+
+        monkeypatch.setenv("CLAUDE_COLAB_HOOK_LOG", "0")
+        assert hook_log.run("safety_check", "PreToolUse", "Bash", lambda: 0) == 0
+        assert len(hook_log.load_records()) == 4
+
+    def test_rotation(self, home, monkeypatch):
+        """Test that the log rotates once it reaches MAX_BYTES."""
+        monkeypatch.setattr(hook_log, "MAX_BYTES", 2000)
+        for i in range(100):
+            hook_log.append({"id": str(i), "hook": "statusline", "ms": 1.0, "exit": 0, "ts": 0})
+        path = hook_log.log_path()
+        assert Path(path).stat().st_size <= 2000
+        assert Path(path + ".1").stat().st_size <= 2000
+        ids = [int(r["id"]) for r in hook_log.load_records()]
+        assert ids == sorted(ids) and ids[-1] == 99
+
+    def test_summary(self):
+        """Test percentiles, counts and timeout detection."""
+        records = [
+            {"id": str(i), "hook": "safety_check", "ms": float(i), "exit": 0, "ts": 0}
+            for i in range(1, 101)
+        ]
+        records[-1].update(exit=2, decision="block", detail="rm -rf /")
+        records.append({"id": "killed", "hook": "session_start", "start": 0.0})
+        records.append({"id": "running", "hook": "session_start", "start": 990.0})
+        summary = hook_log.summarize(records, top=2, now=1000.0)
+
+        checks = summary["hooks"]["safety_check"]
+        assert (checks["p50_ms"], checks["p95_ms"], checks["p99_ms"]) == (50.0, 95.0, 99.0)
+        assert (checks["runs"], checks["blocked"], checks["timeouts"]) == (100, 1, 0)
+        assert summary["hooks"]["session_start"]["timeouts"] == 1
+        assert [r["ms"] for r in summary["slowest"]] == [100.0, 99.0]
+        assert "rm -rf /" in hook_log.format_report(summary)
+
+
+class TestDepCache:
+    """Test the Drive-backed venv snapshot and wheel cache."""
+
+    @pytest.fixture
+    def cache(self, tmp_path, monkeypatch):
+        """A project with a requirements.txt, a fake venv builder and a scratch cache dir."""
+        monkeypatch.setattr(dep_cache, "STATE_DIR", tmp_path / "state")
+        project = tmp_path / "proj"
+        project.mkdir()
+        (project / "requirements.txt").write_text("numpy==1.26.4\n")
+        builds = []
+
+        def fake_create_venv(cache, env):
+            builds.append(env["PIP_CACHE_DIR"])
+            (cache.venv / "bin").mkdir(parents=True)
+            (cache.venv / "bin" / "python").write_text("#!/bin/sh\n")
+            Path(env["PIP_CACHE_DIR"]).mkdir(parents=True, exist_ok=True)
+            (Path(env["PIP_CACHE_DIR"]) / "numpy.whl").write_bytes(b"wheel")
+
+        monkeypatch.setattr(dep_cache, "create_venv", fake_create_venv)
+        cache = dep_cache.DepCache(project, tmp_path / "drive", tmp_path / "venv", cuda="cu12.2")
+        cache.builds = builds
+        return cache
+
+    def test_key_tracks_python_cuda_and_lockfile(self, cache):
+        """Test that the key changes with the lockfile and names Python and CUDA."""
+        assert cache.key.startswith(f"{dep_cache.python_tag()}-cu12.2-")
+        (cache.project / "requirements.txt").write_text("numpy==2.0.0\n")
+        assert dep_cache.cache_key(cache.lockfile, "cu12.2") != cache.key
+        assert dep_cache.cache_key(cache.lockfile, "cpu").split("-")[1] == "cpu"
+
+    def test_default_cache_dir_is_not_a_workspace(self, tmp_path, monkeypatch):
+        """Test that the Drive cache lives outside claude-workspaces/ and isn't listed."""
+        monkeypatch.delenv("CLAUDE_COLAB_DEP_CACHE", raising=False)
+        drive = tmp_path / "My Drive"
+        monkeypatch.setattr(dep_cache, "DRIVE_ROOTS", (drive,))
+        monkeypatch.setattr(colab_env, "WORKSPACE_ROOTS", (drive / "claude-workspaces",))
+        (drive / "claude-workspaces" / "project").mkdir(parents=True)
+        cache_dir = dep_cache.default_cache_dir()
+        assert cache_dir == drive / ".claude-colab" / "dep-cache"
+        # A cache left inside the workspace root by an older version is skipped too
+        (drive / "claude-workspaces" / ".dep-cache").mkdir()
+        assert colab_env.find_workspaces() == [drive / "claude-workspaces" / "project"]
+
+    def test_build_then_restore(self, cache):
+        """Test that a build snapshots the venv and wheels and a restore brings them back."""
+        snapshot = dep_cache.build(cache)
+        assert snapshot == cache.snapshot_path()
+        assert cache.wheels_archive.exists()
+        assert cache.installed_key() == cache.key
+        assert not cache.lock_path.exists()
+
+        dep_cache.shutil.rmtree(cache.venv)
+        dep_cache.restore_snapshot(cache)
+        assert (cache.venv / "bin" / "python").exists()
+        assert cache.installed_key() == cache.key
+        assert len(cache.builds) == 1
+
+    def test_miss_rebuilds_in_background(self, cache, monkeypatch, capsys):
+        """Test that restore starts a detached build when no snapshot matches."""
+        started = []
+        monkeypatch.setattr(
+            dep_cache, "start_background_build", lambda cache, argv: started.append(argv) or 42
+        )
+        monkeypatch.setattr(dep_cache, "cuda_version", lambda: "cu12.2")
+        args = ["--project", str(cache.project), "--cache-dir", str(cache.cache_dir)]
+        args += ["--venv", str(cache.venv)]
+        assert dep_cache.main(["restore", *args, "--background"]) == 0
+        assert "rebuilding in background" in capsys.readouterr().out
+        assert started and started[0][:2] == ["--project", str(cache.project)]
+
+        # The bare slash command passes only --project: status
+        assert dep_cache.main([*args, "--json"]) == 0
+        assert json.loads(capsys.readouterr().out)["key"] == cache.key
+
+    def test_prune_keeps_newest(self, cache):
+        """Test that only the newest snapshots are kept."""
+        for generation in range(3):
+            (cache.project / "requirements.txt").write_text(f"numpy==1.{generation}\n")
+            cache.lockfile = dep_cache.find_lockfile(cache.project)
+            cache.key = dep_cache.cache_key(cache.lockfile, "cu12.2")
+            dep_cache.build(cache, keep=2)
+        snapshots = list(cache.snapshot_dir.glob("venv-*.tar.*"))
+        assert len(snapshots) == 2
+        assert len(list(cache.snapshot_dir.glob("venv-*.json"))) == 2
+
+
+class TestWorkspaceIndex:
+    """Test the persistent workspace file index."""
+
+    @pytest.fixture
+    def workspace(self, tmp_path):
+        """A small workspace with an excluded .git directory."""
+        root = tmp_path / "ws"
+        (root / "src").mkdir(parents=True)
+        (root / ".git").mkdir()
+        (root / "src" / "train.py").write_text("print('train')\n")
+        (root / "notes.md").write_text("# notes\n")
+        (root / "data.bin").write_bytes(b"x" * 5000)
+        (root / ".git" / "HEAD").write_text("ref\n")
+        return root
+
+    def test_reconcile_and_round_trip(self, workspace):
+        """Test indexing, persistence and incremental reconcile."""
+        index = workspace_index.FileIndex(workspace, hashed=True)
+        assert index.reconcile() == {"added": 3, "changed": 0, "removed": 0}
+        index.save()
+
+        loaded = workspace_index.FileIndex.load(workspace)
+        assert sorted(loaded.files) == ["data.bin", "notes.md", "src/train.py"]
+        assert loaded.hashed and loaded.files["notes.md"][2] == workspace_index.file_hash(
+            workspace / "notes.md"
+        )
+
+        (workspace / "notes.md").write_text("# changed notes\n")
+        (workspace / "data.bin").unlink()
+        (workspace / "src" / "eval.py").write_text("")
+        assert loaded.reconcile() == {"added": 1, "changed": 1, "removed": 1}
+        loaded.save()
+        assert "file-index" not in " ".join(workspace_index.FileIndex.load(workspace).files)
+
+    def test_queries(self, workspace):
+        """Test changed-since, glob and largest queries."""
+        index = workspace_index.FileIndex(workspace)
+        index.reconcile()
+        assert [e["path"] for e in index.match("*.py")] == ["src/train.py"]
+        assert [e["path"] for e in index.match("src/*")] == ["src/train.py"]
+        assert index.largest(1)[0]["path"] == "data.bin"
+        old = time.time() - 3600
+        os.utime(workspace / "notes.md", (old, old))
+        index.reconcile()
+        recent = index.changed_since(time.time() - 60)
+        assert "notes.md" not in [e["path"] for e in recent]
+        assert index.summary()["files"] == 3
+
+    def test_remove_tree(self, workspace):
+        """Test dropping a subtree without touching siblings that share its prefix."""
+        for rel in ["src/sub/a.py", "src-old/b.py", "src.md", "src-x"]:
+            (workspace / rel).parent.mkdir(parents=True, exist_ok=True)
+            (workspace / rel).write_text("")
+        index = workspace_index.FileIndex(workspace)
+        index.reconcile()
+        index.remove_tree("src")
+        assert sorted(index.files) == ["data.bin", "notes.md", "src-old/b.py", "src-x", "src.md"]
+        index.remove_tree("src-x")
+        index.refresh("src/train.py")
+        index.refresh("src/sub")
+        assert sorted(index.files) == [
+            "data.bin",
+            "notes.md",
+            "src-old/b.py",
+            "src.md",
+            "src/sub/a.py",
+            "src/train.py",
+        ]
+        (workspace / "src" / "sub" / "a.py").unlink()
+        assert index.reconcile("src") == {"added": 0, "changed": 0, "removed": 1}
+        assert index._paths == sorted(index.files)
+
+    def test_parse_when(self):
+        """Test ages, timestamps and ISO dates."""
+        assert workspace_index.parse_when("2h", now=10000) == 10000 - 7200
+        assert workspace_index.parse_when("1700000000") == 1700000000
+        assert workspace_index.parse_when("2024-01-02T03:04:05") > 0
+        with pytest.raises(ValueError):
+            workspace_index.parse_when("yesterday")
+
+    def test_watch_follows_changes(self, workspace, tmp_path, monkeypatch):
+        """Test that inotify events update and persist the index."""
+        monkeypatch.setattr(workspace_index, "FLUSH_DELAY", 0.2)
+        monkeypatch.setattr(colab_env, "STATE_DIR", tmp_path / "state")
+
+        def edit():
+            time.sleep(0.5)
+            (workspace / "src" / "new.py").write_text("x = 1\n")
+            (workspace / "runs" / "a").mkdir(parents=True)
+            (workspace / "runs" / "a" / "log.txt").write_text("log\n")
+            (workspace / "notes.md").unlink()
+            (workspace / ".git" / "index").write_text("ignored\n")
+
+        editor = threading.Thread(target=edit)
+        handler = signal.getsignal(signal.SIGTERM)
+        editor.start()
+        try:
+            workspace_index.watch(workspace, stop_after=1.5)
+        finally:
+            signal.signal(signal.SIGTERM, handler)
+            editor.join()
+        files = workspace_index.FileIndex.load(workspace).files
+        assert sorted(files) == ["data.bin", "runs/a/log.txt", "src/new.py", "src/train.py"]
+
+
+class TestWorkspaceImport:
+    """Test archive import into a local workspace."""
+
+    FILES = {
+        "src/train.py": b"print('train')\n",
+        "README.md": b"# demo\n",
+        "data/big.bin": b"x" * 4096,
+    }
+
+    def _zip(self, path):
+        import zipfile
+
+        with zipfile.ZipFile(path, "w", zipfile.ZIP_DEFLATED) as zf:
+            for name, data in self.FILES.items():
+                zf.writestr(f"demo-main/{name}", data)
+            zf.writestr("demo-main/../escape.txt", b"no")
+        return path
+
+    def _tar(self, path):
+        import io
+        import tarfile
+
+        with tarfile.open(path, "w:gz") as tf:
+            for name, data in self.FILES.items():
+                info = tarfile.TarInfo(f"demo-main/{name}")
+                info.size, info.mode = len(data), 0o755 if name.endswith(".py") else 0o644
+                tf.addfile(info, io.BytesIO(data))
+        return path
+
+    @pytest.mark.parametrize("kind", ["zip", "tar"])
+    def test_import_defers_large_files(self, tmp_path, kind):
+        """Test extraction, wrapper stripping, deferral and project registration."""
+        archive = tmp_path / ("demo-main.zip" if kind == "zip" else "demo-main.tar.gz")
+        (self._zip if kind == "zip" else self._tar)(archive)
+        root = tmp_path / "workspaces"
+
+        result = workspace_import.import_archive(
+            archive, dest_root=root, jobs=4, max_file_size=1024
+        )
+        dest = root / "demo-main"
+        assert result["workspace"] == str(dest)
+        assert (dest / "src" / "train.py").read_bytes() == self.FILES["src/train.py"]
+        assert not (dest / "data" / "big.bin").exists()
+        assert not (root / "escape.txt").exists()
+        assert [m["path"] for m in result["deferred"]] == ["data/big.bin"]
+        if kind == "tar":
+            assert os.access(dest / "src" / "train.py", os.X_OK)
+
+        environment = colab_env.read_json(dest / "ENVIRONMENT.json")
+        assert environment["project_name"] == "demo-main"
+        assert environment["imported_from"] == str(archive)
+        assert "src/train.py" in workspace_index.FileIndex.load(dest).files
+
+        assert workspace_import.extract_deferred(dest, jobs=2) == 1
+        assert (dest / "data" / "big.bin").read_bytes() == self.FILES["data/big.bin"]
+        assert not (dest / workspace_import.DEFERRED_NAME).exists()
+        assert "data/big.bin" in workspace_index.FileIndex.load(dest).files
+
+    def test_tar_hard_links(self, tmp_path, capsys):
+        """Test that hard links are recreated, and ones to deferred files are reported."""
+        import io
+        import tarfile
+
+        archive = self._tar(tmp_path / "demo-main.tar.gz")
+        with tarfile.open(archive, "r:gz") as tf:
+            members = [(info, tf.extractfile(info).read()) for info in tf.getmembers()]
+        with tarfile.open(archive, "w:gz") as tf:
+            for info, data in members:
+                tf.addfile(info, io.BytesIO(data))
+            for name, linkname in [
+                ("demo-main/src/train_copy.py", "demo-main/src/train.py"),
+                ("demo-main/big_copy.bin", "demo-main/data/big.bin"),
+                ("demo-main/escape.py", "../outside.py"),
+            ]:
+                info = tarfile.TarInfo(name)
+                info.type, info.linkname = tarfile.LNKTYPE, linkname
+                tf.addfile(info)
+        root = tmp_path / "workspaces"
+
+        args = ["import", str(archive), "--dest-root", str(root), "--max-file-size", "1K"]
+        assert workspace_import.main(args) == 0
+        dest = root / "demo-main"
+        copy = dest / "src" / "train_copy.py"
+        assert copy.read_bytes() == self.FILES["src/train.py"]
+        assert os.path.samefile(copy, dest / "src" / "train.py")
+        assert not (dest / "big_copy.bin").exists() and not (dest / "escape.py").exists()
+        out = capsys.readouterr().out
+        assert "Skipped 1 hard link(s)" in out and "Skipped 1 member(s) with unsafe" in out
+
+    def test_existing_workspace_needs_force(self, tmp_path, capsys):
+        """Test that a non-empty destination is not overwritten without --force."""
+        archive = self._zip(tmp_path / "demo-main.zip")
+        root = tmp_path / "workspaces"
+        (root / "demo-main").mkdir(parents=True)
+        (root / "demo-main" / "keep.txt").write_text("")
+
+        args = ["import", str(archive), "--dest-root", str(root)]
+        assert workspace_import.main(args) == 1
+        assert "--force" in capsys.readouterr().err
+        assert (
+            workspace_import.main([*args, "--force", "--large", "skip", "--max-file-size", "1K"])
+            == 0
+        )
+        assert not (root / "demo-main" / "keep.txt").exists()
+        assert not (root / "demo-main" / workspace_import.DEFERRED_NAME).exists()
+
+    @pytest.mark.parametrize("prefix", ["../", "/abs/"])
+    def test_unsafe_wrapper_stays_in_dest_root(self, tmp_path, prefix):
+        """Test that "../" or absolute members never name a workspace outside the root."""
+        import zipfile
+
+        root = tmp_path / "parent" / "workspaces"
+        (tmp_path / "parent" / "keep.txt").parent.mkdir()
+        (tmp_path / "parent" / "keep.txt").write_text("")
+        archive = tmp_path / "evil.zip"
+        with zipfile.ZipFile(archive, "w") as zf:
+            zf.writestr(f"{prefix}a/x.txt", b"no")
+            zf.writestr(f"{prefix}b/y.txt", b"no")
+        result = workspace_import.import_archive(archive, dest_root=root, force=True)
+        assert result["workspace"] == str(root / "evil")
+        assert len(result["skipped_unsafe"]) == 2
+        assert (tmp_path / "parent" / "keep.txt").exists()
+
+    @pytest.mark.parametrize("name", ["..", ".", "a/b", "a\\b", ""])
+    def test_bad_name_rejected(self, tmp_path, name, capsys):
+        """Test that --name must be a single directory name."""
+        archive = self._zip(tmp_path / "demo-main.zip")
+        root = tmp_path / "workspaces"
+        args = ["import", str(archive), "--dest-root", str(root), "--name", name, "--force"]
+        assert workspace_import.main(args) == 1
+        assert "Error:" in capsys.readouterr().err
+        assert not root.exists() and archive.exists()
+
+    def test_helpers(self):
+        """Test size parsing, archive stems and wrapper detection."""
+        assert colab_env.parse_size("1.5G") == int(1.5 * 2**30)
+        assert colab_env.parse_size("200MB") == 200 * 2**20
+        assert colab_env.parse_size("512") == 512
+        assert colab_env.parse_size("1500", "M") == colab_env.parse_size("1500M")
+        with pytest.raises(ValueError):
+            colab_env.parse_size("lots")
+        assert workspace_import.archive_stem(Path("repo-main.tar.gz")) == "repo-main"
+        assert workspace_import.archive_stem(Path("data.tgz")) == "data"
+        assert workspace_import.common_root(["a/x", "a/y/z"]) == "a"
+        assert workspace_import.common_root(["a/x", "b"]) is None
+        assert workspace_import.common_root(["only.txt"]) is None
+        assert workspace_import.safe_member_path("/etc/passwd", 0) is None
+        assert str(workspace_import.safe_member_path("w/a/b", 1)) == "a/b"
+
+
+class TestPathGuard:
+    """Test protected-path checks for file-writing tools."""
+
+    def test_longest_prefix_wins(self):
+        """Test that narrow rules override broader ones in the trie."""
+        trie = path_guard.compile_rules(
+            [
+                ("/data", "block", "no data"),
+                ("/data/work", "allow", None),
+                ("/data/work/secret", "warn", "careful"),
+            ]
+        )
+        assert path_guard.lookup(trie, "/data/x") == ("block", "no data")
+        assert path_guard.lookup(trie, "/data/work/a/b.py") == ("allow", None)
+        assert path_guard.lookup(trie, "/data/work/secret") == ("warn", "careful")
+        assert path_guard.lookup(trie, "/database") == ("allow", None)
+        assert path_guard.lookup(trie, "/") == ("allow", None)
+
+    def test_default_rules(self, home):
+        """Test Drive, system and settings rules, including through a symlinked ~/.claude."""
+        path_guard._trie = None
+        config = home / "workspace" / ".claude"
+        config.mkdir(parents=True)
+        (home / ".claude").rmdir()
+        (home / ".claude").symlink_to(config)
+        try:
+            assert path_guard.check_path("/etc/hosts")[0] == "block"
+            assert path_guard.check_path("/content/drive/My Drive/notes.txt")[0] == "block"
+            assert path_guard.check_path("/content/drive/My Drive/claude-workspaces/p/a.py")[0] == (
+                "allow"
+            )
+            assert path_guard.check_path("~/.bashrc")[0] == "warn"
+            action, _, resolved = path_guard.check_path(str(config / "settings.json"))
+            assert action == "block" and resolved == str(config / "settings.json")
+            assert path_guard.check_path("settings.json", cwd=str(home / ".claude"))[0] == "block"
+            assert path_guard.check_path("src/app.py", cwd=str(home / "workspace"))[0] == "allow"
+        finally:
+            path_guard._trie = None
+
+    def test_symlink_out_of_workspace_is_blocked(self, tmp_path):
+        """Test that a symlink is resolved before the rules are applied."""
+        (tmp_path / "etc-link").symlink_to("/etc")
+        assert path_guard.check_path(str(tmp_path / "etc-link" / "passwd"))[0] == "block"
+
+    def test_hook_blocks_file_tools(self, home):
+        """Test the hook end to end for Write and NotebookEdit."""
+        for tool, field, path, code in (
+            ("Write", "file_path", "/etc/cron.d/job", 2),
+            ("Edit", "file_path", str(home / "project" / "a.py"), 0),
+            ("NotebookEdit", "notebook_path", "/content/drive/MyDrive/nb.ipynb", 2),
+        ):
+            stdin = json.dumps({"tool_name": tool, "tool_input": {field: path}})
+            result = subprocess.run(
+                [sys.executable, str(SCRIPTS_DIR / "hook.py"), "safety_check"],
+                input=stdin,
+                capture_output=True,
+                text=True,
+                env={**os.environ, "HOME": str(home), "CLAUDE_COLAB_HOOK_LOG": "0"},
+            )
+            assert result.returncode == code, (tool, result.stdout, result.stderr)
+            if code == 2:
+                assert json.loads(result.stdout)["status"] == "blocked"
+
+    def test_lookup_cost_does_not_grow_with_rules(self):
+        """Test that a check stays in microseconds with thousands of rules."""
+        import timeit
+
+        few = path_guard.compile_rules(path_guard.PATH_RULES)
+        many = path_guard.compile_rules(
+            path_guard.PATH_RULES + [(f"/rules/r{i}", "block", "x") for i in range(5000)]
+        )
+        target = "/content/claude-workspaces/project/src/model/train.py"
+        per_call = [
+            min(timeit.repeat(lambda t=t: path_guard.lookup(t, target), number=2000, repeat=3))
+            / 2000
+            for t in (few, many)
+        ]
+        assert per_call[1] < 50e-6
+        assert per_call[1] < per_call[0] * 3 + 5e-6
+
+
+class TestJobQueue:
+    """Test the background job queue."""
+
+    @pytest.fixture
+    def workspace(self, tmp_path, monkeypatch):
+        """An empty workspace with isolated runtime state."""
+        monkeypatch.setattr(colab_env, "STATE_DIR", tmp_path / "state")
+        root = tmp_path / "ws"
+        root.mkdir()
+        return root
+
+    def _drain(self, workspace, children, timeout=10):
+        """Run the scheduler in-process until the queue is idle."""
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            with job_queue.locked_queue(workspace) as queue:
+                if not job_queue.schedule(workspace, queue, children):
+                    return queue
+            time.sleep(0.05)
+        raise AssertionError("queue did not drain")
+
+    def test_exclusive_jobs_run_one_at_a_time(self, workspace):
+        """Test FIFO exclusive scheduling, exit codes and logs."""
+        first = job_queue.submit(workspace, "echo one; sleep 0.3", start=False)
+        job_queue.submit(workspace, "echo two; exit 3", name="two", start=False)
+        children = {}
+        with job_queue.locked_queue(workspace) as queue:
+            job_queue.schedule(workspace, queue, children)
+            assert [j["state"] for j in queue["jobs"]] == ["running", "queued"]
+
+        queue = self._drain(workspace, children)
+        one, two = queue["jobs"]
+        assert (one["state"], one["exit"]) == ("done", 0)
+        assert (two["state"], two["exit"], two["name"]) == ("failed", 3, "two")
+        assert two["started"] >= one["finished"] - 0.01
+        log = (workspace / job_queue.JOBS_DIR / f"{first['id']}.log").read_text()
+        assert log.startswith("=== job 1 attempt 1") and "one" in log
+
+    def test_one_scheduler_per_workspace(self, workspace):
+        """Test that a scheduler started while another runs exits without scheduling."""
+        job_queue.submit(workspace, "true", start=False)
+        pid_file = job_queue._pid_file(workspace)
+        with colab_env.hold_pid_file(pid_file):
+            assert job_queue.run(workspace, poll=0.01) == 0
+            assert job_queue.load_queue(workspace)["jobs"][0]["state"] == "queued"
+        handler = signal.getsignal(signal.SIGTERM)
+        try:
+            assert job_queue.run(workspace, poll=0.05) == 0
+        finally:
+            signal.signal(signal.SIGTERM, handler)
+        assert job_queue.load_queue(workspace)["jobs"][0]["state"] == "done"
+        assert not pid_file.exists()
+
+    def test_gpu_memory_packing(self, monkeypatch):
+        """Test that declared-memory jobs share the GPU and exclusive ones wait."""
+        monkeypatch.setenv("CLAUDE_COLAB_GPU_MEM", "16000")
+        total, free = job_queue.gpu_memory()
+        small, large, exclusive = {"gpu_mem": 6000}, {"gpu_mem": 12000}, {"gpu_mem": None}
+        assert job_queue.can_start(small, [small], total, free)
+        assert not job_queue.can_start(large, [small], total, free)
+        assert not job_queue.can_start(exclusive, [small], total, free)
+        assert not job_queue.can_start(small, [exclusive], total, free)
+        assert job_queue.can_start(exclusive, [], total, free)
+        assert not job_queue.can_start(small, [], total, 4000)
+
+    def test_cancel_resume_and_interrupted(self, workspace):
+        """Test cancelling a running job, resuming it and detecting lost jobs."""
+        job = job_queue.submit(workspace, "sleep 30", start=False)
+        children = {}
+        with job_queue.locked_queue(workspace) as queue:
+            job_queue.schedule(workspace, queue, children)
+        cancelled = job_queue.cancel(workspace, job["id"], grace=0.5)
+        assert cancelled["state"] == "cancelled"
+        with pytest.raises(job_queue.JobError):
+            job_queue.cancel(workspace, job["id"])
+
+        with job_queue.locked_queue(workspace) as queue:
+            queue["jobs"][0]["command"] = "true"
+        with pytest.MonkeyPatch.context() as mp:
+            mp.setattr(job_queue, "ensure_scheduler", lambda workspace: None)
+            resumed = job_queue.resume(workspace, job["id"])
+        assert resumed["state"] == "queued" and "pid" not in resumed
+        queue = self._drain(workspace, {})
+        assert (queue["jobs"][0]["state"], queue["jobs"][0]["attempts"]) == ("done", 2)
+
+        # A running job from an earlier boot is interrupted, not silently lost
+        (workspace / job_queue.JOBS_DIR / f"{job['id']}.exit").unlink()
+        with job_queue.locked_queue(workspace) as queue:
+            queue["jobs"][0].update(state="running", pid=os.getpid(), boot="earlier-boot")
+            job_queue.reconcile(workspace, queue)
+        assert job_queue.load_queue(workspace)["jobs"][0]["state"] == "interrupted"
+
+    def test_cli_submit_list_tail(self, workspace, monkeypatch, capsys):
+        """Test the CLI end to end with the detached scheduler."""
+        args = ["--workspace", str(workspace)]
+        assert job_queue.main([*args, "submit", "--name", "hello", "--", "echo", "hi there"]) == 0
+        deadline = time.monotonic() + 15
+        while job_queue.load_queue(workspace)["jobs"][0]["state"] != "done":
+            assert time.monotonic() < deadline
+            time.sleep(0.1)
+        capsys.readouterr()
+        assert job_queue.main([*args, "list", "--all"]) == 0
+        assert "done" in capsys.readouterr().out
+        monkeypatch.setattr(job_queue, "current_workspace", lambda: workspace)
+        assert job_queue.main([]) == 0
+        assert "done" in capsys.readouterr().out
+        assert job_queue.main([*args, "tail", "1"]) == 0
+        assert "hi there" in capsys.readouterr().out
+        assert job_queue.main([*args, "resume", "1"]) == 1
+
+
+class TestDataCache:
+    """Test the local-disk dataset cache."""
+
+    @pytest.fixture
+    def source(self, tmp_path):
+        """A fake Drive dataset of four 1 KB shards."""
+        root = tmp_path / "drive" / "data"
+        root.mkdir(parents=True)
+        for i in range(4):
+            (root / f"shard-{i}.bin").write_bytes(bytes([i]) * 1024)
+        (root / "README.txt").write_text("about")
+        return root
+
+    def test_get_caches_and_verifies(self, tmp_path, source):
+        """Test miss, hit and re-copy after the source changes."""
+        cache = data_cache.DataCache(tmp_path / "cache", quota="1M")
+        shard = source / "shard-0.bin"
+        local = cache.get(shard)
+        assert local != str(shard) and Path(local).read_bytes() == shard.read_bytes()
+        assert cache.get(shard) == local and cache.status()["files"] == 1
+
+        shard.write_bytes(b"new" * 100)
+        os.utime(shard, (1, 1))
+        assert Path(cache.get(shard)).read_bytes() == b"new" * 100
+        assert cache.used() == 300
+
+    def test_forked_worker_opens_its_own_connection(self, tmp_path, source):
+        """Test that a forked child (a DataLoader worker) doesn't reuse the parent's connection."""
+        cache = data_cache.DataCache(tmp_path / "cache", quota="1M")
+        cache.get(source / "shard-0.bin")
+        parent_db = cache.db
+        pid = os.fork()
+        if pid == 0:
+            try:
+                ok = cache.db is not parent_db and cache.get(source / "shard-1.bin")
+                os._exit(0 if ok and cache.status()["files"] == 2 else 1)
+            except BaseException:
+                os._exit(2)
+        _, status = os.waitpid(pid, 0)
+        assert os.WEXITSTATUS(status) == 0
+        assert cache.db is parent_db and cache.status()["files"] == 2
+
+    def test_lru_eviction_under_quota(self, tmp_path, source):
+        """Test that the least recently used file is evicted to fit the quota."""
+        cache = data_cache.DataCache(tmp_path / "cache", quota=3 * 1024)
+        for i in range(3):
+            cache.get(source / f"shard-{i}.bin")
+            time.sleep(0.01)
+        cache.get(source / "shard-0.bin")  # now most recent
+        time.sleep(0.01)
+        cache.get(source / "shard-3.bin")
+        cached = {row[0] for row in cache.db.execute("SELECT source FROM entries")}
+        assert str(source / "shard-1.bin") not in cached
+        assert str(source / "shard-0.bin") in cached and cache.used() <= cache.quota
+        assert not cache.local_path(source / "shard-1.bin").exists()
+
+        big = tmp_path / "big.bin"
+        big.write_bytes(b"x" * 4096)
+        assert cache.get(big) == str(big)
+
+    def test_prefetch_parallel_within_quota(self, tmp_path, source):
+        """Test parallel directory prefetch, glob filtering and the quota cap."""
+        cache = data_cache.DataCache(tmp_path / "cache", quota=3 * 1024)
+        result = cache.prefetch([source], pattern="shard-*", jobs=4)
+        assert (result["copied"], result["hits"], result["skipped_over_quota"]) == (3, 0, 1)
+        again = cache.prefetch([source], pattern="shard-*", jobs=4)
+        assert (again["copied"], again["hits"]) == (0, 3)
+
+        # A second process sees the same index
+        other = data_cache.DataCache(tmp_path / "cache", quota=3 * 1024)
+        assert other.lookup(source / "shard-0.bin") is not None
+
+    def test_cli(self, tmp_path, source, monkeypatch, capsys):
+        """Test get, status, evict and clear from the command line."""
+        args = ["--cache-dir", str(tmp_path / "cache"), "--quota", "1M"]
+        monkeypatch.setenv("CLAUDE_COLAB_DATA_CACHE", str(tmp_path / "cache"))
+        assert data_cache.main([]) == 0
+        capsys.readouterr()
+        assert data_cache.main([*args, "get", str(source / "README.txt")]) == 0
+        assert capsys.readouterr().out.strip().startswith(str(tmp_path / "cache"))
+        assert data_cache.main([*args, "status", "--json"]) == 0
+        assert json.loads(capsys.readouterr().out)["files"] == 1
+        assert data_cache.main([*args, "evict"]) == 0
+        assert "Evicted 1 file" in capsys.readouterr().out
+        assert data_cache.main([*args, "clear"]) == 0
+        assert data_cache.main([*args, "get", str(tmp_path / "missing")]) == 1
+
+
+# Inputs that drive backtracking regexes superlinear, built to `n` characters
+PATHOLOGICAL_INPUTS = {
+    "dd_repeated": lambda n: "dd " * (n // 3),
+    "rm_flags": lambda n: "rm " + "-r " * (n // 3) + "x",
+    "kill_flags": lambda n: "kill " + "-9 " * (n // 3) + "x",
+    "chmod_flags": lambda n: "chmod " + "-R " * (n // 3) + "x",
+    "whitespace": lambda n: "rm" + " " * n,
+    "fork_prefix": lambda n: ":(){ :|" * (n // 7),
+    "heredoc": lambda n: "cat <<EOF\n" + "rm -rf ./build; dd of=/dev/null\n" * (n // 32) + "EOF",
+}
+
+
+class TestSafetyCheck:
+    """Test the Bash safety check's rules, chunked scanning and CPU budget."""
+
+    @pytest.mark.parametrize(
+        "command,code",
+        [
+            ("rm -rf /", 2),
+            ("rm -rf ~/", 2),
+            ("rm -rf /content/drive/MyDrive", 2),
+            ("echo ok; dd if=/dev/zero of=/dev/sda bs=1M", 2),
+            ("kill -9 1", 2),
+            (":(){ :|:& };:", 2),
+            ("rm -rf /usr/local/lib/foo", 0),
+            ("rm -rf ./build", 0),
+            ("dd if=/dev/zero of=/tmp/x", 0),
+        ],
+    )
+    def test_rules(self, command, code):
+        """Test that the rewritten rules block and allow as before."""
+        assert safety_check.check_command(command)[0] == code
+
+    def test_matches_across_chunks(self, monkeypatch):
+        """Test that chunking neither misses nor invents matches at a boundary."""
+        monkeypatch.setattr(safety_check, "CHUNK_CHARS", 64)
+        monkeypatch.setattr(safety_check, "OVERLAP_CHARS", 32)
+        for offset in range(50, 70):
+            padding = "x" * offset + "; "
+            assert safety_check.check_command(padding + "rm -rf / ")[0] == 2
+            assert safety_check.check_command(padding + "rm -rf /" + "usr" * 20)[0] == 0
+
+    def test_long_match_across_chunks(self):
+        """Test that a match near the longest a pattern allows is found at a boundary."""
+        gap = " " * 250
+        command = "rm" + gap + ("-rf" + gap) * 8 + "/"
+        assert len(command) > 1024
+        for offset in (10, len(command) // 2, len(command) - 10):
+            padding = "x" * (safety_check.CHUNK_CHARS - offset) + "; "
+            assert safety_check.check_command(padding + command)[0] == 2
+        for _, pattern, _ in safety_check.BLOCKED_PATTERNS + safety_check.WARN_PATTERNS:
+            assert safety_check._max_width(pattern) < safety_check.OVERLAP_CHARS
+
+    def test_budget_policy(self, monkeypatch, capsys):
+        """Test fail-closed and fail-open behavior when the CPU budget runs out."""
+        monkeypatch.setattr(safety_check, "CPU_BUDGET_MS", -1)
+        code, message = safety_check.check_command("rm -rf ./build")
+        assert code == 2 and "CLAUDE_COLAB_SAFETY_ON_BUDGET" in message
+        monkeypatch.setattr(safety_check, "ON_BUDGET", "allow")
+        assert safety_check.check_command("rm -rf ./build") == (0, None)
+        assert "not fully checked" in capsys.readouterr().err
+
+    @pytest.mark.parametrize("name", sorted(PATHOLOGICAL_INPUTS))
+    def test_pathological_input_benchmark(self, name):
+        """Benchmark: checks stay linear and far inside the hook timeout."""
+
+        def cpu_seconds(n):
+            command = PATHOLOGICAL_INPUTS[name](n)
+            best = float("inf")
+            for _ in range(3):
+                start = time.process_time()
+                safety_check.check_command(command)
+                best = min(best, time.process_time() - start)
+            return best
+
+        small, large = cpu_seconds(250_000), cpu_seconds(1_000_000)
+        assert large < 0.5, f"{name}: {large:.3f}s for 1 MB"
+        # 4x the input may cost at most ~4x the time (plus noise)
+        assert large < 6 * small + 0.02, f"{name}: {small:.3f}s -> {large:.3f}s"
+
+
+class TestRuntimeProbe:
+    """Test the runtime capability benchmark."""
+
+    def test_probe_within_budget(self, tmp_path):
+        """Test that a probe measures local disk and Drive within its budget."""
+        drive = tmp_path / "drive"
+        drive.mkdir()
+        started = time.monotonic()
+        result = runtime_probe.probe(str(tmp_path), str(drive), budget=0.5)
+        assert time.monotonic() - started < 3
+        measured = result["measured"]
+        assert measured["cpu"]["usable_cores"] >= 1 and measured["cpu"]["sha256_mb_s"] > 0
+        assert measured["local_disk"]["read_mb_s"] > 0 and measured["drive"]["write_mb_s"] > 0
+        assert not list(tmp_path.rglob(runtime_probe.PROBE_FILE))
+        # Only the just-written scratch file to read back: flagged, and staging is advised
+        assert measured["drive"]["read_cached"] and "read_cached" not in measured["local_disk"]
+        assert result["recommended"]["stage_data_locally"]
+        assert "(cached" in runtime_probe.format_result(result)
+
+    def test_drive_read_uses_existing_file(self, tmp_path):
+        """Test that the Drive read is timed on an existing file, not the scratch file."""
+        (tmp_path / "data").mkdir()
+        (tmp_path / "data" / "small.txt").write_text("x")
+        (tmp_path / "data" / "shard.bin").write_bytes(b"x" * runtime_probe.READ_SAMPLE_MIN_BYTES)
+        deadline = time.perf_counter() + 5
+        assert runtime_probe.find_read_sample(str(tmp_path), deadline) == str(
+            tmp_path / "data" / "shard.bin"
+        )
+        drive = runtime_probe.probe_disk(str(tmp_path), 0.2, 4, read_existing=True)
+        assert not drive["read_cached"] and drive["read_mb_s"] > 0
+
+    def test_gpu_setup_counts_against_budget(self, monkeypatch):
+        """Test that a slow torch/CUDA start skips the bandwidth test instead of overrunning."""
+        smi = subprocess.CompletedProcess([], 0, stdout="Tesla T4, 15360, 0\n")
+        monkeypatch.setattr(runtime_probe.shutil, "which", lambda name: "/usr/bin/nvidia-smi")
+        monkeypatch.setattr(runtime_probe.subprocess, "run", lambda *args, **kwargs: smi)
+
+        def slow_cuda_init(device):
+            time.sleep(0.3)
+            return 7, 5
+
+        tensor = type("tensor", (), {})()
+        tensor.copy_ = lambda src: None
+        torch = type("torch", (), {})()
+        torch.uint8 = "uint8"
+        torch.empty = lambda *args, **kwargs: tensor
+        torch.empty_like = lambda src: tensor
+        torch.cuda = type("cuda", (), {})()
+        torch.cuda.is_available = lambda: True
+        torch.cuda.get_device_capability = slow_cuda_init
+        torch.cuda.synchronize = torch.cuda.empty_cache = lambda: None
+        monkeypatch.setitem(sys.modules, "torch", torch)
+
+        started = time.monotonic()
+        result = runtime_probe.probe_gpu(0.2)
+        assert time.monotonic() - started < 0.5
+        assert result == {
+            "name": "Tesla T4",
+            "memory_gb": 15.0,
+            "free_gb": 15.0,
+            "compute_capability": "7.5",
+        }
+
+    def test_recommendations(self):
+        """Test derived settings for a slow-Drive GPU runtime and a tiny CPU runtime."""
+        gpu_runtime = {
+            "cpu": {"usable_cores": 12},
+            "memory": {"available_gb": 80.0},
+            "local_disk": {"read_mb_s": 1500},
+            "drive": {"read_mb_s": 90},
+            "gpu": {"free_gb": 39.0, "compute_capability": "8.0"},
+        }
+        assert runtime_probe.recommend(gpu_runtime) == {
+            "dataloader_num_workers": 8,
+            "pin_memory": True,
+            "stage_data_locally": True,
+            "batch_memory_budget_gb": 32.3,
+            "mixed_precision": "bf16",
+        }
+        small = {
+            "cpu": {"usable_cores": 2},
+            "memory": {"available_gb": 1.2},
+            "local_disk": {"read_mb_s": 500},
+        }
+        assert runtime_probe.recommend(small) == {
+            "dataloader_num_workers": 0,
+            "pin_memory": False,
+            "stage_data_locally": False,
+        }
+
+    def test_update_environment(self, tmp_path, capsys):
+        """Test that --update stores the result under "runtime"."""
+        environment = tmp_path / "ENVIRONMENT.json"
+        environment.write_text(json.dumps({"project_name": "p"}))
+        args = ["--update", str(environment), "--local-dir", str(tmp_path), "--budget", "0.3"]
+        assert runtime_probe.main(args) == 0
+        stored = json.loads(environment.read_text())
+        assert stored["project_name"] == "p" and "recommended" in stored["runtime"]
+        assert "Recommended:" in capsys.readouterr().out
+
+
+def _tool_use(name, **tool_input):
+    block = {"type": "tool_use", "id": "toolu_1", "name": name, "input": tool_input}
+    return json.dumps({"type": "assistant", "message": {"role": "assistant", "content": [block]}})
+
+
+class TestSafetyAudit:
+    """Test the bulk audit of histories and transcripts against the safety rules."""
+
+    @pytest.fixture
+    def history(self, tmp_path):
+        path = tmp_path / "bash_history"
+        lines = []
+        for i in range(300):
+            lines += [f"#{1700000000 + i}", "ls -la", f"python train.py --seed {i}"]
+            if i % 10 == 0:
+                lines.append(f": 1700000000:0;rm -rf / # {i}")
+            if i % 50 == 0:
+                lines.append("pip install torch")
+        path.write_text("\n".join(lines) + "\n")
+        return path
+
+    def test_counts_every_line_once_across_ranges(self, history, monkeypatch):
+        """Test that newline-aligned ranges neither drop nor double-count lines."""
+        expected = safety_audit.audit([str(history)], jobs=1)
+        monkeypatch.setattr(safety_audit, "RANGE_BYTES", 37)
+        split = safety_audit.audit([str(history)], jobs=1)
+        assert expected["commands"] == split["commands"] == 300 * 2 + 30 + 6
+        assert expected["rules"] == split["rules"]
+        (rule,) = split["rules"]
+        assert rule["rule"] == "Refusing to delete root directory /"
+        assert (rule["matches"], rule["distinct"]) == (30, 30)
+        assert rule["examples"] == ["rm -rf / # 0", "rm -rf / # 10", "rm -rf / # 20"]
+
+    def test_transcripts_and_candidate_rules(self, history, tmp_path):
+        """Test transcript parsing, write-path rules and candidate rules side by side."""
+        transcript = tmp_path / "session.jsonl"
+        transcript.write_text(
+            "\n".join(
+                [
+                    json.dumps({"type": "user", "message": {"content": "hi"}}),
+                    _tool_use("Bash", command="dd if=/dev/zero of=/dev/sda bs=1M"),
+                    _tool_use("Bash", command="pip install numpy"),
+                    _tool_use("Write", file_path="/etc/hosts", content="x"),
+                    _tool_use("Read", file_path="/etc/passwd"),
+                ]
+            )
+            + "\n"
+        )
+        rules = tmp_path / "candidates.json"
+        rules.write_text(
+            json.dumps(
+                [
+                    {
+                        "needle": "pip",
+                        "pattern": r"\bpip install\b",
+                        "message": "pip",
+                        "action": "warn",
+                    }
+                ]
+            )
+        )
+        candidates = safety_audit.load_candidates(str(rules))
+        summary = safety_audit.audit([str(history), str(transcript)], candidates, jobs=2)
+
+        assert (summary["commands"], summary["paths"]) == (638, 1)
+        by_rule = {(r["source"], r["rule"]): r for r in summary["rules"]}
+        assert by_rule[("candidate", "pip")]["matches"] == 7
+        assert by_rule[("candidate", "pip")]["distinct"] == 2
+        assert by_rule[("hook", "Refusing to write directly to disk device")]["matches"] == 1
+        assert by_rule[("path", "Refusing to write system configuration in /etc")]["matches"] == 1
+        # Candidate rules are listed first
+        assert summary["rules"][0]["source"] == "candidate"
+
+    def test_cli(self, history, tmp_path, capsys):
+        """Test the `safety_check.py audit` entry point and rule file validation."""
+        result = subprocess.run(
+            [sys.executable, str(SCRIPTS_DIR / "safety_check.py"), "audit", str(history), "--json"],
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+        assert json.loads(result.stdout)["rules"][0]["matches"] == 30
+
+        bad = tmp_path / "bad.json"
+        bad.write_text(json.dumps([{"pattern": "("}]))
+        assert safety_audit.main([str(history), "--rules", str(bad)]) == 1
+        assert "bad candidate rule" in capsys.readouterr().err
+
+
+def _dist_info(site, name, version):
+    info = site / f"{name.replace('-', '_')}-{version}.dist-info"
+    info.mkdir(parents=True)
+    (info / "METADATA").write_text(f"Metadata-Version: 2.1\nName: {name}\nVersion: {version}\n")
+    return info
+
+
+class TestPackageInventory:
+    """Test the cached package inventory and its invalidation."""
+
+    @pytest.fixture
+    def site(self, home, tmp_path, monkeypatch):
+        site = tmp_path / "venv" / "site-packages"
+        _dist_info(site, "torch", "2.3.0")
+        _dist_info(site, "Scikit_Learn", "1.5.0")
+        user_site = tmp_path / "user" / "site-packages"
+        _dist_info(user_site, "torch", "2.4.0")
+        monkeypatch.setattr(sys, "path", [str(user_site), str(site)])
+        return site
+
+    def test_scan_and_lookup(self, site):
+        """Test normalized lookups and that the first distribution on sys.path wins."""
+        inventory = package_inventory.load()
+        assert package_inventory.version("torch", inventory) == "2.4.0"
+        assert package_inventory.version("scikit_learn", inventory) == "1.5.0"
+        assert package_inventory.version("numpy", inventory) is None
+        assert inventory["packages"]["scikit-learn"]["location"] == str(site)
+
+    def test_cache_invalidated_by_site_packages_mtime(self, site, monkeypatch):
+        """Test that cached lookups skip the scan until a package is installed."""
+        package_inventory.load()
+        real_scan = package_inventory.scan
+        scans = []
+
+        def counting_scan():
+            scans.append(1)
+            return real_scan()
+
+        monkeypatch.setattr(package_inventory, "scan", counting_scan)
+        assert package_inventory.version("numpy") is None
+        assert scans == []
+
+        _dist_info(site, "numpy", "2.0.0")
+        assert package_inventory.version("numpy") == "2.0.0"
+        assert scans == [1]
+        package_inventory.load()
+        assert scans == [1]
+
+        # A different interpreter gets its own cache
+        monkeypatch.setattr(sys, "prefix", "/other/venv")
+        package_inventory.load()
+        assert scans == [1, 1]
+
+    def test_cli(self, site, tmp_path, capsys):
+        """Test version lookups and recording the summary in ENVIRONMENT.json."""
+        assert package_inventory.main(["version", "torch", "scikit-learn"]) == 0
+        assert capsys.readouterr().out.split() == ["torch==2.4.0", "scikit-learn==1.5.0"]
+        assert package_inventory.main(["version", "jax"]) == 1
+
+        env_path = tmp_path / "ENVIRONMENT.json"
+        env_path.write_text(json.dumps({"project_name": "demo"}))
+        assert package_inventory.main(["summary", "--update", str(env_path)]) == 0
+        env = json.loads(env_path.read_text())
+        assert env["project_name"] == "demo"
+        assert env["packages"]["count"] == 2
+        assert env["packages"]["key"] == {"torch": "2.4.0", "Scikit_Learn": "1.5.0"}
+
+
+class TestKernelBridge:
+    """Test the persistent kernel bridge."""
+
+    def test_apply_message(self):
+        """Test folding IOPub messages into a result."""
+        result = {"stdout": "", "stderr": "", "result": None, "displays": [], "error": None}
+        messages = [
+            ("status", {"execution_state": "busy"}),
+            ("stream", {"name": "stdout", "text": "hi\n"}),
+            ("display_data", {"data": {"text/plain": "<Figure>", "image/png": "..."}}),
+            ("execute_result", {"data": {"text/plain": "42"}}),
+            ("error", {"ename": "E", "evalue": "v", "traceback": ["\x1b[0;31mE\x1b[0m: v"]}),
+        ]
+        for kind, content in messages:
+            assert not kernel_bridge.apply_message(result, {"msg_type": kind, "content": content})
+        idle = {"msg_type": "status", "content": {"execution_state": "idle"}}
+        assert kernel_bridge.apply_message(result, idle)
+        assert (result["stdout"], result["result"], result["displays"]) == (
+            "hi\n",
+            "42",
+            ["image/png"],
+        )
+        assert result["error"]["traceback"] == "E: v"
+        assert kernel_bridge.format_result(result).splitlines() == [
+            "hi",
+            "[image/png output not shown]",
+            "42",
+            "E: v",
+        ]
+
+    def test_no_arguments_shows_status(self, home, monkeypatch, capsys):
+        """Test that the bare slash command (no arguments) reports status."""
+        monkeypatch.setattr(colab_env, "STATE_DIR", home / "state")
+        assert kernel_bridge.main([]) == 0
+        assert capsys.readouterr().out == "No kernel running\n"
+
+    def test_concurrent_starts_launch_one_kernel(self, home, monkeypatch):
+        """Test that racing start() calls share one kernel."""
+        pytest.importorskip("ipykernel")
+        launcher = pytest.importorskip("jupyter_client.launcher")
+        import jupyter_client
+
+        launched = []
+
+        def launch_kernel(*args, **kwargs):
+            launched.append(args)
+            time.sleep(0.2)
+            # A live pid stands in for the kernel
+            return type("process", (), {"pid": os.getpid()})
+
+        monkeypatch.setattr(colab_env, "STATE_DIR", home / "state")
+        monkeypatch.setattr(jupyter_client, "write_connection_file", lambda *a, **kw: None)
+        monkeypatch.setattr(launcher, "launch_kernel", launch_kernel)
+        pids = []
+        threads = [
+            threading.Thread(target=lambda: pids.append(kernel_bridge.start())) for _ in range(4)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert len(launched) == 1
+        assert pids == [os.getpid()] * 4
+
+    def test_state_persists_until_restart(self, home, capsys):
+        """Test that a real kernel keeps state across calls, interrupts and restarts."""
+        pytest.importorskip("ipykernel")
+        pytest.importorskip("jupyter_client")
+        try:
+            first = kernel_bridge.execute("import os\nx = 21\nprint('ready')")
+            assert first["kernel_started"] and first["stdout"] == "ready\n"
+            second = kernel_bridge.execute("x * 2")
+            assert not second["kernel_started"] and second["result"] == "42"
+
+            slow = kernel_bridge.execute("import time\ntime.sleep(30)", timeout=0.5)
+            assert slow["timed_out"] and slow["error"]["ename"] == "KeyboardInterrupt"
+            assert kernel_bridge.execute("x")["result"] == "21"
+
+            assert kernel_bridge.main(["restart"]) == 0
+            assert kernel_bridge.main(["exec", "x"]) == 1
+            assert "NameError" in capsys.readouterr().out
+        finally:
+            kernel_bridge.stop()
+        assert kernel_bridge.kernel_pid() is None
+
+    def test_dead_kernel_reported_without_waiting(self, home, monkeypatch):
+        """Test that a kernel exiting mid-call returns KernelDied instead of blocking."""
+        pytest.importorskip("ipykernel")
+        pytest.importorskip("jupyter_client")
+        monkeypatch.setattr(colab_env, "STATE_DIR", home / "state")
+        try:
+            kernel_bridge.execute("x = 1")
+            started = time.monotonic()
+            died = kernel_bridge.execute("import os\nos._exit(1)", timeout=60)
+            assert time.monotonic() - started < 10
+            assert died["error"]["ename"] == "KernelDied" and not died.get("timed_out")
+            assert "Kernel died" in kernel_bridge.format_result(died)
+            again = kernel_bridge.execute("1 + 1")
+            assert again["kernel_started"] and again["result"] == "2"
+        finally:
+            kernel_bridge.stop()
+
+
+class TestDataPeek:
+    """Test schema, stats and row estimates from bounded samples."""
+
+    def test_csv_schema_and_exact_rows(self, tmp_path):
+        """Test type inference, stats and sample rows of a small CSV."""
+        path = tmp_path / "small.csv"
+        rows = [
+            f"{i},{i * 0.5},{'yes' if i % 2 else 'no'},2024-01-{i + 1:02d},{'' if i == 3 else 'x'}"
+            for i in range(10)
+        ]
+        path.write_text("id,value,answer,day,maybe\n" + "\n".join(rows) + "\n")
+        result = data_peek.peek(str(path), rows=2)
+        assert (result["format"], result["rows"], result["rows_exact"]) == ("csv", 10, True)
+        columns = result["columns"]
+        assert {name: c["type"] for name, c in columns.items()} == {
+            "id": "int",
+            "value": "float",
+            "answer": "string",
+            "day": "date",
+            "maybe": "string",
+        }
+        assert (columns["id"]["min"], columns["id"]["max"]) == (0, 9)
+        assert columns["answer"]["top"] == ["no", "yes"]
+        assert columns["maybe"]["nulls"] == 0.1
+        assert result["sample"][1] == {
+            "id": "1",
+            "value": "0.5",
+            "answer": "yes",
+            "day": "2024-01-02",
+            "maybe": "x",
+        }
+
+    def test_estimates_rows_from_a_bounded_sample(self, tmp_path):
+        """Test that large files are estimated from probes, not read in full."""
+        path = tmp_path / "big.tsv"
+        with open(path, "w") as f:
+            f.write("id\tname\n")
+            for i in range(50_000):
+                f.write(f"{i}\tname-{i % 97}\n")
+        result = data_peek.peek(str(path), sample_bytes=16 * 1024)
+        assert result["delimiter"] == "\t" and not result["rows_exact"]
+        assert abs(result["rows"] - 50_000) < 2_500
+        assert result["sampled_rows"] < 2_000
+
+    def test_gzipped_jsonl(self, tmp_path):
+        """Test JSON Lines (gzipped) with nested values, nulls and a bad line."""
+        path = tmp_path / "events.jsonl.gz"
+        lines = [
+            json.dumps({"id": i, "tags": ["a"], "score": None if i % 4 else 1.5}) for i in range(8)
+        ]
+        with gzip.open(path, "wt") as f:
+            f.write("\n".join(lines[:4] + ["{broken"] + lines[4:]) + "\n")
+        result = data_peek.peek(str(path), rows=1)
+        assert (result["format"], result["rows"], result["invalid_lines"]) == ("jsonl", 9, 1)
+        assert result["columns"]["tags"]["type"] == "array"
+        assert result["columns"]["score"] == {
+            "type": "float",
+            "nulls": 0.75,
+            "distinct": 1,
+            "min": 1.5,
+            "max": 1.5,
+            "mean": 1.5,
+        }
+        assert result["sample"] == [{"id": 0, "tags": ["a"], "score": 1.5}]
+
+    def test_parquet_footer(self, tmp_path):
+        """Test that row counts, schema and statistics come from the footer alone."""
+        pa = pytest.importorskip("pyarrow")
+        pq = pytest.importorskip("pyarrow.parquet")
+        path = tmp_path / "data.parquet"
+        table = pa.table(
+            {
+                "id": pa.array(range(1000), pa.int64()),
+                "name": pa.array([f"n{i % 7}" if i % 10 else None for i in range(1000)]),
+                "day": pa.array([datetime.date(2024, 1, 1 + i % 28) for i in range(1000)]),
+                "nested": pa.array([{"a": i} for i in range(1000)]),
+            }
+        )
+        pq.write_table(table, path, row_group_size=300, compression="zstd")
+
+        result = data_peek.peek(str(path), rows=0)
+        assert (result["rows"], result["row_groups"]) == (1000, 4)
+        columns = result["columns"]
+        assert list(columns) == ["id", "name", "day", "nested.a"]
+        assert columns["id"] == {**columns["id"], "type": "int64", "min": 0, "max": 999}
+        assert (columns["name"]["type"], columns["name"]["nulls"]) == ("string", 100)
+        assert (columns["name"]["min"], columns["name"]["max"]) == ("n0", "n6")
+        assert (columns["day"]["min"], columns["day"]["max"]) == ("2024-01-01", "2024-01-28")
+        assert columns["id"]["codec"] == "ZSTD"
+        assert "sample" not in result
+
+        assert data_peek.peek(str(path), rows=2)["sample"][1]["id"] == 1
+
+    def test_rejects_non_parquet(self, tmp_path, capsys):
+        """Test the error for a file that only looks like Parquet by name."""
+        path = tmp_path / "fake.parquet"
+        path.write_text("id,name\n1,a\n")
+        assert data_peek.main([str(path)]) == 1
+        assert "PAR1" in capsys.readouterr().err
+
+
+class TestPageWarmup:
+    """Test the page-cache warm-up of package files."""
+
+    @pytest.fixture
+    def packages(self, home, tmp_path, monkeypatch):
+        """Two fake packages on sys.path: heavylib (libraries + modules) and smalllib."""
+        root = tmp_path / "site"
+        heavy = root / "heavylib"
+        (heavy / "lib").mkdir(parents=True)
+        (heavy / "__init__.py").write_text("")
+        (heavy / "lib" / "libcore.so.2").write_bytes(b"\0" * 300_000)
+        (heavy / "lib" / "libsmall.so").write_bytes(b"\0" * 100_000)
+        (heavy / "data.bin").write_bytes(b"\0" * 500_000)
+        (root / "smalllib.py").write_text("x = 1\n")
+        monkeypatch.syspath_prepend(str(root))
+        monkeypatch.setenv("PYTHONPATH", str(root))
+        # Same state dir as the detached warm-up process
+        monkeypatch.setattr(colab_env, "STATE_DIR", home / "state")
+        return root
+
+    def test_reads_libraries_first_within_budget(self, packages, monkeypatch):
+        """Test file selection, ordering and the budget."""
+        files = page_warmup.package_files("heavylib")
+        assert [Path(path).name for path, _ in files] == [
+            "libcore.so.2",
+            "libsmall.so",
+            "__init__.py",
+        ]
+
+        result = page_warmup.warm(["heavylib", "smalllib", "missing"], max_mb=1)
+        assert result["files"] == 4
+        assert result["mb"] == round(400_006 / 2**20, 1)
+        assert result["missing"] == ["missing"]
+
+        # Half of the available memory caps the budget
+        monkeypatch.setattr(page_warmup, "available_mb", lambda: 0)
+        capped = page_warmup.warm(["heavylib"], max_mb=1)
+        assert (capped["budget_mb"], capped["mb"]) == (0, 0)
+
+    def test_config_and_once_per_boot(self, packages, tmp_path):
+        """Test the workspace config and that a finished warm-up isn't repeated this boot."""
+        workspace = tmp_path / "ws"
+        (workspace / ".claude").mkdir(parents=True)
+        (workspace / ".claude" / "warmup.json").write_text(
+            json.dumps({"packages": ["smalllib"], "max_mb": 10})
+        )
+        assert page_warmup.load_config(workspace) == (["smalllib"], 10)
+        assert page_warmup.load_config(None) == (list(page_warmup.DEFAULT_PACKAGES), 4096)
+
+        pid = page_warmup.ensure_started(workspace)
+        assert pid
+        deadline = time.monotonic() + 10
+        while not page_warmup.result_path().exists() and time.monotonic() < deadline:
+            time.sleep(0.05)
+        result = json.loads(page_warmup.result_path().read_text())
+        assert list(result["packages"]) == ["smalllib"] and result["files"] == 1
+        assert page_warmup.ensure_started(workspace) is None
+
+    def test_one_warmup_at_a_time(self, packages, capsys):
+        """Test that a warm-up started while another runs exits without warming."""
+        with colab_env.hold_pid_file(page_warmup.pid_path()):
+            assert page_warmup.run() is None
+            assert page_warmup.main(["run"]) == 0
+        assert capsys.readouterr().out == "Warm-up already running\n"
+        assert not page_warmup.result_path().exists()
+
+
+class TestGitAccel:
+    """Test git acceleration and the local-disk .git mirror."""
+
+    @pytest.fixture
+    def repo(self, tmp_path, monkeypatch):
+        """A Drive-like workspace with one committed repository."""
+        if not shutil.which("git"):
+            pytest.skip("git not installed")
+        monkeypatch.setenv("CLAUDE_COLAB_LOCAL_GIT_ROOT", str(tmp_path / "local"))
+        for name, value in (("NAME", "Test"), ("EMAIL", "test@example.com")):
+            monkeypatch.setenv(f"GIT_AUTHOR_{name}", value)
+            monkeypatch.setenv(f"GIT_COMMITTER_{name}", value)
+        repo = tmp_path / "drive" / "ws" / "project"
+        repo.mkdir(parents=True)
+        subprocess.run(["git", "init", "-q", str(repo)], check=True)
+        (repo / "train.py").write_text("print('hi')\n")
+        git_accel.git(repo, "add", ".")
+        git_accel.git(repo, "commit", "-qm", "init")
+        return repo
+
+    def test_setup_enables_speedups(self, repo, tmp_path):
+        """Test the settings, commit-graph, timing and repository discovery."""
+        report = git_accel.setup(repo, test_cache=False)
+        assert set(report["before"]) == {"first_s", "best_s"} and report["speedup"] > 0
+        steps = {step["step"]: step["status"] for step in report["steps"]}
+        assert steps["untracked cache"] == "on"
+        assert steps["commit-graph"] == "on"
+        assert steps["fsmonitor"] in ("on", "unsupported")
+
+        config = git_accel.status(repo)["config"]
+        assert config["core.untrackedCache"] == "true"
+        assert config["core.splitIndex"] == "true" and config["index.version"] == "4"
+        assert (repo / ".git" / "objects" / "info" / "commit-graph").exists()
+        assert git_accel.git(repo, "status", "--porcelain").stdout == ""
+        assert git_accel.find_repos(tmp_path / "drive") == [repo]
+
+    def test_local_git_sync_restore_and_off(self, repo, tmp_path):
+        """Test that commits made on local disk survive sync, a lost runtime and `off`."""
+        local = git_accel.local_git_on(repo)
+        assert (repo / ".git").read_text() == f"gitdir: {local}\n"
+        assert (repo / git_accel.DRIVE_GIT / "HEAD").exists()
+        assert git_accel.git(repo, "status", "--porcelain").stdout == ""
+
+        (repo / "eval.py").write_text("print('eval')\n")
+        git_accel.git(repo, "add", ".")
+        git_accel.git(repo, "commit", "-qm", "second")
+        copied, _ = git_accel.sync(repo)
+        assert copied
+        # Refs keep their size when updated; a repeat sync copies nothing
+        assert git_accel.sync(repo) == (0, 0)
+
+        # Runtime restart: the local copy is gone until restored
+        shutil.rmtree(local)
+        assert git_accel.needs_restore(repo)
+        git_accel.restore(repo)
+        assert not git_accel.needs_restore(repo)
+        log = git_accel.git(repo, "log", "--format=%s").stdout.split()
+        assert log == ["second", "init"]
+
+        git_accel.local_git_off(repo)
+        assert (repo / ".git").is_dir() and not (repo / git_accel.DRIVE_GIT).exists()
+        assert not local.exists()
+        assert git_accel.git(repo, "log", "--format=%s").stdout.split() == log
+
+    def test_sync_skips_worktrees_and_continues_after_errors(self, repo, monkeypatch, capsys):
+        """Test that a worktree's .git file isn't mistaken for a local .git."""
+        workspace = repo.parent
+        monkeypatch.setattr(git_accel, "current_workspace", lambda: workspace)
+        # Sorts before the local-git repo
+        git_accel.git(repo, "worktree", "add", "-q", str(workspace / "a-worktree"))
+        git_accel.local_git_on(repo)
+        (repo / "eval.py").write_text("print('eval')\n")
+        git_accel.git(repo, "add", ".")
+        git_accel.git(repo, "commit", "-qm", "second")
+
+        assert git_accel.find_repos(workspace) == [workspace / "a-worktree", repo]
+        assert git_accel.main(["sync"]) == 0
+        assert capsys.readouterr().out.count("synced .git to Drive") == 1
+        drive_log = git_accel.git(repo, "--git-dir", str(repo / git_accel.DRIVE_GIT), "log")
+        assert "second" in drive_log.stdout
+        assert git_accel.status(workspace / "a-worktree")["local_git"] is None
+        assert git_accel.main([]) == 0
+        assert "a-worktree" in capsys.readouterr().out
+
+        # Explicit repos: the worktree fails, the local-git repo still syncs
+        assert git_accel.main(["sync", str(workspace / "a-worktree"), str(repo)]) == 1
+        captured = capsys.readouterr()
+        assert "a-worktree: " in captured.err and "synced .git to Drive" in captured.out
+        assert git_accel.main(["local-git", "off", str(workspace / "a-worktree")]) == 1
+        assert (workspace / "a-worktree" / ".git").is_file()
+
+    def test_cli(self, repo, capsys):
+        """Test the CLI reports and errors."""
+        assert git_accel.main(["sync", str(repo)]) == 1
+        assert "does not keep .git on local disk" in capsys.readouterr().err
+        assert git_accel.main(["setup", str(repo), "--skip-cache-test", "--json"]) == 0
+        assert json.loads(capsys.readouterr().out)["repo"] == str(repo)
+        assert git_accel.main(["local-git", "on", str(repo)]) == 0
+        assert git_accel.main(["local-git", "on", str(repo)]) == 1
+        assert "already local" in capsys.readouterr().err
+
+
+class TestNotebookCache:
+    """Test the cell-result cache and dependency-aware notebook runner."""
+
+    @pytest.fixture
+    def cached_notebook(self, tmp_path, monkeypatch):
+        """A notebook with a slow load cell, a mutation, a helper and an unpicklable value."""
+        monkeypatch.setenv("CLAUDE_COLAB_CELL_CACHE", str(tmp_path / "cache"))
+        (tmp_path / "data.csv").write_text("a,b\n1,2\n")
+        path = tmp_path / "cached.ipynb"
+        cells = [
+            _code_cell("imports", ["import time"], []),
+            _code_cell(
+                "load",
+                [
+                    "time.sleep(0.3)\n",
+                    "rows = open('data.csv').read().splitlines()\n",
+                    "print(len(rows))",
+                ],
+                [],
+            ),
+            _code_cell("clean", ["rows.append('3,4')"], []),
+            _code_cell("unrelated", ["other = 42"], []),
+            _code_cell("gen", ["counter = (i for i in range(10))"], []),
+            _code_cell("last", ["print(len(rows), other, next(counter))"], []),
+        ]
+        _write_notebook(path, cells)
+        return path
+
+    def _edit(self, path, cell_id, source):
+        notebook = json.loads(path.read_text())
+        for cell in notebook["cells"]:
+            if cell["metadata"]["id"] == cell_id:
+                cell["source"] = source
+        _write_notebook(path, notebook["cells"])
+
+    def _statuses(self, results):
+        return {entry["id"]: entry["status"] for entry in results}
+
+    def test_dependencies(self):
+        """Test reads, binds, in-place mutation and keys that follow dependencies."""
+        sources = [
+            "import pandas as pd\ndf = pd.DataFrame()",
+            "df['x'] = 1\nmodel.fit(df)",
+            "def f():\n    return scale * 2\nlocal_only = [y for y in range(3)]",
+            "scale = 3",
+            "print(f(), df)",
+        ]
+        keys, deps, _ = notebook_cache.cell_keys(sources, "/tmp")
+        # Method calls on modules don't count as mutation; df and model do
+        assert deps == [[], [0], [], [], [1, 2, 3]]
+
+        edited, _, _ = notebook_cache.cell_keys([*sources[:3], "scale = 4", sources[4]], "/tmp")
+        assert edited[:3] == keys[:3] and edited[3:] != keys[3:]
+        # Unparseable cells depend on everything above
+        _, deps, writes = notebook_cache.cell_keys(["a = 1", "b = (", "print(a)"], "/tmp")
+        assert deps == [[], [0], [1]] and writes[1] is None
+
+    def test_function_mutations_written_at_call_site(self):
+        """Test that a call writes the globals its function mutates."""
+        sources = [
+            "df = {}",
+            "def add(x):\n    df['y'] = x",
+            "def add_twice(x):\n    add(x)\n    add(x)",
+            "add_twice(1)",
+            "print(df)",
+        ]
+        keys, deps, writes = notebook_cache.cell_keys(sources, "/tmp")
+        assert deps[3] == [0, 1, 2] and writes[3] == {"df"}
+        assert "df" not in writes[1] | writes[2] | writes[4]
+        # Changing the call's argument invalidates the cell that reads df
+        edited, _, _ = notebook_cache.cell_keys([*sources[:3], "add_twice(2)", sources[4]], "/tmp")
+        assert edited[4] != keys[4]
+        # Defined and called in one cell
+        _, _, writes = notebook_cache.cell_keys(["df = {}", f"{sources[1]}\nadd(1)"], "/tmp")
+        assert writes[1] == {"add", "df"}
+
+    def test_pack_values_checks_size_before_pickling(self):
+        """Test that a value over the quota is refused by its size, before it is pickled."""
+        big = types.SimpleNamespace(nbytes=2**30)
+        assert notebook_cache.pack_values({"big": big}, {"big"}, quota=2**20) == (
+            None,
+            "values larger than the cache quota",
+        )
+        blob, reason = notebook_cache.pack_values({"big": big}, {"big"})
+        assert blob and reason is None
+
+    def test_function_globals_rebound_later(self, tmp_path, monkeypatch):
+        """Test that a call sees globals its function reads as rebound after the def."""
+        monkeypatch.setenv("CLAUDE_COLAB_CELL_CACHE", str(tmp_path / "cache"))
+        path = tmp_path / "globals.ipynb"
+        cells = [
+            _code_cell("lr0", ["lr = 0.5"], []),
+            _code_cell("train", ["def train():\n", "    return lr * 2"], []),
+            _code_cell("lr", ["lr = 0.1"], []),
+            _code_cell("call", ["print(train())"], []),
+        ]
+        _write_notebook(path, cells)
+        results, _ = notebook_cache.run_notebook(path, timeout=60)
+        assert results[-1]["output"] == "0.2\n"
+
+        self._edit(path, "lr", ["lr = 0.9"])
+        results, _ = notebook_cache.run_notebook(path, timeout=60)
+        assert self._statuses(results)["call"] == "ran"
+        assert results[-1]["output"] == "1.8\n"
+
+    def test_reruns_only_changed_cells(self, cached_notebook):
+        """Test cache hits, output replay, and re-running a cell and its dependents."""
+        results, status = notebook_cache.run_notebook(cached_notebook, timeout=60)
+        assert status == "completed"
+        assert set(self._statuses(results).values()) == {"ran"}
+        assert results[-1]["output"] == "3 42 0\n"
+        assert "generator" in results[-1]["not_cached"]
+
+        results, _ = notebook_cache.run_notebook(cached_notebook, timeout=60)
+        assert set(self._statuses(results).values()) == {"cached"}
+        assert results[1]["output"] == "2\n" and results[1]["saved_s"] >= 0.3
+
+        # Only the edited cell and the unpicklable value it needs run again
+        self._edit(cached_notebook, "last", ["print('edited', len(rows), other, next(counter))"])
+        plan = notebook_cache.make_plan(str(cached_notebook), notebook_cache.CellCache())
+        assert [step["action"] for step in plan] == [
+            "restore", "restore", "restore", "restore", "run", "run",
+        ]  # fmt: skip
+        results, _ = notebook_cache.run_notebook(cached_notebook, timeout=60)
+        assert results[-1]["output"] == "edited 3 42 0\n"
+        assert self._statuses(results)["load"] == "cached"
+
+        # A changed data file invalidates the cell that reads it and its dependents
+        (cached_notebook.parent / "data.csv").write_text("a,b\n1,2\n5,6\n")
+        results, _ = notebook_cache.run_notebook(cached_notebook, timeout=60)
+        statuses = self._statuses(results)
+        assert statuses["load"] == statuses["clean"] == "ran"
+        assert statuses["unrelated"] == "cached"
+        assert results[-1]["output"] == "edited 4 42 0\n"
+
+        results, _ = notebook_cache.run_notebook(cached_notebook, rerun=["unrelated"])
+        assert self._statuses(results)["unrelated"] == "ran"
+        assert self._statuses(results)["load"] == "cached"
+
+    def test_errors_and_eviction(self, cached_notebook, capsys):
+        """Test that failed cells aren't cached and the quota evicts old entries."""
+        self._edit(cached_notebook, "unrelated", ["1 / 0"])
+        results, _ = notebook_cache.run_notebook(cached_notebook, timeout=60)
+        assert results[3]["error"].startswith("ZeroDivisionError")
+        assert self._statuses(results)["gen"] == "skipped"
+        results, _ = notebook_cache.run_notebook(cached_notebook, timeout=60)
+        assert self._statuses(results)["unrelated"] == "ran"
+
+        cache = notebook_cache.CellCache()
+        assert cache.status()["entries"] == 3
+        assert cache.evict(target=0)[0] == 3
+        assert cache.status()["entries"] == 0
+
+        assert notebook_cache.main(["run", str(cached_notebook), "--rerun", "nope"]) == 1
+        assert notebook_cache.main(["plan", str(cached_notebook), "--rerun", "nope"]) == 1
+        assert "no code cell 'nope'" in capsys.readouterr().err